@@ -0,0 +1,11 @@
+#
+# Project:   retdec-python
+# Copyright: (c) 2015 by Petr Zemek <s3rvac@gmail.com> and contributors
+# License:   MIT, see the LICENSE file for more details
+#
+
+"""Benchmarks of the library.
+
+Run them by ``make bench`` or ``python -m benchmarks`` from the root of the
+repository.
+"""
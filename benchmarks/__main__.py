@@ -0,0 +1,13 @@
+#
+# Project:   retdec-python
+# Copyright: (c) 2015 by Petr Zemek <s3rvac@gmail.com> and contributors
+# License:   MIT, see the LICENSE file for more details
+#
+
+"""Runs the benchmarks."""
+
+import sys
+
+from benchmarks.runner import main
+
+sys.exit(main())
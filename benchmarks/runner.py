@@ -0,0 +1,455 @@
+#
+# Project:   retdec-python
+# Copyright: (c) 2015 by Petr Zemek <s3rvac@gmail.com> and contributors
+# License:   MIT, see the LICENSE file for more details
+#
+
+"""Runs the benchmarks and compares their results with a baseline."""
+
+import argparse
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from retdec import __version__
+from retdec.daemon import Daemon
+from retdec.decompiler import Decompiler
+from retdec.testing.server import MockAPIServer
+
+#: Numbers of control-flow graphs in statuses for which polling is measured.
+CFG_COUNTS = (10, 1000, 100000)
+
+#: Outputs whose download is measured.
+DOWNLOADED_OUTPUTS = ('hll', 'dsm', 'archive')
+
+#: Size of downloaded outputs (in bytes).
+OUTPUT_SIZE = 16 * 1024 * 1024
+
+#: Modules whose import time is measured (the package and modules of the
+#: scripts, which are run many times).
+IMPORTED_MODULES = ('retdec', 'retdec.tools.decompiler', 'retdec.tools.fileinfo')
+
+#: Default maximal import time of each of the modules and startup time of
+#: each of the scripts (in milliseconds).
+IMPORT_TIME_BUDGET = 100.0
+
+#: Modules of the scripts whose startup (``python -m MODULE --version``) is
+#: measured end to end.
+STARTED_SCRIPTS = ('retdec.tools.decompiler', 'retdec.tools.fileinfo')
+
+#: Modules that are needed only when a script does actual work, so they must
+#: not be imported when it merely starts.
+DEFERRED_MODULES = (
+    'requests', 'sqlite3', 'retdec.manifest', 'retdec.scheduler',
+    'retdec.storage'
+)
+
+#: Runs the decompiler script and prints its peak memory usage (in KiB) to
+#: the standard error. The usage cannot be obtained by the parent process
+#: because on Linux, a child inherits the peak usage of its parent.
+CLI_WRAPPER = """
+import sys
+from benchmarks.runner import _own_max_rss_kib
+from retdec.tools.decompiler import main
+exit_code = main(sys.argv)
+sys.stderr.write(str(_own_max_rss_kib()))
+sys.exit(exit_code)
+"""
+
+
+class Results:
+    """Results of the benchmarks."""
+
+    def __init__(self):
+        self.results = {}
+
+    def add(self, name, value, unit, higher_is_better):
+        """Adds a result of a benchmark and prints it."""
+        self.results[name] = {
+            'value': value,
+            'unit': unit,
+            'higher_is_better': higher_is_better
+        }
+        print('{:<36} {:>12.2f} {}'.format(name, value, unit))
+        sys.stdout.flush()
+
+    def to_json(self):
+        return {
+            'retdec_version': __version__,
+            'python': '{} {}'.format(
+                platform.python_implementation(),
+                platform.python_version()
+            ),
+            'platform': platform.platform(),
+            'results': self.results
+        }
+
+
+def measure(func, iterations, repeats=3):
+    """Returns the median number of seconds needed to call `func`
+    `iterations` times.
+    """
+    durations = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for _ in range(iterations):
+            func()
+        durations.append(time.perf_counter() - start)
+    return statistics.median(durations)
+
+
+def bench_submissions(results, server, input_file, scale):
+    """Measures the number of started decompilations per second."""
+    decompiler = Decompiler(api_url=server.api_url, api_key='KEY')
+    iterations = max(1, int(200 * scale))
+
+    duration = measure(
+        lambda: decompiler.start_decompilation(input_file=input_file),
+        iterations
+    )
+    results.add('submissions', iterations / duration, 'ops/s', True)
+
+
+def bench_status_polls(results, server, input_file, scale):
+    """Measures the number of processed status checks per second for
+    statuses with various numbers of control-flow graphs.
+    """
+    decompiler = Decompiler(api_url=server.api_url, api_key='KEY')
+    decompilation = decompiler.start_decompilation(
+        input_file=input_file,
+        generate_cfgs=True
+    )
+    for cfg_count in CFG_COUNTS:
+        server.api.cfg_count = cfg_count
+        iterations = max(1, int(200000 * scale / (cfg_count + 1000)))
+
+        # The state is updated directly to bypass the waiting interval
+        # between two status checks.
+        duration = measure(decompilation._update_state, iterations)
+        results.add(
+            'status_polls_{}_cfgs'.format(cfg_count),
+            iterations / duration,
+            'ops/s',
+            True
+        )
+
+
+def bench_downloads(results, server, input_file, scale):
+    """Measures the download speed of outputs."""
+    server.api.output_size = OUTPUT_SIZE
+    decompiler = Decompiler(api_url=server.api_url, api_key='KEY')
+    decompilation = decompiler.start_decompilation(
+        input_file=input_file,
+        generate_archive=True
+    )
+    iterations = max(1, int(10 * scale))
+    mib = OUTPUT_SIZE / 1024 / 1024
+
+    with tempfile.TemporaryDirectory() as output_dir:
+        downloads = {
+            'hll': decompilation.get_hll_code,
+            'dsm': decompilation.get_dsm_code,
+            'archive': lambda: decompilation.save_archive(output_dir),
+        }
+        for output in DOWNLOADED_OUTPUTS:
+            duration = measure(downloads[output], iterations)
+            results.add(
+                'download_{}'.format(output),
+                iterations * mib / duration,
+                'MiB/s',
+                True
+            )
+
+
+def bench_cli(results, server, input_file, scale):
+    """Measures the latency of decompiling a file by the decompiler script
+    (directly and through a daemon) and its peak memory usage.
+    """
+    server.api.output_size = 64 * 1024
+    iterations = max(1, int(10 * scale))
+
+    max_rss_kib = []
+
+    with tempfile.TemporaryDirectory() as output_dir:
+        def run_cli(*extra_args):
+            cli = subprocess.Popen([
+                sys.executable, '-c', CLI_WRAPPER,
+                '--api-url', server.api_url,
+                '--api-key', 'KEY',
+                '--quiet',
+                '--output-dir', output_dir,
+                input_file
+            ] + list(extra_args), stderr=subprocess.PIPE)
+            _, stderr = cli.communicate()
+            if cli.returncode != 0:
+                raise RuntimeError(stderr.decode('utf-8', 'replace'))
+            max_rss_kib.append(int(stderr))
+        duration = measure(run_cli, iterations, repeats=1)
+        results.add('cli_latency', duration / iterations * 1000, 'ms', False)
+        results.add('cli_peak_rss', max(max_rss_kib) / 1024, 'MiB', False)
+
+        socket_path = os.path.join(output_dir, 'retdecd.sock')
+        with Daemon(socket_path, poll_interval=0.05):
+            duration = measure(
+                lambda: run_cli('--daemon-socket', socket_path),
+                iterations,
+                repeats=1
+            )
+        results.add(
+            'cli_latency_daemon',
+            duration / iterations * 1000,
+            'ms',
+            False
+        )
+
+
+def bench_import_time(results, scale):
+    """Measures the time needed to import the package and modules of the
+    scripts.
+    """
+    repeats = max(3, int(10 * scale))
+    for module in IMPORTED_MODULES:
+        durations = [_import_time_ms(module) for _ in range(repeats)]
+        results.add(
+            'import_time_{}'.format(module),
+            statistics.median(durations),
+            'ms',
+            False
+        )
+
+
+def bench_startup_time(results, scale):
+    """Measures the time needed to start the scripts and print their version
+    and counts the deferred modules that are imported by them.
+
+    The time needed to start the interpreter itself (which depends e.g. on
+    the installed packages) is subtracted. The fastest of several runs is
+    used because the startup is short and easily disturbed by other
+    processes.
+    """
+    repeats = max(5, int(20 * scale))
+
+    def startup_time(args):
+        durations = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            subprocess.check_call(
+                [sys.executable] + args, stdout=subprocess.DEVNULL
+            )
+            durations.append(time.perf_counter() - start)
+        return min(durations)
+
+    interpreter_time = startup_time(['-c', 'pass'])
+    for module in STARTED_SCRIPTS:
+        args = ['-m', module, '--version']
+        results.add(
+            'startup_time_{}'.format(module),
+            (startup_time(args) - interpreter_time) * 1000,
+            'ms',
+            False
+        )
+        results.add(
+            'startup_deferred_imports_{}'.format(module),
+            len(_imported_modules(args) & set(DEFERRED_MODULES)),
+            'modules',
+            False
+        )
+
+
+def run_benchmarks(scale):
+    """Runs all the benchmarks and returns their results."""
+    results = Results()
+    with tempfile.TemporaryDirectory() as tmp_dir, MockAPIServer() as server:
+        input_file = os.path.join(tmp_dir, 'prog.exe')
+        with open(input_file, 'wb') as f:
+            f.write(os.urandom(64 * 1024))
+
+        bench_submissions(results, server, input_file, scale)
+        bench_status_polls(results, server, input_file, scale)
+        bench_downloads(results, server, input_file, scale)
+        bench_cli(results, server, input_file, scale)
+    bench_import_time(results, scale)
+    bench_startup_time(results, scale)
+    results.add('peak_rss', _own_max_rss_kib() / 1024, 'MiB', False)
+    return results
+
+
+def compare(results, baseline, max_regression):
+    """Compares the given results with the given baseline.
+
+    :returns: Names of the benchmarks whose results are worse than the
+        baseline by more than `max_regression` (a fraction).
+    """
+    print()
+    print('{:<36} {:>12} {:>12} {:>9}'.format(
+        'Benchmark', 'Baseline', 'Current', 'Change'
+    ))
+    regressions = []
+    for name, result in sorted(results['results'].items()):
+        base = baseline['results'].get(name)
+        if base is None or not base['value']:
+            continue
+        change = (result['value'] - base['value']) / base['value']
+        regressed = -change if result['higher_is_better'] else change
+        mark = ''
+        if regressed > max_regression:
+            regressions.append(name)
+            mark = '  REGRESSION'
+        print('{:<36} {:>12.2f} {:>12.2f} {:>+8.1f}%{}'.format(
+            name, base['value'], result['value'], change * 100, mark
+        ))
+    return regressions
+
+
+def parse_args(argv):
+    """Parses the given list of arguments."""
+    parser = argparse.ArgumentParser(
+        description=(
+            'Measures the throughput of the library against a local stand-in '
+            'for the retdec.com API.'
+        )
+    )
+    parser.add_argument(
+        '-o', '--output',
+        dest='output',
+        metavar='FILE',
+        default=None,
+        help='Save the results into the given JSON file.'
+    )
+    parser.add_argument(
+        '-b', '--baseline',
+        dest='baseline',
+        metavar='FILE',
+        default=None,
+        help='Compare the results with the results in the given JSON file.'
+    )
+    parser.add_argument(
+        '--max-regression',
+        dest='max_regression',
+        metavar='PERCENT',
+        type=float,
+        default=20.0,
+        help='Fail when a result is worse than the baseline by more than '
+             'the given percentage. Default: %(default)s.'
+    )
+    parser.add_argument(
+        '--import-budget',
+        dest='import_budget',
+        metavar='MS',
+        type=float,
+        default=IMPORT_TIME_BUDGET,
+        help='Fail when an import or the startup of a script takes more '
+             'than the given number of milliseconds. Default: %(default)s.'
+    )
+    parser.add_argument(
+        '--quick',
+        dest='quick',
+        action='store_true',
+        help='Run fewer iterations (less precise, but faster).'
+    )
+    return parser.parse_args(argv[1:])
+
+
+def main(argv=None):
+    """Runs the benchmarks.
+
+    :returns: Exit code (``1`` when an import or a startup exceeds the budget,
+        when a script imports a deferred module, or when there is a
+        regression against the baseline, ``0`` otherwise).
+    """
+    args = parse_args(argv if argv is not None else sys.argv)
+    results = run_benchmarks(scale=0.1 if args.quick else 1.0).to_json()
+
+    if args.output is not None:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=4, sort_keys=True)
+            f.write('\n')
+
+    over_budget = [
+        name for name, result in sorted(results['results'].items())
+        if name.startswith(('import_time_', 'startup_time_')) and
+        result['value'] > args.import_budget
+    ]
+    if over_budget:
+        print('\nOver the import budget ({} ms): {}'.format(
+            args.import_budget, ', '.join(over_budget)
+        ))
+        return 1
+
+    eager_imports = [
+        name for name, result in sorted(results['results'].items())
+        if name.startswith('startup_deferred_imports_') and result['value']
+    ]
+    if eager_imports:
+        print('\nDeferred modules imported at startup: {}'.format(
+            ', '.join(eager_imports)
+        ))
+        return 1
+
+    if args.baseline is not None:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.max_regression / 100)
+        if regressions:
+            print('\nRegressions: {}'.format(', '.join(regressions)))
+            return 1
+    return 0
+
+
+def _own_max_rss_kib():
+    """Returns the peak resident set size of the current process (in KiB)."""
+    try:
+        # On Linux, the peak usage of the current program (without the usage
+        # inherited from the parent process) is available in /proc.
+        with open('/proc/self/status', encoding='utf-8') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS reports bytes, other systems kilobytes.
+    return max_rss / 1024 if sys.platform == 'darwin' else max_rss
+
+
+def _imported_modules(args):
+    """Returns a set of names of modules imported when running a new
+    interpreter with the given arguments, as reported by
+    ``python -X importtime``.
+    """
+    process = subprocess.Popen(
+        [sys.executable, '-X', 'importtime'] + args,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE
+    )
+    _, stderr = process.communicate()
+    modules = set()
+    for line in stderr.decode('utf-8', 'replace').splitlines():
+        parts = line.split('|')
+        if len(parts) == 3:
+            modules.add(parts[2].strip())
+    return modules
+
+
+def _import_time_ms(module):
+    """Returns the number of milliseconds needed to import the given module
+    in a new interpreter, as reported by ``python -X importtime``.
+    """
+    process = subprocess.Popen(
+        [sys.executable, '-X', 'importtime', '-c', 'import ' + module],
+        stderr=subprocess.PIPE
+    )
+    _, stderr = process.communicate()
+    # Every line has the form "import time: SELF | CUMULATIVE | MODULE",
+    # where the times are in microseconds.
+    for line in stderr.decode('utf-8', 'replace').splitlines():
+        parts = line.split('|')
+        if len(parts) == 3 and parts[2].strip() == module:
+            return int(parts[1]) / 1000
+    raise RuntimeError('Failed to measure the import time of ' + module)
@@ -9,7 +9,45 @@
 `REST API <https://retdec.com/api/>`_.
 """
 
+import sys
+
 __version__ = '0.6-dev'
 
 #: Default API URL.
 DEFAULT_API_URL = 'https://retdec.com/service/api'
+
+#: Classes that can be imported directly from the package (e.g. ``from retdec
+#: import Decompiler``) and modules in which they are defined. The modules are
+#: imported only when the classes are accessed so that importing the package
+#: (and its submodules, like the tools) stays fast.
+_LAZY_EXPORTS = {
+    'Decompiler': 'retdec.decompiler',
+    'Fileinfo': 'retdec.fileinfo',
+    'RetdecError': 'retdec.exceptions',
+    'Test': 'retdec.test',
+}
+
+
+def __getattr__(name):
+    if name not in _LAZY_EXPORTS:
+        raise AttributeError(
+            "module '{}' has no attribute '{}'".format(__name__, name)
+        )
+
+    import importlib
+
+    value = getattr(importlib.import_module(_LAZY_EXPORTS[name]), name)
+    # Subsequent accesses will not go through this function.
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_EXPORTS))
+
+
+# Python < 3.7 does not call __getattr__() of modules (PEP 562), so export the
+# classes eagerly there.
+if sys.version_info < (3, 7):
+    for _name in _LAZY_EXPORTS:
+        __getattr__(_name)
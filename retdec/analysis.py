@@ -37,6 +37,29 @@ class Analysis(Resource):
         file_path = '/{}/output'.format(self.id)
         return self._get_file_contents(file_path, is_text_file=True)
 
+    def iter_output_lines(self):
+        """Returns an iterator over the lines of the output from the analysis
+        (`str`).
+
+        The output is downloaded and decoded while iterating, so it is never
+        stored in memory as a whole. The lines include their terminating
+        newlines.
+        """
+        return self._iter_file_lines('/{}/output'.format(self.id))
+
+    def write_output(self, file):
+        """Obtains the output from the analysis and writes it into the given
+        file.
+
+        :param file: Binary file-like object into which the output is written
+            (e.g. ``sys.stdout.buffer``).
+
+        Unlike :func:`get_output()`, the output is not stored in memory as a
+        whole.
+        """
+        file_path = '/{}/output'.format(self.id)
+        self._get_file_and_write_it(file_path, file)
+
     def __repr__(self):
         return '<{} id={!r}>'.format(
             __name__ + '.' + self.__class__.__name__,
@@ -0,0 +1,232 @@
+#
+# Project:   retdec-python
+# Copyright: (c) 2015 by Petr Zemek <s3rvac@gmail.com> and contributors
+# License:   MIT, see the LICENSE file for more details
+#
+
+"""Processing of batches of files."""
+
+import hashlib
+import os
+
+from retdec.exceptions import InvalidValueError
+from retdec.exceptions import RetdecError
+from retdec.file import File
+
+
+class Submission:
+    """Result of submitting a single item from a batch.
+
+    :param dict params: Parameters with which the item was submitted.
+    :param retdec.resource.Resource resource: Started resource.
+    :param Exception error: Error that prevented the item from being
+        submitted.
+
+    Exactly one of `resource` and `error` is ``None``.
+    """
+
+    def __init__(self, params, resource=None, error=None):
+        self._params = params
+        self._resource = resource
+        self._error = error
+
+    @property
+    def params(self):
+        """Parameters with which the item was submitted (`dict`)."""
+        return self._params
+
+    @property
+    def resource(self):
+        """Started resource (:class:`~retdec.resource.Resource`).
+
+        It is ``None`` when the submission failed.
+        """
+        return self._resource
+
+    @property
+    def error(self):
+        """Error that prevented the item from being submitted (`Exception`).
+
+        It is ``None`` when the submission succeeded.
+        """
+        return self._error
+
+    def has_succeeded(self):
+        """Has the item been successfully submitted?"""
+        return self._error is None
+
+    def has_failed(self):
+        """Has the submission of the item failed?"""
+        return self._error is not None
+
+    def __repr__(self):
+        return '<{} params={!r} resource={!r} error={!r}>'.format(
+            __name__ + '.' + self.__class__.__name__,
+            self.params,
+            self.resource,
+            self.error
+        )
+
+
+def submit_concurrently(start, batch, max_workers):
+    """Calls `start` for every item in `batch` from a pool of threads.
+
+    :param callable start: Function that submits a single item (it gets the
+        item as its only argument) and returns the started resource.
+    :param iterable batch: Items to be submitted.
+    :param int max_workers: Maximal number of items that are submitted at the
+        same time.
+
+    :returns: Generator of :class:`Submission` instances, yielded in the order
+        in which the submissions complete (not in the order of `batch`).
+
+    :raises InvalidValueError: When `max_workers` is not positive (right
+        away, not when the generator is iterated).
+
+    `batch` is consumed lazily, so at most `max_workers` items are being
+    submitted at any given time. An error raised while submitting an item
+    (e.g. an API, connection, or I/O error, or a malformed response) does not
+    stop the processing of other items; it is reported in the corresponding
+    submission instead. Programming errors (e.g. :class:`TypeError`) are
+    propagated.
+    """
+    if max_workers < 1:
+        raise InvalidValueError('max_workers', max_workers)
+
+    return _submit_concurrently(start, batch, max_workers)
+
+
+def _submit_concurrently(start, batch, max_workers):
+    """Implementation of :func:`submit_concurrently()`."""
+    import concurrent.futures
+
+    batch = iter(batch)
+    with concurrent.futures.ThreadPoolExecutor(max_workers) as executor:
+        pending = {}
+
+        def submit_next_item():
+            for params in batch:
+                pending[executor.submit(start, params)] = params
+                return
+
+        for _ in range(max_workers):
+            submit_next_item()
+
+        while pending:
+            done, _ = concurrent.futures.wait(
+                pending,
+                return_when=concurrent.futures.FIRST_COMPLETED
+            )
+            # Refill the pool before yielding so that the uploads continue
+            # while the caller processes the completed submissions.
+            completed = []
+            for future in done:
+                completed.append((pending.pop(future), future))
+                submit_next_item()
+
+            for params, future in completed:
+                yield _submission_from_future(params, future)
+
+
+def _submission_from_future(params, future):
+    """Creates a submission from the given completed future."""
+    try:
+        return Submission(params, resource=future.result())
+    except _submission_errors() as ex:
+        return Submission(params, error=ex)
+
+
+def _submission_errors():
+    """Returns the exceptions that are reported in submissions rather than
+    propagated.
+    """
+    # The 'requests' module is imported only here (when a submission has
+    # failed, it has already been imported by the connection). Its
+    # exceptions that are not converted into RetdecError include e.g.
+    # TooManyRedirects or ChunkedEncodingError. A malformed response (e.g. an
+    # error without a JSON body) raises ValueError.
+    import requests
+
+    return (
+        RetdecError, OSError, ValueError, requests.exceptions.RequestException
+    )
+
+
+def shard(paths, index, count, by='path', consistent=False):
+    """Returns the paths that belong to the given shard.
+
+    :param iterable paths: Paths to files.
+    :param int index: Index of the shard (from ``0`` to ``count - 1``).
+    :param int count: Number of shards.
+    :param str by: What the assignment is based on: ``'path'`` (the path
+        itself, which is fast) or ``'content'`` (the contents of the file,
+        which does not change when the file is moved or renamed).
+    :param bool consistent: Use consistent (rendezvous) hashing, which
+        reassigns as few files as possible when `count` changes.
+
+    :returns: Generator of paths from `paths` that belong to the shard, in the
+        original order.
+
+    The assignment depends only on the path (or the contents of the file) and
+    `count`, so workers given the same paths and different indexes process
+    disjoint sets of files without any coordination. Without consistent
+    hashing, almost all files are reassigned when `count` changes. When a
+    file cannot be read, it is assigned by its path, so exactly one worker
+    gets it and reports the error.
+    """
+    if count < 1:
+        raise InvalidValueError('count', count)
+    if not 0 <= index < count:
+        raise InvalidValueError('index', index)
+    if by == 'path':
+        get_digest = _path_digest
+    elif by == 'content':
+        get_digest = _content_digest
+    else:
+        raise InvalidValueError('by', by)
+
+    for path in paths:
+        digest = get_digest(path)
+        if consistent:
+            path_shard = _rendezvous_shard(digest, count)
+        else:
+            path_shard = int.from_bytes(digest[:8], 'big') % count
+        if path_shard == index:
+            yield path
+
+
+def _path_digest(path):
+    """Returns a digest of the given path."""
+    # Normalize the path so that e.g. 'dir/file' and 'dir//file' are assigned
+    # to the same shard.
+    path = os.path.normpath(path)
+    return hashlib.sha256(os.fsencode(path)).digest()
+
+
+def _content_digest(path):
+    """Returns a digest of the contents of the given file.
+
+    When the file cannot be read, a digest of its path is returned.
+    """
+    try:
+        # The file is memory-mapped, so its contents are hashed without being
+        # copied.
+        file = File(path, use_mmap=True)
+    except OSError:
+        # The error is reported when the file is processed.
+        return _path_digest(path)
+    try:
+        return bytes.fromhex(file.digest())
+    except OSError:
+        return _path_digest(path)
+    finally:
+        file.close()
+
+
+def _rendezvous_shard(digest, count):
+    """Returns the shard with the highest weight for the given digest."""
+    def weight(shard_index):
+        return hashlib.sha256(
+            digest + shard_index.to_bytes(4, 'big')
+        ).digest()
+    return max(range(count), key=weight)
@@ -6,16 +6,22 @@
 
 """API connection."""
 
-import cgi
-import platform
-
-import requests
+import threading
+import time
+import urllib.parse
 
+from retdec import hooks
 from retdec.exceptions import AuthenticationError
 from retdec.exceptions import ConnectionError
+from retdec.exceptions import RetdecError
 from retdec.exceptions import UnknownAPIError
 from retdec.file import File
 
+# The 'requests', 'cgi', and 'platform' modules are imported only when they are
+# needed, i.e. when the first request is sent. Importing them takes most of the
+# startup time of the tools, which would be wasted when a tool merely prints
+# its usage or version.
+
 
 class APIConnection:
     """Connection to the API.
@@ -30,12 +36,19 @@ class APIConnection:
     * ``AuthenticationError``: When the authentication fails.
     * ``UnknownAPIError``: When there is an API error other than failed
       authentication.
+
+    Requests can be observed by hooks registered via
+    :func:`retdec.hooks.register()`.
     """
 
     def __init__(self, base_url, api_key):
         self._base_url = base_url
         self._api_key = api_key
 
+        # The connection may be shared by several threads (e.g. when starting
+        # decompilations in a batch), so guard the creation of the session.
+        self._session_lock = threading.Lock()
+
     def send_get_request(self, path='', params=None):
         """Sends a GET request to the given path with the given parameters.
 
@@ -77,7 +90,11 @@ class APIConnection:
         from which the connection was initialized.
         """
         response = self._send_request('get', path, params=params, stream=True)
-        return File(response.raw, self._get_file_name(response.headers))
+        return File(
+            response.raw,
+            self._get_file_name(response.headers),
+            size=self._get_file_size(response.headers)
+        )
 
     @property
     def _session(self):
@@ -86,12 +103,17 @@ class APIConnection:
         # way, we can check whether the session already exists and if so, we
         # may directly return it without re-creating it.
         if '_session' not in self.__dict__:
-            self.__dict__['_session'] = self._start_new_session()
+            with self._session_lock:
+                if '_session' not in self.__dict__:
+                    self.__dict__['_session'] = self._start_new_session()
 
         return self.__dict__['_session']
 
     def _start_new_session(self):
         """Starts a new session to be used to send requests and returns it."""
+        import platform
+        import requests
+
         session = requests.Session()
 
         # We have to authenticate ourselves by using the API key, which should
@@ -115,15 +137,101 @@ class APIConnection:
         """
         url = self._base_url + path
 
+        registered_hooks = hooks.registered()
+        if registered_hooks:
+            return self._send_request_with_hooks(
+                registered_hooks, method, path, url, **kwargs
+            )
+
         try:
             response = getattr(self._session, method)(url, **kwargs)
-        except (requests.exceptions.Timeout,
-                requests.exceptions.ConnectionError) as ex:
+        except _connection_errors() as ex:
             raise ConnectionError(str(ex))
 
         self._ensure_request_succeeded(response)
         return response
 
+    def _send_request_with_hooks(self, registered_hooks, method, path, url,
+                                 **kwargs):
+        """Sends a request like :func:`_send_request()` and reports its
+        progress to the given hooks.
+        """
+        request = hooks.RequestInfo(
+            method.upper(),
+            _get_path_template(self._base_url, path),
+            url,
+            _get_resource_id(path),
+            dict(kwargs.get('params') or {})
+        )
+
+        def call_hooks(name, *args):
+            hooks.notify(name, request, *args, hooks=registered_hooks)
+
+        def request_ended():
+            call_hooks('on_request_end', time.monotonic() - start_time)
+
+        def bytes_received(count):
+            request.bytes_received += count
+            call_hooks('on_bytes', 'received', count)
+
+        call_hooks('on_request_start')
+        if request.headers:
+            kwargs['headers'] = dict(kwargs.get('headers') or {})
+            kwargs['headers'].update(request.headers)
+
+        start_time = time.monotonic()
+        try:
+            response = getattr(self._session, method)(url, **kwargs)
+        except _connection_errors() as ex:
+            error = ConnectionError(str(ex))
+            call_hooks('on_error', error)
+            raise error
+        request.latency = time.monotonic() - start_time
+        request.status_code = response.status_code
+        request.retries = self._get_retry_count(response)
+
+        request.bytes_sent = self._get_body_size(response.request)
+        if request.bytes_sent:
+            call_hooks('on_bytes', 'sent', request.bytes_sent)
+        call_hooks('on_response')
+        stream = kwargs.get('stream') and response.ok
+        if stream:
+            # The contents are read later, so count them while they are read.
+            response.raw = hooks.CountingReader(
+                response.raw, bytes_received, request_ended
+            )
+        elif response.content:
+            bytes_received(len(response.content))
+
+        try:
+            self._ensure_request_succeeded(response)
+        except RetdecError as ex:
+            call_hooks('on_error', ex)
+            raise
+        if not stream:
+            request_ended()
+        return response
+
+    def _get_retry_count(self, response):
+        """Returns the number of retries of the request with the given
+        response.
+        """
+        retries = getattr(response.raw, 'retries', None)
+        return len(getattr(retries, 'history', ()))
+
+    def _get_body_size(self, prepared_request):
+        """Returns the size of the body of the given sent request (in
+        bytes).
+        """
+        body = prepared_request.body
+        if isinstance(body, bytes):
+            return len(body)
+        elif isinstance(body, str):
+            return len(body.encode('utf-8'))
+        # The body is either empty or streamed, in which case its size is not
+        # known.
+        return 0
+
     def _ensure_request_succeeded(self, response):
         """Checks if a request with the given response succeeded.
 
@@ -140,9 +248,22 @@ class APIConnection:
         raise UnknownAPIError(
             int(json['code']),
             json['message'],
-            json['description']
+            json['description'],
+            self._get_retry_after(response.headers)
         )
 
+    def _get_retry_after(self, headers):
+        """Returns the number of seconds from the ``Retry-After`` header in
+        the given response headers.
+
+        If the header is missing or it is not a number of seconds (it may also
+        be a date), it returns ``None``.
+        """
+        value = headers.get('Retry-After', '').strip()
+        if not value.isdigit():
+            return None
+        return float(value)
+
     def _get_file_name(self, headers):
         """Returns the name of the file from the given response headers.
 
@@ -154,11 +275,64 @@ class APIConnection:
         #     Content-Disposition: attachment; filename=prog.out.c
         #
         # https://retdec.com/api/docs/essential_information.html#id3
+        import cgi
+
         _, params = cgi.parse_header(headers.get('Content-Disposition', ''))
         return params.get('filename')
 
+    def _get_file_size(self, headers):
+        """Returns the size of the file from the given response headers.
+
+        If the size cannot be determined, it returns ``None``.
+        """
+        # When the response is compressed, Content-Length is the size of the
+        # compressed data, which is not the size of the file.
+        if 'Content-Encoding' in headers:
+            return None
+
+        try:
+            return int(headers['Content-Length'])
+        except (KeyError, ValueError):
+            return None
+
     def __repr__(self):
         return '<{} base_url={!r}>'.format(
             __name__ + '.' + self.__class__.__name__,
             self._base_url
         )
+
+
+def _connection_errors():
+    """Returns the exceptions raised by the ``requests`` module when there is
+    a connection error.
+    """
+    # The exceptions are only needed when an exception has been raised, in
+    # which case 'requests' has already been imported.
+    import requests
+
+    return (requests.exceptions.Timeout, requests.exceptions.ConnectionError)
+
+
+def _get_path_template(base_url, path):
+    """Returns a template of the full path of a request to the given path
+    (relative to `base_url`), in which the variable parts are replaced by
+    placeholders.
+    """
+    # The given path is relative to the base URL and it is either empty
+    # (e.g. starting a decompilation) or starts with the ID of a resource
+    # (e.g. /ID/status). Control-flow graphs are named after functions
+    # (/ID/outputs/cfgs/FUNC).
+    parts = path.split('/')
+    if len(parts) > 1:
+        parts[1] = '{id}'
+    if parts[2:4] == ['outputs', 'cfgs'] and len(parts) > 4:
+        parts[4:] = ['{func}']
+    return urllib.parse.urlparse(base_url).path + '/'.join(parts)
+
+
+def _get_resource_id(path):
+    """Returns the ID of the resource to which a request to the given path
+    belongs (``None`` if the request does not belong to any resource).
+    """
+    parts = path.split('/')
+    return parts[1] if len(parts) > 1 and parts[1] else None
@@ -0,0 +1,853 @@
+#
+# Project:   retdec-python
+# Copyright: (c) 2015 by Petr Zemek <s3rvac@gmail.com> and contributors
+# License:   MIT, see the LICENSE file for more details
+#
+
+"""A local daemon that sends API requests on behalf of other processes.
+
+Every process using the library connects to the API on its own (including
+TLS handshakes) and polls the statuses of its decompilations and analyses on
+its own. A :class:`Daemon` (run by the ``retdecd`` script) keeps the
+connections open between runs of the scripts, polls the statuses of all
+resources in a shared poller, and reuses resources started for identical
+submissions. Processes talk to it over a Unix domain socket through
+:class:`DaemonConnection`, which is used by services that are given the path
+to the socket (see :class:`~retdec.service.Service`).
+"""
+
+import collections
+import contextlib
+import io
+import json
+import os
+import re
+import socket
+import socketserver
+import stat
+import threading
+import time
+
+from retdec import hooks
+from retdec.conn import APIConnection
+from retdec.conn import _get_path_template
+from retdec.conn import _get_resource_id
+from retdec.exceptions import AuthenticationError
+from retdec.exceptions import ConnectionError
+from retdec.exceptions import RetdecError
+from retdec.exceptions import UnknownAPIError
+from retdec.file import File
+
+#: Size of chunks (in bytes) in which files are sent through the socket.
+_CHUNK_SIZE = 256 * 1024
+
+#: Paths of requests for statuses of resources.
+_STATUS_PATH_RE = re.compile(r'^/[^/]+/status$')
+
+
+def default_socket_path():
+    """Returns the path to the socket of the daemon that is used when no path
+    is given.
+
+    It is ``$XDG_RUNTIME_DIR/retdecd.sock`` or, when the variable is not set,
+    ``retdecd-UID.sock`` in the directory for temporary files.
+    """
+    runtime_dir = os.environ.get('XDG_RUNTIME_DIR')
+    if runtime_dir:
+        return os.path.join(runtime_dir, 'retdecd.sock')
+    return os.path.join(
+        os.environ.get('TMPDIR', '/tmp'),
+        'retdecd-{}.sock'.format(os.getuid())
+    )
+
+
+class DaemonConnection:
+    """Connection to the API through a daemon (see :class:`Daemon`).
+
+    :param str socket_path: Path to the socket of the daemon.
+    :param str base_url: Base URL from which all subsequent URLs are
+        constructed.
+    :param str api_key: API key to be used for authentication.
+
+    It has the same interface as :class:`~retdec.conn.APIConnection` and
+    raises the same exceptions. Moreover, it raises
+    :class:`~retdec.exceptions.ConnectionError` when the daemon cannot be
+    reached. Input files given by their paths are read by the daemon, so the
+    daemon has to run on the same host. Sockets to the daemon are shared by
+    all connections in the process.
+
+    Requests are observed by hooks registered in the current process (see
+    :func:`retdec.hooks.register()`) as well as by hooks registered in the
+    daemon. In the current process, the status code of a successful request
+    is always ``200`` because the daemon may answer it without contacting the
+    API, and headers added by hooks are not sent to the API.
+    """
+
+    def __init__(self, socket_path, base_url, api_key):
+        self._pool = _get_channel_pool(socket_path)
+        self._base_url = base_url
+        self._api_key = api_key
+
+    def send_get_request(self, path='', params=None):
+        """Sends a GET request to the given path with the given parameters.
+
+        See :func:`retdec.conn.APIConnection.send_get_request()`.
+        """
+        return self._send_request('get', path, params)['json']
+
+    def send_post_request(self, path='', params=None, files=None):
+        """Sends a POST request to the given path with the given parameters.
+
+        See :func:`retdec.conn.APIConnection.send_post_request()`.
+        """
+        return self._send_request('post', path, params, files)['json']
+
+    def get_file(self, path='', params=None):
+        """GETs a file from the given path with the given parameters.
+
+        See :func:`retdec.conn.APIConnection.get_file()`.
+        """
+        channel, response, callbacks = self._send_request(
+            'get_file', path, params, keep_channel=True
+        )
+        return File(
+            _DaemonFile(channel, self._pool, callbacks),
+            response['name'],
+            size=response['size']
+        )
+
+    def _send_request(self, method, path, params=None, files=None,
+                      keep_channel=False):
+        """Sends a request to the daemon and returns its response.
+
+        When `keep_channel` is ``True``, a triple of the channel to the daemon,
+        the response, and callbacks for :class:`_DaemonFile` (``None`` when no
+        hooks are registered) is returned, and the caller has to return the
+        channel into the pool.
+        """
+        request = {
+            'method': method,
+            'base_url': self._base_url,
+            'api_key': self._api_key,
+            'path': path,
+            'params': params,
+            'files': {},
+        }
+        inline_files = []
+        for name, file in sorted((files or {}).items()):
+            if file.path is not None:
+                # The daemon reads the file by itself.
+                request['files'][name] = {'name': file.name, 'path': file.path}
+            else:
+                request['files'][name] = {'name': file.name}
+                inline_files.append(file)
+
+        registered_hooks = hooks.registered()
+        if registered_hooks:
+            return self._exchange_with_hooks(
+                registered_hooks, request, inline_files, keep_channel
+            )
+        channel, response = self._exchange(request, inline_files)
+        if keep_channel:
+            return channel, response, None
+        self._pool.release(channel)
+        return response
+
+    def _exchange(self, request, inline_files):
+        """Sends the given request to the daemon and returns a pair of the
+        channel and the response.
+        """
+        channel = self._pool.acquire()
+        try:
+            return channel, channel.exchange(request, inline_files)
+        except BaseException:
+            self._pool.release(channel)
+            raise
+
+    def _exchange_with_hooks(self, registered_hooks, request, inline_files,
+                             keep_channel):
+        """Sends the given request like :func:`_send_request()` and reports
+        its progress to the given hooks in the same way as
+        :class:`~retdec.conn.APIConnection`.
+        """
+        path = request['path']
+        info = hooks.RequestInfo(
+            'POST' if request['method'] == 'post' else 'GET',
+            _get_path_template(self._base_url, path),
+            self._base_url + path,
+            _get_resource_id(path),
+            dict(request['params'] or {})
+        )
+
+        def call_hooks(name, *args):
+            hooks.notify(name, info, *args, hooks=registered_hooks)
+
+        def request_ended():
+            call_hooks('on_request_end', time.monotonic() - start_time)
+
+        call_hooks('on_request_start')
+        start_time = time.monotonic()
+        try:
+            channel, response = self._exchange(request, inline_files)
+        except RetdecError as ex:
+            info.latency = time.monotonic() - start_time
+            if isinstance(ex, AuthenticationError):
+                info.status_code = 401
+            elif isinstance(ex, UnknownAPIError):
+                info.status_code = ex.code
+            if info.status_code is not None:
+                call_hooks('on_response')
+            call_hooks('on_error', ex)
+            raise
+        info.latency = time.monotonic() - start_time
+        info.status_code = 200
+        call_hooks('on_response')
+
+        if keep_channel:
+            # The contents are read later, so count them while they are read.
+            def bytes_received(count):
+                info.bytes_received += count
+                call_hooks('on_bytes', 'received', count)
+
+            return channel, response, (bytes_received, request_ended)
+        self._pool.release(channel)
+        request_ended()
+        return response
+
+    def __repr__(self):
+        return '<{} socket_path={!r} base_url={!r}>'.format(
+            __name__ + '.' + self.__class__.__name__,
+            self._pool.socket_path,
+            self._base_url
+        )
+
+
+class Daemon:
+    """A daemon sending API requests on behalf of local processes.
+
+    :param str socket_path: Path to the Unix domain socket on which the
+        daemon listens (default: :func:`default_socket_path()`).
+    :param float poll_interval: Number of seconds between two updates of the
+        statuses of unfinished resources.
+    :param float cache_ttl: Number of seconds for which a resource started for
+        a submission is reused for identical submissions (same files and
+        parameters). Zero disables the reuse.
+
+    The daemon keeps a connection to the API for every endpoint and API key,
+    so consecutive requests reuse open connections. Statuses of resources are
+    updated in the background by a shared poller and requests for them are
+    answered from memory. Only the first status of a resource is obtained
+    from the API when it is requested.
+
+    The socket is accessible only by the user running the daemon because the
+    daemon reads input files for its clients. When used as a context manager,
+    the daemon serves requests in a background thread.
+    """
+
+    def __init__(self, socket_path=None, poll_interval=0.5, cache_ttl=600.0):
+        self._socket_path = socket_path or default_socket_path()
+        self._connections = {}
+        self._connections_lock = threading.Lock()
+        self._poller = _StatusPoller(poll_interval)
+        self._submissions = _SubmissionCache(cache_ttl)
+        self._thread = None
+
+        _remove_stale_socket(self._socket_path)
+        # Create the socket with the right permissions right away so that
+        # other users cannot connect to it in the meantime.
+        old_umask = os.umask(0o177)
+        try:
+            self._server = _DaemonServer(self._socket_path, self)
+        except BaseException:
+            self._poller.stop()
+            raise
+        finally:
+            os.umask(old_umask)
+
+    @property
+    def socket_path(self):
+        """Path to the socket on which the daemon listens."""
+        return self._socket_path
+
+    def serve_forever(self, poll_interval=0.5):
+        """Serves requests until :func:`shutdown()` is called."""
+        self._server.serve_forever(poll_interval)
+
+    def shutdown(self):
+        """Stops :func:`serve_forever()` (from another thread)."""
+        self._server.shutdown()
+
+    def close(self):
+        """Stops the poller, closes the socket, and removes it."""
+        self._server.server_close()
+        self._poller.stop()
+        try:
+            os.remove(self._socket_path)
+        except FileNotFoundError:
+            pass
+
+    def handle(self, request, rfile, wfile):
+        """Handles the given request and writes a response into `wfile`.
+
+        Files sent with the request are read from `rfile`.
+        """
+        files = {}
+        try:
+            files = self._get_files(request['files'], rfile)
+            conn = self._get_connection(request['base_url'], request['api_key'])
+            method = request['method']
+            if method == 'get_file':
+                self._send_file(conn, request, wfile)
+                return
+            elif method == 'get':
+                response = self._get(conn, request['path'], request['params'])
+            elif method == 'post':
+                response = self._post(
+                    conn, request['path'], request['params'], files
+                )
+            else:
+                raise RetdecError('Unknown method: {}'.format(method))
+        except Exception as ex:
+            _write_message(wfile, {'error': _error_to_message(ex)})
+        else:
+            _write_message(wfile, {'json': response})
+        finally:
+            for file in files.values():
+                file.close()
+
+    def _get_files(self, files, rfile):
+        """Returns files sent with a request (the files that are not given by
+        paths are read from `rfile`).
+        """
+        result = {}
+        for name, file in sorted(files.items()):
+            if 'path' in file:
+                result[name] = File(file['path'], file['name'])
+            else:
+                result[name] = File(
+                    io.BytesIO(b''.join(_iter_chunks(rfile))),
+                    file['name']
+                )
+        return result
+
+    def _get_connection(self, base_url, api_key):
+        """Returns a connection to the given endpoint with the given key."""
+        with self._connections_lock:
+            key = (base_url, api_key)
+            if key not in self._connections:
+                self._connections[key] = APIConnection(base_url, api_key)
+            return self._connections[key]
+
+    def _get(self, conn, path, params):
+        if _STATUS_PATH_RE.match(path) and not params:
+            return self._poller.get(conn, path)
+        return conn.send_get_request(path, params=params)
+
+    def _post(self, conn, path, params, files):
+        if path or not files:
+            return conn.send_post_request(path, params=params, files=files)
+
+        # A resource is being started, so reuse an identical one if there
+        # is any (unless it has failed).
+        key = self._submissions.key(conn, params, files)
+        response = self._submissions.get(key)
+        if response is not None and not self._poller.has_failed(
+                conn, '/{}/status'.format(response['id'])):
+            return response
+        response = conn.send_post_request(path, params=params, files=files)
+        self._submissions.put(key, response)
+        return response
+
+    def _send_file(self, conn, request, wfile):
+        """Sends a file downloaded from the API into `wfile`."""
+        file = conn.get_file(request['path'], request['params'])
+        with contextlib.closing(file):
+            _write_message(wfile, {'name': file.name, 'size': file.size})
+            try:
+                _write_chunks(wfile, file)
+            except Exception as ex:
+                # The client already got a successful response, so the error
+                # has to be reported in place of a chunk.
+                wfile.write(b'-1\n')
+                _write_message(wfile, {'error': _error_to_message(ex)})
+
+    def __enter__(self):
+        self._thread = threading.Thread(
+            target=self.serve_forever,
+            # Make shutdown() return quickly.
+            kwargs={'poll_interval': 0.05}
+        )
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.shutdown()
+        self._thread.join()
+        self.close()
+
+    def __repr__(self):
+        return '<{} socket_path={!r}>'.format(
+            __name__ + '.' + self.__class__.__name__,
+            self._socket_path
+        )
+
+
+class _DaemonServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """A server handling connections of clients in separate threads."""
+
+    daemon_threads = True
+
+    def __init__(self, socket_path, daemon):
+        super().__init__(socket_path, _DaemonRequestHandler)
+        self.retdec_daemon = daemon
+
+
+class _DaemonRequestHandler(socketserver.StreamRequestHandler):
+    """Handles requests of a single client (until it disconnects)."""
+
+    # Buffer the responses and flush them after every request.
+    wbufsize = -1
+
+    def handle(self):
+        while True:
+            try:
+                request = _read_message(self.rfile)
+            except (OSError, ValueError):
+                return
+            if request is None:
+                return
+            self.server.retdec_daemon.handle(request, self.rfile, self.wfile)
+            self.wfile.flush()
+
+
+class _StatusPoller:
+    """Updates the statuses of unfinished resources in the background.
+
+    :param float interval: Number of seconds between two updates.
+    """
+
+    #: Number of seconds after which a resource whose status is no longer
+    #: requested is forgotten.
+    IDLE_TIMEOUT = 60.0
+
+    #: Maximal number of statuses that are obtained at the same time.
+    MAX_CONCURRENT_UPDATES = 8
+
+    def __init__(self, interval):
+        self._interval = interval
+        # (connection, path) -> _PolledStatus
+        self._statuses = {}
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def get(self, conn, path):
+        """Returns the status of the resource from the given path.
+
+        The first status of a resource is obtained from the API. Afterwards,
+        the last obtained status is returned. When the last update has
+        failed, its error is raised.
+        """
+        key = (conn, path)
+        with self._lock:
+            polled = self._statuses.get(key)
+            if polled is not None:
+                polled.requested = time.monotonic()
+                if polled.error is not None:
+                    # The next request obtains the status from the API again.
+                    del self._statuses[key]
+                    raise polled.error
+                return polled.status
+
+        status = conn.send_get_request(path)
+        with self._lock:
+            self._statuses[key] = _PolledStatus(status)
+        return status
+
+    def has_failed(self, conn, path):
+        """Is the resource from the given path known to have failed?"""
+        with self._lock:
+            polled = self._statuses.get((conn, path))
+            return polled is not None and bool(polled.status.get('failed'))
+
+    def update(self):
+        """Updates the statuses of all unfinished resources and forgets the
+        resources whose status is no longer requested.
+
+        A finished resource is still updated until all of its requested
+        outputs (e.g. the call graph) have been generated or have failed to
+        be generated.
+        """
+        import concurrent.futures
+
+        now = time.monotonic()
+        with self._lock:
+            for key, polled in list(self._statuses.items()):
+                if now - polled.requested > self.IDLE_TIMEOUT:
+                    del self._statuses[key]
+            unfinished = [
+                (key, polled) for key, polled in self._statuses.items()
+                if not _is_final_status(polled.status)
+            ]
+
+        def update_status(item):
+            (conn, path), polled = item
+            try:
+                status = conn.send_get_request(path)
+            except Exception as ex:
+                polled.error = ex
+            else:
+                polled.status = status
+                polled.error = None
+
+        if not unfinished:
+            return
+        with concurrent.futures.ThreadPoolExecutor(
+                self.MAX_CONCURRENT_UPDATES) as executor:
+            list(executor.map(update_status, unfinished))
+
+    def stop(self):
+        """Stops the updates."""
+        self._stopped.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stopped.wait(self._interval):
+            self.update()
+
+
+def _is_final_status(status):
+    """Can the given status of a resource no longer change?"""
+    if status.get('failed'):
+        return True
+    if not status.get('finished'):
+        return False
+    outputs = [status.get('cg'), status.get('archive')]
+    outputs.extend((status.get('cfgs') or {}).values())
+    return all(
+        output.get('generated') or output.get('failed')
+        for output in outputs if output is not None
+    )
+
+
+class _PolledStatus:
+    """The last known status of a resource."""
+
+    def __init__(self, status):
+        self.status = status
+        self.error = None
+        self.requested = time.monotonic()
+
+
+class _SubmissionCache:
+    """Remembers responses to submissions of resources so that identical
+    submissions reuse already started resources.
+
+    :param float ttl: Number of seconds for which a response is reused.
+    """
+
+    #: Maximal number of remembered responses.
+    MAX_SIZE = 10000
+
+    def __init__(self, ttl):
+        self._ttl = ttl
+        # key -> (response, time when it was added)
+        self._responses = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def key(self, conn, params, files):
+        """Returns a key identifying the given submission (or ``None`` when
+        the cache is disabled).
+        """
+        if self._ttl <= 0:
+            return None
+        return (
+            conn,
+            json.dumps(params, sort_keys=True),
+            tuple(
+                (name, file.name, file.digest())
+                for name, file in sorted(files.items())
+            )
+        )
+
+    def get(self, key):
+        """Returns the response to the submission with the given key (or
+        ``None``).
+        """
+        if key is None:
+            return None
+        with self._lock:
+            item = self._responses.get(key)
+            if item is None:
+                return None
+            response, added = item
+            if time.monotonic() - added > self._ttl:
+                del self._responses[key]
+                return None
+            return response
+
+    def put(self, key, response):
+        """Remembers the response to the submission with the given key."""
+        if key is None:
+            return
+        with self._lock:
+            self._responses.pop(key, None)
+            self._responses[key] = (response, time.monotonic())
+            while len(self._responses) > self.MAX_SIZE:
+                self._responses.popitem(last=False)
+
+
+class _Channel:
+    """A connection to the daemon through its socket."""
+
+    def __init__(self, socket_path):
+        self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            self._socket.connect(socket_path)
+        except OSError as ex:
+            self._socket.close()
+            raise ConnectionError(
+                'Cannot connect to the daemon at {}: {}'.format(
+                    socket_path, ex.strerror or ex
+                )
+            )
+        self._file = self._socket.makefile('rwb')
+        self.broken = False
+
+    def exchange(self, request, inline_files=()):
+        """Sends the given request (followed by the given files) and returns
+        the response.
+        """
+        try:
+            _write_message(self._file, request)
+            for file in inline_files:
+                _write_chunks(self._file, file)
+            self._file.flush()
+            response = _read_message(self._file)
+            if response is None:
+                raise EOFError
+        except BaseException as ex:
+            self.broken = True
+            if isinstance(ex, (OSError, ValueError, EOFError)):
+                raise ConnectionError('Lost connection to the daemon.')
+            raise
+        if 'error' in response:
+            raise _error_from_message(response['error'])
+        return response
+
+    def read_chunk(self):
+        """Reads the next chunk of a file (``b''`` at the end of the file)."""
+        try:
+            return _read_chunk(self._file)
+        except (OSError, ValueError):
+            self.broken = True
+            raise ConnectionError('Lost connection to the daemon.')
+
+    def close(self):
+        self._file.close()
+        self._socket.close()
+
+
+class _ChannelPool:
+    """A pool of idle channels to the daemon."""
+
+    def __init__(self, socket_path):
+        self.socket_path = socket_path
+        self._idle = []
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Returns an idle channel (or a new one when there is none)."""
+        with self._lock:
+            if self._idle:
+                return self._idle.pop()
+        return _Channel(self.socket_path)
+
+    def release(self, channel):
+        """Returns the given channel into the pool (unless it is broken)."""
+        if channel.broken:
+            channel.close()
+            return
+        with self._lock:
+            self._idle.append(channel)
+
+
+#: Channel pools by paths to sockets.
+_channel_pools = {}
+_channel_pools_lock = threading.Lock()
+
+
+def _get_channel_pool(socket_path):
+    """Returns the pool of channels to the daemon at the given path."""
+    with _channel_pools_lock:
+        if socket_path not in _channel_pools:
+            _channel_pools[socket_path] = _ChannelPool(socket_path)
+        return _channel_pools[socket_path]
+
+
+class _DaemonFile(io.RawIOBase):
+    """A file that is being sent by the daemon.
+
+    :param tuple callbacks: Either ``None`` or a pair of a function to be
+        called with the number of bytes after every read and a function to be
+        called when the file is closed (see
+        :class:`~retdec.hooks.CountingReader`).
+    """
+
+    def __init__(self, channel, pool, callbacks=None):
+        self._channel = channel
+        self._pool = pool
+        self._chunk = memoryview(b'')
+        self._eof = False
+        self._on_read, self._on_close = callbacks or (None, None)
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        if not self._chunk and not self._eof:
+            self._chunk = memoryview(self._channel.read_chunk())
+            self._eof = not self._chunk
+        size = min(len(buffer), len(self._chunk))
+        buffer[:size] = self._chunk[:size]
+        self._chunk = self._chunk[size:]
+        if size and self._on_read is not None:
+            self._on_read(size)
+        return size
+
+    def close(self):
+        if not self.closed:
+            # A channel with unread chunks cannot be reused.
+            if not self._eof:
+                self._channel.broken = True
+            self._pool.release(self._channel)
+            if self._on_close is not None:
+                self._on_close()
+        super().close()
+
+
+def _remove_stale_socket(socket_path):
+    """Removes a socket left by a daemon that is no longer running.
+
+    :raises RetdecError: When a daemon is listening on the socket or when the
+        path exists and it is not a socket.
+    """
+    try:
+        mode = os.lstat(socket_path).st_mode
+    except FileNotFoundError:
+        return
+    if not stat.S_ISSOCK(mode):
+        raise RetdecError('Not a socket: {}'.format(socket_path))
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(socket_path)
+    except OSError:
+        os.remove(socket_path)
+    else:
+        raise RetdecError(
+            'A daemon is already listening on {}.'.format(socket_path)
+        )
+    finally:
+        sock.close()
+
+
+def _write_message(file, message):
+    """Writes the given message (a JSON object) into the given file."""
+    file.write(json.dumps(message).encode('utf-8') + b'\n')
+
+
+def _read_message(file):
+    """Reads a message from the given file (``None`` at the end of the
+    file).
+    """
+    line = file.readline()
+    if not line:
+        return None
+    return json.loads(line.decode('utf-8'))
+
+
+def _write_chunks(file, src):
+    """Writes the contents of `src` into `file` in chunks.
+
+    Every chunk is preceded by a line with its size. An empty chunk marks the
+    end of the contents.
+    """
+    while True:
+        chunk = src.read(_CHUNK_SIZE)
+        file.write('{}\n'.format(len(chunk)).encode('ascii'))
+        if not chunk:
+            return
+        file.write(chunk)
+
+
+def _read_chunk(file):
+    """Reads a chunk written by :func:`_write_chunks()` from the given file.
+
+    :raises RetdecError: When the sender reported an error instead of the
+        chunk.
+    """
+    size = int(file.readline())
+    if size < 0:
+        message = _read_message(file)
+        if message is None:
+            raise EOFError
+        raise _error_from_message(message['error'])
+    chunk = file.read(size)
+    if len(chunk) != size:
+        raise EOFError
+    return chunk
+
+
+def _iter_chunks(file):
+    """Yields chunks written by :func:`_write_chunks()` from the given file.
+    """
+    while True:
+        chunk = _read_chunk(file)
+        if not chunk:
+            return
+        yield chunk
+
+
+def _error_to_message(ex):
+    """Returns a message describing the given exception."""
+    if isinstance(ex, UnknownAPIError):
+        return {
+            'type': 'UnknownAPIError',
+            'code': ex.code,
+            'message': ex.message,
+            'description': ex.description,
+            'retry_after': ex.retry_after,
+        }
+    elif isinstance(ex, AuthenticationError):
+        return {'type': 'AuthenticationError'}
+    elif isinstance(ex, ConnectionError):
+        return {'type': 'ConnectionError', 'message': str(ex)}
+    elif isinstance(ex, OSError):
+        return {
+            'type': 'OSError',
+            'errno': ex.errno,
+            'message': ex.strerror or str(ex),
+            'filename': ex.filename,
+        }
+    return {'type': 'RetdecError', 'message': str(ex)}
+
+
+def _error_from_message(error):
+    """Returns an exception described by the given message."""
+    if error['type'] == 'UnknownAPIError':
+        return UnknownAPIError(
+            error['code'], error['message'], error['description'],
+            error.get('retry_after')
+        )
+    elif error['type'] == 'AuthenticationError':
+        return AuthenticationError()
+    elif error['type'] == 'ConnectionError':
+        return ConnectionError(error['message'])
+    elif error['type'] == 'OSError':
+        if error['errno'] is None:
+            return OSError(error['message'])
+        # OSError returns its subclass based on the error number (e.g.
+        # FileNotFoundError).
+        return OSError(error['errno'], error['message'], error['filename'])
+    return RetdecError(error['message'])
@@ -6,10 +6,15 @@
 
 """A representation of decompilations."""
 
+import os
+import tempfile
+import threading
+
 from retdec.exceptions import ArchiveGenerationFailedError
 from retdec.exceptions import CFGGenerationFailedError
 from retdec.exceptions import CGGenerationFailedError
 from retdec.exceptions import DecompilationFailedError
+from retdec.exceptions import InvalidValueError
 from retdec.exceptions import NoSuchCFGError
 from retdec.exceptions import OutputNotRequestedError
 from retdec.resource import Resource
@@ -88,7 +93,20 @@ class DecompilationPhase:
 
 
 class Decompilation(Resource):
-    """A representation of a decompilation."""
+    """A representation of a decompilation.
+
+    The ``save_*()`` methods accept either a path to a directory or a store
+    from :mod:`retdec.storage` (e.g. :class:`~retdec.storage.ZipStore`, which
+    packs all the outputs into a single file).
+    """
+
+    #: Outputs that can be saved by :func:`save_all()`.
+    OUTPUTS = ('hll', 'dsm', 'binary', 'cg', 'cfgs', 'archive')
+
+    #: Maximal size (in bytes) of an archive that is buffered in memory by
+    #: :func:`extract_archive()`. Larger archives are buffered in a temporary
+    #: file.
+    _ARCHIVE_BUFFER_SIZE = 64 * 1024 * 1024
 
     def get_completion(self):
         """How much of the decompilation has been completed (in percentage)?
@@ -157,6 +175,45 @@ class Decompilation(Resource):
             is_text_file=True
         )
 
+    def iter_hll_lines(self):
+        """Returns an iterator over the lines of the decompiled code in the
+        high-level language (`str`).
+
+        The code is downloaded and decoded while iterating, so it is never
+        stored in memory as a whole. The lines include their terminating
+        newlines.
+        """
+        return self._iter_file_lines(self._path_to_output_file('hll'))
+
+    def read_output_into(self, output, buffer):
+        """Reads the given output from the decompilation into the given
+        buffer.
+
+        :param str output: Output to be read: ``'hll'``, ``'dsm'``,
+            ``'binary'``, ``'cg'``, ``'archive'``, or ``'cfgs/FUNC'`` (the
+            control-flow graph of function ``FUNC``).
+        :param buffer: Writable object supporting the buffer protocol (e.g.
+            `bytearray`, `memoryview`, or the ``buf`` attribute of
+            :class:`multiprocessing.shared_memory.SharedMemory`).
+
+        :returns: Number of bytes read into `buffer` (`int`).
+
+        :raises BufferTooSmallError: When the output does not fit into
+            `buffer`. When the API reports the size of the output in advance,
+            nothing is read into `buffer`.
+
+        The output is read directly into `buffer`, without creating any
+        intermediate copies, so buffers can be reused for several outputs.
+        The outputs that have to be generated after the decompilation (see
+        e.g. :func:`wait_until_cg_is_generated()`) have to be generated
+        before they are read.
+        """
+        if output not in ('hll', 'dsm', 'binary', 'cg', 'archive') and \
+                not output.startswith('cfgs/'):
+            raise InvalidValueError('output', output)
+
+        return self._read_file_into(self._path_to_output_file(output), buffer)
+
     def save_hll_code(self, directory=None):
         """Saves the decompiled code in the high-level language to the given
         directory.
@@ -168,10 +225,7 @@ class Decompilation(Resource):
 
         If `directory` is ``None``, the current working directory is used.
         """
-        return self._get_file_and_save_it(
-            self._path_to_output_file('hll'),
-            directory
-        )
+        return self._save_output_file('hll', directory)
 
     def get_dsm_code(self):
         """Obtains and returns the disassembled input file in assembly-like
@@ -182,6 +236,16 @@ class Decompilation(Resource):
             is_text_file=True
         )
 
+    def iter_dsm_lines(self):
+        """Returns an iterator over the lines of the disassembled input file in
+        assembly-like syntax (`str`).
+
+        The code is downloaded and decoded while iterating, so it is never
+        stored in memory as a whole. The lines include their terminating
+        newlines.
+        """
+        return self._iter_file_lines(self._path_to_output_file('dsm'))
+
     def save_dsm_code(self, directory=None):
         """Saves the disassembled input file in assembly-like syntax to the
         given directory.
@@ -193,10 +257,7 @@ class Decompilation(Resource):
 
         If `directory` is ``None``, the current working directory is used.
         """
-        return self._get_file_and_save_it(
-            self._path_to_output_file('dsm'),
-            directory
-        )
+        return self._save_output_file('dsm', directory)
 
     def cg_generation_has_finished(self):
         """Checks if the call-graph generation has finished.
@@ -268,10 +329,7 @@ class Decompilation(Resource):
 
         If `directory` is ``None``, the current working directory is used.
         """
-        return self._get_file_and_save_it(
-            self._path_to_output_file('cg'),
-            directory
-        )
+        return self._save_output_file('cg', directory)
 
     @property
     def funcs_with_cfg(self):
@@ -386,10 +444,7 @@ class Decompilation(Resource):
 
         If `directory` is ``None``, the current working directory is used.
         """
-        return self._get_file_and_save_it(
-            self._path_to_output_file('cfgs/{}'.format(func)),
-            directory
-        )
+        return self._save_output_file('cfgs/{}'.format(func), directory)
 
     def archive_generation_has_finished(self):
         """Checks if the archive generation has finished.
@@ -463,10 +518,61 @@ class Decompilation(Resource):
 
         If `directory` is ``None``, the current working directory is used.
         """
-        return self._get_file_and_save_it(
-            self._path_to_output_file('archive'),
-            directory
-        )
+        return self._save_output_file('archive', directory)
+
+    def extract_archive(self, directory=None, members=None):
+        """Extracts files from the archive containing all outputs from the
+        decompilation into the given directory.
+
+        :param str directory: Path to a directory into which the files will be
+            extracted.
+        :param members: Files to be extracted. Either names of the files in
+            the archive, or a function that gets a name of a file and returns
+            ``True`` when the file should be extracted. If it is ``None``, all
+            files are extracted.
+
+        :returns: Paths to the extracted files (`list` of `str`).
+
+        :raises KeyError: When a file from `members` is not in the archive.
+
+        Unlike saving the archive by :func:`save_archive()` and extracting it
+        afterwards, the archive is not written into `directory`. Since the list
+        of files is stored at the end of the archive, the archive is buffered
+        while it is being downloaded. Small archives are buffered in memory,
+        larger ones in a temporary file.
+
+        If `directory` is ``None``, the current working directory is used.
+        """
+        directory = directory or os.getcwd()
+        with tempfile.SpooledTemporaryFile(
+                max_size=self._ARCHIVE_BUFFER_SIZE) as buffer:
+            self._get_file_and_write_it(
+                self._path_to_output_file('archive'),
+                buffer
+            )
+            buffer.seek(0)
+            # Imported here because the module is needed only when an archive
+            # is extracted.
+            import zipfile
+
+            with zipfile.ZipFile(buffer) as archive:
+                names = self._get_archive_members(archive, members)
+                return [archive.extract(name, directory) for name in names]
+
+    def _get_archive_members(self, archive, members):
+        """Returns names of files from the given archive that should be
+        extracted.
+        """
+        if members is None:
+            return archive.namelist()
+        elif callable(members):
+            return [name for name in archive.namelist() if members(name)]
+
+        names = list(members)
+        for name in names:
+            # Raises KeyError when there is no such file.
+            archive.getinfo(name)
+        return names
 
     def save_binary(self, directory=None):
         """Saves the compiled version of the input C file (provided that the
@@ -479,10 +585,135 @@ class Decompilation(Resource):
 
         If `directory` is ``None``, the current working directory is used.
         """
-        return self._get_file_and_save_it(
-            self._path_to_output_file('binary'),
-            directory
-        )
+        return self._save_output_file('binary', directory)
+
+    def save_all(self, directory=None, outputs=('hll', 'dsm'), max_workers=4,
+                 on_download=None, on_generation_failure=None,
+                 durability='none'):
+        """Saves the given outputs from the decompilation to the given
+        directory.
+
+        :param directory: Directory in which the files will be stored. Either
+            a path (`str`) or a store (:class:`~retdec.storage.OutputStore`).
+        :param iterable outputs: Outputs to be saved. Each output is one of
+            :attr:`OUTPUTS`: ``'hll'`` (decompiled code), ``'dsm'``
+            (disassembled code), ``'binary'`` (compiled input C file),
+            ``'cg'`` (call graph), ``'cfgs'`` (control-flow graphs of all
+            functions), and ``'archive'``.
+        :param int max_workers: Maximal number of files that are downloaded at
+            the same time.
+        :param callable on_download: Function to be called with a path to
+            every saved file.
+        :param callable on_generation_failure: Function to be called when an
+            output fails to be generated.
+        :param str durability: Durability of the saved files (see
+            :class:`~retdec.storage.DirectoryStore`). It is ignored when
+            `directory` is a store.
+
+        :returns: A `dict` mapping the saved outputs to paths to the saved
+            files. Control-flow graphs are stored under ``'cfgs/FUNC'``, where
+            ``FUNC`` is the name of the function.
+
+        The decompilation is expected to have finished (see
+        :func:`wait_until_finished()`). The files are downloaded concurrently.
+        The outputs that have to be generated after the decompilation (the
+        call graph, control-flow graphs, and the archive) are downloaded as
+        soon as they are generated.
+
+        If `on_generation_failure` is ``None``, the exception raised by the
+        corresponding ``wait_until_*_is_generated()`` method is propagated.
+        Otherwise, it is called with a description of the output (e.g.
+        ``'call graph'``) and the reason of the failure, and the other outputs
+        are still saved.
+
+        The saved files are committed to the disk at once after all of them
+        have been saved. When `directory` is a store, it is up to the caller
+        to commit them.
+
+        If `directory` is ``None``, the current working directory is used.
+        """
+        for output in outputs:
+            if output not in self.OUTPUTS:
+                raise InvalidValueError('outputs', output)
+
+        # Imported here for the same reason as in Resource._get_store().
+        from retdec.storage import OutputStore
+
+        if isinstance(directory, OutputStore):
+            return self._save_all(
+                directory, outputs, max_workers, on_download,
+                on_generation_failure
+            )
+
+        with self._get_store(directory, durability) as store:
+            return self._save_all(
+                store, outputs, max_workers, on_download,
+                on_generation_failure
+            )
+
+    def _save_all(self, store, outputs, max_workers, on_download,
+                  on_generation_failure):
+        """Implementation of :func:`save_all()`."""
+        # The callbacks may be called from several threads, so serialize
+        # them to make them safe to use e.g. for printing.
+        callback_lock = threading.Lock()
+        manifest = {}
+
+        def save(output_file):
+            file_path = self._save_output_file(output_file, store)
+            with callback_lock:
+                manifest[output_file] = file_path
+                if on_download is not None:
+                    on_download(file_path)
+
+        def generation_failed(what, ex):
+            if on_generation_failure is None:
+                raise ex
+            with callback_lock:
+                on_generation_failure(what, str(ex))
+
+        import concurrent.futures
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers) as executor:
+            futures = []
+            # Outputs that do not have to be generated are available right
+            # away, so start downloading them first.
+            for output in ('hll', 'dsm', 'binary'):
+                if output in outputs:
+                    futures.append(executor.submit(save, output))
+
+            # Wait for the generation of the remaining outputs in this thread
+            # while the downloads are in progress.
+            if 'cg' in outputs:
+                try:
+                    self.wait_until_cg_is_generated()
+                    futures.append(executor.submit(save, 'cg'))
+                except CGGenerationFailedError as ex:
+                    generation_failed('call graph', ex)
+
+            if 'cfgs' in outputs:
+                for func in self.funcs_with_cfg:
+                    try:
+                        self.wait_until_cfg_is_generated(func)
+                        futures.append(
+                            executor.submit(save, 'cfgs/{}'.format(func))
+                        )
+                    except CFGGenerationFailedError as ex:
+                        generation_failed(
+                            'control-flow graph for {}'.format(func), ex
+                        )
+
+            if 'archive' in outputs:
+                try:
+                    self.wait_until_archive_is_generated()
+                    futures.append(executor.submit(save, 'archive'))
+                except ArchiveGenerationFailedError as ex:
+                    generation_failed('archive', ex)
+
+            for future in futures:
+                future.result()
+
+        return manifest
 
     def _update_state(self):
         """Updates the state of the decompilation."""
@@ -530,6 +761,14 @@ class Decompilation(Resource):
             return _NotRequestedOutputStatus()
         return _OutputGenerationStatus(**status['archive'])
 
+    def _save_output_file(self, output_file, directory):
+        """Saves the given output file to the given directory (or store)."""
+        return self._get_file_and_save_it(
+            self._path_to_output_file(output_file),
+            directory,
+            key=output_file
+        )
+
     def _path_to_output_file(self, output_file):
         """Returns a path to the given output file."""
         return '/{}/outputs/{}'.format(self.id, output_file)
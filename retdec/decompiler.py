@@ -6,6 +6,7 @@
 
 """Access to the decompiler (decompilation of files)."""
 
+from retdec.batch import submit_concurrently
 from retdec.decompilation import Decompilation
 from retdec.exceptions import MissingParameterError
 from retdec.file import File
@@ -110,6 +111,52 @@ class Decompiler(Service):
         """
         conn = self._create_new_api_connection('/decompiler/decompilations')
         id = self._start_decompilation(conn, kwargs)
+        return self._resource_started(Decompilation(id, conn))
+
+    def start_decompilations(self, batch, max_concurrent_uploads=4):
+        """Starts decompilations with the given parameters.
+
+        :param iterable batch: Parameters of the decompilations. Each item is
+            a `dict` accepting the same keys as the keyword arguments of
+            :func:`start_decompilation()`.
+        :param int max_concurrent_uploads: Maximal number of input files that
+            are uploaded at the same time.
+
+        :returns: Generator of submissions (:class:`~retdec.batch.Submission`).
+            The started decompilation of a successful submission is available
+            in its ``resource`` attribute.
+
+        The input files are uploaded from a pool of threads over a single API
+        connection. Submissions are yielded as soon as the API returns the
+        identifiers of the started decompilations, i.e. not necessarily in the
+        order of `batch`. An error during the submission of a decompilation
+        does not stop the other submissions; it is reported in the ``error``
+        attribute of the corresponding submission.
+        """
+        conn = self._create_new_api_connection('/decompiler/decompilations')
+
+        def start(kwargs):
+            return self._resource_started(
+                Decompilation(self._start_decompilation(conn, kwargs), conn)
+            )
+
+        return submit_concurrently(start, batch, max_concurrent_uploads)
+
+    def get_decompilation(self, id):
+        """Returns a decompilation that has already been started.
+
+        :param str id: ID of the decompilation (see
+            :attr:`~retdec.resource.Resource.id`).
+
+        :returns: The decompilation
+            (:class:`~retdec.decompilation.Decompilation`).
+
+        It allows e.g. to wait for a decompilation started by another process.
+        No request is sent, so a decompilation that does not exist is reported
+        only when its status is obtained. Hooks are not notified about the
+        start of the decompilation.
+        """
+        conn = self._create_new_api_connection('/decompiler/decompilations')
         return Decompilation(id, conn)
 
     def _start_decompilation(self, conn, kwargs):
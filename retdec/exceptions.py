@@ -33,6 +33,19 @@ class MissingParameterError(RetdecError):
         )
 
 
+class MissingDependencyError(RetdecError):
+    """Exception raised when an optional package required by a feature is not
+    installed.
+
+    :param str package: Name of the package.
+    """
+
+    def __init__(self, package):
+        super().__init__(
+            "Package '{}' is required but it is not installed.".format(package)
+        )
+
+
 class InvalidValueError(RetdecError):
     """Exception raised when a parameter has an invalid value.
 
@@ -111,14 +124,17 @@ class UnknownAPIError(RetdecError):
     :param int code: Error code.
     :param str message: Short message describing what went wrong.
     :param str description: Longer description of what went wrong.
+    :param float retry_after: Number of seconds after which the request may
+        be retried (from the ``Retry-After`` header of the response).
     """
 
-    def __init__(self, code, message, description):
+    def __init__(self, code, message, description, retry_after=None):
         super().__init__(description)
 
         self._code = code
         self._message = message
         self._description = description
+        self._retry_after = retry_after
 
     @property
     def code(self):
@@ -134,3 +150,55 @@ class UnknownAPIError(RetdecError):
     def description(self):
         """Longer description of what went wrong (`str`)."""
         return self._description
+
+    @property
+    def retry_after(self):
+        """Number of seconds after which the request may be retried
+        (`float`).
+
+        It is ``None`` when the API did not say it.
+        """
+        return self._retry_after
+
+
+class LeaseLostError(RetdecError):
+    """Exception raised when a lease of an item from a work queue has expired
+    and the item has been returned to the queue (or leased by another worker).
+
+    :param str id: Identifier of the item.
+    """
+
+    def __init__(self, id):
+        super().__init__(
+            "The lease of item '{}' has been lost.".format(id)
+        )
+
+
+class BufferTooSmallError(RetdecError):
+    """Exception raised when a file does not fit into a buffer.
+
+    :param int buffer_size: Size of the buffer (in bytes).
+    :param int file_size: Size of the file (in bytes) or ``None`` if it is
+        not known.
+    """
+
+    def __init__(self, buffer_size, file_size=None):
+        if file_size is not None:
+            message = 'The file ({} bytes) does not fit into the buffer' \
+                ' ({} bytes).'.format(file_size, buffer_size)
+        else:
+            message = 'The file does not fit into the buffer ({} bytes).' \
+                .format(buffer_size)
+        super().__init__(message)
+        self._buffer_size = buffer_size
+        self._file_size = file_size
+
+    @property
+    def buffer_size(self):
+        """Size of the buffer (`int`)."""
+        return self._buffer_size
+
+    @property
+    def file_size(self):
+        """Size of the file (`int`) or ``None`` if it is not known."""
+        return self._file_size
@@ -6,6 +6,10 @@
 
 """Representation of a file."""
 
+import hashlib
+import mmap
+import os
+
 
 class File:
     """Representation of a file.
@@ -13,21 +17,36 @@ class File:
     :param str/file-like object file: Either path to the file (`str`) or an
         opened file (a file-like object).
     :param str name: Name of the file to be used.
+    :param bool use_mmap: Memory-map the file when `file` is a path.
+    :param int size: Size of the file (in bytes) if it is known in advance,
+        e.g. from a response header.
 
     When `name` is not given or it is ``None``, the name is taken from `file`.
     You can use `name` to set a custom file name that may be different from the
     real file's name.
+
+    When `use_mmap` is ``True``, the file is read from a memory mapping instead
+    of through buffered I/O. The contents are then shared by all readers of the
+    file, e.g. by :func:`digest()` and by the upload of the file, so the file
+    is read from the disk only once. Empty files cannot be mapped, so they are
+    read in the usual way.
     """
 
-    def __init__(self, file, name=None):
+    def __init__(self, file, name=None, use_mmap=False, size=None):
+        self._mmap = None
+        self._path = None
         if isinstance(file, str):
+            self._path = os.path.abspath(file)
             # We got a path to the file. Since we do not know whether the file
             # is a binary or text file, open it in the binary mode to ensure
             # that no conversions are done during reading.
             file = open(file, 'rb')
+            if use_mmap:
+                self._mmap = self._map_file(file)
 
         self._file = file
         self._name = name
+        self._size = size
 
     @property
     def name(self):
@@ -39,6 +58,14 @@ class File:
             return self._name
         return getattr(self._file, 'name', None)
 
+    @property
+    def path(self):
+        """Absolute path to the file (`str`).
+
+        It is ``None`` when the file was not given as a path.
+        """
+        return self._path
+
     @property
     def mode(self):
         """Mode in which the file is opened.
@@ -47,6 +74,74 @@ class File:
         """
         return getattr(self._file, 'mode', None)
 
+    @property
+    def size(self):
+        """Size of the file in bytes (`int`).
+
+        May be ``None`` if the size is not known in advance.
+        """
+        if self._size is not None:
+            return self._size
+        if self._mmap is not None:
+            return len(self._mmap)
+        return None
+
+    def is_mapped(self):
+        """Is the file memory-mapped?"""
+        return self._mmap is not None
+
+    def getbuffer(self):
+        """Returns a read-only `memoryview` of the contents of the
+        memory-mapped file.
+
+        Slicing the view does not copy the data. The view has to be released
+        before the file is closed.
+
+        :raises ValueError: When the file is not memory-mapped.
+        """
+        if self._mmap is None:
+            raise ValueError('The file is not memory-mapped.')
+        return memoryview(self._mmap)
+
+    def digest(self, algorithm='sha256'):
+        """Returns a hexadecimal digest of the contents of the file.
+
+        :param str algorithm: Name of the hashing algorithm (see
+            :func:`hashlib.new()`).
+
+        The current position in the file is not changed.
+        """
+        if self._mmap is not None:
+            # Hash the mapping directly to avoid copying the contents.
+            return hashlib.new(algorithm, self._mmap).hexdigest()
+
+        digest = hashlib.new(algorithm)
+        position = self._file.tell()
+        self._file.seek(0)
+        try:
+            for chunk in iter(lambda: self._file.read(1024 * 1024), b''):
+                digest.update(chunk)
+        finally:
+            self._file.seek(position)
+        return digest.hexdigest()
+
+    def close(self):
+        """Closes the file (and its memory mapping)."""
+        if self._mmap is not None:
+            self._mmap.close()
+        self._file.close()
+
+    def _map_file(self, file):
+        """Memory-maps the given opened file.
+
+        Returns ``None`` when the file cannot be mapped.
+        """
+        try:
+            return mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Empty files cannot be mapped.
+            return None
+
     def __repr__(self):
         return "<{} name={!r} mode={!r}>".format(
             __name__ + '.' + self.__class__.__name__,
@@ -54,7 +149,12 @@ class File:
             self.mode
         )
 
-    # Delegate other attributes to the underlying file.
+    # Delegate other attributes to the underlying file (reading is delegated
+    # to the memory mapping when the file is mapped).
+
+    _MAPPED_ATTRS = frozenset(['read', 'readline', 'seek', 'tell'])
 
     def __getattr__(self, attr):
+        if attr in self._MAPPED_ATTRS and self._mmap is not None:
+            return getattr(self._mmap, attr)
         return getattr(self._file, attr)
@@ -7,6 +7,7 @@
 """Access to the file-analyzing service (fileinfo)."""
 
 from retdec.analysis import Analysis
+from retdec.batch import submit_concurrently
 from retdec.exceptions import MissingParameterError
 from retdec.file import File
 from retdec.service import Service
@@ -29,7 +30,33 @@ class Fileinfo(Service):
         """
         conn = self._create_new_api_connection('/fileinfo/analyses')
         id = self._start_analysis(conn, kwargs)
-        return Analysis(id, conn)
+        return self._resource_started(Analysis(id, conn))
+
+    def start_analyses(self, batch, max_concurrent_uploads=4):
+        """Starts analyses with the given parameters.
+
+        :param iterable batch: Parameters of the analyses. Each item is a
+            `dict` accepting the same keys as the keyword arguments of
+            :func:`start_analysis()`.
+        :param int max_concurrent_uploads: Maximal number of input files that
+            are uploaded at the same time.
+
+        :returns: Generator of submissions (:class:`~retdec.batch.Submission`).
+            The started analysis of a successful submission is available in
+            its ``resource`` attribute.
+
+        The submissions are yielded in the order in which they complete. See
+        :func:`retdec.decompiler.Decompiler.start_decompilations()` for more
+        details.
+        """
+        conn = self._create_new_api_connection('/fileinfo/analyses')
+
+        def start(kwargs):
+            return self._resource_started(
+                Analysis(self._start_analysis(conn, kwargs), conn)
+            )
+
+        return submit_concurrently(start, batch, max_concurrent_uploads)
 
     def _start_analysis(self, conn, kwargs):
         """Starts an analysis with the given parameters.
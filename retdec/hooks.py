@@ -0,0 +1,250 @@
+#
+# Project:   retdec-python
+# Copyright: (c) 2015 by Petr Zemek <s3rvac@gmail.com> and contributors
+# License:   MIT, see the LICENSE file for more details
+#
+
+"""Hooks for observing requests sent to the API and resources.
+
+Register an instance of a subclass of :class:`RequestHooks` via
+:func:`register()` and its methods are called for every request sent by
+:class:`~retdec.conn.APIConnection`. Similarly, methods of
+:class:`ResourceHooks` are called during the lifetime of resources (e.g.
+decompilations). A class may inherit from both. When no hooks are registered,
+requests are sent without any instrumentation.
+"""
+
+import threading
+
+#: Registered hooks. A tuple is used so that it can be iterated without
+#: locking while hooks are being registered.
+_hooks = ()
+_hooks_lock = threading.Lock()
+
+
+class RequestInfo:
+    """Information about a request sent to the API.
+
+    :param str method: HTTP method (e.g. ``'GET'``).
+    :param str path: Template of the path of the request, in which the
+        variable parts are replaced by placeholders (e.g.
+        ``'/service/api/decompiler/decompilations/{id}/status'``). Use it to
+        group requests.
+    :param str url: Full URL of the request.
+    :param str resource_id: ID of the resource (e.g. decompilation) to which
+        the request belongs. It is ``None`` for requests that start resources.
+    :param dict params: Parameters of the request (e.g. parameters of a
+        started decompilation).
+
+    The other attributes are filled in while the request is being processed:
+
+    * ``status_code``: HTTP status code of the response (``None`` when no
+      response has been received).
+    * ``latency``: Number of seconds until the response was received
+      (``None`` when no response has been received). For downloads of files,
+      it does not include the time needed to download the contents.
+    * ``bytes_sent``: Number of bytes sent in the body of the request.
+    * ``bytes_received``: Number of bytes received in the body of the
+      response so far.
+    * ``retries``: Number of times the request was retried by the underlying
+      HTTP library (see the ``max_retries`` parameter of
+      ``requests.adapters.HTTPAdapter``).
+    * ``headers``: A `dict` of additional headers to be sent. Hooks may add
+      headers in :func:`RequestHooks.on_request_start()`.
+    * ``context``: A `dict` in which hooks may store their own data about the
+      request.
+    """
+
+    def __init__(self, method, path, url, resource_id=None, params=None):
+        self.method = method
+        self.path = path
+        self.url = url
+        self.resource_id = resource_id
+        self.params = params if params is not None else {}
+        self.status_code = None
+        self.latency = None
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.retries = 0
+        self.headers = {}
+        self.context = {}
+
+    @property
+    def kind(self):
+        """Kind of the request (`str`).
+
+        It is either ``'upload'`` (starting a resource), ``'status'`` (checking
+        the status of a resource), ``'download'`` (obtaining an output), or
+        ``'other'``.
+        """
+        if self.method == 'POST':
+            return 'upload'
+        elif self.path.endswith('/status'):
+            return 'status'
+        elif '/output' in self.path:
+            return 'download'
+        return 'other'
+
+    def __repr__(self):
+        return '<{} method={!r} path={!r} status_code={!r}>'.format(
+            __name__ + '.' + self.__class__.__name__,
+            self.method,
+            self.path,
+            self.status_code
+        )
+
+
+class RequestHooks:
+    """Base class of hooks for observing requests.
+
+    Override the methods that you are interested in. All of them are passed
+    a :class:`RequestInfo`. The methods may be called from several threads,
+    and they should not raise exceptions because the exceptions are
+    propagated to the code sending the request.
+    """
+
+    def on_request_start(self, request):
+        """Called before the request is sent."""
+
+    def on_response(self, request):
+        """Called when a response (including an error one) is received.
+
+        The status code, latency, and retry count of `request` are set.
+        """
+
+    def on_request_end(self, request, duration):
+        """Called when the response has been completely received.
+
+        :param float duration: Number of seconds since the request was sent.
+
+        For downloads of files, it is called when the file is closed, so
+        `duration` includes the download of the contents. It is not called
+        when the request fails.
+        """
+
+    def on_error(self, request, error):
+        """Called when the request fails.
+
+        :param retdec.exceptions.RetdecError error: The error to be raised
+            (e.g. :class:`~retdec.exceptions.ConnectionError` or
+            :class:`~retdec.exceptions.UnknownAPIError`).
+        """
+
+    def on_bytes(self, request, direction, count):
+        """Called when data are sent or received.
+
+        :param str direction: Either ``'sent'`` or ``'received'``.
+        :param int count: Number of bytes.
+
+        For downloads of files, it is called repeatedly while the file is
+        being read.
+        """
+
+
+class ResourceHooks:
+    """Base class of hooks for observing resources (decompilations and
+    analyses).
+
+    Override the methods that you are interested in. The methods may be called
+    from several threads.
+    """
+
+    def on_resource_start(self, resource):
+        """Called when a resource has been started (i.e. after its input file
+        has been uploaded).
+        """
+
+    def on_resource_status(self, resource, status):
+        """Called when the status of a resource has been obtained from the
+        API.
+
+        :param dict status: Status returned by the API.
+        """
+
+    def on_resource_finish(self, resource, status):
+        """Called once when a resource is found to have finished (either
+        successfully or not).
+
+        :param dict status: Status returned by the API in which the resource
+            has finished (e.g. ``status['failed']`` says whether it failed).
+        """
+
+    def on_resource_error(self, resource, error):
+        """Called before an exception signaling a failure of a resource (e.g.
+        :class:`~retdec.exceptions.DecompilationFailedError`) is raised.
+        """
+
+
+def register(hooks):
+    """Registers the given hooks (:class:`RequestHooks` or
+    :class:`ResourceHooks`).
+    """
+    global _hooks
+    with _hooks_lock:
+        _hooks = _hooks + (hooks,)
+
+
+def unregister(hooks):
+    """Unregisters the given hooks.
+
+    It does nothing when the hooks are not registered.
+    """
+    global _hooks
+    with _hooks_lock:
+        _hooks = tuple(h for h in _hooks if h is not hooks)
+
+
+def registered():
+    """Returns a `tuple` of the registered hooks."""
+    return _hooks
+
+
+def notify(name, *args, hooks=None):
+    """Calls the method with the given name on hooks that define it.
+
+    :param str name: Name of the method (e.g. ``'on_resource_start'``).
+    :param tuple hooks: Hooks to be called. If it is ``None``, the registered
+        hooks are called.
+    """
+    for h in hooks if hooks is not None else _hooks:
+        method = getattr(h, name, None)
+        if method is not None:
+            method(*args)
+
+
+class CountingReader:
+    """Wrapper of a binary file-like object that reports the number of read
+    bytes.
+
+    :param file: Wrapped file-like object.
+    :param callable callback: Function to be called with the number of bytes
+        after every read.
+    :param callable on_close: Function to be called (without arguments) when
+        the file is closed for the first time.
+    """
+
+    def __init__(self, file, callback, on_close=None):
+        self._file = file
+        self._callback = callback
+        self._on_close = on_close
+
+    def read(self, *args, **kwargs):
+        data = self._file.read(*args, **kwargs)
+        if data:
+            self._callback(len(data))
+        return data
+
+    def readinto(self, buffer):
+        count = self._file.readinto(buffer)
+        if count:
+            self._callback(count)
+        return count
+
+    def close(self):
+        self._file.close()
+        on_close, self._on_close = self._on_close, None
+        if on_close is not None:
+            on_close()
+
+    def __getattr__(self, attr):
+        return getattr(self._file, attr)
@@ -0,0 +1,231 @@
+#
+# Project:   retdec-python
+# Copyright: (c) 2015 by Petr Zemek <s3rvac@gmail.com> and contributors
+# License:   MIT, see the LICENSE file for more details
+#
+
+"""Limiting of the number of resources (e.g. decompilations) that are running
+remotely at the same time.
+"""
+
+import threading
+import time
+
+from retdec.exceptions import InvalidValueError
+from retdec.exceptions import UnknownAPIError
+
+
+class InFlightLimiter:
+    """Limits the number of resources that are in flight, i.e. started but not
+    yet finished.
+
+    :param int limit: Maximal number of resources in flight. ``None`` means
+        that the limit is unknown; it is learned from the API.
+    :param int max_retries: Maximal number of times a start of a resource is
+        retried after the API rejects it because of too many running
+        resources.
+    :param float retry_interval: Number of seconds to wait before retrying a
+        rejected start when the API does not say how long to wait (via the
+        ``Retry-After`` header).
+    :param int increase_after: Number of consecutive successful starts after
+        which a lowered limit is raised by one.
+
+    A slot is taken when a resource is started via :func:`start()` and
+    released once the resource reports that it has finished (see
+    :func:`~retdec.resource.Resource.has_finished()`). The finished resources
+    are checked lazily, i.e. when a slot is needed, so no background thread is
+    involved. Since the state of a resource is updated at most once in a while,
+    the checks do not flood the API.
+
+    When the API rejects a start with status code 429 (Too Many Requests), the
+    limit is lowered to the number of resources that are currently in flight
+    and the start is retried once a slot is released (but not sooner than the
+    API asks in the ``Retry-After`` header). Since the rejection may have been
+    caused by a temporary load of the API, the limit is raised by one after
+    every `increase_after` consecutive successful starts, but never above the
+    `limit` given when creating the limiter.
+
+    The limiter can be shared by several threads. Code that must not block
+    (e.g. an event loop) can use :func:`try_acquire()` and :func:`track()`
+    instead of :func:`start()`.
+    """
+
+    #: Number of seconds between checks of finished resources when waiting for
+    #: a free slot.
+    _POLL_INTERVAL = 0.5
+
+    def __init__(self, limit=None, max_retries=10, retry_interval=5,
+                 increase_after=10):
+        if limit is not None and limit < 1:
+            raise InvalidValueError('limit', limit)
+        if increase_after < 1:
+            raise InvalidValueError('increase_after', increase_after)
+
+        self._limit = limit
+        self._max_limit = limit
+        self._max_retries = max_retries
+        self._retry_interval = retry_interval
+        self._increase_after = increase_after
+        self._successful_starts = 0
+        self._in_flight = 0
+        self._tracked = []
+        self._cond = threading.Condition()
+
+    @property
+    def limit(self):
+        """Maximal number of resources in flight (`int`).
+
+        ``None`` means that the limit is not known.
+        """
+        with self._cond:
+            return self._limit
+
+    @property
+    def in_flight(self):
+        """Number of resources in flight (`int`)."""
+        with self._cond:
+            return self._in_flight
+
+    def start(self, start, *args, **kwargs):
+        """Waits for a free slot, starts a resource, and tracks it.
+
+        :param callable start: Function that starts the resource (e.g.
+            :func:`~retdec.decompiler.Decompiler.start_decompilation()`). It is
+            called with `args` and `kwargs`.
+
+        :returns: The started resource.
+
+        When the API rejects the start because of too many running resources,
+        the start is retried (at most `max_retries` times). Other errors are
+        propagated.
+        """
+        retries = 0
+        while True:
+            self.acquire()
+            try:
+                resource = start(*args, **kwargs)
+            except UnknownAPIError as ex:
+                self.release()
+                if ex.code != 429 or retries >= self._max_retries:
+                    raise
+                self._lower_limit()
+                retries += 1
+                time.sleep(
+                    ex.retry_after if ex.retry_after is not None
+                    else self._retry_interval
+                )
+                continue
+            except BaseException:
+                self.release()
+                raise
+            self.track(resource)
+            self._raise_limit()
+            return resource
+
+    def acquire(self, timeout=None):
+        """Takes a slot, waiting until one is free.
+
+        :param float timeout: Maximal number of seconds to wait. ``None``
+            means to wait for as long as needed.
+
+        :returns: ``True`` when a slot has been taken, ``False`` when the
+            timeout expired.
+        """
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        while not self.try_acquire():
+            wait_time = self._POLL_INTERVAL
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                wait_time = min(wait_time, remaining)
+            with self._cond:
+                self._cond.wait(wait_time)
+        return True
+
+    def try_acquire(self):
+        """Takes a slot if one is free, without waiting.
+
+        :returns: ``True`` when a slot has been taken, ``False`` otherwise.
+        """
+        if self._try_take_slot():
+            return True
+        # All slots are taken, so check whether some of them can be released.
+        return self.release_finished() > 0 and self._try_take_slot()
+
+    def release(self):
+        """Releases a slot taken by :func:`acquire()` or
+        :func:`try_acquire()` that is not used by a tracked resource.
+        """
+        with self._cond:
+            self._in_flight -= 1
+            self._cond.notify_all()
+
+    def track(self, resource):
+        """Tracks the given resource, which uses an already taken slot.
+
+        The slot is released once the resource has finished.
+        """
+        with self._cond:
+            self._tracked.append(resource)
+
+    def release_finished(self):
+        """Releases slots of tracked resources that have finished.
+
+        :returns: Number of released slots.
+        """
+        with self._cond:
+            tracked = list(self._tracked)
+        # Query the resources without holding the lock because it may involve
+        # sending requests to the API.
+        finished = [
+            resource for resource in tracked if resource.has_finished()
+        ]
+        if not finished:
+            return 0
+
+        released = 0
+        with self._cond:
+            for resource in finished:
+                # Another thread may have released the slot in the meantime.
+                if resource in self._tracked:
+                    self._tracked.remove(resource)
+                    released += 1
+            self._in_flight -= released
+            self._cond.notify_all()
+        return released
+
+    def _try_take_slot(self):
+        """Takes a slot if one is free."""
+        with self._cond:
+            if self._limit is not None and self._in_flight >= self._limit:
+                return False
+            self._in_flight += 1
+            return True
+
+    def _lower_limit(self):
+        """Lowers the limit to the number of resources in flight."""
+        with self._cond:
+            self._limit = max(self._in_flight, 1)
+            self._successful_starts = 0
+
+    def _raise_limit(self):
+        """Records a successful start and raises a lowered limit by one after
+        enough consecutive successful starts.
+        """
+        with self._cond:
+            self._successful_starts += 1
+            if self._successful_starts < self._increase_after:
+                return
+            self._successful_starts = 0
+            if self._limit is None or self._limit == self._max_limit:
+                return
+            self._limit += 1
+            self._cond.notify_all()
+
+    def __repr__(self):
+        return '<{} limit={!r} in_flight={}>'.format(
+            __name__ + '.' + self.__class__.__name__,
+            self.limit,
+            self.in_flight
+        )
@@ -0,0 +1,312 @@
+#
+# Project:   retdec-python
+# Copyright: (c) 2015 by Petr Zemek <s3rvac@gmail.com> and contributors
+# License:   MIT, see the LICENSE file for more details
+#
+
+"""Manifests recording the processing of batches of input files, which allow
+resuming interrupted batches.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from retdec.file import File
+
+
+class ManifestEntry:
+    """A record of an input file in a manifest.
+
+    :param str input_file: Absolute path to the input file.
+    :param str digest: SHA-256 digest of the contents of the file when it was
+        submitted.
+    :param dict params: Parameters with which the file was submitted.
+    :param str id: ID of the remote decompilation (``None`` when the file
+        has not been submitted).
+    :param str state: State of the file (see :class:`Manifest`).
+    :param list outputs: Paths to the saved outputs.
+    :param str error: Reason of the failure.
+    """
+
+    def __init__(self, input_file, digest, params, id, state, outputs=(),
+                 error=None):
+        self._input_file = input_file
+        self._digest = digest
+        self._params = params
+        self._id = id
+        self._state = state
+        self._outputs = list(outputs)
+        self._error = error
+
+    @property
+    def input_file(self):
+        """Absolute path to the input file (`str`)."""
+        return self._input_file
+
+    @property
+    def digest(self):
+        """SHA-256 digest of the contents of the file (`str`)."""
+        return self._digest
+
+    @property
+    def params(self):
+        """Parameters with which the file was submitted (`dict`)."""
+        return self._params
+
+    @property
+    def id(self):
+        """ID of the remote decompilation (`str`)."""
+        return self._id
+
+    @property
+    def state(self):
+        """State of the file (`str`)."""
+        return self._state
+
+    @property
+    def outputs(self):
+        """Paths to the saved outputs (`list`)."""
+        return self._outputs
+
+    @property
+    def error(self):
+        """Reason of the failure (`str`)."""
+        return self._error
+
+    def __repr__(self):
+        return '<{} input_file={!r} state={!r} id={!r}>'.format(
+            __name__ + '.' + self.__class__.__name__,
+            self.input_file,
+            self.state,
+            self.id
+        )
+
+
+class Manifest:
+    """A manifest stored in an SQLite database.
+
+    :param str path: Path to the database. It is created when it does not
+        exist.
+
+    Every input file has a single entry, which holds a digest of its contents,
+    the parameters of its decompilation, the ID of the remote decompilation,
+    its state, and paths to the saved outputs. Every change is committed
+    right away, so the manifest is up to date even when the process crashes
+    or is interrupted. The manifest may be used from several threads.
+    """
+
+    #: States of input files.
+    SUBMITTED = 'submitted'
+    DONE = 'done'
+    FAILED = 'failed'
+
+    def __init__(self, path):
+        self._path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(
+            path,
+            timeout=60,
+            isolation_level=None,
+            check_same_thread=False
+        )
+        # In the WAL mode, commits do not wait for the disk, yet committed
+        # entries survive a crash of the process.
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('PRAGMA synchronous=NORMAL')
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS entries ('
+            ' input_file TEXT PRIMARY KEY,'
+            ' size INTEGER,'
+            ' mtime_ns INTEGER,'
+            ' digest TEXT,'
+            ' params TEXT NOT NULL,'
+            ' id TEXT,'
+            ' state TEXT NOT NULL,'
+            ' outputs TEXT,'
+            ' error TEXT,'
+            ' updated REAL NOT NULL'
+            ')'
+        )
+
+    @property
+    def path(self):
+        """Path to the database (`str`)."""
+        return self._path
+
+    def get(self, input_file):
+        """Returns the entry of the given input file (or ``None``)."""
+        with self._lock:
+            row = self._db.execute(
+                'SELECT input_file, digest, params, id, state, outputs, error'
+                ' FROM entries WHERE input_file = ?',
+                (os.path.abspath(input_file),)
+            ).fetchone()
+        if row is None:
+            return None
+        input_file, digest, params, id, state, outputs, error = row
+        return ManifestEntry(
+            input_file,
+            digest,
+            json.loads(params),
+            id,
+            state,
+            json.loads(outputs) if outputs else [],
+            error
+        )
+
+    def get_resumable(self, input_file, params):
+        """Returns the entry of the given input file when it was created for
+        the current contents of the file and the given parameters (or
+        ``None``).
+
+        The contents are hashed only when the size or modification time of
+        the file has changed since its submission.
+        """
+        input_file = os.path.abspath(input_file)
+        entry = self.get(input_file)
+        if entry is None or entry.params != _normalize_params(params):
+            return None
+        with self._lock:
+            size, mtime_ns = self._db.execute(
+                'SELECT size, mtime_ns FROM entries WHERE input_file = ?',
+                (input_file,)
+            ).fetchone()
+        try:
+            stat = os.stat(input_file)
+        except OSError:
+            return None
+        if (stat.st_size, stat.st_mtime_ns) == (size, mtime_ns):
+            return entry
+        # The file may have been only touched or copied.
+        if entry.digest is None or _file_digest(input_file) != entry.digest:
+            return None
+        return entry
+
+    def mark_submitted(self, input_file, params, id):
+        """Records that the given input file has been submitted with the given
+        parameters and that the remote decompilation has the given ID.
+        """
+        input_file = os.path.abspath(input_file)
+        stat = os.stat(input_file)
+        self._put(
+            input_file,
+            size=stat.st_size,
+            mtime_ns=stat.st_mtime_ns,
+            digest=_file_digest(input_file),
+            params=json.dumps(_normalize_params(params), sort_keys=True),
+            id=id,
+            state=self.SUBMITTED,
+            outputs=None,
+            error=None
+        )
+
+    def mark_done(self, input_file, outputs):
+        """Records that the outputs of the given input file have been saved
+        into the given paths.
+        """
+        self._update(
+            os.path.abspath(input_file),
+            state=self.DONE,
+            outputs=json.dumps(list(outputs)),
+            error=None
+        )
+
+    def mark_failed(self, input_file, params, error):
+        """Records that the given input file has failed to be decompiled with
+        the given parameters.
+        """
+        input_file = os.path.abspath(input_file)
+        with self._lock:
+            exists = self._db.execute(
+                'SELECT 1 FROM entries WHERE input_file = ?',
+                (input_file,)
+            ).fetchone()
+        if exists:
+            self._update(input_file, state=self.FAILED, error=str(error))
+        else:
+            # The file has not even been submitted.
+            self._put(
+                input_file,
+                size=None,
+                mtime_ns=None,
+                digest=None,
+                params=json.dumps(_normalize_params(params), sort_keys=True),
+                id=None,
+                state=self.FAILED,
+                outputs=None,
+                error=str(error)
+            )
+
+    def counts(self):
+        """Returns a `dict` mapping states of input files to their number."""
+        counts = dict.fromkeys((self.SUBMITTED, self.DONE, self.FAILED), 0)
+        with self._lock:
+            counts.update(self._db.execute(
+                'SELECT state, COUNT(*) FROM entries GROUP BY state'
+            ))
+        return counts
+
+    def close(self):
+        """Closes the manifest."""
+        self._db.close()
+
+    def _put(self, input_file, **columns):
+        """Inserts or replaces the entry of the given input file."""
+        columns['updated'] = time.time()
+        names = sorted(columns)
+        with self._lock:
+            self._db.execute(
+                'INSERT OR REPLACE INTO entries (input_file, {}) VALUES'
+                ' (?, {})'.format(', '.join(names), ', '.join('?' * len(names))),
+                [input_file] + [columns[name] for name in names]
+            )
+
+    def _update(self, input_file, **columns):
+        """Updates the given columns of the entry of the given input file."""
+        columns['updated'] = time.time()
+        names = sorted(columns)
+        with self._lock:
+            self._db.execute(
+                'UPDATE entries SET {} WHERE input_file = ?'.format(
+                    ', '.join('{} = ?'.format(name) for name in names)
+                ),
+                [columns[name] for name in names] + [input_file]
+            )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __repr__(self):
+        return '<{} path={!r}>'.format(
+            __name__ + '.' + self.__class__.__name__,
+            self._path
+        )
+
+
+def _normalize_params(params):
+    """Returns the given parameters as they are stored in a manifest (without
+    the input file, which is the key of the entry).
+    """
+    return json.loads(json.dumps({
+        name: value for name, value in params.items()
+        if name != 'input_file'
+    }, sort_keys=True))
+
+
+def _file_digest(path):
+    """Returns a hexadecimal SHA-256 digest of the contents of the given
+    file.
+    """
+    # The file is memory-mapped, so its contents are hashed without being
+    # copied.
+    file = File(path, use_mmap=True)
+    try:
+        return file.digest()
+    finally:
+        file.close()
@@ -0,0 +1,487 @@
+#
+# Project:   retdec-python
+# Copyright: (c) 2015 by Petr Zemek <s3rvac@gmail.com> and contributors
+# License:   MIT, see the LICENSE file for more details
+#
+
+"""Metrics of the library in the `Prometheus text format
+<https://prometheus.io/docs/instrumenting/exposition_formats/>`_.
+
+Call :func:`enable()` to start collecting metrics about requests sent to the
+API and about started resources. The metrics can be exposed via an HTTP
+endpoint (:func:`start_http_server()`) or written into a file for the
+textfile collector of the node exporter (:func:`write_textfile()`).
+"""
+
+import http.server
+import math
+import os
+import socketserver
+import threading
+
+from retdec import hooks
+from retdec.exceptions import InvalidValueError
+from retdec.exceptions import UnknownAPIError
+
+
+class Metric:
+    """Base class of all metrics.
+
+    :param str name: Name of the metric.
+    :param str documentation: Description of the metric.
+    :param tuple labelnames: Names of labels of the metric.
+
+    Values of the labels are passed as keyword arguments to the methods that
+    update the metric. All the labels have to be given.
+    """
+
+    #: Type of the metric in the Prometheus text format.
+    type = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self._name = name
+        self._documentation = documentation
+        self._labelnames = tuple(labelnames)
+        # Label values (tuple) -> value.
+        self._values = {}
+        self._lock = threading.Lock()
+
+    @property
+    def name(self):
+        """Name of the metric (`str`)."""
+        return self._name
+
+    def render(self):
+        """Returns the metric in the Prometheus text format (`str`)."""
+        lines = [
+            '# HELP {} {}'.format(
+                self._name,
+                self._documentation.replace('\\', r'\\').replace('\n', r'\n')
+            ),
+            '# TYPE {} {}'.format(self._name, self.type),
+        ]
+        with self._lock:
+            samples = sorted(
+                (key, self._copy_value(value))
+                for key, value in self._values.items()
+            )
+        for key, value in samples:
+            lines.extend(self._render_samples(key, value))
+        return '\n'.join(lines) + '\n'
+
+    def _key(self, labels):
+        """Returns a key of the value with the given labels."""
+        if set(labels) != set(self._labelnames):
+            raise InvalidValueError('labels', ', '.join(sorted(labels)))
+        return tuple(str(labels[name]) for name in self._labelnames)
+
+    def _copy_value(self, value):
+        """Returns a copy of the given value that can be rendered without
+        holding the lock.
+        """
+        return value
+
+    def _render_samples(self, key, value):
+        """Returns lines with samples of the value with the given key."""
+        return ['{}{} {}'.format(
+            self._name, self._format_labels(key), _format_number(value)
+        )]
+
+    def _format_labels(self, key, extra_labels=()):
+        """Formats the labels with the given values."""
+        labels = list(zip(self._labelnames, key)) + list(extra_labels)
+        if not labels:
+            return ''
+        return '{' + ','.join(
+            '{}="{}"'.format(name, _escape_label_value(value))
+            for name, value in labels
+        ) + '}'
+
+    def __repr__(self):
+        return '<{} name={!r}>'.format(
+            __name__ + '.' + self.__class__.__name__,
+            self._name
+        )
+
+
+class Counter(Metric):
+    """A metric whose value only increases (e.g. the number of requests)."""
+
+    type = 'counter'
+
+    def inc(self, amount=1, **labels):
+        """Increases the value with the given labels by `amount`."""
+        if amount < 0:
+            raise InvalidValueError('amount', amount)
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def get(self, **labels):
+        """Returns the value with the given labels."""
+        key = self._key(labels)
+        with self._lock:
+            return self._values.get(key, 0)
+
+
+class Gauge(Metric):
+    """A metric whose value can go up and down (e.g. the number of running
+    decompilations).
+    """
+
+    type = 'gauge'
+
+    def set(self, value, **labels):
+        """Sets the value with the given labels."""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount=1, **labels):
+        """Increases the value with the given labels by `amount`."""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        """Decreases the value with the given labels by `amount`."""
+        self.inc(-amount, **labels)
+
+    def get(self, **labels):
+        """Returns the value with the given labels."""
+        key = self._key(labels)
+        with self._lock:
+            return self._values.get(key, 0)
+
+
+class Histogram(Metric):
+    """A metric that counts observed values (e.g. durations) in buckets.
+
+    :param tuple buckets: Upper bounds of the buckets. A bucket for all values
+        (``+Inf``) is always added.
+    """
+
+    type = 'histogram'
+
+    #: Default upper bounds of buckets (suitable for durations in seconds).
+    DEFAULT_BUCKETS = (
+        0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+        1, 2.5, 5, 10, 30, 60, 120, 300, 600
+    )
+
+    def __init__(self, name, documentation, labelnames=(),
+                 buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self._buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, value, **labels):
+        """Observes the given value."""
+        key = self._key(labels)
+        with self._lock:
+            if key not in self._values:
+                self._values[key] = _HistogramValue(len(self._buckets))
+            self._values[key].observe(value, self._buckets)
+
+    def get(self, **labels):
+        """Returns a pair ``(count, sum)`` of the values observed with the
+        given labels.
+        """
+        key = self._key(labels)
+        with self._lock:
+            value = self._values.get(key)
+            return (value.count, value.sum) if value is not None else (0, 0)
+
+    def _copy_value(self, value):
+        return value.copy()
+
+    def _render_samples(self, key, value):
+        lines = []
+        for bound, count in zip(self._buckets, value.bucket_counts):
+            lines.append('{}_bucket{} {}'.format(
+                self._name,
+                self._format_labels(key, [('le', _format_number(bound))]),
+                count
+            ))
+        labels = self._format_labels(key)
+        lines.append('{}_sum{} {}'.format(
+            self._name, labels, _format_number(value.sum)
+        ))
+        lines.append('{}_count{} {}'.format(self._name, labels, value.count))
+        return lines
+
+
+class _HistogramValue:
+    """Observed values of a histogram with particular labels."""
+
+    def __init__(self, bucket_count):
+        # The counts are cumulative, as required by the format.
+        self.bucket_counts = [0] * bucket_count
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value, buckets):
+        for i, bound in enumerate(buckets):
+            if value <= bound:
+                self.bucket_counts[i] += 1
+        self.sum += value
+        self.count += 1
+
+    def copy(self):
+        copy = _HistogramValue(0)
+        copy.bucket_counts = list(self.bucket_counts)
+        copy.sum = self.sum
+        copy.count = self.count
+        return copy
+
+
+class Registry:
+    """A collection of metrics that are rendered together."""
+
+    def __init__(self):
+        self._metrics = []
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        """Registers the given metric and returns it."""
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        """Returns all the metrics in the Prometheus text format (`str`)."""
+        with self._lock:
+            metrics = list(self._metrics)
+        return ''.join(metric.render() for metric in metrics)
+
+
+class MetricsHooks(hooks.RequestHooks, hooks.ResourceHooks):
+    """Hooks that collect metrics about requests and resources.
+
+    :param Registry registry: Registry into which the metrics are registered.
+        If it is ``None``, a new registry is created.
+
+    Requests are labeled by their kind (see
+    :attr:`retdec.hooks.RequestInfo.kind`) and resources by their type, e.g.
+    ``decompilation`` or ``analysis``.
+    """
+
+    def __init__(self, registry=None):
+        self.registry = registry if registry is not None else Registry()
+        self.requests = self.registry.register(Counter(
+            'retdec_requests_total',
+            'Requests sent to the API by kind, method, and status code.',
+            ('kind', 'method', 'code')
+        ))
+        self.request_duration = self.registry.register(Histogram(
+            'retdec_request_duration_seconds',
+            'Durations of requests sent to the API, including downloads of '
+            'the contents of files.',
+            ('kind',)
+        ))
+        self.sent_bytes = self.registry.register(Counter(
+            'retdec_sent_bytes_total',
+            'Bytes sent to the API in bodies of requests.',
+            ('kind',)
+        ))
+        self.received_bytes = self.registry.register(Counter(
+            'retdec_received_bytes_total',
+            'Bytes received from the API in bodies of responses.',
+            ('kind',)
+        ))
+        self.failures = self.registry.register(Counter(
+            'retdec_failures_total',
+            'Failures by the type of the raised exception and the error code '
+            '(for API errors).',
+            ('type', 'code')
+        ))
+        self.submissions = self.registry.register(Counter(
+            'retdec_submissions_total',
+            'Started resources by type.',
+            ('resource',)
+        ))
+        self.in_flight = self.registry.register(Gauge(
+            'retdec_in_flight',
+            'Resources that have been started but have not finished yet.',
+            ('resource',)
+        ))
+        self.status_polls = self.registry.register(Counter(
+            'retdec_status_polls_total',
+            'Obtained statuses of resources by type.',
+            ('resource',)
+        ))
+        self.finished = self.registry.register(Counter(
+            'retdec_finished_total',
+            'Finished resources by type and outcome.',
+            ('resource', 'outcome')
+        ))
+        # IDs of resources that are counted as in flight.
+        self._in_flight_ids = set()
+        self._lock = threading.Lock()
+
+    def on_response(self, request):
+        self.requests.inc(
+            kind=request.kind,
+            method=request.method,
+            code=request.status_code
+        )
+
+    def on_request_end(self, request, duration):
+        self.request_duration.observe(duration, kind=request.kind)
+
+    def on_error(self, request, error):
+        self._count_failure(error)
+
+    def on_bytes(self, request, direction, count):
+        counter = self.sent_bytes if direction == 'sent' \
+            else self.received_bytes
+        counter.inc(count, kind=request.kind)
+
+    def on_resource_start(self, resource):
+        resource_type = _resource_type(resource)
+        self.submissions.inc(resource=resource_type)
+        with self._lock:
+            self._in_flight_ids.add(resource.id)
+        self.in_flight.inc(resource=resource_type)
+
+    def on_resource_status(self, resource, status):
+        self.status_polls.inc(resource=_resource_type(resource))
+
+    def on_resource_finish(self, resource, status):
+        resource_type = _resource_type(resource)
+        self.finished.inc(
+            resource=resource_type,
+            outcome='failed' if status['failed'] else 'succeeded'
+        )
+        with self._lock:
+            # Resources that were not started by us (e.g. obtained from their
+            # IDs) are not counted as in flight.
+            if resource.id not in self._in_flight_ids:
+                return
+            self._in_flight_ids.remove(resource.id)
+        self.in_flight.dec(resource=resource_type)
+
+    def on_resource_error(self, resource, error):
+        self._count_failure(error)
+
+    def _count_failure(self, error):
+        """Counts the given error."""
+        self.failures.inc(
+            type=error.__class__.__name__,
+            code=error.code if isinstance(error, UnknownAPIError) else ''
+        )
+
+
+_default_hooks = None
+_default_hooks_lock = threading.Lock()
+
+
+def enable():
+    """Starts collecting metrics.
+
+    :returns: Hooks collecting the metrics (:class:`MetricsHooks`). Their
+        ``registry`` contains the metrics.
+
+    When the metrics are already being collected, the same hooks are
+    returned.
+    """
+    global _default_hooks
+    with _default_hooks_lock:
+        if _default_hooks is None:
+            _default_hooks = MetricsHooks()
+            hooks.register(_default_hooks)
+        return _default_hooks
+
+
+def disable():
+    """Stops collecting metrics and discards the collected metrics."""
+    global _default_hooks
+    with _default_hooks_lock:
+        if _default_hooks is not None:
+            hooks.unregister(_default_hooks)
+            _default_hooks = None
+
+
+def start_http_server(port, address='127.0.0.1', registry=None):
+    """Starts serving the metrics over HTTP in a background thread.
+
+    :param int port: Port to listen on (``0`` chooses a free port).
+    :param str address: Address to listen on. By default, the metrics are
+        available only from the local host.
+    :param Registry registry: Metrics to be served. If it is ``None``, the
+        metrics collected after calling :func:`enable()` are served.
+
+    :returns: The server. Its ``server_address`` attribute contains the
+        address and port on which it listens. Call its ``shutdown()`` method
+        to stop it.
+
+    The metrics are available at ``/metrics``.
+    """
+    registry = registry if registry is not None else enable().registry
+
+    class MetricsHandler(http.server.BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] != '/metrics':
+                self.send_error(404)
+                return
+            body = registry.render().encode('utf-8')
+            self.send_response(200)
+            self.send_header(
+                'Content-Type', 'text/plain; version=0.0.4; charset=utf-8'
+            )
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            # Do not clutter the output of the program.
+            pass
+
+    server = _ThreadingHTTPServer((address, port), MetricsHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+def write_textfile(path, registry=None):
+    """Writes the metrics into the given file.
+
+    :param str path: Path to the file. For the textfile collector of the node
+        exporter, its name has to end with ``.prom``.
+    :param Registry registry: Metrics to be written. If it is ``None``, the
+        metrics collected after calling :func:`enable()` are written.
+
+    The file is written atomically, so the collector never reads a partially
+    written file.
+    """
+    registry = registry if registry is not None else enable().registry
+    tmp_path = '{}.{}.tmp'.format(path, os.getpid())
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(registry.render())
+    os.replace(tmp_path, path)
+
+
+class _ThreadingHTTPServer(socketserver.ThreadingMixIn,
+                           http.server.HTTPServer):
+    """HTTP server that handles each request in a separate thread."""
+
+    daemon_threads = True
+
+
+def _resource_type(resource):
+    """Returns the type of the given resource (e.g. ``'decompilation'``)."""
+    return resource.__class__.__name__.lower()
+
+
+def _format_number(value):
+    """Formats the given number for the Prometheus text format."""
+    if value == math.inf:
+        return '+Inf'
+    elif isinstance(value, float) and value.is_integer():
+        return str(int(value)) + '.0'
+    return str(value)
+
+
+def _escape_label_value(value):
+    """Escapes the given value of a label."""
+    return str(value).replace('\\', r'\\').replace('"', r'\"') \
+        .replace('\n', r'\n')
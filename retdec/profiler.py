@@ -0,0 +1,259 @@
+#
+# Project:   retdec-python
+# Copyright: (c) 2015 by Petr Zemek <s3rvac@gmail.com> and contributors
+# License:   MIT, see the LICENSE file for more details
+#
+
+"""Profiling of decompilation phases on the server.
+
+:class:`PhaseProfiler` records when every phase of a decompilation (see
+:class:`~retdec.decompilation.DecompilationPhase`) was first observed and
+appends a record per finished decompilation to a log. :func:`read_records()`
+and :func:`summarize()` aggregate the records of many decompilations into
+percentiles of durations of the phases, e.g. to find out which decompilation
+parameters pay off.
+
+The log contains a JSON object per line, for example::
+
+    {"id": "8nK1wGDqWb", "params": {"mode": "bin"}, "phases":
+     [[null, "Initialization", 0.0], ["Front-End", "Initializing", 1.52],
+      ["Front-End", "Decoding", 2.08]], "total": 30.1, "failed": false}
+
+A phase is identified by its part and name because the same name may appear
+in several parts (e.g. "Initializing" in Front-End and Back-End). The times
+are the numbers of seconds since the decompilation has been started.
+Phases are observed by checking the status of decompilations, so their times
+are only as accurate as the interval between two status checks.
+"""
+
+import collections
+import json
+import math
+import threading
+import time
+
+from retdec import hooks
+
+#: Percentiles computed by :func:`summarize()` by default.
+DEFAULT_PERCENTILES = (50, 95, 99)
+
+#: Name of the pseudo-phase that covers the whole decompilation.
+TOTAL = 'Total'
+
+
+class PhaseProfiler(hooks.RequestHooks, hooks.ResourceHooks):
+    """Records phases of decompilations into a log.
+
+    :param str/file-like object log: Either path to the log (`str`), to which
+        records are appended, or an opened text file.
+
+    Use the profiler as a context manager. It is registered as hooks (see
+    :mod:`retdec.hooks`) when the context is entered, and unregistered and
+    closed when the context is exited:
+
+    .. code-block:: python
+
+        with PhaseProfiler('phases.jsonl'):
+            decompilation = decompiler.start_decompilation(input_file='a.exe')
+            decompilation.wait_until_finished()
+
+    Only decompilations that are started while the profiler is registered are
+    recorded. Their records are written when they are observed to have
+    finished.
+    """
+
+    def __init__(self, log):
+        if isinstance(log, str):
+            self._log = open(log, 'a', encoding='utf-8')
+            self._owns_log = True
+        else:
+            self._log = log
+            self._owns_log = False
+        # Resource ID -> record of a running decompilation.
+        self._records = {}
+        self._lock = threading.Lock()
+        # Parameters of the resources that are being started in the current
+        # thread (their IDs are not known until they are started).
+        self._local = threading.local()
+
+    def on_request_start(self, request):
+        if request.kind == 'upload':
+            self._local.params = request.params
+
+    def on_resource_start(self, resource):
+        record = {
+            'id': resource.id,
+            'params': self._local.__dict__.pop('params', {}),
+            'phases': [],
+            # Monotonic time is used to compute the durations. It is replaced
+            # with the total duration when the record is written.
+            'start': time.monotonic(),
+        }
+        with self._lock:
+            self._records[resource.id] = record
+
+    def on_resource_status(self, resource, status):
+        with self._lock:
+            record = self._records.get(resource.id)
+            if record is None:
+                return
+            elapsed = _round(time.monotonic() - record['start'])
+            phases = status.get('phases', [])
+            for phase in phases[len(record['phases']):]:
+                record['phases'].append(
+                    [phase['part'], phase['name'], elapsed]
+                )
+
+    def on_resource_finish(self, resource, status):
+        with self._lock:
+            record = self._records.pop(resource.id, None)
+            if record is None or not record['phases']:
+                # Resources without phases (e.g. analyses) are not recorded.
+                return
+            record['total'] = _round(time.monotonic() - record.pop('start'))
+            record['failed'] = status['failed']
+            self._log.write(json.dumps(record, separators=(',', ':')) + '\n')
+            self._log.flush()
+
+    def close(self):
+        """Closes the log (when it has been opened by the profiler).
+
+        Records of decompilations that have not finished yet are discarded.
+        """
+        with self._lock:
+            self._records.clear()
+            if self._owns_log:
+                self._log.close()
+
+    def __enter__(self):
+        hooks.register(self)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        hooks.unregister(self)
+        self.close()
+
+    def __repr__(self):
+        return '<{} log={!r}>'.format(
+            __name__ + '.' + self.__class__.__name__,
+            getattr(self._log, 'name', None)
+        )
+
+
+def read_records(path):
+    """Returns a generator of records from the given log.
+
+    :param str path: Path to the log written by :class:`PhaseProfiler`.
+
+    Empty and truncated lines (e.g. the last line of a log whose writer has
+    crashed) are skipped.
+    """
+    with open(path, encoding='utf-8') as log:
+        for line in log:
+            try:
+                yield json.loads(line)
+            except ValueError:
+                continue
+
+
+def phase_durations(record):
+    """Returns a list of pairs ``(phase, duration)`` for the given record.
+
+    A phase is a pair ``(part, name)``, where `part` may be ``None`` if the
+    phase does not belong to any part. The duration of a phase is the time
+    between its first observation and the first observation of the next phase
+    (or the finish of the decompilation for the last phase). The last pair is
+    the total duration of the decompilation, whose phase is
+    ``(None, TOTAL)``.
+    """
+    phases = record['phases']
+    durations = []
+    for (part, name, start), (_, _, end) in zip(phases, phases[1:]):
+        durations.append(((part, name), end - start))
+    if phases:
+        part, name, start = phases[-1]
+        durations.append(((part, name), record['total'] - start))
+    durations.append(((None, TOTAL), record['total']))
+    return durations
+
+
+def summarize(records, by=(), percentiles=DEFAULT_PERCENTILES,
+              include_failed=False):
+    """Computes percentiles of durations of phases in the given records.
+
+    :param iterable records: Records (see :func:`read_records()`).
+    :param tuple by: Names of decompilation parameters (e.g.
+        ``('decomp_optimizations',)``) by which the records are grouped.
+    :param tuple percentiles: Percentiles to be computed (from 0 to 100).
+    :param bool include_failed: Include records of failed decompilations?
+
+    :returns: A `dict` mapping groups to summaries. A group is a `tuple` of
+        values of the parameters from `by` (``None`` for parameters that were
+        not given). A summary is a list of triples ``(phase, count,
+        values)``, where `phase` is a pair ``(part, name)`` (see
+        :func:`phase_durations()`) and `values` are the percentiles of the
+        durations of the phase. The phases are in the order in which they
+        were observed and the last one is ``(None, TOTAL)``.
+
+    The percentiles are computed by NumPy when it is installed. Otherwise,
+    they are computed in pure Python in the same way (by linear
+    interpolation).
+    """
+    # Group -> phase -> durations (phases keep the order of observation).
+    durations = {}
+    for record in records:
+        if record['failed'] and not include_failed:
+            continue
+        group = tuple(record['params'].get(param) for param in by)
+        group_durations = durations.setdefault(
+            group, collections.OrderedDict()
+        )
+        for phase, duration in phase_durations(record):
+            group_durations.setdefault(phase, []).append(duration)
+
+    summaries = {}
+    for group, group_durations in durations.items():
+        total = group_durations.pop((None, TOTAL))
+        group_durations[(None, TOTAL)] = total
+        summaries[group] = [
+            (phase, len(values), _compute_percentiles(values, percentiles))
+            for phase, values in group_durations.items()
+        ]
+    return summaries
+
+
+def _compute_percentiles(values, percentiles):
+    """Returns a list of the given percentiles of the given values."""
+    numpy = _import_numpy()
+    if numpy is not None:
+        return [float(v) for v in numpy.percentile(values, percentiles)]
+
+    values = sorted(values)
+    result = []
+    for percentile in percentiles:
+        k = (len(values) - 1) * percentile / 100
+        lower = math.floor(k)
+        upper = min(lower + 1, len(values) - 1)
+        result.append(
+            values[lower] + (values[upper] - values[lower]) * (k - lower)
+        )
+    return result
+
+
+def _import_numpy():
+    """Returns the ``numpy`` module (``None`` when it is not installed).
+
+    NumPy is imported only when percentiles are computed because importing it
+    takes a lot of time and memory, which would be wasted by the tools that
+    merely record phases.
+    """
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+def _round(seconds):
+    """Rounds the given number of seconds for the log."""
+    return round(seconds, 3)
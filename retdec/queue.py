@@ -0,0 +1,572 @@
+#
+# Project:   retdec-python
+# Copyright: (c) 2015 by Petr Zemek <s3rvac@gmail.com> and contributors
+# License:   MIT, see the LICENSE file for more details
+#
+
+"""Work queues that allow several workers (possibly on different hosts) to
+cooperatively process a shared set of files without an external broker.
+
+A worker *leases* an item from the queue. While the lease is valid, the item is
+invisible to other workers. When the worker finishes the item, it
+*acknowledges* it. When the worker fails or crashes, the lease eventually
+expires (after the visibility timeout) and the item becomes available again,
+until the maximal number of attempts is reached. A worker processing an item
+for longer than the visibility timeout *renews* its lease from time to time.
+"""
+
+import abc
+import json
+import os
+import sqlite3
+import time
+import uuid
+
+from retdec.exceptions import LeaseLostError
+
+
+class WorkItem:
+    """An item leased from a work queue.
+
+    :param str id: Unique identifier of the item in the queue.
+    :param dict payload: Data of the item.
+    :param int attempts: How many times has the item been leased (including
+        the current lease)?
+    :param str token: Identifier of the lease.
+    """
+
+    def __init__(self, id, payload, attempts, token):
+        self._id = id
+        self._payload = payload
+        self._attempts = attempts
+        self._token = token
+
+    @property
+    def id(self):
+        """Unique identifier of the item in the queue (`str`)."""
+        return self._id
+
+    @property
+    def payload(self):
+        """Data of the item (`dict`)."""
+        return self._payload
+
+    @property
+    def attempts(self):
+        """How many times has the item been leased (`int`)?"""
+        return self._attempts
+
+    @property
+    def token(self):
+        """Identifier of the lease (`str`)."""
+        return self._token
+
+    def __repr__(self):
+        return '<{} id={!r} attempts={}>'.format(
+            __name__ + '.' + self.__class__.__name__,
+            self.id,
+            self.attempts
+        )
+
+
+class WorkQueue(metaclass=abc.ABCMeta):
+    """Base class of work queues.
+
+    :param int visibility_timeout: Number of seconds after which a lease
+        expires and the item becomes available to other workers.
+    :param int max_attempts: Maximal number of times an item is leased before
+        it is marked as failed.
+    """
+
+    #: States of items.
+    PENDING = 'pending'
+    LEASED = 'leased'
+    DONE = 'done'
+    FAILED = 'failed'
+
+    def __init__(self, visibility_timeout=3600, max_attempts=3):
+        self._visibility_timeout = visibility_timeout
+        self._max_attempts = max_attempts
+
+    @property
+    def visibility_timeout(self):
+        """Number of seconds after which a lease expires (`int`)."""
+        return self._visibility_timeout
+
+    @property
+    def max_attempts(self):
+        """Maximal number of times an item is leased (`int`)."""
+        return self._max_attempts
+
+    @abc.abstractmethod
+    def put(self, payload):
+        """Adds an item with the given payload (a JSON-serializable `dict`) to
+        the queue.
+
+        :returns: Unique identifier of the item (`str`).
+        """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def lease(self):
+        """Leases an available item from the queue.
+
+        :returns: The leased item (:class:`WorkItem`) or ``None`` when there
+            is no available item.
+
+        Items whose lease has expired are available again.
+        """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def renew(self, item):
+        """Extends the lease of the given leased item so that it expires
+        after the visibility timeout from now.
+
+        :raises LeaseLostError: When the lease has expired and the item has
+            been leased by another worker (or put back into the queue).
+        """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def ack(self, item):
+        """Marks the given leased item as done.
+
+        :raises LeaseLostError: When the lease has expired and the item has
+            been leased by another worker (or put back into the queue).
+        """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def fail(self, item, error=None):
+        """Returns the given leased item to the queue because it failed to be
+        processed.
+
+        :param str error: Reason of the failure.
+
+        When the item has reached the maximal number of attempts, it is marked
+        as failed and it is not leased anymore.
+
+        :raises LeaseLostError: When the lease has expired and the item has
+            been leased by another worker (or put back into the queue).
+        """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def counts(self):
+        """Returns a `dict` mapping states of items to their number."""
+        raise NotImplementedError
+
+    def close(self):
+        """Closes the queue."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __repr__(self):
+        return '<{}>'.format(
+            __name__ + '.' + self.__class__.__name__
+        )
+
+
+class SQLiteWorkQueue(WorkQueue):
+    """A work queue stored in an SQLite database.
+
+    :param str path: Path to the database. It is created when it does not
+        exist.
+    :param bool wal: Should the database be used in the WAL mode?
+
+    See :class:`WorkQueue` for a description of the other parameters.
+
+    The WAL mode allows workers to lease items while other workers write into
+    the database. However, SQLite supports the WAL mode only when all the
+    workers run on the same host. When the database is placed on a shared
+    network filesystem, pass ``wal=False`` (or use
+    :class:`DirectoryWorkQueue`).
+    """
+
+    def __init__(self, path, wal=True, **kwargs):
+        super().__init__(**kwargs)
+        self._path = path
+        # Leases are performed in explicit transactions (see lease()), so
+        # disable the implicit ones.
+        self._db = sqlite3.connect(path, timeout=60, isolation_level=None)
+        if wal:
+            self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS items ('
+            ' id INTEGER PRIMARY KEY AUTOINCREMENT,'
+            ' payload TEXT NOT NULL,'
+            ' state TEXT NOT NULL,'
+            ' attempts INTEGER NOT NULL DEFAULT 0,'
+            ' lease_expires REAL,'
+            ' lease_token TEXT,'
+            ' error TEXT'
+            ')'
+        )
+        self._db.execute(
+            'CREATE INDEX IF NOT EXISTS items_state ON items (state, id)'
+        )
+
+    def put(self, payload):
+        cursor = self._db.execute(
+            'INSERT INTO items (payload, state) VALUES (?, ?)',
+            (json.dumps(payload), self.PENDING)
+        )
+        return str(cursor.lastrowid)
+
+    def lease(self):
+        now = time.time()
+        token = uuid.uuid4().hex
+        # BEGIN IMMEDIATE acquires the write lock right away, so two workers
+        # cannot lease the same item.
+        self._db.execute('BEGIN IMMEDIATE')
+        try:
+            # Items whose lease expired after the last attempt have failed.
+            self._db.execute(
+                'UPDATE items SET state = ?, error = ?'
+                ' WHERE state = ? AND lease_expires < ? AND attempts >= ?',
+                (self.FAILED, 'lease expired', self.LEASED, now,
+                 self.max_attempts)
+            )
+            row = self._db.execute(
+                'SELECT id, payload, attempts FROM items'
+                ' WHERE state = ? OR (state = ? AND lease_expires < ?)'
+                ' ORDER BY id LIMIT 1',
+                (self.PENDING, self.LEASED, now)
+            ).fetchone()
+            if row is None:
+                self._db.execute('COMMIT')
+                return None
+
+            id, payload, attempts = row
+            self._db.execute(
+                'UPDATE items'
+                ' SET state = ?, attempts = ?, lease_expires = ?,'
+                ' lease_token = ?'
+                ' WHERE id = ?',
+                (self.LEASED, attempts + 1, now + self.visibility_timeout,
+                 token, id)
+            )
+            self._db.execute('COMMIT')
+        except BaseException:
+            self._db.execute('ROLLBACK')
+            raise
+        return WorkItem(str(id), json.loads(payload), attempts + 1, token)
+
+    def renew(self, item):
+        cursor = self._db.execute(
+            'UPDATE items SET lease_expires = ?'
+            ' WHERE id = ? AND state = ? AND lease_token = ?',
+            (time.time() + self.visibility_timeout, int(item.id), self.LEASED,
+             item.token)
+        )
+        if cursor.rowcount != 1:
+            raise LeaseLostError(item.id)
+
+    def ack(self, item):
+        self._finish_lease(item, self.DONE, None)
+
+    def fail(self, item, error=None):
+        state = (
+            self.FAILED if item.attempts >= self.max_attempts
+            else self.PENDING
+        )
+        self._finish_lease(item, state, error)
+
+    def _finish_lease(self, item, state, error):
+        """Moves the given leased item into the given state."""
+        cursor = self._db.execute(
+            'UPDATE items'
+            ' SET state = ?, error = ?, lease_expires = NULL,'
+            ' lease_token = NULL'
+            ' WHERE id = ? AND state = ? AND lease_token = ?',
+            (state, error, int(item.id), self.LEASED, item.token)
+        )
+        if cursor.rowcount != 1:
+            raise LeaseLostError(item.id)
+
+    def counts(self):
+        counts = dict.fromkeys(
+            (self.PENDING, self.LEASED, self.DONE, self.FAILED), 0
+        )
+        counts.update(self._db.execute(
+            'SELECT state, COUNT(*) FROM items GROUP BY state'
+        ))
+        return counts
+
+    def close(self):
+        self._db.close()
+
+    def __repr__(self):
+        return '<{} path={!r}>'.format(
+            __name__ + '.' + self.__class__.__name__,
+            self._path
+        )
+
+
+class DirectoryWorkQueue(WorkQueue):
+    """A work queue stored in a directory, one file per item.
+
+    :param str path: Path to the directory. It is created when it does not
+        exist.
+
+    See :class:`WorkQueue` for a description of the other parameters.
+
+    Items are moved between the ``pending``, ``leased``, ``done``, and
+    ``failed`` subdirectories by renaming, which is atomic. Hence, the queue
+    can be shared by workers on different hosts through a network filesystem
+    that provides atomic renames (e.g. NFS). Files in the subdirectories are
+    never modified: a worker first moves a file into a private file, modifies
+    it, and then moves it into the target subdirectory. The expiration time
+    of a lease is stored as the modification time of the leased file, so the
+    clocks of the hosts should be synchronized.
+    """
+
+    def __init__(self, path, **kwargs):
+        super().__init__(**kwargs)
+        self._path = path
+        for state in (self.PENDING, self.LEASED, self.DONE, self.FAILED):
+            os.makedirs(os.path.join(path, state), exist_ok=True)
+
+    def put(self, payload):
+        # Prefixing the identifier with the current time makes items leased
+        # roughly in the order in which they were put into the queue.
+        id = '{:017.6f}-{}'.format(time.time(), uuid.uuid4().hex)
+        self._write_item(self.PENDING, id, {
+            'payload': payload,
+            'attempts': 0,
+            'error': None
+        })
+        return id
+
+    def lease(self):
+        self._return_expired_leases()
+
+        for file_name in sorted(os.listdir(self._state_dir(self.PENDING))):
+            if not file_name.endswith('.json'):
+                continue
+            id = file_name[:-len('.json')]
+            token = uuid.uuid4().hex
+            # Only one worker succeeds in claiming the file.
+            claim_path = self._claim(
+                self._item_path(self.PENDING, id), id, token
+            )
+            if claim_path is None:
+                continue
+
+            try:
+                data = self._read_file(claim_path)
+            except ValueError:
+                # The item is corrupted, so it cannot be processed.
+                self._move(claim_path, self._item_path(self.FAILED, id))
+                continue
+            data['attempts'] += 1
+            try:
+                self._rewrite_file(claim_path, data)
+            except FileNotFoundError:
+                # The claim has expired and the item has been returned.
+                continue
+            # The expiration time has to be set before the file appears in
+            # the directory with leased items. Otherwise, other workers would
+            # consider the lease expired.
+            expires = time.time() + self.visibility_timeout
+            os.utime(claim_path, (expires, expires))
+            if not self._move(claim_path, self._leased_item_path(id, token)):
+                # The claim has expired and the item has been returned.
+                continue
+            return WorkItem(id, data['payload'], data['attempts'], token)
+        return None
+
+    def renew(self, item):
+        # The file of the leased item is renamed when another worker returns
+        # the item to the queue, so it cannot be renewed afterwards.
+        expires = time.time() + self.visibility_timeout
+        try:
+            os.utime(
+                self._leased_item_path(item.id, item.token),
+                (expires, expires)
+            )
+        except FileNotFoundError:
+            raise LeaseLostError(item.id)
+
+    def ack(self, item):
+        self._finish_lease(item, self.DONE, None)
+
+    def fail(self, item, error=None):
+        state = (
+            self.FAILED if item.attempts >= self.max_attempts
+            else self.PENDING
+        )
+        self._finish_lease(item, state, error)
+
+    def _finish_lease(self, item, state, error):
+        """Moves the given leased item into the given state."""
+        claim_path = self._claim(
+            self._leased_item_path(item.id, item.token), item.id, item.token
+        )
+        if claim_path is None:
+            raise LeaseLostError(item.id)
+        try:
+            data = self._read_file(claim_path)
+            data['error'] = error
+            self._rewrite_file(claim_path, data)
+        except FileNotFoundError:
+            raise LeaseLostError(item.id)
+        self._move(claim_path, self._item_path(state, item.id))
+
+    def _return_expired_leases(self):
+        """Returns items with expired leases to the queue (or marks them as
+        failed when they have reached the maximal number of attempts).
+
+        Items left claimed by workers that crashed are returned as well.
+        """
+        now = time.time()
+        leased_dir = self._state_dir(self.LEASED)
+        for file_name in os.listdir(leased_dir):
+            leased_path = os.path.join(leased_dir, file_name)
+            try:
+                if os.path.getmtime(leased_path) >= now:
+                    continue
+            except FileNotFoundError:
+                continue
+            id, token, _ = file_name.rsplit('.', 2)
+            claim_path = self._claim(leased_path, id, token)
+            if claim_path is not None:
+                self._return_item(claim_path, id)
+
+        for file_name in os.listdir(self._path):
+            if not file_name.endswith('.claim'):
+                continue
+            id, _, deadline, _ = file_name[1:].rsplit('.', 3)
+            if int(deadline) < now:
+                self._return_item(os.path.join(self._path, file_name), id)
+
+    def _return_item(self, claim_path, id):
+        """Returns the claimed item to the queue (or marks it as failed when
+        it has reached the maximal number of attempts).
+        """
+        try:
+            data = self._read_file(claim_path)
+        except FileNotFoundError:
+            # Another worker has already returned the item.
+            return
+        except ValueError:
+            # The item has been left partially written by a crashed worker.
+            self._move(claim_path, self._item_path(self.FAILED, id))
+            return
+
+        if data['attempts'] >= self.max_attempts:
+            data['error'] = 'lease expired'
+            try:
+                self._rewrite_file(claim_path, data)
+            except FileNotFoundError:
+                return
+            self._move(claim_path, self._item_path(self.FAILED, id))
+        else:
+            self._move(claim_path, self._item_path(self.PENDING, id))
+
+    def _claim(self, path, id, token):
+        """Moves the file of the given item into a file that is private to
+        the current worker.
+
+        :returns: Path to the private file (``None`` when another worker has
+            moved the file first).
+
+        The private file is outside of the state directories, so it can be
+        modified without other workers seeing it partially written. Its name
+        contains a deadline after which the item is returned to the queue by
+        other workers, so the item is not lost when the current worker
+        crashes.
+        """
+        deadline = int(time.time() + self.visibility_timeout) + 1
+        claim_path = os.path.join(
+            self._path,
+            '.{}.{}.{}.claim'.format(id, token, deadline)
+        )
+        return claim_path if self._move(path, claim_path) else None
+
+    def _move(self, src_path, dst_path):
+        """Renames the given file.
+
+        :returns: ``False`` when the file no longer exists (i.e. another
+            worker has moved it first), ``True`` otherwise.
+        """
+        try:
+            os.rename(src_path, dst_path)
+        except FileNotFoundError:
+            return False
+        return True
+
+    def counts(self):
+        return {
+            state: len(os.listdir(self._state_dir(state)))
+            for state in (self.PENDING, self.LEASED, self.DONE, self.FAILED)
+        }
+
+    def _state_dir(self, state):
+        """Returns a path to the directory with items in the given state."""
+        return os.path.join(self._path, state)
+
+    def _item_path(self, state, id):
+        """Returns a path to the file of the given item."""
+        return os.path.join(self._state_dir(state), id + '.json')
+
+    def _leased_item_path(self, id, token):
+        """Returns a path to the file of the given leased item."""
+        return os.path.join(
+            self._state_dir(self.LEASED),
+            '{}.{}.json'.format(id, token)
+        )
+
+    def _write_item(self, state, id, data):
+        """Writes data of the given item into the given state directory."""
+        # Write the data into a temporary file first so that other workers
+        # never see a partially written item.
+        tmp_path = os.path.join(self._path, '.{}.tmp'.format(id))
+        self._write_file(tmp_path, data)
+        os.rename(tmp_path, self._item_path(state, id))
+
+    def _read_file(self, path):
+        """Reads data of an item from the given file."""
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def _write_file(self, path, data):
+        """Writes data of an item into the given file."""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+
+    def _rewrite_file(self, path, data):
+        """Writes data of an item into the given existing file.
+
+        :raises FileNotFoundError: When the file no longer exists. Unlike
+            :func:`_write_file()`, the file is never re-created after another
+            worker has moved it.
+        """
+        with open(path, 'r+', encoding='utf-8') as f:
+            f.truncate()
+            json.dump(data, f)
+
+    def __repr__(self):
+        return '<{} path={!r}>'.format(
+            __name__ + '.' + self.__class__.__name__,
+            self._path
+        )
+
+
+def open_queue(path, **kwargs):
+    """Opens a work queue from the given path.
+
+    :param str path: Path to the queue.
+
+    If `path` is an existing directory, :class:`DirectoryWorkQueue` is
+    returned. Otherwise, :class:`SQLiteWorkQueue` is returned. `kwargs` are
+    passed to the initializer of the queue.
+    """
+    if os.path.isdir(path):
+        return DirectoryWorkQueue(path, **kwargs)
+    return SQLiteWorkQueue(path, **kwargs)
@@ -6,12 +6,15 @@
 
 """Base class of all resources."""
 
+import codecs
 import contextlib
 import datetime
-import os
 import shutil
 import time
 
+from retdec import hooks
+from retdec.exceptions import BufferTooSmallError
+
 
 class Resource:
     """Base class of all resources.
@@ -24,6 +27,10 @@ class Resource:
     #: Time interval after which we can update resource's state.
     _STATE_UPDATE_INTERVAL = datetime.timedelta(seconds=0.5)
 
+    #: Size of chunks (in bytes) in which text files are read when iterating
+    #: over their lines.
+    _LINES_CHUNK_SIZE = 64 * 1024
+
     def __init__(self, id, conn):
         self._id = id
         self._conn = conn
@@ -38,6 +45,9 @@ class Resource:
         # details.
         self._last_updated = datetime.datetime.min
 
+        # Hooks are notified only once about the resource having finished.
+        self._finish_reported = False
+
     @property
     def id(self):
         """Unique identifier of the resource."""
@@ -87,7 +97,17 @@ class Resource:
     def _update_state_if_needed(self):
         """Updates the state of the resource (if needed)."""
         if self._state_should_be_updated():
-            self._update_state()
+            status = self._update_state()
+            self._notify_hooks_about_status(status)
+
+    def _notify_hooks_about_status(self, status):
+        """Notifies the registered hooks about the given (just obtained)
+        status.
+        """
+        hooks.notify('on_resource_status', self, status)
+        if self._finished and not self._finish_reported:
+            self._finish_reported = True
+            hooks.notify('on_resource_finish', self, status)
 
     def _state_should_be_updated(self):
         """Should the state of the resource be updated?"""
@@ -128,6 +148,7 @@ class Resource:
         if on_failure is not None:
             obj = on_failure(*args)
             if isinstance(obj, Exception):
+                hooks.notify('on_resource_error', self, obj)
                 raise obj
 
     def _get_file_contents(self, file_path, is_text_file):
@@ -142,19 +163,110 @@ class Resource:
                 contents = contents.decode()
             return contents
 
-    def _get_file_and_save_it(self, file_path, directory=None):
+    def _iter_file_lines(self, file_path):
+        """Obtains a text file from the given path and yields its lines.
+
+        :param str file_path: Path to the file to be downloaded.
+
+        The lines include their terminating newlines (except for the last line
+        if the file does not end with a newline). The file is read in chunks
+        and decoded incrementally, so it is never stored in memory as a whole.
+        """
+        decoder = codecs.getincrementaldecoder('utf-8')()
+        with contextlib.closing(self._conn.get_file(file_path)) as file:
+            # Pieces of the line that is incomplete until a newline is read.
+            # They are joined only once the line is complete so that a very
+            # long line is not copied again with every chunk.
+            pieces = []
+            while True:
+                chunk = file.read(self._LINES_CHUNK_SIZE)
+                lines = decoder.decode(chunk, final=not chunk).split('\n')
+                if len(lines) > 1:
+                    pieces.append(lines[0])
+                    yield ''.join(pieces) + '\n'
+                    pieces = []
+                    for line in lines[1:-1]:
+                        yield line + '\n'
+                if lines[-1]:
+                    pieces.append(lines[-1])
+                if not chunk:
+                    break
+            if pieces:
+                yield ''.join(pieces)
+
+    def _read_file_into(self, file_path, buffer):
+        """Obtains a file from `file_path` and reads it into `buffer`.
+
+        :param str file_path: Path to the file to be downloaded.
+        :param buffer: Writable object supporting the buffer protocol (e.g.
+            `bytearray` or `memoryview`).
+
+        :returns: Number of bytes read into `buffer` (`int`).
+
+        :raises BufferTooSmallError: When the file does not fit into `buffer`.
+
+        The file is read directly into `buffer`, so no intermediate copies are
+        made.
+        """
+        with memoryview(buffer) as buffer_view, buffer_view.cast('B') as view:
+            with contextlib.closing(self._conn.get_file(file_path)) as file:
+                # Fail early when the size of the file is known in advance.
+                if file.size is not None and file.size > len(view):
+                    raise BufferTooSmallError(len(view), file.size)
+
+                size = 0
+                while size < len(view):
+                    n = file.readinto(view[size:])
+                    if not n:
+                        return size
+                    size += n
+
+                # The buffer is full, so the file fits only if there is no
+                # more data.
+                if file.read(1):
+                    raise BufferTooSmallError(len(view))
+                return size
+
+    def _get_file_and_write_it(self, file_path, dst):
+        """Obtains a file from `file_path` and writes it into `dst`.
+
+        :param str file_path: Path to the file to be downloaded.
+        :param dst: Binary file-like object into which the file is written.
+
+        The file is copied in chunks, so it is never stored in memory as a
+        whole.
+        """
+        with contextlib.closing(self._conn.get_file(file_path)) as src:
+            shutil.copyfileobj(src, dst)
+
+    def _get_file_and_save_it(self, file_path, directory=None, key=None):
         """Obtains a file from `file_path` and saves it to `directory`.
 
         :param str file_path: Path to the file to be downloaded.
-        :param str directory: Directory in which the file will be stored.
+        :param directory: Directory in which the file will be stored. Either a
+            path (`str`) or a store (:class:`~retdec.storage.OutputStore`).
+        :param str key: Key under which the file is saved in packed stores.
 
         :returns: Path to the saved file (`str`).
 
-        If `directory` is ``None``, the current working directory is used.
+        The file is saved atomically, i.e. it never appears truncated. If
+        `directory` is ``None``, the current working directory is used.
         """
-        directory = directory or os.getcwd()
+        store = self._get_store(directory)
         with contextlib.closing(self._conn.get_file(file_path)) as src:
-            dst_path = os.path.join(directory, src.name)
-            with open(dst_path, 'wb') as dst:
-                shutil.copyfileobj(src, dst)
-                return dst_path
+            return store.save(src, src.name, key)
+
+    def _get_store(self, directory, durability='none'):
+        """Returns a store for saving files into the given directory.
+
+        When `directory` already is a store, it is returned unchanged.
+        """
+        # Imported here because the module (with the modules it uses) is not
+        # needed until outputs are saved, so the tools start faster without
+        # it.
+        from retdec.storage import DirectoryStore
+        from retdec.storage import OutputStore
+
+        if isinstance(directory, OutputStore):
+            return directory
+        return DirectoryStore(directory, durability)
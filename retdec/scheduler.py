@@ -0,0 +1,379 @@
+#
+# Project:   retdec-python
+# Copyright: (c) 2015 by Petr Zemek <s3rvac@gmail.com> and contributors
+# License:   MIT, see the LICENSE file for more details
+#
+
+"""Scheduling of submissions of many files."""
+
+import abc
+import collections
+import heapq
+import itertools
+import os
+import threading
+
+from retdec.batch import Submission
+from retdec.batch import _submission_errors
+from retdec.exceptions import InvalidValueError
+
+
+class Job:
+    """A job waiting in a scheduler.
+
+    :param dict params: Parameters with which the job is to be started.
+    :param int priority: Priority of the job (jobs with higher priorities are
+        started sooner by :class:`PriorityPolicy`).
+    :param str feed: Name of the feed from which the job comes (used by
+        :class:`FairSharePolicy`).
+    """
+
+    def __init__(self, params, priority=0, feed=None):
+        self._params = params
+        self._priority = priority
+        self._feed = feed
+
+    @property
+    def params(self):
+        """Parameters with which the job is to be started (`dict`)."""
+        return self._params
+
+    @property
+    def priority(self):
+        """Priority of the job (`int`)."""
+        return self._priority
+
+    @property
+    def feed(self):
+        """Name of the feed from which the job comes (`str`)."""
+        return self._feed
+
+    def __repr__(self):
+        return '<{} params={!r} priority={!r} feed={!r}>'.format(
+            __name__ + '.' + self.__class__.__name__,
+            self.params,
+            self.priority,
+            self.feed
+        )
+
+
+class SchedulingPolicy(metaclass=abc.ABCMeta):
+    """Base class of scheduling policies.
+
+    A policy holds the jobs waiting to be started and decides which of them
+    is started next.
+    """
+
+    @abc.abstractmethod
+    def push(self, job):
+        """Adds the given job (:class:`Job`) to the waiting jobs."""
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def pop(self):
+        """Removes and returns the job that should be started next."""
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def __len__(self):
+        raise NotImplementedError
+
+    def __repr__(self):
+        return '<{}>'.format(
+            __name__ + '.' + self.__class__.__name__
+        )
+
+
+class FIFOPolicy(SchedulingPolicy):
+    """Starts jobs in the order in which they were added."""
+
+    def __init__(self):
+        self._jobs = collections.deque()
+
+    def push(self, job):
+        self._jobs.append(job)
+
+    def pop(self):
+        return self._jobs.popleft()
+
+    def __len__(self):
+        return len(self._jobs)
+
+
+class _KeyPolicy(SchedulingPolicy):
+    """Starts jobs in the ascending order of their keys.
+
+    Jobs with equal keys are started in the order in which they were added.
+    """
+
+    def __init__(self):
+        self._jobs = []
+        self._counter = itertools.count()
+
+    @abc.abstractmethod
+    def _key(self, job):
+        """Returns the key of the given job."""
+        raise NotImplementedError
+
+    def push(self, job):
+        heapq.heappush(self._jobs, (self._key(job), next(self._counter), job))
+
+    def pop(self):
+        return heapq.heappop(self._jobs)[-1]
+
+    def __len__(self):
+        return len(self._jobs)
+
+
+def input_file_size(params):
+    """Returns the size of the input file from the given parameters (in
+    bytes).
+
+    When the size cannot be determined (e.g. the input file is not a path to
+    an existing file), it returns ``0``.
+    """
+    input_file = params.get('input_file')
+    if not isinstance(input_file, str):
+        return 0
+    try:
+        return os.path.getsize(input_file)
+    except OSError:
+        return 0
+
+
+class ShortestJobFirstPolicy(_KeyPolicy):
+    """Starts the shortest jobs first.
+
+    :param callable estimate: Function that gets parameters of a job and
+        returns its estimated duration (or any other comparable value).
+
+    By default, the duration is estimated by the size of the input file (see
+    :func:`input_file_size()`).
+    """
+
+    def __init__(self, estimate=input_file_size):
+        super().__init__()
+        self._estimate = estimate
+
+    def _key(self, job):
+        return self._estimate(job.params)
+
+
+class PriorityPolicy(_KeyPolicy):
+    """Starts jobs with higher priorities first."""
+
+    def _key(self, job):
+        return -job.priority
+
+
+class FairSharePolicy(SchedulingPolicy):
+    """Takes turns in starting jobs from different feeds.
+
+    :param callable policy_factory: Function returning a policy that orders
+        jobs within a single feed.
+
+    A feed that adds many jobs thus does not delay jobs from other feeds.
+    """
+
+    def __init__(self, policy_factory=FIFOPolicy):
+        self._policy_factory = policy_factory
+        self._feeds = {}
+        # Feeds with waiting jobs, in the order in which they take turns.
+        self._turns = collections.deque()
+
+    def push(self, job):
+        policy = self._feeds.get(job.feed)
+        if policy is None:
+            policy = self._feeds[job.feed] = self._policy_factory()
+        if not policy:
+            self._turns.append(job.feed)
+        policy.push(job)
+
+    def pop(self):
+        feed = self._turns.popleft()
+        policy = self._feeds[feed]
+        job = policy.pop()
+        if policy:
+            self._turns.append(feed)
+        return job
+
+    def __len__(self):
+        return sum(len(policy) for policy in self._feeds.values())
+
+
+class Scheduler:
+    """Starts jobs in the order given by a scheduling policy while keeping the
+    number of jobs in flight under a limit.
+
+    :param callable start: Function that gets parameters of a job and starts
+        it (e.g. a decompilation). It returns the started resource.
+    :param SchedulingPolicy policy: Scheduling policy. By default,
+        :class:`FIFOPolicy` is used.
+    :param int max_in_flight: Maximal number of jobs that are in flight at the
+        same time.
+    :param retdec.limiter.InFlightLimiter limiter: Limiter of the number of
+        jobs running remotely. When given, the jobs are started through it, so
+        they wait in the scheduler while the remote limit is reached.
+    :param int max_pending: Maximal number of jobs waiting to be started.
+        When it is reached, :func:`add()` blocks until a job is started. By
+        default, the number of waiting jobs is not limited.
+
+    A job is in flight from the moment it is started until the function
+    passed to :func:`run()` finishes its processing. The policy decides which
+    job is started next at the moment a slot becomes available, so jobs added
+    later can overtake jobs added sooner.
+    """
+
+    def __init__(self, start, policy=None, max_in_flight=4, limiter=None,
+                 max_pending=None):
+        if max_in_flight < 1:
+            raise InvalidValueError('max_in_flight', max_in_flight)
+        if max_pending is not None and max_pending < 1:
+            raise InvalidValueError('max_pending', max_pending)
+
+        self._start = start
+        self._policy = policy if policy is not None else FIFOPolicy()
+        self._max_in_flight = max_in_flight
+        self._limiter = limiter
+        self._max_pending = max_pending
+        self._lock = threading.Lock()
+        # Signaled when a job is added or the scheduler is closed.
+        self._changed = threading.Condition(self._lock)
+        # Signaled when a job is started or the scheduler is closed.
+        self._popped = threading.Condition(self._lock)
+        self._closed = False
+
+    @property
+    def policy(self):
+        """Scheduling policy (:class:`SchedulingPolicy`)."""
+        return self._policy
+
+    @property
+    def max_in_flight(self):
+        """Maximal number of jobs in flight (`int`)."""
+        return self._max_in_flight
+
+    def add(self, params, priority=0, feed=None):
+        """Adds a job to be started.
+
+        :param dict params: Parameters with which the job is to be started.
+        :param int priority: Priority of the job.
+        :param str feed: Name of the feed from which the job comes.
+
+        Jobs may be added even while :func:`run()` is running. However, once
+        all the added jobs have been started, :func:`run()` starts no more
+        jobs (unless it waits for them until the scheduler is closed).
+
+        When `max_pending` jobs are waiting to be started, it blocks until one
+        of them is started or the scheduler is closed. Jobs can thus be added
+        from a long (or endless) source without keeping all of them in memory.
+        """
+        with self._lock:
+            while (self._max_pending is not None and not self._closed and
+                    len(self._policy) >= self._max_pending):
+                self._popped.wait()
+            self._policy.push(Job(params, priority, feed))
+            self._changed.notify()
+
+    def pending(self):
+        """Returns the number of jobs waiting to be started."""
+        with self._lock:
+            return len(self._policy)
+
+    def close(self, discard_pending=False):
+        """Closes the scheduler, so :func:`run()` no longer waits for new
+        jobs.
+
+        :param bool discard_pending: Discard the jobs that have not been
+            started yet?
+
+        It may be called from any thread.
+        """
+        with self._lock:
+            self._closed = True
+            if discard_pending:
+                while self._policy:
+                    self._policy.pop()
+            self._changed.notify_all()
+            self._popped.notify_all()
+
+    def run(self, finish, until_closed=False):
+        """Starts all the added jobs and processes them.
+
+        :param callable finish: Function that gets a
+            :class:`~retdec.batch.Submission` for every job (including jobs
+            that failed to be started) and processes it (e.g. waits until the
+            decompilation finishes and saves its outputs).
+        :param bool until_closed: Wait for new jobs until the scheduler is
+            closed by :func:`close()`? This allows processing jobs that are
+            continuously added by another thread.
+
+        `finish` is called from a pool of threads. This method returns when
+        there are no more jobs to be started (and, when `until_closed` is
+        ``True``, the scheduler has been closed) and all the started jobs
+        have been processed. Errors other than those from starting the jobs
+        are propagated.
+        """
+        slots = threading.BoundedSemaphore(self._max_in_flight)
+
+        def process(job):
+            try:
+                finish(self._start_job(job))
+            finally:
+                slots.release()
+
+        import concurrent.futures
+
+        with concurrent.futures.ThreadPoolExecutor(
+                self._max_in_flight) as executor:
+            futures = set()
+            while True:
+                # Wait for a free slot before choosing the next job so that the
+                # choice reflects all the jobs added so far.
+                slots.acquire()
+                job = self._next_job(wait=until_closed)
+                if job is None:
+                    slots.release()
+                    break
+                futures.add(executor.submit(process, job))
+
+                # Forget the processed jobs so that the memory does not grow
+                # with the number of jobs.
+                for future in [f for f in futures if f.done()]:
+                    futures.remove(future)
+                    future.result()
+
+            for future in futures:
+                future.result()
+
+    def _next_job(self, wait=False):
+        """Returns the job that should be started next (or ``None``).
+
+        When `wait` is ``True``, it waits for a job until the scheduler is
+        closed.
+        """
+        with self._lock:
+            while wait and not self._policy and not self._closed:
+                self._changed.wait()
+            if not self._policy:
+                return None
+            self._popped.notify()
+            return self._policy.pop()
+
+    def _start_job(self, job):
+        """Starts the given job and returns a submission."""
+        try:
+            if self._limiter is not None:
+                resource = self._limiter.start(self._start, job.params)
+            else:
+                resource = self._start(job.params)
+            return Submission(job.params, resource=resource)
+        except _submission_errors() as ex:
+            return Submission(job.params, error=ex)
+
+    def __repr__(self):
+        return '<{} policy={!r} max_in_flight={}>'.format(
+            __name__ + '.' + self.__class__.__name__,
+            self.policy,
+            self.max_in_flight
+        )
@@ -9,6 +9,7 @@
 import os
 
 from retdec import DEFAULT_API_URL
+from retdec import hooks
 from retdec.conn import APIConnection
 from retdec.exceptions import InvalidValueError
 from retdec.exceptions import MissingAPIKeyError
@@ -19,11 +20,16 @@ class Service:
 
     :param str api_key: API key to be used for authentication.
     :param str api_url: URL to the API.
+    :param str daemon_socket: Path to the socket of a daemon through which
+        API requests are sent (see :mod:`retdec.daemon`).
+
+    When `daemon_socket` is not given, requests are sent directly to the API.
     """
 
-    def __init__(self, *, api_key=None, api_url=None):
+    def __init__(self, *, api_key=None, api_url=None, daemon_socket=None):
         self._api_key = self._get_api_key_to_use(api_key)
         self._api_url = self._get_api_url_to_use(api_url)
+        self._daemon_socket = daemon_socket
 
     @property
     def api_key(self):
@@ -35,13 +41,35 @@ class Service:
         """URL to the API (`str`)."""
         return self._api_url
 
+    @property
+    def daemon_socket(self):
+        """Path to the socket of the daemon through which API requests are
+        sent (`str`, ``None`` when they are sent directly).
+        """
+        return self._daemon_socket
+
     def _create_new_api_connection(self, path):
         """Creates a new API connection from the given path.
 
         :param str path: Path that is appended after the API URL.
         """
+        if self._daemon_socket is not None:
+            # Imported here because the module is only needed when a daemon
+            # is used.
+            from retdec.daemon import DaemonConnection
+
+            return DaemonConnection(
+                self._daemon_socket, self.api_url + path, self.api_key
+            )
         return APIConnection(self.api_url + path, self.api_key)
 
+    def _resource_started(self, resource):
+        """Notifies the registered hooks that the given resource has been
+        started and returns it.
+        """
+        hooks.notify('on_resource_start', resource)
+        return resource
+
     @staticmethod
     def _get_api_key_to_use(api_key):
         """Returns an API key to be used based on the given key and environment
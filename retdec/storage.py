@@ -0,0 +1,566 @@
+#
+# Project:   retdec-python
+# Copyright: (c) 2015 by Petr Zemek <s3rvac@gmail.com> and contributors
+# License:   MIT, see the LICENSE file for more details
+#
+
+"""Storage of downloaded output files.
+
+Output files are stored either as separate files in a directory
+(:class:`DirectoryStore`) or packed into a single container
+(:class:`ZipStore`, :class:`SQLiteStore`). Packed outputs are read by
+:func:`open_store_reader()`.
+
+The ``zipfile`` and ``sqlite3`` modules are imported only by the stores that
+use them, so saving outputs into a directory does not pay for their import.
+"""
+
+import abc
+import binascii
+import io
+import os
+import shutil
+import sys
+import threading
+import time
+
+from retdec.exceptions import InvalidValueError
+
+
+class OutputStore(metaclass=abc.ABCMeta):
+    """Base class of all stores of output files.
+
+    The stores can be used as context managers, which call :func:`close()`
+    upon exit, or :func:`abort()` when the block is left by an exception. They
+    can be shared by several threads.
+    """
+
+    #: Supported durabilities.
+    DURABILITIES = ('none', 'file', 'batch')
+
+    @abc.abstractmethod
+    def save(self, src, name, key=None):
+        """Saves the contents of the given file into the store.
+
+        :param src: Binary file-like object whose contents are saved.
+        :param str name: Name of the saved file.
+        :param str key: Key under which the file is saved in packed stores,
+            e.g. ``'hll'`` or ``'cfgs/main'``. If it is ``None``, `name` is
+            used.
+
+        :returns: Path to the saved file (`str`).
+        """
+
+    def commit(self):
+        """Makes the files saved since the last commit durable."""
+
+    def close(self):
+        """Commits the saved files and closes the store."""
+        self.commit()
+
+    def abort(self):
+        """Discards the files saved since the last commit and closes the
+        store.
+        """
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is not None:
+            self.abort()
+        else:
+            self.close()
+
+
+class DirectoryStore(OutputStore):
+    """Stores files into a directory.
+
+    :param str directory: Path to the directory. If it is ``None``, the
+        current working directory is used.
+    :param str durability: When the saved files are flushed to the disk. One
+        of :attr:`DURABILITIES` (see below).
+
+    Every file is written into a temporary file in `directory` first, which is
+    then atomically renamed to the final name. Hence, a crash never leaves a
+    truncated file under the final name.
+
+    The durability specifies what happens after a crash of the operating
+    system (e.g. a power loss):
+
+    * ``'none'``: The files are not flushed. Recently saved files may be
+      missing after the crash.
+    * ``'file'``: Every file is flushed (``fsync``) before it is renamed, and
+      the directory is flushed after the rename. A file is durable once
+      :func:`save()` returns.
+    * ``'batch'``: The renames are postponed until :func:`commit()`, which
+      flushes the written files, renames them, and flushes the directory
+      once. The files appear under their final names and are durable once
+      :func:`commit()` returns. This is cheaper than ``'file'`` when many
+      small files are saved.
+
+    Keys of the saved files are not used because the files are saved under
+    their names.
+    """
+
+    def __init__(self, directory=None, durability='none'):
+        if durability not in self.DURABILITIES:
+            raise InvalidValueError('durability', durability)
+
+        self._directory = directory or os.getcwd()
+        self._durability = durability
+        # Pairs (path to a temporary file, final path) waiting for a commit.
+        self._pending = []
+        self._lock = threading.Lock()
+
+    @property
+    def directory(self):
+        """Path to the directory (`str`)."""
+        return self._directory
+
+    @property
+    def durability(self):
+        """Durability of the saved files (`str`)."""
+        return self._durability
+
+    def save(self, src, name, key=None):
+        """Saves the contents of the given file into the directory.
+
+        See :func:`OutputStore.save()` for the description of the parameters.
+
+        When the durability is ``'batch'``, the file appears under the
+        returned path only after :func:`commit()`.
+        """
+        path = os.path.join(self._directory, name)
+        tmp_path = _tmp_path_for(path)
+        try:
+            with open(tmp_path, 'xb') as dst:
+                shutil.copyfileobj(src, dst)
+                if self._durability == 'file':
+                    dst.flush()
+                    os.fsync(dst.fileno())
+        except BaseException:
+            _remove_if_exists(tmp_path)
+            raise
+
+        if self._durability == 'batch':
+            with self._lock:
+                self._pending.append((tmp_path, path))
+        else:
+            os.replace(tmp_path, path)
+            if self._durability == 'file':
+                _fsync_directory(self._directory)
+        return path
+
+    def commit(self):
+        """Makes the files saved since the last commit durable.
+
+        It does nothing unless the durability is ``'batch'``.
+        """
+        with self._lock:
+            pending, self._pending = self._pending, []
+        if not pending:
+            return
+
+        _sync_files(tmp_path for tmp_path, _ in pending)
+        for tmp_path, path in pending:
+            os.replace(tmp_path, path)
+        _fsync_directory(self._directory)
+
+    def abort(self):
+        """Discards the files waiting for a commit.
+
+        It does nothing unless the durability is ``'batch'``, as other files
+        are saved under their final names right away.
+        """
+        with self._lock:
+            pending, self._pending = self._pending, []
+        for tmp_path, _ in pending:
+            _remove_if_exists(tmp_path)
+
+    def __repr__(self):
+        return '<{} directory={!r} durability={!r}>'.format(
+            __name__ + '.' + self.__class__.__name__,
+            self.directory,
+            self.durability
+        )
+
+
+#: Files up to this size (in bytes) are kept in memory before they are packed.
+_SPOOL_MAX_SIZE = 1024 * 1024
+
+
+class PackedStore(OutputStore):
+    """Base class of stores that pack all files into a single container.
+
+    :param str path: Path to the container.
+    :param str durability: Durability of the container (see
+        :class:`DirectoryStore`).
+
+    The container is written into a temporary file, which is atomically
+    renamed to `path` when the store is closed. Until then, nothing appears
+    under `path`. When the store is aborted (e.g. because saving of a file
+    failed), the temporary file is removed and nothing appears under `path`
+    at all. Since the container is a single file, the ``'file'`` and
+    ``'batch'`` durabilities are equivalent: the container is flushed to the
+    disk once, before the rename.
+    """
+
+    def __init__(self, path, durability='none'):
+        if durability not in self.DURABILITIES:
+            raise InvalidValueError('durability', durability)
+
+        self._path = path
+        self._durability = durability
+        self._tmp_path = _tmp_path_for(path)
+        self._lock = threading.Lock()
+        self._closed = False
+
+    @property
+    def path(self):
+        """Path to the container (`str`)."""
+        return self._path
+
+    @property
+    def durability(self):
+        """Durability of the container (`str`)."""
+        return self._durability
+
+    def save(self, src, name, key=None):
+        """Saves the contents of the given file into the container.
+
+        See :func:`OutputStore.save()` for the description of the parameters.
+
+        The returned path consists of the path to the container and the key,
+        e.g. ``'prog.exe.zip/cfgs/main'``.
+        """
+        # Imported here because the module is comparatively slow to import
+        # and is not needed unless outputs are packed.
+        import tempfile
+
+        key = key if key is not None else name
+        # Copy the file (e.g. a download from the API) before locking the
+        # container so that concurrent saves wait only for each other's
+        # appends, not for each other's downloads.
+        with tempfile.SpooledTemporaryFile(_SPOOL_MAX_SIZE) as spool:
+            shutil.copyfileobj(src, spool)
+            spool.seek(0)
+            with self._lock:
+                self._save(spool, name, key)
+        return os.path.join(self._path, key)
+
+    def close(self):
+        """Finishes the container and moves it to its path."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._close()
+
+        if self._durability != 'none':
+            _sync_file(self._tmp_path)
+        os.replace(self._tmp_path, self._path)
+        if self._durability != 'none':
+            _fsync_directory(os.path.dirname(self._path) or os.curdir)
+
+    def abort(self):
+        """Closes the container and removes it without moving it to its
+        path.
+        """
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            try:
+                self._close()
+            finally:
+                _remove_if_exists(self._tmp_path)
+
+    @abc.abstractmethod
+    def _save(self, src, name, key):
+        """Saves the given file into the container."""
+
+    @abc.abstractmethod
+    def _close(self):
+        """Finishes the container."""
+
+    def __repr__(self):
+        return '<{} path={!r} durability={!r}>'.format(
+            __name__ + '.' + self.__class__.__name__,
+            self.path,
+            self.durability
+        )
+
+
+class ZipStore(PackedStore):
+    """Packs files into an uncompressed zip archive.
+
+    :param str path: Path to the archive.
+    :param str durability: Durability of the archive (see
+        :class:`PackedStore`).
+
+    Each file is stored as an archive member named after its key. The
+    original name of the file is stored in the comment of the member. The
+    files are not compressed, so they can be read without decompression.
+    """
+
+    def __init__(self, path, durability='none'):
+        import zipfile
+
+        super().__init__(path, durability)
+        self._archive = zipfile.ZipFile(
+            self._tmp_path, 'w', compression=zipfile.ZIP_STORED
+        )
+
+    def _save(self, src, name, key):
+        import zipfile
+
+        info = zipfile.ZipInfo(key, time.localtime()[:6])
+        info.comment = name.encode('utf-8')
+        if sys.version_info < (3, 6):
+            # Members cannot be written by chunks before Python 3.6.
+            self._archive.writestr(info, src.read())
+            return
+
+        with self._archive.open(info, 'w', force_zip64=True) as dst:
+            shutil.copyfileobj(src, dst)
+
+    def _close(self):
+        self._archive.close()
+
+
+class SQLiteStore(PackedStore):
+    """Packs files into an SQLite database.
+
+    :param str path: Path to the database.
+    :param str durability: Durability of the database (see
+        :class:`PackedStore`).
+
+    The files are stored in table ``outputs`` with columns ``key`` (primary
+    key), ``name`` (original name of the file), and ``data`` (contents of the
+    file). Saving a file under an existing key replaces it.
+    """
+
+    def __init__(self, path, durability='none'):
+        import sqlite3
+
+        super().__init__(path, durability)
+        self._db = sqlite3.connect(self._tmp_path, check_same_thread=False)
+        # The database is renamed when it is complete, so there is no need
+        # for a journal.
+        self._db.execute('PRAGMA journal_mode=OFF')
+        self._db.execute('PRAGMA synchronous=OFF')
+        self._db.execute(
+            'CREATE TABLE outputs ('
+            ' key TEXT PRIMARY KEY,'
+            ' name TEXT NOT NULL,'
+            ' data BLOB NOT NULL'
+            ')'
+        )
+
+    def _save(self, src, name, key):
+        # SQLite cannot write blobs by chunks, so the file has to be read as a
+        # whole.
+        self._db.execute(
+            'INSERT OR REPLACE INTO outputs (key, name, data)'
+            ' VALUES (?, ?, ?)',
+            (key, name, src.read())
+        )
+
+    def _close(self):
+        self._db.commit()
+        self._db.close()
+
+
+class StoreReader(metaclass=abc.ABCMeta):
+    """Base class of readers of files packed by :class:`ZipStore` or
+    :class:`SQLiteStore`.
+
+    The files are accessed by their keys (e.g. ``'hll'`` or ``'cfgs/main'``).
+    The readers can be used as context managers, which call :func:`close()`
+    upon exit.
+    """
+
+    @abc.abstractmethod
+    def keys(self):
+        """Returns a sorted list of keys of the packed files."""
+
+    @abc.abstractmethod
+    def name(self, key):
+        """Returns the original name of the file with the given key.
+
+        :raises KeyError: When there is no such file.
+        """
+
+    @abc.abstractmethod
+    def open(self, key):
+        """Opens the file with the given key for reading.
+
+        :returns: Binary file-like object.
+
+        :raises KeyError: When there is no such file.
+        """
+
+    def read(self, key):
+        """Returns the contents of the file with the given key (`bytes`).
+
+        :raises KeyError: When there is no such file.
+        """
+        with self.open(key) as f:
+            return f.read()
+
+    @property
+    def funcs_with_cfg(self):
+        """A list of names of functions whose control-flow graph is packed."""
+        return [
+            key[len('cfgs/'):] for key in self.keys()
+            if key.startswith('cfgs/')
+        ]
+
+    def read_cfg(self, func):
+        """Returns the control-flow graph of the given function (`bytes`).
+
+        :raises KeyError: When there is no such graph.
+        """
+        return self.read('cfgs/' + func)
+
+    @abc.abstractmethod
+    def close(self):
+        """Closes the reader."""
+
+    def __contains__(self, key):
+        return key in self.keys()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class ZipStoreReader(StoreReader):
+    """Reader of files packed by :class:`ZipStore`.
+
+    :param str path: Path to the archive.
+    """
+
+    def __init__(self, path):
+        import zipfile
+
+        self._archive = zipfile.ZipFile(path)
+
+    def keys(self):
+        return sorted(self._archive.namelist())
+
+    def name(self, key):
+        return self._archive.getinfo(key).comment.decode('utf-8')
+
+    def open(self, key):
+        return self._archive.open(key)
+
+    def close(self):
+        self._archive.close()
+
+
+class SQLiteStoreReader(StoreReader):
+    """Reader of files packed by :class:`SQLiteStore`.
+
+    :param str path: Path to the database.
+    """
+
+    def __init__(self, path):
+        import sqlite3
+
+        self._db = sqlite3.connect(path)
+
+    def keys(self):
+        return [
+            key for key, in
+            self._db.execute('SELECT key FROM outputs ORDER BY key')
+        ]
+
+    def name(self, key):
+        return self._select('name', key)
+
+    def open(self, key):
+        return io.BytesIO(self._select('data', key))
+
+    def close(self):
+        self._db.close()
+
+    def _select(self, column, key):
+        """Returns the value of the given column for the given key."""
+        row = self._db.execute(
+            'SELECT {} FROM outputs WHERE key = ?'.format(column),
+            (key,)
+        ).fetchone()
+        if row is None:
+            raise KeyError(key)
+        return row[0]
+
+
+def open_store_reader(path):
+    """Returns a reader of files packed into the given container.
+
+    :param str path: Path to a container created by :class:`ZipStore` or
+        :class:`SQLiteStore`.
+
+    :returns: :class:`ZipStoreReader` or :class:`SQLiteStoreReader`.
+    """
+    import zipfile
+
+    if zipfile.is_zipfile(path):
+        return ZipStoreReader(path)
+    return SQLiteStoreReader(path)
+
+
+def _tmp_path_for(path):
+    """Returns a path to a temporary file for the given path."""
+    # Hide the temporary file so that it is skipped by tools that scan the
+    # directory for outputs.
+    directory, name = os.path.split(path)
+    # Random bytes rather than the uuid module, whose import is comparatively
+    # slow and would delay the startup of tools.
+    suffix = binascii.hexlify(os.urandom(6)).decode('ascii')
+    return os.path.join(directory, '.{}.{}.tmp'.format(name, suffix))
+
+
+def _sync_files(paths):
+    """Flushes the given files to the disk.
+
+    Renames of the files have to be flushed by flushing their directories.
+    """
+    # os.sync() would be a single call, but it flushes all file systems on
+    # the host, which may take much longer than flushing just the given
+    # files.
+    for path in paths:
+        _sync_file(path)
+
+
+def _sync_file(path):
+    """Flushes the given file to the disk."""
+    with open(path, 'ab') as f:
+        os.fsync(f.fileno())
+
+
+def _fsync_directory(directory):
+    """Flushes the given directory (i.e. renames in it) to the disk."""
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        # Directories cannot be opened on some systems (e.g. on Windows), where
+        # renames are made durable by the file system itself.
+        return
+
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _remove_if_exists(path):
+    """Removes the given file if it exists."""
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
@@ -0,0 +1,718 @@
+#
+# Project:   retdec-python
+# Copyright: (c) 2015 by Petr Zemek <s3rvac@gmail.com> and contributors
+# License:   MIT, see the LICENSE file for more details
+#
+
+"""A local mock of the retdec.com API.
+
+The mock implements the decompilation, file-analyzing, and testing services.
+It returns the same JSON documents as the real API, so code using the library
+(e.g. workers) can be tested and load-tested without the real service:
+
+.. code-block:: python
+
+    from retdec.decompiler import Decompiler
+    from retdec.testing.server import MockAPI
+    from retdec.testing.server import MockAPIServer
+
+    with MockAPIServer(MockAPI(job_duration=2, error_rate=0.01)) as server:
+        decompiler = Decompiler(api_url=server.api_url, api_key='KEY')
+        ...
+
+The mock can also be run as a standalone server (see ``python -m
+retdec.testing.server --help``).
+"""
+
+import argparse
+import base64
+import http.server
+import io
+import itertools
+import json
+import random
+import re
+import socketserver
+import sys
+import threading
+import time
+import urllib.parse
+import zipfile
+
+#: Names of phases through which decompilations progress by default.
+DEFAULT_PHASES = (
+    'Initialization',
+    'Unpacking',
+    'Front-End',
+    'Middle-End',
+    'Back-End',
+    'Done',
+)
+
+#: Path under which the API is available.
+API_PATH = '/service/api'
+
+
+class MockAPI:
+    """Configuration and state of the mock API.
+
+    :param float job_duration: Number of seconds for which decompilations and
+        analyses run.
+    :param float queue_duration: Number of seconds for which decompilations
+        and analyses are pending before they start to run.
+    :param iterable phases: Names of phases through which decompilations
+        progress. They are spread evenly over `job_duration`.
+    :param int cfg_count: Number of functions with control-flow graphs in
+        decompilations that generate them.
+    :param int output_size: Size of every output (in bytes).
+    :param float latency: Number of seconds by which every response is
+        delayed.
+    :param float failure_rate: Probability that a decompilation or analysis
+        fails.
+    :param float error_rate: Probability that a request fails with the ``500``
+        error.
+    :param float throttle_rate: Probability that a request is rejected with
+        the ``429`` error (too many requests).
+    :param float drop_rate: Probability that the connection is closed without
+        responding to a request.
+    :param int retry_after: Value of the ``Retry-After`` header of ``429``
+        responses (in seconds).
+    :param str api_key: API key that clients have to use. When it is
+        ``None``, any key is accepted.
+    :param int seed: Seed of the random generator that decides which requests
+        and jobs fail.
+
+    The parameters are available as attributes of the same names, which can
+    be changed while the mock is running.
+    """
+
+    def __init__(self, job_duration=0.0, queue_duration=0.0,
+                 phases=DEFAULT_PHASES, cfg_count=10, output_size=1024,
+                 latency=0.0, failure_rate=0.0, error_rate=0.0,
+                 throttle_rate=0.0, drop_rate=0.0, retry_after=1,
+                 api_key=None, seed=None):
+        self.job_duration = job_duration
+        self.queue_duration = queue_duration
+        self.phases = tuple(phases)
+        self.cfg_count = cfg_count
+        self.output_size = output_size
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.drop_rate = drop_rate
+        self.retry_after = retry_after
+        self.api_key = api_key
+
+        self._random = random.Random(seed)
+        self._ids = itertools.count(1)
+        self._jobs = {}
+        self._lock = threading.Lock()
+        # Statuses of finished jobs and outputs are cached because they can be
+        # large (e.g. a status with 100k control-flow graphs) and the mock
+        # should spend as little time as possible by serving requests.
+        self._finished_statuses = {}
+        self._outputs = {}
+
+    def handle(self, method, path, params=None, headers=None, body=b''):
+        """Handles the given request.
+
+        :param str method: HTTP method (e.g. ``'GET'``).
+        :param str path: Path of the request, including :data:`API_PATH`.
+        :param dict params: Parameters from the query string.
+        :param dict headers: Headers of the request.
+        :param bytes body: Body of the request.
+
+        :returns: A triple ``(code, headers, body)`` with the response or
+            ``None`` when the connection should be dropped.
+        """
+        params = params or {}
+        headers = headers or {}
+        if self.latency > 0:
+            time.sleep(self.latency)
+        if self._happens(self.drop_rate):
+            return None
+
+        try:
+            if self._happens(self.throttle_rate):
+                raise _APIError(
+                    429, 'Too Many Requests',
+                    'The request limit has been reached.',
+                    {'Retry-After': str(self.retry_after)}
+                )
+            if self._happens(self.error_rate):
+                raise _APIError(
+                    500, 'Internal Server Error',
+                    'An internal error has occurred.'
+                )
+            self._authenticate(headers)
+            return self._route(method, path, params, body)
+        except _APIError as ex:
+            return ex.code, ex.headers, _encode_json({
+                'code': ex.code,
+                'message': ex.message,
+                'description': ex.description
+            })
+
+    def _happens(self, probability):
+        """Randomly decides whether an event with the given probability
+        happens.
+        """
+        if probability <= 0:
+            return False
+        with self._lock:
+            return self._random.random() < probability
+
+    def _authenticate(self, headers):
+        """Checks the API key passed via HTTP Basic Auth."""
+        if self.api_key is None:
+            return
+        auth = headers.get('Authorization', '')
+        try:
+            credentials = base64.b64decode(auth.split(' ', 1)[1]).decode()
+            api_key = credentials.split(':', 1)[0]
+        except (IndexError, ValueError):
+            api_key = None
+        if api_key != self.api_key:
+            raise _APIError(
+                401, 'Unauthorized', 'Authentication has failed.'
+            )
+
+    def _route(self, method, path, params, body):
+        """Calls the handler of the request to the given path."""
+        if not path.startswith(API_PATH + '/'):
+            raise _not_found('The requested URL was not found.')
+        path = path[len(API_PATH):]
+
+        for route_method, pattern, handler, kwargs in _ROUTES:
+            match = pattern.match(path)
+            if match and method == route_method:
+                kwargs = dict(kwargs, **match.groupdict())
+                return getattr(self, handler)(params, body, **kwargs)
+        raise _not_found('The requested URL was not found.')
+
+    def _start_job(self, params, body, service):
+        """Starts a decompilation or analysis of the uploaded file."""
+        file_name = _uploaded_file_name(body)
+        if file_name is None:
+            raise _APIError(
+                400, 'Missing Input File', 'No input file was given.'
+            )
+        job = _Job(
+            service,
+            file_name,
+            params,
+            start_time=time.monotonic(),
+            failed=self._happens(self.failure_rate)
+        )
+        with self._lock:
+            id = 'mock{}'.format(next(self._ids))
+            self._jobs[service, id] = job
+        return _json_response({'id': id})
+
+    def _get_status(self, params, body, service, id):
+        """Returns a status of the given decompilation or analysis."""
+        job = self._get_job(service, id)
+        progress = self._progress(job)
+        if progress < 1:
+            return _json_response(self._status(job, progress))
+
+        key = (
+            service, job.failed, job.generates('cg'),
+            job.generates('cfgs'), job.generates('archive'),
+            self.cfg_count, self.phases
+        )
+        with self._lock:
+            status = self._finished_statuses.get(key)
+        if status is None:
+            status = _encode_json(self._status(job, progress))
+            with self._lock:
+                self._finished_statuses[key] = status
+        return 200, {'Content-Type': 'application/json'}, status
+
+    def _get_decompilation_output(self, params, body, id, output):
+        """Returns the given output of the given decompilation."""
+        job = self._get_finished_job('decompilation', id)
+        if output in ('cg', 'archive') or output.startswith('cfgs/'):
+            kind = output.split('/')[0]
+            if not job.generates(kind):
+                raise _not_found('The output was not requested.')
+            if kind == 'cfgs' and output[5:] not in self._cfg_funcs():
+                raise _not_found('There is no such function.')
+
+        graph_format = job.params.get('graph_format', 'svg')
+        file_names = {
+            'hll': '.c',
+            'dsm': '.dsm',
+            'binary': '.out',
+            'cg': '.cg.' + graph_format,
+            'archive': '.archive.zip',
+        }
+        suffix = file_names.get(output)
+        if suffix is None:
+            suffix = '.cfg.{}.{}'.format(output[5:], graph_format)
+        return _file_response(
+            self._output_contents(output.split('/')[0]),
+            job.base_name + suffix
+        )
+
+    def _get_analysis_output(self, params, body, id):
+        """Returns the output of the given analysis."""
+        job = self._get_finished_job('analysis', id)
+        return _file_response(
+            self._output_contents('fileinfo'),
+            job.base_name + '.fileinfo.txt'
+        )
+
+    def _echo(self, params, body):
+        """Echoes the given parameters."""
+        return _json_response(params)
+
+    def _get_job(self, service, id):
+        """Returns the given decompilation or analysis."""
+        with self._lock:
+            job = self._jobs.get((service, id))
+        if job is None:
+            raise _not_found('There is no {} with ID {}.'.format(service, id))
+        return job
+
+    def _get_finished_job(self, service, id):
+        """Returns the given decompilation or analysis, which has to have
+        successfully finished.
+        """
+        job = self._get_job(service, id)
+        if self._progress(job) < 1 or job.failed:
+            raise _not_found('The output is not available.')
+        return job
+
+    def _progress(self, job):
+        """Returns the progress of the given job.
+
+        It is a number between ``0`` and ``1`` (``1`` meaning that the job
+        has finished) or a negative number when the job is pending.
+        """
+        elapsed = time.monotonic() - job.start_time - self.queue_duration
+        if elapsed < 0:
+            return -1
+        if self.job_duration <= 0:
+            return 1
+        return min(1, elapsed / self.job_duration)
+
+    def _status(self, job, progress):
+        """Returns a status of the given job with the given progress."""
+        finished = progress >= 1
+        error = None
+        if finished and job.failed:
+            error = 'The {} has failed.'.format(job.service)
+        status = {
+            'pending': progress < 0,
+            'running': 0 <= progress < 1,
+            'finished': finished,
+            'succeeded': finished and not job.failed,
+            'failed': finished and job.failed,
+            'error': error,
+        }
+        if job.service != 'decompilation':
+            return status
+
+        completion = max(0, int(progress * 100))
+        status['completion'] = completion
+        status['phases'] = [
+            phase for phase in self._phases() if phase['completion'] <= completion
+        ] if progress >= 0 else []
+
+        output_status = {
+            'generated': finished and not job.failed,
+            'failed': finished and job.failed,
+            'error': error,
+        }
+        if job.generates('cg'):
+            status['cg'] = output_status
+        if job.generates('cfgs'):
+            status['cfgs'] = {
+                func: output_status for func in self._cfg_funcs()
+            } if finished and not job.failed else {}
+        if job.generates('archive'):
+            status['archive'] = output_status
+        return status
+
+    def _phases(self):
+        """Returns phases of decompilations as returned by the API."""
+        last = max(1, len(self.phases) - 1)
+        return [
+            {
+                'name': name,
+                'part': None,
+                'description': name,
+                'completion': i * 100 // last,
+                'warnings': []
+            } for i, name in enumerate(self.phases)
+        ]
+
+    def _cfg_funcs(self):
+        """Returns names of functions with control-flow graphs."""
+        return ['func{}'.format(i) for i in range(self.cfg_count)]
+
+    def _output_contents(self, kind):
+        """Returns contents of an output of the given kind."""
+        key = (kind, self.output_size)
+        with self._lock:
+            contents = self._outputs.get(key)
+        if contents is None:
+            contents = _generate_output(kind, self.output_size)
+            with self._lock:
+                self._outputs[key] = contents
+        return contents
+
+    def __repr__(self):
+        return '<{} job_duration={!r} jobs={}>'.format(
+            __name__ + '.' + self.__class__.__name__,
+            self.job_duration,
+            len(self._jobs)
+        )
+
+
+class MockAPIServer(socketserver.ThreadingMixIn, http.server.HTTPServer):
+    """HTTP server serving the mock API.
+
+    :param MockAPI api: The mock API. When it is ``None``, a mock with the
+        default configuration is used.
+    :param str address: Address on which the server listens.
+    :param int port: Port on which the server listens. When it is ``0``, a
+        free port is used.
+
+    When used as a context manager, the server serves requests in a
+    background thread until the context is left. The API is available at
+    :attr:`api_url`.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, api=None, address='127.0.0.1', port=0):
+        super().__init__((address, port), _MockAPIHandler)
+        self.api = api if api is not None else MockAPI()
+
+    @property
+    def api_url(self):
+        """URL of the API (to be passed as `api_url` to services)."""
+        return 'http://{}:{}{}'.format(
+            self.server_address[0],
+            self.server_address[1],
+            API_PATH
+        )
+
+    def __enter__(self):
+        # A short poll interval makes leaving the context (shutdown) fast.
+        threading.Thread(
+            target=self.serve_forever,
+            kwargs={'poll_interval': 0.05},
+            daemon=True
+        ).start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.shutdown()
+        self.server_close()
+
+    def __repr__(self):
+        return '<{} api_url={!r}>'.format(
+            __name__ + '.' + self.__class__.__name__,
+            self.api_url
+        )
+
+
+class _MockAPIHandler(http.server.BaseHTTPRequestHandler):
+    """Handler of requests to the mock API."""
+
+    # Keep connections alive like the real service does.
+    protocol_version = 'HTTP/1.1'
+
+    # Headers and bodies are sent separately, so without this, responses
+    # would be delayed by the interplay of Nagle's algorithm and delayed
+    # acknowledgements.
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        self._handle('GET')
+
+    def do_POST(self):
+        self._handle('POST')
+
+    def _handle(self, method):
+        url = urllib.parse.urlsplit(self.path)
+        params = dict(urllib.parse.parse_qsl(url.query))
+        length = int(self.headers.get('Content-Length', 0))
+        body = self.rfile.read(length) if length > 0 else b''
+
+        response = self.server.api.handle(
+            method, url.path, params, self.headers, body
+        )
+        if response is None:
+            self.close_connection = True
+            return
+
+        code, headers, body = response
+        self.send_response(code)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Do not clutter the output of tests and tools using the mock.
+        pass
+
+
+class _Job:
+    """A decompilation or analysis."""
+
+    def __init__(self, service, file_name, params, start_time, failed):
+        self.service = service
+        self.base_name = file_name.rsplit('.', 1)[0] or file_name
+        self.params = params
+        self.start_time = start_time
+        self.failed = failed
+
+    def generates(self, output):
+        """Does the job generate the given output (``'cg'``, ``'cfgs'``, or
+        ``'archive'``)?
+        """
+        value = self.params.get('generate_' + output, '')
+        return value.lower() in ('1', 'true', 'yes', 'on')
+
+
+class _APIError(Exception):
+    """An error returned by the mock API."""
+
+    def __init__(self, code, message, description, headers=None):
+        super().__init__(description)
+        self.code = code
+        self.message = message
+        self.description = description
+        self.headers = {'Content-Type': 'application/json'}
+        self.headers.update(headers or {})
+
+
+def _not_found(description):
+    """Returns the ``404`` error with the given description."""
+    return _APIError(404, 'Not Found', description)
+
+
+def _json_response(obj):
+    """Returns a response with the given object encoded into JSON."""
+    return 200, {'Content-Type': 'application/json'}, _encode_json(obj)
+
+
+def _file_response(contents, file_name):
+    """Returns a response with the given file."""
+    return 200, {
+        'Content-Type': 'application/octet-stream',
+        'Content-Disposition': 'attachment; filename={}'.format(file_name)
+    }, contents
+
+
+def _encode_json(obj):
+    """Encodes the given object into JSON."""
+    return json.dumps(obj).encode('utf-8')
+
+
+def _uploaded_file_name(body):
+    """Returns the name of the file uploaded in the given multipart body
+    (``None`` if there is no file).
+    """
+    # The name is in the headers of the part, which precede the contents of
+    # the file, so there is no need to search the whole (possibly large) body.
+    match = re.search(rb'filename="([^"]*)"', body[:64 * 1024])
+    return match.group(1).decode('utf-8', 'replace') if match else None
+
+
+def _generate_output(kind, size):
+    """Generates contents of an output of the given kind with the given
+    size.
+    """
+    if kind == 'archive':
+        archive = io.BytesIO()
+        with zipfile.ZipFile(archive, 'w', zipfile.ZIP_STORED) as zip_file:
+            zip_file.writestr('decompiled.c', _generate_output('hll', size))
+        return archive.getvalue()
+
+    lines = {
+        'hll': b'int main() { return 0; }\n',
+        'dsm': b'0x401000:   c3   ret\n',
+        'cg': b'<!-- call graph -->\n',
+        'cfgs': b'<!-- control-flow graph -->\n',
+        'fileinfo': b'File format: PE\n',
+    }
+    line = lines.get(kind, b'\x90' * 16)
+    return (line * (size // len(line) + 1))[:size]
+
+
+#: Routes of requests: ``(method, path pattern, handler, handler arguments)``.
+_ROUTES = [
+    (
+        'POST',
+        re.compile(r'^/decompiler/decompilations$'),
+        '_start_job',
+        {'service': 'decompilation'}
+    ),
+    (
+        'GET',
+        re.compile(r'^/decompiler/decompilations/(?P<id>[^/]+)/status$'),
+        '_get_status',
+        {'service': 'decompilation'}
+    ),
+    (
+        'GET',
+        re.compile(r'^/decompiler/decompilations/(?P<id>[^/]+)/outputs/'
+                   r'(?P<output>hll|dsm|binary|cg|archive|cfgs/.+)$'),
+        '_get_decompilation_output',
+        {}
+    ),
+    (
+        'POST',
+        re.compile(r'^/fileinfo/analyses$'),
+        '_start_job',
+        {'service': 'analysis'}
+    ),
+    (
+        'GET',
+        re.compile(r'^/fileinfo/analyses/(?P<id>[^/]+)/status$'),
+        '_get_status',
+        {'service': 'analysis'}
+    ),
+    (
+        'GET',
+        re.compile(r'^/fileinfo/analyses/(?P<id>[^/]+)/output$'),
+        '_get_analysis_output',
+        {}
+    ),
+    (
+        'GET',
+        re.compile(r'^/test/echo$'),
+        '_echo',
+        {}
+    ),
+]
+
+
+def parse_args(argv):
+    """Parses the given list of arguments."""
+    parser = argparse.ArgumentParser(
+        description='Runs a local mock of the retdec.com API.'
+    )
+    parser.add_argument(
+        '--address',
+        default='127.0.0.1',
+        help='Address on which the server listens. Default: %(default)s.'
+    )
+    parser.add_argument(
+        '--port',
+        type=int,
+        default=8000,
+        help='Port on which the server listens. Default: %(default)s.'
+    )
+    parser.add_argument(
+        '--job-duration',
+        type=float,
+        default=10.0,
+        metavar='SECONDS',
+        help='Duration of decompilations and analyses. Default: %(default)s.'
+    )
+    parser.add_argument(
+        '--queue-duration',
+        type=float,
+        default=0.0,
+        metavar='SECONDS',
+        help='Duration for which decompilations and analyses are pending. '
+             'Default: %(default)s.'
+    )
+    parser.add_argument(
+        '--phases',
+        type=lambda value: value.split(','),
+        default=DEFAULT_PHASES,
+        metavar='NAME,...',
+        help='Comma-separated names of decompilation phases.'
+    )
+    parser.add_argument(
+        '--cfg-count',
+        type=int,
+        default=10,
+        metavar='N',
+        help='Number of control-flow graphs. Default: %(default)s.'
+    )
+    parser.add_argument(
+        '--output-size',
+        type=int,
+        default=1024,
+        metavar='BYTES',
+        help='Size of every output. Default: %(default)s.'
+    )
+    parser.add_argument(
+        '--latency',
+        type=float,
+        default=0.0,
+        metavar='SECONDS',
+        help='Delay of every response. Default: %(default)s.'
+    )
+    for name, what in [('failure', 'a decompilation or analysis fails'),
+                       ('error', 'a request fails with 500'),
+                       ('throttle', 'a request is rejected with 429'),
+                       ('drop', 'a connection is dropped')]:
+        parser.add_argument(
+            '--{}-rate'.format(name),
+            type=float,
+            default=0.0,
+            metavar='PROBABILITY',
+            help='Probability that {}. Default: %(default)s.'.format(what)
+        )
+    parser.add_argument(
+        '--api-key',
+        default=None,
+        help='Accept only the given API key. By default, any key is accepted.'
+    )
+    parser.add_argument(
+        '--seed',
+        type=int,
+        default=None,
+        help='Seed of the random generator.'
+    )
+    return parser.parse_args(argv[1:])
+
+
+def main(argv=None):
+    """Runs the mock API until it is interrupted.
+
+    :param list argv: Arguments.
+
+    If `argv` is ``None``, ``sys.argv`` is used.
+    """
+    args = parse_args(argv if argv is not None else sys.argv)
+    api = MockAPI(
+        job_duration=args.job_duration,
+        queue_duration=args.queue_duration,
+        phases=args.phases,
+        cfg_count=args.cfg_count,
+        output_size=args.output_size,
+        latency=args.latency,
+        failure_rate=args.failure_rate,
+        error_rate=args.error_rate,
+        throttle_rate=args.throttle_rate,
+        drop_rate=args.drop_rate,
+        api_key=args.api_key,
+        seed=args.seed
+    )
+    server = MockAPIServer(api, args.address, args.port)
+    print('Serving the mock API at {}'.format(server.api_url))
+    sys.stdout.flush()
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -6,8 +6,17 @@
 
 """Tools that use the library to analyze and decompile files."""
 
+import argparse
+import contextlib
+import errno
+import os
+import signal
+import sys
+import threading
+
 from retdec import DEFAULT_API_URL
 from retdec import __version__
+from retdec.batch import shard
 
 
 def _add_arguments_shared_by_all_tools(parser):
@@ -35,3 +44,381 @@ def _add_arguments_shared_by_all_tools(parser):
         action='version',
         version='%(prog)s (via retdec-python) {}'.format(__version__)
     )
+
+
+def _add_sharding_arguments(parser):
+    """Adds arguments for processing only a shard of the input files to the
+    given parser.
+    """
+    parser.add_argument(
+        '--shard',
+        dest='shard',
+        metavar='I/N',
+        type=_parse_shard,
+        default=None,
+        help='Process only the I-th of N disjoint shards of the input files '
+             '(I is from 0 to N-1).'
+    )
+    parser.add_argument(
+        '--shard-by',
+        dest='shard_by',
+        metavar='WHAT',
+        choices=['path', 'content'],
+        default='path',
+        help='Assign the files to the shards by hashes of their paths or '
+             'contents. Choices: %(choices)s. Default: %(default)s.'
+    )
+    parser.add_argument(
+        '--consistent-sharding',
+        dest='consistent_sharding',
+        action='store_true',
+        help='Use consistent hashing, which reassigns as few files as '
+             'possible when the number of shards changes.'
+    )
+
+
+def _add_durability_argument(parser):
+    """Adds an argument for choosing the durability of the saved outputs to the
+    given parser.
+    """
+    parser.add_argument(
+        '--durability',
+        dest='durability',
+        metavar='WHEN',
+        choices=['none', 'file', 'batch'],
+        default='none',
+        help='When the saved outputs are flushed to the disk: '
+             "'none' (left to the operating system), 'file' (after every "
+             "file), 'batch' (once after all outputs of an input file). "
+             'Outputs are always saved atomically. Default: %(default)s.'
+    )
+
+
+def _add_metrics_arguments(parser):
+    """Adds arguments for exporting metrics to the given parser."""
+    parser.add_argument(
+        '--metrics-port',
+        dest='metrics_port',
+        metavar='PORT',
+        type=int,
+        default=None,
+        help='Serve metrics in the Prometheus format at '
+             'http://127.0.0.1:PORT/metrics while running.'
+    )
+    parser.add_argument(
+        '--metrics-file',
+        dest='metrics_file',
+        metavar='FILE',
+        default=None,
+        help='Write metrics in the Prometheus format into the given file '
+             'when finished (e.g. for the textfile collector of the node '
+             'exporter).'
+    )
+
+
+@contextlib.contextmanager
+def _collecting_metrics(args):
+    """Collects metrics while running the tool when the user requested them.
+    """
+    if args.metrics_port is None and args.metrics_file is None:
+        yield
+        return
+
+    # Imported here because the module imports an HTTP server, which would
+    # slow down the startup of tools even when no metrics are requested.
+    from retdec import metrics
+
+    metrics_hooks = metrics.enable()
+    server = None
+    if args.metrics_port is not None:
+        server = metrics.start_http_server(
+            args.metrics_port,
+            registry=metrics_hooks.registry
+        )
+    try:
+        yield
+    finally:
+        if server is not None:
+            server.shutdown()
+            server.server_close()
+        if args.metrics_file is not None:
+            metrics.write_textfile(
+                args.metrics_file,
+                registry=metrics_hooks.registry
+            )
+        metrics.disable()
+
+
+def _add_phase_log_argument(parser):
+    """Adds an argument for recording phases of decompilations to the given
+    parser.
+    """
+    parser.add_argument(
+        '--phase-log',
+        dest='phase_log',
+        metavar='FILE',
+        default=None,
+        help='Append records of phases of finished decompilations to the '
+             'given file (summarize them with retdec-phase-report).'
+    )
+
+
+@contextlib.contextmanager
+def _profiling_phases(args):
+    """Records phases of decompilations while running the tool when the user
+    requested it.
+    """
+    if args.phase_log is None:
+        yield
+        return
+
+    from retdec.profiler import PhaseProfiler
+
+    with PhaseProfiler(args.phase_log):
+        yield
+
+
+def _add_daemon_arguments(parser):
+    """Adds arguments for sending requests through a daemon to the given
+    parser.
+    """
+    parser.add_argument(
+        '--daemon',
+        dest='daemon',
+        action='store_true',
+        help='Send requests through a daemon run by retdecd, which keeps '
+             'connections to the API open and polls statuses for all its '
+             'clients. It is also used when RETDEC_DAEMON_SOCKET is set.'
+    )
+    parser.add_argument(
+        '--daemon-socket',
+        dest='daemon_socket',
+        metavar='SOCKET',
+        default=None,
+        help='Path to the socket of the daemon (implies --daemon). '
+             'Default: $XDG_RUNTIME_DIR/retdecd.sock or '
+             '/tmp/retdecd-UID.sock.'
+    )
+
+
+def _get_daemon_socket(args):
+    """Returns a path to the socket of the daemon to be used (``None`` when
+    the user did not request a daemon).
+
+    The ``RETDEC_DAEMON_SOCKET`` environment variable is used when neither
+    ``--daemon`` nor ``--daemon-socket`` was given. It is read only by the
+    tools, not by the library.
+    """
+    if args.daemon_socket is not None:
+        return args.daemon_socket
+    if args.daemon:
+        # Imported here because the module is only needed when a daemon is
+        # used.
+        from retdec.daemon import default_socket_path
+
+        return default_socket_path()
+    return os.environ.get('RETDEC_DAEMON_SOCKET') or None
+
+
+def _add_watch_arguments(parser):
+    """Adds arguments for processing files dropped into a directory to the
+    given parser.
+    """
+    parser.add_argument(
+        '--watch',
+        dest='watch',
+        metavar='DIR',
+        default=None,
+        help='Watch the given directory and process files as soon as they are '
+             'fully written into it (until interrupted). Processed files are '
+             "moved into the 'done' or 'failed' subdirectory."
+    )
+    parser.add_argument(
+        '--settle-time',
+        dest='settle_time',
+        metavar='SECONDS',
+        type=float,
+        default=2.0,
+        help='When it cannot be detected that a file in the watched directory '
+             'has been fully written, wait until it has not been modified '
+             'for the given number of seconds. Default: %(default)s.'
+    )
+
+
+def _check_input_arguments(parser, args):
+    """Checks that either input files or a directory to watch were given."""
+    if args.watch is None and not args.input_files:
+        parser.error('the following arguments are required: FILE')
+    elif args.watch is not None and args.input_files:
+        parser.error('argument --watch: not allowed with FILE')
+
+
+def _watch_directory(args, scheduler, finish):
+    """Processes files dropped into the directory given by the user until
+    interrupted (by Ctrl+C or ``SIGTERM``).
+
+    :param scheduler: :class:`~retdec.scheduler.Scheduler` that starts jobs
+        for the files. Its jobs get the path to a file as ``input_file``.
+    :param callable finish: Function that gets a
+        :class:`~retdec.batch.Submission` and the path to the directory of the
+        file (see below) and processes the submission. It returns ``True``
+        when the file has been successfully processed, ``False`` otherwise.
+
+    Uploads, waiting, and downloads of several files are pipelined (at most
+    ``args.jobs`` files are processed at the same time). Every processed file
+    gets its own directory in the ``done`` subdirectory of the watched
+    directory. It is named after the file (with a numeric suffix when the
+    name has already been taken by another file, so nothing is ever
+    overwritten). After the file is processed, it is moved into this
+    directory, and when the processing has failed, the directory is moved
+    into the ``failed`` subdirectory. When interrupted, the files that are being
+    processed are finished and the files that have not been started yet are
+    left in the directory (they are processed when the watching is resumed).
+
+    :returns: Exit code (``0`` when all files have been successfully
+        processed, ``1`` otherwise).
+    """
+    # Imported here because watching is rarely used, so there is no need to
+    # slow down the startup of tools by it.
+    from retdec.watcher import DirectoryWatcher
+
+    done_dir = os.path.join(args.watch, 'done')
+    failed_dir = os.path.join(args.watch, 'failed')
+    os.makedirs(done_dir, exist_ok=True)
+    os.makedirs(failed_dir, exist_ok=True)
+
+    lock = threading.Lock()
+    failed = [False]
+
+    def finish_and_move(submission):
+        input_file = submission.params['input_file']
+        with lock:
+            name = _reserve_entry_name(
+                done_dir, failed_dir, os.path.basename(input_file)
+            )
+        entry_dir = os.path.join(done_dir, name)
+        succeeded = finish(submission, entry_dir)
+        with lock:
+            if not succeeded:
+                failed[0] = True
+            try:
+                _move_without_overwriting(
+                    input_file,
+                    os.path.join(entry_dir, os.path.basename(input_file))
+                )
+                if not succeeded:
+                    _move_without_overwriting(
+                        entry_dir,
+                        os.path.join(failed_dir, name)
+                    )
+            except OSError as ex:
+                sys.stderr.write('Error: {}: {}\n'.format(input_file, ex))
+                sys.stderr.flush()
+                failed[0] = True
+
+    errors = []
+
+    def run_scheduler():
+        try:
+            scheduler.run(finish_and_move, until_closed=True)
+        except Exception as ex:
+            errors.append(ex)
+
+    runner = threading.Thread(target=run_scheduler)
+    with DirectoryWatcher(args.watch, settle_time=args.settle_time) as watcher, \
+            _interrupted_by_sigterm():
+        runner.start()
+        try:
+            # The scheduler stops only because of an unexpected error, so
+            # check it from time to time.
+            while runner.is_alive():
+                new_files = watcher.wait(timeout=1.0)
+                for input_file in _shard_input_files(args, new_files):
+                    scheduler.add({'input_file': input_file})
+        except KeyboardInterrupt:
+            pass
+        finally:
+            scheduler.close(discard_pending=True)
+            runner.join()
+    if errors:
+        raise errors[0]
+    return 1 if failed[0] else 0
+
+
+def _reserve_entry_name(done_dir, failed_dir, name):
+    """Creates a directory for a watched file in `done_dir` and returns its
+    name.
+
+    The name is `name` or, when a file with the same name has already been
+    processed (its directory exists in `done_dir` or `failed_dir`), `name`
+    with a numeric suffix inserted before the extension (``prog-2.exe``).
+    """
+    stem, ext = os.path.splitext(name)
+    candidate = name
+    number = 1
+    while True:
+        if not os.path.exists(os.path.join(failed_dir, candidate)):
+            try:
+                os.mkdir(os.path.join(done_dir, candidate))
+                return candidate
+            except FileExistsError:
+                pass
+        number += 1
+        candidate = '{}-{}{}'.format(stem, number, ext)
+
+
+def _move_without_overwriting(src, dst):
+    """Moves `src` to `dst`, failing when `dst` already exists.
+
+    :raises FileExistsError: When `dst` already exists.
+    """
+    # os.rename() silently replaces existing files on POSIX systems.
+    if os.path.lexists(dst):
+        raise FileExistsError(errno.EEXIST, 'File exists', dst)
+    os.rename(src, dst)
+
+
+@contextlib.contextmanager
+def _interrupted_by_sigterm():
+    """Makes ``SIGTERM`` raise :class:`KeyboardInterrupt` (like Ctrl+C) so
+    that the tool can be stopped gracefully.
+    """
+    def raise_keyboard_interrupt(signum, frame):
+        raise KeyboardInterrupt
+
+    previous_handler = signal.signal(signal.SIGTERM, raise_keyboard_interrupt)
+    try:
+        yield
+    finally:
+        signal.signal(signal.SIGTERM, previous_handler)
+
+
+def _parse_shard(value):
+    """Parses a shard given in the form ``I/N`` into a pair of integers."""
+    try:
+        index, count = (int(part) for part in value.split('/'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(
+            "invalid shard: '{}' (expected I/N)".format(value)
+        )
+    if not 0 <= index < count:
+        raise argparse.ArgumentTypeError(
+            "invalid shard: '{}' (I has to be from 0 to N-1)".format(value)
+        )
+    return index, count
+
+
+def _shard_input_files(args, input_files):
+    """Returns the input files that belong to the shard given by the user (or
+    all input files when no shard was given).
+    """
+    if args.shard is None:
+        return input_files
+    index, count = args.shard
+    return shard(
+        input_files,
+        index,
+        count,
+        by=args.shard_by,
+        consistent=args.consistent_sharding
+    )
@@ -0,0 +1,104 @@
+#
+# Project:   retdec-python
+# Copyright: (c) 2015 by Petr Zemek <s3rvac@gmail.com> and contributors
+# License:   MIT, see the LICENSE file for more details
+#
+
+"""A daemon that sends requests to the API on behalf of the other tools. It
+uses the library.
+"""
+
+import argparse
+import sys
+
+from retdec import __version__
+from retdec.daemon import Daemon
+from retdec.daemon import default_socket_path
+from retdec.tools import _add_metrics_arguments
+from retdec.tools import _collecting_metrics
+from retdec.tools import _interrupted_by_sigterm
+
+
+def parse_args(argv):
+    """Parses the given list of arguments."""
+    parser = argparse.ArgumentParser(
+        description=(
+            'Runs a daemon that sends requests to the retdec.com API on '
+            'behalf of the decompiler and fileinfo scripts run with '
+            '--daemon.\n'
+            '\n'
+            'The daemon keeps connections to the API open between runs of '
+            'the scripts, polls the statuses of all decompilations and '
+            'analyses in a shared poller, and reuses decompilations and '
+            'analyses started for identical files with identical parameters. '
+            'It listens on a Unix domain socket that is accessible only by '
+            'the current user.'
+        ),
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        '-s', '--socket',
+        dest='socket_path',
+        metavar='SOCKET',
+        default=default_socket_path(),
+        help='Path to the socket to listen on. Default: %(default)s.'
+    )
+    parser.add_argument(
+        '--poll-interval',
+        dest='poll_interval',
+        metavar='SECONDS',
+        type=float,
+        default=0.5,
+        help='Number of seconds between two updates of the statuses of '
+             'unfinished decompilations and analyses. Default: %(default)s.'
+    )
+    parser.add_argument(
+        '--cache-ttl',
+        dest='cache_ttl',
+        metavar='SECONDS',
+        type=float,
+        default=600.0,
+        help='Number of seconds for which a decompilation or analysis is '
+             'reused for identical submissions (0 disables the reuse). '
+             'Default: %(default)s.'
+    )
+    parser.add_argument(
+        '-V', '--version',
+        action='version',
+        version='%(prog)s (via retdec-python) {}'.format(__version__)
+    )
+    _add_metrics_arguments(parser)
+    return parser.parse_args(argv[1:])
+
+
+def main(argv=None):
+    """Runs the tool.
+
+    :param list argv: Tool arguments.
+
+    If `argv` is ``None``, ``sys.argv`` is used.
+
+    The daemon runs until it is interrupted (by Ctrl+C or ``SIGTERM``).
+
+    :returns: Exit code (``0``).
+    """
+    args = parse_args(argv if argv is not None else sys.argv)
+    with _collecting_metrics(args), _interrupted_by_sigterm():
+        daemon = Daemon(
+            args.socket_path,
+            poll_interval=args.poll_interval,
+            cache_ttl=args.cache_ttl
+        )
+        try:
+            sys.stdout.write('Listening on {}\n'.format(daemon.socket_path))
+            sys.stdout.flush()
+            daemon.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            daemon.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
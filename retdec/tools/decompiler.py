@@ -27,14 +27,30 @@
 
 import abc
 import argparse
+import collections
+import glob
 import os
+import shutil
 import sys
+import threading
+import time
 
 from retdec.decompiler import Decompiler
-from retdec.exceptions import ArchiveGenerationFailedError
-from retdec.exceptions import CFGGenerationFailedError
-from retdec.exceptions import CGGenerationFailedError
+from retdec.exceptions import RetdecError
+from retdec.exceptions import UnknownAPIError
 from retdec.tools import _add_arguments_shared_by_all_tools
+from retdec.tools import _add_daemon_arguments
+from retdec.tools import _add_durability_argument
+from retdec.tools import _add_metrics_arguments
+from retdec.tools import _add_phase_log_argument
+from retdec.tools import _add_sharding_arguments
+from retdec.tools import _add_watch_arguments
+from retdec.tools import _check_input_arguments
+from retdec.tools import _collecting_metrics
+from retdec.tools import _get_daemon_socket
+from retdec.tools import _profiling_phases
+from retdec.tools import _shard_input_files
+from retdec.tools import _watch_directory
 
 
 class ProgressDisplayer(metaclass=abc.ABCMeta):
@@ -281,6 +297,49 @@ class ProgressLogDisplayer(ProgressDisplayer):
             self._first_download = False
 
 
+class ProgressSummaryDisplayer(ProgressDisplayer):
+    """Displays a single line per decompilation when it finishes.
+
+    :param str input_file: Path to the decompiled file.
+
+    It is used when several files are decompiled at the same time because
+    detailed progress of concurrent decompilations would be interleaved.
+    """
+
+    def __init__(self, input_file):
+        self._input_file = input_file
+
+    def display_decompilation_progress(self, d):
+        # Example:
+        #
+        #     dir/prog.exe (8DRerEdKop): OK
+        #
+        if d.has_finished():
+            # Write the whole line at once so that lines from concurrent
+            # decompilations are not mixed together.
+            sys.stdout.write('{} ({}): {}\n'.format(
+                self._input_file,
+                d.id,
+                'OK' if d.has_succeeded() else 'FAIL'
+            ))
+            sys.stdout.flush()
+
+    def display_download_progress(self, file_name):
+        # Do not display anything.
+        pass
+
+    def display_generation_failure(self, what, reason):
+        # Example:
+        #
+        #   Warning: dir/prog.exe: Generation of the archive failed: Archive
+        #   is too big.
+        #
+        sys.stdout.write('Warning: {}: Generation of the {} failed: {}\n'.format(
+            self._input_file, what, reason
+        ))
+        sys.stdout.flush()
+
+
 class NoProgressDisplayer(ProgressDisplayer):
     """Displays nothing."""
 
@@ -294,18 +353,291 @@ class NoProgressDisplayer(ProgressDisplayer):
         pass
 
 
+class MultiJobProgressDisplayer:
+    """Displays aggregate progress of many concurrent decompilations.
+
+    :param int total: Number of files to be decompiled.
+    :param file stream: Stream into which the progress is written (standard
+        output by default).
+    :param bool is_tty: Is `stream` a terminal? When ``None``, it is detected.
+    :param float frame_interval: Number of seconds between redraws on a
+        terminal.
+    :param float summary_interval: Number of seconds between summary lines
+        when `stream` is not a terminal.
+    :param int slowest_count: Number of the slowest decompilations in flight
+        to be displayed.
+    :param callable clock: Function returning the current time (in seconds).
+
+    The events (started and finished decompilations and their status updates)
+    only update counters. The progress itself is written by a background
+    thread, which is started by :meth:`start()`, so the cost of displaying it
+    does not depend on the number of events. On a terminal, a block of lines
+    with the number of decompiled, in-flight, and queued files, the
+    throughput, the estimated time to finish, and the slowest decompilations
+    is redrawn in place at a fixed rate. Otherwise, a single summary line is
+    written periodically.
+    """
+
+    def __init__(self, total, stream=None, is_tty=None, frame_interval=0.25,
+                 summary_interval=30.0, slowest_count=3, clock=time.monotonic):
+        self._total = total
+        self._stream = stream if stream is not None else sys.stdout
+        if is_tty is None:
+            is_tty = getattr(self._stream, 'isatty', lambda: False)()
+        self._is_tty = is_tty
+        self._interval = frame_interval if is_tty else summary_interval
+        self._slowest_count = slowest_count
+        self._clock = clock
+        self._start_time = clock()
+        self._lock = threading.Lock()
+        # Input file -> [start time, completion, description of the phase].
+        self._jobs = {}
+        self._succeeded = 0
+        self._failed = 0
+        # Guards the writing of the progress and messages, which have to be
+        # written above the drawn block of lines.
+        self._output_lock = threading.Lock()
+        self._drawn_lines = 0
+        self._stopped = threading.Event()
+        self._thread = None
+
+    @property
+    def is_tty(self):
+        """Is the progress drawn on a terminal (`bool`)?"""
+        return self._is_tty
+
+    def start(self):
+        """Starts displaying the progress in a background thread."""
+        self._thread = threading.Thread(target=self._display_periodically)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def close(self):
+        """Stops displaying the progress and displays its final state."""
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.refresh()
+
+    def job_started(self, input_file):
+        """Records that the decompilation of the given file has started."""
+        with self._lock:
+            self._jobs[input_file] = [self._clock(), 0, None]
+
+    def job_displayer(self, input_file):
+        """Returns a :class:`ProgressDisplayer` recording the progress of the
+        decompilation of the given file.
+        """
+        return _JobProgressDisplayer(self, input_file)
+
+    def job_finished(self, input_file, error=None):
+        """Records that the decompilation of the given file has finished.
+
+        :param error: Error that prevented the decompilation of the file
+            (``None`` when the file has been successfully decompiled). It is
+            displayed on the standard error.
+        """
+        with self._lock:
+            self._jobs.pop(input_file, None)
+            if error is None:
+                self._succeeded += 1
+            else:
+                self._failed += 1
+        if error is not None:
+            self.display_message(
+                'Error: {}: {}'.format(input_file, error),
+                sys.stderr
+            )
+
+    def display_message(self, message, stream=None):
+        """Displays the given message above the progress.
+
+        :param file stream: Stream into which the message is written (the
+            stream of the progress by default).
+        """
+        stream = stream if stream is not None else self._stream
+        with self._output_lock:
+            self._erase()
+            stream.write(message + '\n')
+            stream.flush()
+
+    def refresh(self):
+        """Displays the current progress right away."""
+        lines = self._render()
+        with self._output_lock:
+            self._erase()
+            if self._is_tty:
+                width = shutil.get_terminal_size().columns - 1
+                # Longer lines would wrap, and the block could not be erased.
+                lines = [line[:width] for line in lines]
+                self._drawn_lines = len(lines)
+            self._stream.write(''.join(line + '\n' for line in lines))
+            self._stream.flush()
+
+    def _update_job(self, input_file, completion, description):
+        """Records a status update of the decompilation of the given file."""
+        with self._lock:
+            job = self._jobs.get(input_file)
+            if job is not None:
+                job[1:] = [completion, description]
+
+    def _display_periodically(self):
+        """Displays the progress until the displayer is closed."""
+        while not self._stopped.wait(self._interval):
+            self.refresh()
+
+    def _erase(self):
+        """Erases the drawn block of lines (if any)."""
+        if self._drawn_lines:
+            # Move the cursor to the beginning of the first drawn line and
+            # clear everything below it.
+            self._stream.write('\x1b[{}F\x1b[J'.format(self._drawn_lines))
+            self._drawn_lines = 0
+
+    def _render(self):
+        """Returns lines with the current progress."""
+        with self._lock:
+            now = self._clock()
+            done = self._succeeded + self._failed
+            in_flight = len(self._jobs)
+            slowest = sorted(
+                (start_time, input_file, completion, description)
+                for input_file, (start_time, completion, description)
+                in self._jobs.items()
+            )[:self._slowest_count]
+        queued = max(self._total - done - in_flight, 0)
+        elapsed = now - self._start_time
+        rate = done / elapsed if elapsed > 0 else 0
+        eta = (
+            _format_duration((self._total - done) / rate) if rate > 0
+            else 'unknown'
+        )
+        counts = '{}/{} files decompiled ({} failed), {} in flight, {} queued'.format(
+            done, self._total, self._failed, in_flight, queued
+        )
+        throughput = '{:.1f} files/min'.format(rate * 60)
+
+        if not self._is_tty:
+            # Example:
+            #
+            #     Progress: 120/2000 files decompiled (3 failed), 8 in flight,
+            #     1872 queued, 14.2 files/min, ETA 2h 12m, slowest:
+            #     dir/prog.exe (12m 03s)
+            #
+            line = 'Progress: {}, {}, ETA {}'.format(counts, throughput, eta)
+            if slowest:
+                start_time, input_file, _, _ = slowest[0]
+                line += ', slowest: {} ({})'.format(
+                    input_file, _format_duration(now - start_time)
+                )
+            return [line]
+
+        # Example:
+        #
+        #     Progress: 120/2000 files decompiled (3 failed), 8 in flight, ...
+        #     Throughput: 14.2 files/min, elapsed: 8m 27s, ETA: 2h 12m
+        #     Slowest:
+        #       12m 03s  34%  dir/prog.exe (Data-flow analysis)
+        #        9m 41s  60%  dir/other.exe (Initializing)
+        #
+        lines = [
+            'Progress: {}'.format(counts),
+            'Throughput: {}, elapsed: {}, ETA: {}'.format(
+                throughput, _format_duration(elapsed), eta
+            ),
+        ]
+        if slowest:
+            lines.append('Slowest:')
+        for start_time, input_file, completion, description in slowest:
+            line = '  {:>7}  {:>3}%  {}'.format(
+                _format_duration(now - start_time), completion, input_file
+            )
+            if description is not None:
+                line += ' ({})'.format(description)
+            lines.append(line)
+        return lines
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __repr__(self):
+        return '<{} total={} tty={}>'.format(
+            __name__ + '.' + self.__class__.__name__,
+            self._total,
+            self._is_tty
+        )
+
+
+class _JobProgressDisplayer(ProgressDisplayer):
+    """Records progress of a single decompilation into a
+    :class:`MultiJobProgressDisplayer`.
+    """
+
+    def __init__(self, multi_displayer, input_file):
+        self._multi_displayer = multi_displayer
+        self._input_file = input_file
+
+    def display_decompilation_progress(self, d):
+        phases = d.get_phases()
+        self._multi_displayer._update_job(
+            self._input_file,
+            d.get_completion(),
+            phases[-1].description if phases else None
+        )
+
+    def display_download_progress(self, file_name):
+        # Do not display anything.
+        pass
+
+    def display_generation_failure(self, what, reason):
+        self._multi_displayer.display_message(
+            'Warning: {}: Generation of the {} failed: {}'.format(
+                self._input_file, what, reason
+            )
+        )
+
+
+def _format_duration(seconds):
+    """Returns a short human-readable representation of the given number of
+    seconds (e.g. ``12m 03s``).
+    """
+    seconds = int(seconds)
+    minutes, seconds = divmod(seconds, 60)
+    hours, minutes = divmod(minutes, 60)
+    days, hours = divmod(hours, 24)
+    if days:
+        return '{}d {:02}h'.format(days, hours)
+    elif hours:
+        return '{}h {:02}m'.format(hours, minutes)
+    elif minutes:
+        return '{}m {:02}s'.format(minutes, seconds)
+    return '{}s'.format(seconds)
+
+
 def parse_args(argv):
     """Parses the given list of arguments."""
     parser = argparse.ArgumentParser(
         description=(
-            'Decompiles the given file through the retdec.com '
+            'Decompiles the given files through the retdec.com '
             'decompilation service by using their public REST API.\n'
             '\n'
             'By default, the output files are stored into the same directory '
             'where the input file is located. For example, if the input file '
             "is 'dir/prog.exe', then the decompiled code in the C language is "
             "saved as 'dir/prog.c'. You can override the output directory by "
-            'using the -o/--output-dir parameter.'
+            'using the -o/--output-dir parameter. When several files are '
+            'decompiled, the outputs of each file are stored into a '
+            'subdirectory of the output directory named after the file.\n'
+            '\n'
+            'With --watch DIR, files dropped into DIR are decompiled as soon '
+            'as they are fully written and then moved into DIR/done or '
+            'DIR/failed. Unless -o/--output-dir is given, the outputs are '
+            'stored into DIR/done.'
         ),
         formatter_class=argparse.RawDescriptionHelpFormatter
     )
@@ -369,6 +701,60 @@ def parse_args(argv):
         help='Endianness of the machine code (bin and raw modes only). '
              'Choices: %(choices)s. Default: little.'
     )
+    parser.add_argument(
+        '-j', '--jobs',
+        dest='jobs',
+        metavar='N',
+        type=int,
+        default=1,
+        help='Number of files that are decompiled at the same time when '
+             'several files are given. Default: %(default)s.'
+    )
+    parser.add_argument(
+        '--schedule',
+        dest='schedule',
+        metavar='POLICY',
+        choices=['fifo', 'size', 'fair'],
+        default='fifo',
+        help='Order in which the files are decompiled when several files are '
+             "given: 'fifo' (in the given order), 'size' (smallest files "
+             "first), 'fair' (take turns among the given arguments, e.g. "
+             'directories). Default: %(default)s.'
+    )
+    parser.add_argument(
+        '--manifest',
+        dest='manifest',
+        metavar='FILE',
+        default=None,
+        help='Record the state of every input file (its hash, the ID of its '
+             'decompilation, and the saved outputs) into the given SQLite '
+             'database so that the decompilation of the files can be resumed '
+             '(see --resume).'
+    )
+    parser.add_argument(
+        '--resume',
+        dest='resume',
+        action='store_true',
+        help='Resume the decompilation of the files recorded in the manifest: '
+             'skip the already decompiled files, wait for the decompilations '
+             'that were in progress, and decompile the failed and new files.'
+    )
+    parser.add_argument(
+        '--dashboard',
+        dest='dashboard',
+        action='store_true',
+        help='Display aggregate progress of all the files (counts, '
+             'throughput, the estimated time to finish, and the slowest '
+             'decompilations) instead of a line for every decompiled file. '
+             'When the standard output is not a terminal, a summary line is '
+             'printed periodically.'
+    )
+    _add_sharding_arguments(parser)
+    _add_durability_argument(parser)
+    _add_metrics_arguments(parser)
+    _add_phase_log_argument(parser)
+    _add_watch_arguments(parser)
+    _add_daemon_arguments(parser)
     parser.add_argument(
         '-l', '--target-language',
         dest='target_language',
@@ -399,6 +785,15 @@ def parse_args(argv):
         metavar='DIR',
         help='Save the outputs into this directory.'
     )
+    parser.add_argument(
+        '--pack',
+        dest='pack',
+        metavar='FORMAT',
+        choices=['zip', 'sqlite'],
+        help='Pack the outputs of each file into a single file (e.g. '
+             "'prog.exe.zip') instead of saving them separately. "
+             'Choices: %(choices)s.'
+    )
     parser.add_argument(
         '-p', '--pdb-file',
         dest='pdb_file',
@@ -513,23 +908,143 @@ def parse_args(argv):
         help='Generate an archive containing all decompilation outputs.'
     )
     parser.add_argument(
-        'input_file',
+        'input_files',
         metavar='FILE',
-        help='File to decompile.'
+        nargs='*',
+        help='File to decompile. It may also be a directory (all files in it '
+             'are decompiled recursively) or a glob pattern.'
     )
-    return parser.parse_args(argv[1:])
-
-
-def get_output_dir(args):
-    """Returns an absolute path to a directory where the output files should be
-    saved.
+    args = parser.parse_args(argv[1:])
+    _check_input_arguments(parser, args)
+    if args.jobs < 1:
+        parser.error('argument -j/--jobs: must be at least 1')
+    if args.resume and args.manifest is None:
+        parser.error('argument --resume: requires --manifest')
+    if args.manifest is not None and args.watch is not None:
+        parser.error('argument --manifest: not allowed with --watch')
+    if args.dashboard and args.watch is not None:
+        parser.error('argument --dashboard: not allowed with --watch')
+    return args
+
+
+def get_input_files(args):
+    """Returns files to be decompiled based on the arguments provided by the
+    user.
+
+    Directories are searched recursively and glob patterns are expanded. Other
+    arguments are returned as they are.
+
+    :returns: An ordered dictionary mapping the files to the arguments from
+        which they come. The arguments are expanded only once, so the
+        dictionary should be passed around rather than computed again.
+    """
+    input_files = collections.OrderedDict()
+    for arg in args.input_files:
+        for input_file in expand_input_file_arg(arg):
+            input_files.setdefault(input_file, arg)
+    return input_files
+
+
+def expand_input_file_arg(arg):
+    """Returns a list of files to be decompiled for the given argument."""
+    if os.path.isdir(arg):
+        input_files = []
+        for dir_path, dir_names, file_names in os.walk(arg):
+            # Make the order of the files deterministic.
+            dir_names.sort()
+            input_files.extend(
+                os.path.join(dir_path, file_name)
+                for file_name in sorted(file_names)
+            )
+        return input_files
+    elif glob.has_magic(arg):
+        return sorted(glob.glob(arg))
+    return [arg]
+
+
+def get_scheduling_policy(args):
+    """Returns a scheduling policy based on the arguments provided by the
+    user.
+    """
+    # The scheduler is used only when several files are decompiled, so it is
+    # imported here to make the startup of the tool faster.
+    from retdec.scheduler import FIFOPolicy
+    from retdec.scheduler import FairSharePolicy
+    from retdec.scheduler import ShortestJobFirstPolicy
+
+    if args.schedule == 'size':
+        return ShortestJobFirstPolicy()
+    elif args.schedule == 'fair':
+        return FairSharePolicy()
+    return FIFOPolicy()
+
+
+def get_output_dir(args, input_file, name=None):
+    """Returns an absolute path to a directory where the output files for the
+    given input file should be saved.
+
+    If `name` is given and the output directory was given by the user, the
+    outputs are saved into a subdirectory with this name (see
+    :func:`get_output_names()`).
     """
     if args.output_dir is not None:
         # The output directory was forced by the user.
-        return os.path.abspath(args.output_dir)
+        output_dir = os.path.abspath(args.output_dir)
+        if name:
+            output_dir = os.path.join(output_dir, name)
+        return output_dir
 
     # Save the outputs to the same directory where the input file is located.
-    return os.path.abspath(os.path.dirname(args.input_file))
+    return os.path.abspath(os.path.dirname(input_file))
+
+
+def uses_flat_layout(args):
+    """Should the outputs be saved right into the output directory rather than
+    into a subdirectory for every input file?
+
+    This is decided by the arguments given by the user, not by the number of
+    files that are actually decompiled: only a single file that is neither a
+    directory nor a glob pattern is decompiled with the flat layout. Hence,
+    the layout does not change when e.g. a directory contains a single file,
+    a shard ends up with a single file, or a manifest is used.
+    """
+    if len(args.input_files) != 1:
+        return False
+    arg = args.input_files[0]
+    return not os.path.isdir(arg) and not glob.has_magic(arg)
+
+
+def get_output_names(input_files):
+    """Returns a dictionary mapping the given input files to names of their
+    subdirectories in the output directory.
+
+    :param dict input_files: Input files mapped to the arguments from which
+        they come (see :func:`get_input_files()`).
+
+    Files found in a directory are named by their paths relative to the
+    directory, so files with the same name in different subdirectories do
+    not overwrite each other's outputs. Other files are named by their base
+    names.
+    """
+    return {
+        input_file: (
+            os.path.relpath(input_file, arg) if os.path.isdir(arg)
+            else os.path.basename(input_file)
+        )
+        for input_file, arg in input_files.items()
+    }
+
+
+def find_output_name_conflict(output_names):
+    """Returns a pair of input files with the same name in the given
+    dictionary (or ``None`` when all the names are distinct).
+    """
+    files_by_name = {}
+    for input_file, name in sorted(output_names.items()):
+        if name in files_by_name:
+            return files_by_name[name], input_file
+        files_by_name[name] = input_file
+    return None
 
 
 def get_progress_displayer(args):
@@ -557,33 +1072,38 @@ def add_decompilation_param_when_given(args, params, param_name):
         params[param_name] = param_value
 
 
-def should_download_output_binary_file(args):
+def should_download_output_binary_file(args, input_file):
     """Should the compiled version of the input C file be downloaded?
     """
     # It should be downloaded only when we are decompiling a C file.
     if args.mode == 'c':
         return True
-    elif not args.mode and args.input_file.lower().endswith('c'):
+    elif not args.mode and input_file.lower().endswith('c'):
         return True
     return False
 
 
-def main(argv=None):
-    """Runs the tool.
-
-    :param list argv: Tool arguments.
-
-    If `argv` is ``None``, ``sys.argv`` is used.
+def get_outputs_to_save(args, input_file):
+    """Returns a list of outputs of the decompilation of the given file that
+    should be saved.
     """
-    args = parse_args(argv if argv is not None else sys.argv)
+    outputs = ['hll', 'dsm']
+    if should_download_output_binary_file(args, input_file):
+        outputs.append('binary')
+    if args.generate_cg:
+        outputs.append('cg')
+    if args.generate_cfgs:
+        outputs.append('cfgs')
+    if args.generate_archive:
+        outputs.append('archive')
+    return outputs
 
-    decompiler = Decompiler(
-        api_url=args.api_url,
-        api_key=args.api_key
-    )
 
+def get_decompilation_params(args):
+    """Returns parameters of decompilations (except for the input file) based
+    on the arguments provided by the user.
+    """
     params = {}
-    add_decompilation_param_when_given(args, params, 'input_file')
     add_decompilation_param_when_given(args, params, 'pdb_file')
     add_decompilation_param_when_given(args, params, 'mode')
     add_decompilation_param_when_given(args, params, 'target_language')
@@ -609,54 +1129,361 @@ def main(argv=None):
     add_decompilation_param_when_given(args, params, 'generate_cg')
     add_decompilation_param_when_given(args, params, 'generate_cfgs')
     add_decompilation_param_when_given(args, params, 'generate_archive')
-    decompilation = decompiler.start_decompilation(**params)
+    return params
 
-    displayer = get_progress_displayer(args)
+
+#: Names of classes from :mod:`retdec.storage` that pack the outputs into a
+#: single file by the value of ``--pack``.
+PACKED_STORES = {
+    'zip': 'ZipStore',
+    'sqlite': 'SQLiteStore',
+}
+
+
+def create_packed_store(args, input_file, output_dir):
+    """Creates a store that packs the outputs of the given input file into a
+    single file in the given directory.
+    """
+    path = os.path.join(
+        output_dir,
+        '{}.{}'.format(os.path.basename(input_file), args.pack)
+    )
+    # Imported here because packing is optional and the module is not needed
+    # (and thus not imported) when the tool merely starts.
+    import retdec.storage
+
+    store_class = getattr(retdec.storage, PACKED_STORES[args.pack])
+    return store_class(path, args.durability)
+
+
+def finish_decompilation(decompilation, args, input_file, output_dir,
+                         displayer):
+    """Waits until the given decompilation finishes and saves its outputs.
+
+    :returns: Paths to the saved files (a single file when the outputs are
+        packed).
+    """
     displayer.display_decompilation_progress(decompilation)
     decompilation.wait_until_finished(
         callback=displayer.display_decompilation_progress
     )
 
-    output_dir = get_output_dir(args)
+    def save_outputs(directory):
+        return decompilation.save_all(
+            directory,
+            outputs=get_outputs_to_save(args, input_file),
+            on_download=lambda file_path: display_download_progress(
+                displayer, file_path
+            ),
+            on_generation_failure=displayer.display_generation_failure,
+            durability=args.durability
+        )
 
-    file_path = decompilation.save_hll_code(output_dir)
-    display_download_progress(displayer, file_path)
+    if args.pack is None:
+        return sorted(save_outputs(output_dir).values())
+    with create_packed_store(args, input_file, output_dir) as store:
+        save_outputs(store)
+    return [store.path]
 
-    file_path = decompilation.save_dsm_code(output_dir)
-    display_download_progress(displayer, file_path)
 
-    if should_download_output_binary_file(args):
-        file_path = decompilation.save_binary(output_dir)
-        display_download_progress(displayer, file_path)
+def decompile_file(decompiler, args, params, input_file):
+    """Decompiles the given file and saves the outputs."""
+    decompilation = decompiler.start_decompilation(
+        input_file=input_file, **params
+    )
+    finish_decompilation(
+        decompilation,
+        args,
+        input_file,
+        get_output_dir(args, input_file),
+        get_progress_displayer(args)
+    )
 
-    if args.generate_cg:
-        try:
-            decompilation.wait_until_cg_is_generated()
-            file_path = decompilation.save_cg(output_dir)
-            display_download_progress(displayer, file_path)
-        except CGGenerationFailedError as ex:
-            displayer.display_generation_failure('call graph', str(ex))
 
-    if args.generate_cfgs:
-        for func in decompilation.funcs_with_cfg:
-            try:
-                decompilation.wait_until_cfg_is_generated(func)
-                file_path = decompilation.save_cfg(func, output_dir)
-                display_download_progress(displayer, file_path)
-            except CFGGenerationFailedError as ex:
-                displayer.display_generation_failure(
-                    'control-flow graph for {}'.format(func), str(ex)
-                )
+def decompile_files(decompiler, args, params, input_files, manifest=None,
+                    output_names=None):
+    """Decompiles the given files concurrently and saves the outputs.
 
-    if args.generate_archive:
-        try:
-            decompilation.wait_until_archive_is_generated()
-            file_path = decompilation.save_archive(output_dir)
-            display_download_progress(displayer, file_path)
-        except ArchiveGenerationFailedError as ex:
-            displayer.display_generation_failure('archive', str(ex))
-
-    return 0
+    :param dict input_files: Files to be decompiled, mapped to the arguments
+        from which they come (see :func:`get_input_files()`).
+    :param dict output_names: Names of subdirectories in the output directory
+        for the files (see :func:`get_output_names()`). When it is ``None``,
+        the outputs are saved right into the output directory.
+
+    At most ``args.jobs`` files are decompiled at the same time. The order in
+    which the files are decompiled is given by the scheduling policy chosen by
+    the user.
+
+    When a :class:`~retdec.manifest.Manifest` is given, the state of every
+    file is recorded into it. When the user requested to resume the
+    decompilation, the files that have been decompiled are skipped and the
+    decompilations that were in progress are waited for.
+
+    When the user requested a dashboard, the aggregate progress of all the
+    files is displayed by a :class:`MultiJobProgressDisplayer`.
+
+    :returns: Exit code (``0`` when all files have been successfully
+        decompiled, ``1`` otherwise).
+    """
+    # Imported here because the scheduler is not needed when a single file is
+    # decompiled, so the tool starts faster without it.
+    from retdec.scheduler import Scheduler
+
+    lock = threading.Lock()
+    failed = [False]
+    # Input file -> ID of its decompilation that was in progress.
+    in_progress = {}
+    # Created after all the files have been added.
+    progress = None
+
+    def start(job_params):
+        input_file = job_params['input_file']
+        if progress is not None:
+            progress.job_started(input_file)
+        if input_file in in_progress:
+            decompilation = reattach_decompilation(
+                decompiler, in_progress[input_file]
+            )
+            if decompilation is not None:
+                return decompilation
+        decompilation = decompiler.start_decompilation(**job_params)
+        if manifest is not None:
+            manifest.mark_submitted(input_file, job_params, decompilation.id)
+        return decompilation
+
+    def finish(submission):
+        input_file = submission.params['input_file']
+        name = output_names.get(input_file) if output_names else None
+        if name is not None and args.pack is not None:
+            # Packed outputs of each file are stored in a single file, so
+            # they do not need their own subdirectory.
+            name = os.path.dirname(name)
+        output_dir = get_output_dir(args, input_file, name)
+        saved_files = []
+        error = finish_submission(
+            args, submission, output_dir, on_saved=saved_files.extend,
+            displayer=(
+                progress.job_displayer(input_file) if progress is not None
+                else None
+            )
+        )
+        if manifest is not None:
+            if error is None:
+                manifest.mark_done(input_file, saved_files)
+            else:
+                manifest.mark_failed(input_file, submission.params, error)
+        if progress is not None:
+            progress.job_finished(input_file, error)
+        if error is not None:
+            with lock:
+                if progress is None:
+                    display_file_error(input_file, error)
+                failed[0] = True
+
+    scheduler = Scheduler(
+        start,
+        policy=get_scheduling_policy(args),
+        max_in_flight=args.jobs
+    )
+    done_count = 0
+    for input_file in input_files:
+        job_params = dict(params, input_file=input_file)
+        entry = None
+        if manifest is not None and args.resume:
+            entry = manifest.get_resumable(input_file, job_params)
+        if entry is not None and entry.state == manifest.DONE:
+            done_count += 1
+            continue
+        elif entry is not None and entry.state == manifest.SUBMITTED:
+            in_progress[input_file] = entry.id
+        scheduler.add(
+            job_params,
+            feed=input_files[input_file] if args.schedule == 'fair' else None
+        )
+    if args.resume and not args.quiet:
+        sys.stdout.write(
+            'Resuming: {} files already decompiled, {} decompilations in '
+            'progress, {} files to decompile.\n'.format(
+                done_count,
+                len(in_progress),
+                scheduler.pending() - len(in_progress)
+            )
+        )
+        sys.stdout.flush()
+    if args.dashboard and not args.quiet:
+        progress = MultiJobProgressDisplayer(scheduler.pending())
+        with progress:
+            scheduler.run(finish)
+    else:
+        scheduler.run(finish)
+    return 1 if failed[0] else 0
+
+
+def reattach_decompilation(decompiler, id):
+    """Returns the decompilation with the given ID that was started earlier
+    (``None`` when the API no longer knows it).
+    """
+    decompilation = decompiler.get_decompilation(id)
+    try:
+        # Check that the decompilation still exists.
+        decompilation.has_finished()
+    except UnknownAPIError as ex:
+        if ex.code == 404:
+            return None
+        raise
+    return decompilation
+
+
+def finish_submission(args, submission, output_dir, on_saved=None,
+                      displayer=None):
+    """Waits until the decompilation of the given
+    :class:`~retdec.batch.Submission` finishes and saves its outputs into the
+    given directory.
+
+    :param callable on_saved: Function to be called with a list of paths to
+        the saved files.
+    :param ProgressDisplayer displayer: Displayer of the progress of the
+        decompilation (by default, a line is displayed when it finishes).
+
+    :returns: Error that prevented the decompilation of the file (``None``
+        when the file has been successfully decompiled).
+    """
+    if submission.has_failed():
+        return submission.error
+
+    input_file = submission.params['input_file']
+    if displayer is None:
+        displayer = (
+            NoProgressDisplayer() if args.quiet
+            else ProgressSummaryDisplayer(input_file)
+        )
+    try:
+        os.makedirs(output_dir, exist_ok=True)
+        saved_files = finish_decompilation(
+            submission.resource, args, input_file, output_dir, displayer
+        )
+    except (RetdecError, OSError) as ex:
+        return ex
+    if on_saved is not None:
+        on_saved(saved_files)
+    return None
+
+
+def watch_files(decompiler, args, params):
+    """Decompiles files dropped into the directory given by ``--watch`` until
+    interrupted.
+
+    :returns: Exit code (``0`` when all files have been successfully
+        decompiled, ``1`` otherwise).
+    """
+    from retdec.scheduler import Scheduler
+
+    lock = threading.Lock()
+
+    def get_watched_file_output_dir(input_file, entry_dir):
+        if args.output_dir is None:
+            # Store the outputs next to the input file into its directory in
+            # the directory with processed files.
+            return os.path.abspath(entry_dir)
+        return get_output_dir(args, input_file, os.path.basename(entry_dir))
+
+    def finish(submission, entry_dir):
+        input_file = submission.params['input_file']
+        error = finish_submission(
+            args, submission, get_watched_file_output_dir(input_file, entry_dir)
+        )
+        if error is not None:
+            with lock:
+                display_file_error(input_file, error)
+        return error is None
+
+    scheduler = Scheduler(
+        lambda job_params: decompiler.start_decompilation(
+            **dict(params, **job_params)
+        ),
+        policy=get_scheduling_policy(args),
+        max_in_flight=args.jobs
+    )
+    return _watch_directory(args, scheduler, finish)
+
+
+def display_file_error(input_file, error):
+    """Displays an error that occurred when decompiling the given file."""
+    sys.stderr.write('Error: {}: {}\n'.format(input_file, error))
+    sys.stderr.flush()
+
+
+def main(argv=None):
+    """Runs the tool.
+
+    :param list argv: Tool arguments.
+
+    If `argv` is ``None``, ``sys.argv`` is used.
+
+    :returns: Exit code (``0`` when all files have been successfully
+        decompiled, ``1`` otherwise).
+    """
+    args = parse_args(argv if argv is not None else sys.argv)
+    if args.watch is not None:
+        decompiler = Decompiler(
+            api_url=args.api_url,
+            api_key=args.api_key,
+            daemon_socket=_get_daemon_socket(args)
+        )
+        with _collecting_metrics(args), _profiling_phases(args):
+            return watch_files(
+                decompiler, args, get_decompilation_params(args)
+            )
+
+    input_files = get_input_files(args)
+    if not input_files:
+        sys.stderr.write('Error: No files to decompile.\n')
+        return 1
+    output_names = None
+    if not uses_flat_layout(args):
+        # The names are checked before sharding so that all shards detect
+        # the same conflicts.
+        output_names = get_output_names(input_files)
+        conflict = find_output_name_conflict(output_names)
+        if args.output_dir is not None and conflict is not None:
+            sys.stderr.write(
+                'Error: The outputs of {} and {} would be saved into the same '
+                'directory.\n'.format(*conflict)
+            )
+            return 1
+
+    input_files = collections.OrderedDict(
+        (input_file, input_files[input_file])
+        for input_file in _shard_input_files(args, input_files)
+    )
+    if not input_files:
+        # Another worker processes all the files.
+        return 0
+
+    decompiler = Decompiler(
+        api_url=args.api_url,
+        api_key=args.api_key,
+        daemon_socket=_get_daemon_socket(args)
+    )
+    params = get_decompilation_params(args)
+
+    with _collecting_metrics(args), _profiling_phases(args):
+        if args.manifest is not None:
+            # Imported here because the module imports sqlite3, which is
+            # not needed unless a manifest is used.
+            from retdec.manifest import Manifest
+
+            with Manifest(args.manifest) as manifest:
+                return decompile_files(
+                    decompiler, args, params, input_files, manifest,
+                    output_names
+                )
+        if output_names is None and not args.dashboard:
+            decompile_file(decompiler, args, params, next(iter(input_files)))
+            return 0
+        return decompile_files(
+            decompiler, args, params, input_files, output_names=output_names
+        )
 
 
 if __name__ == '__main__':
@@ -7,28 +7,49 @@
 """A tool for analysis of binary files. It uses the library."""
 
 import argparse
+import json
 import sys
+import threading
 
+from retdec.exceptions import RetdecError
 from retdec.fileinfo import Fileinfo
 from retdec.tools import _add_arguments_shared_by_all_tools
+from retdec.tools import _add_daemon_arguments
+from retdec.tools import _add_sharding_arguments
+from retdec.tools import _add_watch_arguments
+from retdec.tools import _check_input_arguments
+from retdec.tools import _get_daemon_socket
+from retdec.tools import _shard_input_files
+from retdec.tools import _watch_directory
 
 
 def parse_args(argv):
     """Parses the given list of arguments."""
     parser = argparse.ArgumentParser(
         description=(
-            'Analyzes the given binary file through the retdec.com '
+            'Analyzes the given binary files through the retdec.com '
             'decompilation service by using their public REST API.\n'
             '\n'
-            'The output from the analysis is printed to the standard output.'
+            'When a single file is given, the output from the analysis is '
+            'printed to the standard output. When more files are given (or '
+            "when the file is '-', in which case paths to the files are read "
+            'from the standard input, one per line), the files are analyzed '
+            'concurrently and a JSON object is printed on a separate line for '
+            'each of them as soon as its analysis finishes.\n'
+            '\n'
+            'With --watch DIR, files dropped into DIR are analyzed as soon as '
+            'they are fully written, a JSON object is printed for each of '
+            'them, and they are moved into DIR/done or DIR/failed.'
         ),
         formatter_class=argparse.RawDescriptionHelpFormatter
     )
     _add_arguments_shared_by_all_tools(parser)
     parser.add_argument(
-        'input_file',
+        'input_files',
         metavar='FILE',
-        help='File to analyze.'
+        nargs='*',
+        help="File to analyze ('-' to read paths to files from the standard "
+             'input).'
     )
     parser.add_argument(
         '-f', '--output-format',
@@ -39,13 +60,201 @@ def parse_args(argv):
         help='Format of the output from the analysis. '
              'Choices: %(choices)s. Default: %(default)s.'
     )
+    parser.add_argument(
+        '-j', '--jobs',
+        dest='jobs',
+        metavar='N',
+        type=int,
+        default=1,
+        help='Number of files that are analyzed at the same time when '
+             'several files are given. Default: %(default)s.'
+    )
     parser.add_argument(
         '-v', '--verbose',
         dest='verbose',
         action='store_true',
         help='Print all available information about the file.'
     )
-    return parser.parse_args(argv[1:])
+    _add_sharding_arguments(parser)
+    _add_watch_arguments(parser)
+    _add_daemon_arguments(parser)
+    args = parser.parse_args(argv[1:])
+    _check_input_arguments(parser, args)
+    if args.jobs < 1:
+        parser.error('argument -j/--jobs: must be at least 1')
+    return args
+
+
+def is_batch(args):
+    """Should the files be analyzed in the batch mode?"""
+    return (
+        len(args.input_files) > 1 or
+        '-' in args.input_files or
+        args.shard is not None
+    )
+
+
+def get_input_files(args):
+    """Returns an iterable of files to be analyzed.
+
+    Paths from the standard input are read lazily so that the analyses may
+    start before the whole input is read. When a shard was given, only the
+    files from the shard are returned.
+    """
+    return _shard_input_files(args, _get_all_input_files(args))
+
+
+def _get_all_input_files(args):
+    """Returns an iterable of all files given by the user."""
+    for input_file in args.input_files:
+        if input_file == '-':
+            for line in sys.stdin:
+                line = line.strip()
+                if line:
+                    yield line
+        else:
+            yield input_file
+
+
+def get_binary_stdout():
+    """Returns the standard output for writing bytes."""
+    # Flush the text layer first so that the output is not reordered.
+    sys.stdout.flush()
+    return sys.stdout.buffer
+
+
+def format_result(args, input_file, analysis=None, output=None, error=None):
+    """Returns a line with the result of the analysis of the given file (a
+    JSON object).
+    """
+    result = {'input_file': input_file}
+    if analysis is not None:
+        result['id'] = analysis.id
+    if error is not None:
+        result['error'] = str(error)
+    elif args.output_format == 'json':
+        # Embed the output as an object rather than as a string with escaped
+        # JSON.
+        result['output'] = json.loads(output)
+    else:
+        result['output'] = output
+    return json.dumps(result, sort_keys=True) + '\n'
+
+
+def finish_analysis(args, submission):
+    """Waits until the analysis of the given
+    :class:`~retdec.batch.Submission` finishes.
+
+    :returns: Pair of a line with the result (see :func:`format_result()`)
+        and a flag whether the file has been successfully analyzed.
+    """
+    input_file = submission.params['input_file']
+    if submission.has_failed():
+        return format_result(args, input_file, error=submission.error), False
+
+    analysis = submission.resource
+    try:
+        analysis.wait_until_finished()
+        output = analysis.get_output()
+        line = format_result(args, input_file, analysis, output=output)
+    except (RetdecError, OSError) as ex:
+        return format_result(args, input_file, analysis, error=ex), False
+    except ValueError as ex:
+        # The output in the JSON format could not be parsed.
+        error = 'Invalid JSON output: {}'.format(ex)
+        return format_result(args, input_file, analysis, error=error), False
+    return line, True
+
+
+def analyze_files(fileinfo, args):
+    """Analyzes the given files concurrently and prints the results in the
+    JSON Lines format.
+
+    At most ``args.jobs`` files are analyzed at the same time. The files are
+    read lazily (e.g. from the standard input), so their number does not
+    affect the memory usage.
+
+    :returns: Exit code (``0`` when all files have been successfully
+        analyzed, ``1`` otherwise).
+    """
+    # Imported here because the scheduler is not needed when a single file is
+    # analyzed, so the tool starts faster without it.
+    from retdec.scheduler import Scheduler
+
+    lock = threading.Lock()
+    failed = [False]
+
+    def finish(submission):
+        line, succeeded = finish_analysis(args, submission)
+        with lock:
+            sys.stdout.write(line)
+            # Make the result available as soon as possible.
+            sys.stdout.flush()
+            if not succeeded:
+                failed[0] = True
+
+    scheduler = Scheduler(
+        lambda params: fileinfo.start_analysis(
+            output_format=args.output_format,
+            verbose=args.verbose,
+            **params
+        ),
+        max_in_flight=args.jobs,
+        max_pending=args.jobs
+    )
+    errors = []
+
+    def run_scheduler():
+        try:
+            scheduler.run(finish, until_closed=True)
+        except Exception as ex:
+            errors.append(ex)
+        finally:
+            # Do not block the main thread when an unexpected error occurred.
+            scheduler.close(discard_pending=True)
+
+    runner = threading.Thread(target=run_scheduler)
+    runner.start()
+    try:
+        for input_file in get_input_files(args):
+            if errors:
+                break
+            scheduler.add({'input_file': input_file})
+    finally:
+        scheduler.close()
+        runner.join()
+    if errors:
+        raise errors[0]
+    return 1 if failed[0] else 0
+
+
+def watch_files(fileinfo, args):
+    """Analyzes files dropped into the directory given by ``--watch`` until
+    interrupted and prints the results in the JSON Lines format.
+
+    :returns: Exit code (``0`` when all files have been successfully
+        analyzed, ``1`` otherwise).
+    """
+    from retdec.scheduler import Scheduler
+
+    lock = threading.Lock()
+
+    def finish(submission, entry_dir):
+        line, succeeded = finish_analysis(args, submission)
+        with lock:
+            sys.stdout.write(line)
+            sys.stdout.flush()
+        return succeeded
+
+    scheduler = Scheduler(
+        lambda params: fileinfo.start_analysis(
+            output_format=args.output_format,
+            verbose=args.verbose,
+            **params
+        ),
+        max_in_flight=args.jobs
+    )
+    return _watch_directory(args, scheduler, finish)
 
 
 def main(argv=None):
@@ -54,19 +263,32 @@ def main(argv=None):
     :param list argv: Tool arguments.
 
     If `argv` is ``None``, ``sys.argv`` is used.
+
+    :returns: Exit code (``0`` when all files have been successfully
+        analyzed, ``1`` otherwise).
     """
     args = parse_args(argv if argv is not None else sys.argv)
     fileinfo = Fileinfo(
         api_url=args.api_url,
-        api_key=args.api_key
+        api_key=args.api_key,
+        daemon_socket=_get_daemon_socket(args)
     )
+    if args.watch is not None:
+        return watch_files(fileinfo, args)
+    if is_batch(args):
+        return analyze_files(fileinfo, args)
+
     analysis = fileinfo.start_analysis(
-        input_file=args.input_file,
+        input_file=args.input_files[0],
         output_format=args.output_format,
         verbose=args.verbose
     )
     analysis.wait_until_finished()
-    sys.stdout.write(analysis.get_output())
+    # Copy the output directly from the response to avoid keeping all of it in
+    # memory.
+    stdout = get_binary_stdout()
+    analysis.write_output(stdout)
+    stdout.flush()
     return 0
 
 
@@ -0,0 +1,133 @@
+#
+# Project:   retdec-python
+# Copyright: (c) 2015 by Petr Zemek <s3rvac@gmail.com> and contributors
+# License:   MIT, see the LICENSE file for more details
+#
+
+"""A tool that summarizes durations of decompilation phases recorded by
+:class:`retdec.profiler.PhaseProfiler`. It uses the library.
+"""
+
+import argparse
+import itertools
+import sys
+
+from retdec import __version__
+from retdec.profiler import DEFAULT_PERCENTILES
+from retdec.profiler import read_records
+from retdec.profiler import summarize
+
+
+def parse_args(argv):
+    """Parses the given list of arguments."""
+    parser = argparse.ArgumentParser(
+        description=(
+            'Summarizes durations of decompilation phases recorded by the '
+            'decompiler or retdec-worker scripts (see their --phase-log '
+            'parameter) into percentiles per phase.'
+        )
+    )
+    parser.add_argument(
+        'logs',
+        metavar='LOG',
+        nargs='+',
+        help='Log with recorded phases.'
+    )
+    parser.add_argument(
+        '--by',
+        dest='by',
+        metavar='PARAM',
+        action='append',
+        default=[],
+        help='Summarize separately for every value of the given '
+             'decompilation parameter (e.g. decomp_optimizations). '
+             'Can be given several times.'
+    )
+    parser.add_argument(
+        '--include-failed',
+        dest='include_failed',
+        action='store_true',
+        help='Include also failed decompilations.'
+    )
+    parser.add_argument(
+        '-V', '--version',
+        action='version',
+        version='%(prog)s (via retdec-python) {}'.format(__version__)
+    )
+    return parser.parse_args(argv[1:])
+
+
+def format_group(by, group):
+    """Returns a heading of the given group of decompilations."""
+    if not by:
+        return 'All decompilations'
+    return ', '.join(
+        '{}={}'.format(param, value if value is not None else '(default)')
+        for param, value in zip(by, group)
+    )
+
+
+def format_phase(phase):
+    """Returns a name of the given phase (a pair ``(part, name)``)."""
+    part, name = phase
+    if part is None:
+        return name
+    return '{}: {}'.format(part, name)
+
+
+def format_summary(summary, percentiles):
+    """Returns a table with the given summary of phases."""
+    phase_width = max(
+        [len('Phase')] + [len(format_phase(phase)) for phase, _, _ in summary]
+    )
+    lines = [
+        '{:<{}}  {:>6}'.format('Phase', phase_width, 'Jobs') + ''.join(
+            '  {:>9}'.format('p{}'.format(p)) for p in percentiles
+        )
+    ]
+    for phase, count, values in summary:
+        lines.append(
+            '{:<{}}  {:>6}'.format(
+                format_phase(phase), phase_width, count
+            ) + ''.join(
+                '  {:>8.2f}s'.format(value) for value in values
+            )
+        )
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    """Runs the tool.
+
+    :param list argv: Tool arguments.
+
+    If `argv` is ``None``, ``sys.argv`` is used.
+
+    :returns: Exit code.
+    """
+    args = parse_args(argv if argv is not None else sys.argv)
+    percentiles = DEFAULT_PERCENTILES
+    records = itertools.chain.from_iterable(
+        read_records(log) for log in args.logs
+    )
+    summaries = summarize(
+        records,
+        by=tuple(args.by),
+        percentiles=percentiles,
+        include_failed=args.include_failed
+    )
+    if not summaries:
+        sys.stderr.write('Error: No decompilations to summarize.\n')
+        return 1
+
+    groups = sorted(summaries, key=lambda group: [str(v) for v in group])
+    for i, group in enumerate(groups):
+        if i > 0:
+            sys.stdout.write('\n')
+        sys.stdout.write(format_group(args.by, group) + '\n')
+        sys.stdout.write(format_summary(summaries[group], percentiles) + '\n')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,285 @@
+#
+# Project:   retdec-python
+# Copyright: (c) 2015 by Petr Zemek <s3rvac@gmail.com> and contributors
+# License:   MIT, see the LICENSE file for more details
+#
+
+"""A worker that decompiles files from a shared work queue. It uses the
+library.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+from retdec.decompiler import Decompiler
+from retdec.exceptions import LeaseLostError
+from retdec.exceptions import RetdecError
+from retdec.queue import open_queue
+from retdec.tools import _add_arguments_shared_by_all_tools
+from retdec.tools import _add_durability_argument
+from retdec.tools import _add_metrics_arguments
+from retdec.tools import _add_phase_log_argument
+from retdec.tools import _collecting_metrics
+from retdec.tools import _profiling_phases
+from retdec.tools.decompiler import ProgressSummaryDisplayer
+
+
+def parse_args(argv):
+    """Parses the given list of arguments."""
+    parser = argparse.ArgumentParser(
+        description=(
+            'Decompiles files from a shared work queue through the retdec.com '
+            'decompilation service by using their public REST API.\n'
+            '\n'
+            'The queue is either an SQLite database or a directory (when the '
+            'given path is an existing directory). Several workers, possibly '
+            'running on different hosts, can process the same queue. Use '
+            '--add to put files into the queue.'
+        ),
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    _add_arguments_shared_by_all_tools(parser)
+    parser.add_argument(
+        'queue',
+        metavar='QUEUE',
+        help='Path to the queue (an SQLite database or a directory).'
+    )
+    parser.add_argument(
+        '--add',
+        dest='files_to_add',
+        metavar='FILE',
+        nargs='+',
+        help='Put the given files into the queue and exit.'
+    )
+    parser.add_argument(
+        '--status',
+        dest='status',
+        action='store_true',
+        help='Print the number of items in the queue by their state and exit.'
+    )
+    parser.add_argument(
+        '-o', '--output-dir',
+        dest='output_dir',
+        metavar='DIR',
+        default=None,
+        help='Save the outputs of each file into a subdirectory of this '
+             'directory named after the identifier of the file in the queue '
+             '(default: next to the input file).'
+    )
+    parser.add_argument(
+        '--with-cg',
+        dest='generate_cg',
+        action='store_true',
+        help='Generate call graphs for the added files.'
+    )
+    parser.add_argument(
+        '--with-cfgs',
+        dest='generate_cfgs',
+        action='store_true',
+        help='Generate control-flow graphs for the added files.'
+    )
+    parser.add_argument(
+        '--with-archive',
+        dest='generate_archive',
+        action='store_true',
+        help='Generate archives containing all outputs for the added files.'
+    )
+    _add_durability_argument(parser)
+    _add_metrics_arguments(parser)
+    _add_phase_log_argument(parser)
+    parser.add_argument(
+        '--visibility-timeout',
+        dest='visibility_timeout',
+        metavar='SECONDS',
+        type=int,
+        default=3600,
+        help='Number of seconds after which a leased file becomes available '
+             'to other workers. The lease is renewed while the worker waits '
+             'for the decompilation, so it expires only when the worker '
+             'stops. Default: %(default)s.'
+    )
+    parser.add_argument(
+        '--max-attempts',
+        dest='max_attempts',
+        metavar='N',
+        type=int,
+        default=3,
+        help='Maximal number of attempts to decompile a file. '
+             'Default: %(default)s.'
+    )
+    parser.add_argument(
+        '--poll-interval',
+        dest='poll_interval',
+        metavar='SECONDS',
+        type=float,
+        default=5,
+        help='Number of seconds to wait when the queue is empty. '
+             'Default: %(default)s.'
+    )
+    parser.add_argument(
+        '--exit-when-empty',
+        dest='exit_when_empty',
+        action='store_true',
+        help='Exit when there are no more files in the queue instead of '
+             'waiting for new ones.'
+    )
+    return parser.parse_args(argv[1:])
+
+
+def add_files(queue, args):
+    """Puts the files given by the user into the queue."""
+    params = {}
+    for param_name in ('generate_cg', 'generate_cfgs', 'generate_archive'):
+        if getattr(args, param_name):
+            params[param_name] = True
+    for input_file in args.files_to_add:
+        queue.put({
+            'input_file': os.path.abspath(input_file),
+            'params': params
+        })
+
+
+def print_status(queue):
+    """Prints the number of items in the queue by their state."""
+    for state, count in sorted(queue.counts().items()):
+        sys.stdout.write('{}: {}\n'.format(state, count))
+
+
+def get_output_dir(args, item):
+    """Returns an absolute path to a directory where the output files for the
+    input file from the given item should be saved.
+
+    With ``--output-dir``, the subdirectory is named after the identifier of
+    the item, which is unique in the queue. Files with the same name (e.g.
+    from different directories or hosts) thus never overwrite each other's
+    outputs.
+    """
+    if args.output_dir is not None:
+        return os.path.join(os.path.abspath(args.output_dir), item.id)
+    return os.path.abspath(os.path.dirname(item.payload['input_file']))
+
+
+def get_outputs_to_save(params):
+    """Returns a list of outputs of a decompilation with the given parameters
+    that should be saved.
+    """
+    outputs = ['hll', 'dsm']
+    if params.get('generate_cg'):
+        outputs.append('cg')
+    if params.get('generate_cfgs'):
+        outputs.append('cfgs')
+    if params.get('generate_archive'):
+        outputs.append('archive')
+    return outputs
+
+
+def process_item(queue, decompiler, args, item):
+    """Decompiles the file from the given item and saves the outputs.
+
+    While waiting for the decompilation, the lease of the item is renewed
+    whenever half of the visibility timeout has elapsed since the last
+    renewal, so the item is not leased by another worker.
+    """
+    input_file = item.payload['input_file']
+    params = item.payload.get('params', {})
+    output_dir = get_output_dir(args, item)
+    os.makedirs(output_dir, exist_ok=True)
+
+    displayer = ProgressSummaryDisplayer(input_file)
+    renewed = [time.monotonic()]
+
+    def callback(decompilation):
+        displayer.display_decompilation_progress(decompilation)
+        now = time.monotonic()
+        if now - renewed[0] >= queue.visibility_timeout / 2:
+            queue.renew(item)
+            renewed[0] = now
+
+    decompilation = decompiler.start_decompilation(
+        input_file=input_file, **params
+    )
+    decompilation.wait_until_finished(callback=callback)
+    decompilation.save_all(
+        output_dir,
+        outputs=get_outputs_to_save(params),
+        on_generation_failure=displayer.display_generation_failure,
+        durability=args.durability
+    )
+
+
+def run_worker(queue, decompiler, args):
+    """Decompiles files from the queue until it is empty (when requested) or
+    forever.
+    """
+    while True:
+        item = queue.lease()
+        if item is None:
+            if args.exit_when_empty:
+                return
+            time.sleep(args.poll_interval)
+            continue
+
+        try:
+            process_item(queue, decompiler, args, item)
+        except LeaseLostError as ex:
+            # Another worker has taken over the item.
+            display_item_error(item, ex)
+        except (RetdecError, OSError) as ex:
+            display_item_error(item, ex)
+            finish_item(queue.fail, item, str(ex))
+        else:
+            finish_item(queue.ack, item)
+
+
+def finish_item(finish, item, *args):
+    """Acknowledges or fails the given item by calling `finish`."""
+    try:
+        finish(item, *args)
+    except LeaseLostError as ex:
+        # Another worker has taken over the item, so there is nothing else to
+        # do.
+        display_item_error(item, ex)
+
+
+def display_item_error(item, error):
+    """Displays an error that occurred when processing the given item."""
+    sys.stderr.write('Error: {}: {}\n'.format(
+        item.payload['input_file'], error
+    ))
+    sys.stderr.flush()
+
+
+def main(argv=None):
+    """Runs the tool.
+
+    :param list argv: Tool arguments.
+
+    If `argv` is ``None``, ``sys.argv`` is used.
+
+    :returns: Exit code.
+    """
+    args = parse_args(argv if argv is not None else sys.argv)
+    queue = open_queue(
+        args.queue,
+        visibility_timeout=args.visibility_timeout,
+        max_attempts=args.max_attempts
+    )
+    with queue:
+        if args.files_to_add:
+            add_files(queue, args)
+        elif args.status:
+            print_status(queue)
+        else:
+            decompiler = Decompiler(
+                api_url=args.api_url,
+                api_key=args.api_key
+            )
+            with _collecting_metrics(args), _profiling_phases(args):
+                run_worker(queue, decompiler, args)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
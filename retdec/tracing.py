@@ -0,0 +1,293 @@
+#
+# Project:   retdec-python
+# Copyright: (c) 2015 by Petr Zemek <s3rvac@gmail.com> and contributors
+# License:   MIT, see the LICENSE file for more details
+#
+
+"""Tracing of decompilations and analyses via `OpenTelemetry
+<https://opentelemetry.io/>`_.
+
+Call :func:`enable()` to record every started resource as a trace. It requires
+the ``opentelemetry-api`` package, which is an optional dependency. To export
+the recorded spans, configure a tracer provider (e.g. from
+``opentelemetry-sdk``). Unless tracing is enabled, this module is not used by
+the library at all.
+"""
+
+import threading
+import weakref
+
+from retdec import hooks
+from retdec.exceptions import MissingDependencyError
+
+try:
+    from opentelemetry import propagate
+    from opentelemetry import trace
+except ImportError:
+    propagate = None
+    trace = None
+
+#: Name of the tracer that is used when no tracer is given.
+TRACER_NAME = 'retdec'
+
+#: Key under which the span of a request is stored in
+#: :attr:`retdec.hooks.RequestInfo.context`.
+_SPAN_KEY = 'retdec.tracing.span'
+
+
+class TracingHooks(hooks.RequestHooks, hooks.ResourceHooks):
+    """Hooks that record OpenTelemetry spans.
+
+    :param tracer: Tracer to be used to create spans
+        (``opentelemetry.trace.Tracer``). If it is ``None``, a tracer named
+        :data:`TRACER_NAME` is obtained from the global tracer provider.
+
+    :raises MissingDependencyError: When OpenTelemetry is not installed.
+
+    The trace of a resource consists of the following spans:
+
+    * ``retdec.decompilation`` (or ``retdec.analysis``): The root span. It
+      starts with the upload of the input file and ends when the resource is
+      found to have finished. A resource that is never found to have finished
+      (e.g. because your code stopped waiting for it) has its root span ended
+      when the resource object is garbage-collected.
+    * ``retdec.upload``, ``retdec.status``, and ``retdec.download``: A span
+      for every request. Downloads of outputs are children of the root span
+      even though they happen after the root span has ended. Spans of status
+      checks have the ``retdec.completion`` and ``retdec.finished``
+      attributes.
+    * ``retdec.phase``: A span for every phase of a decompilation (see
+      :class:`~retdec.decompilation.DecompilationPhase`), from the status
+      check in which the phase was first seen until the next phase was seen
+      or the decompilation finished.
+
+    The trace context is sent to the API in headers of the requests (e.g.
+    ``traceparent``).
+    """
+
+    def __init__(self, tracer=None):
+        _ensure_opentelemetry_is_installed()
+        self._tracer = tracer if tracer is not None \
+            else trace.get_tracer(TRACER_NAME)
+        # Resource ID -> _Trace.
+        self._traces = {}
+        self._lock = threading.Lock()
+        # Root spans of resources that are being started in the current
+        # thread (their IDs are not known until they are started).
+        self._local = threading.local()
+
+    def on_request_start(self, request):
+        if request.resource_id is None:
+            # A POST request that did not start a resource (e.g. because it
+            # was not sent by a service) leaves its root span behind.
+            self._end_pending_root_span()
+            root_span = self._tracer.start_span('retdec.resource')
+            self._local.root_span = root_span
+        else:
+            resource_trace = self._get_trace(request.resource_id)
+            root_span = resource_trace.root_span \
+                if resource_trace is not None else None
+
+        span = self._tracer.start_span(
+            'retdec.' + (request.kind if request.kind != 'other'
+                         else 'request'),
+            context=trace.set_span_in_context(root_span)
+            if root_span is not None else None,
+            kind=trace.SpanKind.CLIENT,
+            attributes={
+                'http.method': request.method,
+                'http.url': request.url,
+                'retdec.path': request.path,
+            }
+        )
+        request.context[_SPAN_KEY] = span
+        propagate.inject(request.headers, trace.set_span_in_context(span))
+
+    def on_response(self, request):
+        span = request.context[_SPAN_KEY]
+        span.set_attribute('http.status_code', request.status_code)
+        span.set_attribute('retdec.retries', request.retries)
+
+    def on_request_end(self, request, duration):
+        span = request.context.pop(_SPAN_KEY)
+        span.set_attribute('retdec.bytes_sent', request.bytes_sent)
+        span.set_attribute('retdec.bytes_received', request.bytes_received)
+        if request.kind == 'status':
+            resource_trace = self._get_trace(request.resource_id)
+            if resource_trace is not None:
+                # The span is ended when the status is processed so that it
+                # can be annotated with the completion.
+                resource_trace.end_status_span()
+                resource_trace.status_span = span
+                return
+        span.end()
+
+    def on_error(self, request, error):
+        span = request.context.pop(_SPAN_KEY)
+        _record_error(span, error)
+        span.end()
+        if request.resource_id is None:
+            # The resource has not been started.
+            self._end_pending_root_span(error)
+
+    def on_resource_start(self, resource):
+        root_span = self._local.__dict__.pop('root_span', None)
+        if root_span is None:
+            root_span = self._tracer.start_span('retdec.resource')
+        root_span.update_name('retdec.' + type(resource).__name__.lower())
+        root_span.set_attribute('retdec.id', resource.id)
+        with self._lock:
+            self._traces[resource.id] = _Trace(root_span)
+        weakref.finalize(resource, self._end_trace, resource.id)
+
+    def on_resource_status(self, resource, status):
+        resource_trace = self._get_trace(resource.id)
+        if resource_trace is None:
+            return
+
+        status_span = resource_trace.status_span
+        if status_span is not None:
+            if 'completion' in status:
+                status_span.set_attribute(
+                    'retdec.completion', status['completion']
+                )
+            status_span.set_attribute('retdec.finished', status['finished'])
+            resource_trace.end_status_span()
+
+        phases = status.get('phases', [])
+        for phase in phases[resource_trace.phase_count:]:
+            resource_trace.end_phase_span()
+            resource_trace.phase_span = self._tracer.start_span(
+                'retdec.phase',
+                context=trace.set_span_in_context(resource_trace.root_span),
+                attributes={
+                    'retdec.phase.name': phase['name'],
+                    'retdec.phase.part': phase['part'] or '',
+                    'retdec.phase.description': phase['description'],
+                    'retdec.phase.completion': phase['completion'],
+                    'retdec.phase.warnings': len(phase['warnings']),
+                }
+            )
+        resource_trace.phase_count = len(phases)
+
+    def on_resource_finish(self, resource, status):
+        resource_trace = self._get_trace(resource.id)
+        if resource_trace is None:
+            return
+
+        root_span = resource_trace.root_span
+        root_span.set_attribute('retdec.failed', status['failed'])
+        if status['failed']:
+            root_span.set_status(trace.Status(
+                trace.StatusCode.ERROR, status.get('error') or None
+            ))
+        # The trace is kept until the resource is garbage-collected so that
+        # downloads of outputs are still children of the root span.
+        resource_trace.end()
+
+    def on_resource_error(self, resource, error):
+        resource_trace = self._get_trace(resource.id)
+        # The error of a failed resource is raised after it has finished, in
+        # which case its root span already has the error status.
+        if resource_trace is not None and not resource_trace.ended:
+            _record_error(resource_trace.root_span, error)
+
+    def _end_pending_root_span(self, error=None):
+        """Ends the root span of a resource that has not been started in the
+        current thread (if any).
+        """
+        root_span = self._local.__dict__.pop('root_span', None)
+        if root_span is not None:
+            if error is not None:
+                _record_error(root_span, error)
+            root_span.end()
+
+    def _get_trace(self, resource_id):
+        """Returns the trace of the resource with the given ID (``None`` if
+        the resource has not been started while tracing).
+        """
+        with self._lock:
+            return self._traces.get(resource_id)
+
+    def _end_trace(self, resource_id):
+        """Forgets the trace of the resource with the given ID and ends its
+        spans (unless they have already been ended).
+        """
+        with self._lock:
+            resource_trace = self._traces.pop(resource_id, None)
+        if resource_trace is not None:
+            resource_trace.end()
+
+
+class _Trace:
+    """Spans of a traced resource."""
+
+    def __init__(self, root_span):
+        self.root_span = root_span
+        self.status_span = None
+        self.phase_span = None
+        self.phase_count = 0
+        self.ended = False
+
+    def end_status_span(self):
+        if self.status_span is not None:
+            self.status_span.end()
+            self.status_span = None
+
+    def end_phase_span(self):
+        if self.phase_span is not None:
+            self.phase_span.end()
+            self.phase_span = None
+
+    def end(self):
+        if self.ended:
+            return
+        self.ended = True
+        self.end_status_span()
+        self.end_phase_span()
+        self.root_span.end()
+
+
+_default_hooks = None
+_default_hooks_lock = threading.Lock()
+
+
+def enable(tracer=None):
+    """Starts recording traces of resources.
+
+    :param tracer: Tracer to be used (see :class:`TracingHooks`).
+
+    :returns: The registered hooks (:class:`TracingHooks`).
+    :raises MissingDependencyError: When OpenTelemetry is not installed.
+
+    When tracing is already enabled, the same hooks are returned.
+    """
+    global _default_hooks
+    with _default_hooks_lock:
+        if _default_hooks is None:
+            _default_hooks = TracingHooks(tracer)
+            hooks.register(_default_hooks)
+        return _default_hooks
+
+
+def disable():
+    """Stops recording traces of newly started resources."""
+    global _default_hooks
+    with _default_hooks_lock:
+        if _default_hooks is not None:
+            hooks.unregister(_default_hooks)
+            _default_hooks = None
+
+
+def _ensure_opentelemetry_is_installed():
+    """Raises :class:`~retdec.exceptions.MissingDependencyError` when
+    OpenTelemetry is not installed.
+    """
+    if trace is None:
+        raise MissingDependencyError('opentelemetry-api')
+
+
+def _record_error(span, error):
+    """Records the given error in the given span."""
+    span.record_exception(error)
+    span.set_status(trace.Status(trace.StatusCode.ERROR, str(error)))
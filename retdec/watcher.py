@@ -0,0 +1,285 @@
+#
+# Project:   retdec-python
+# Copyright: (c) 2015 by Petr Zemek <s3rvac@gmail.com> and contributors
+# License:   MIT, see the LICENSE file for more details
+#
+
+"""Watching of directories for new files."""
+
+import ctypes
+import errno
+import os
+import select
+import stat
+import struct
+import time
+
+from retdec.exceptions import RetdecError
+
+# Constants from <sys/inotify.h>.
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_DELETE = 0x00000200
+_IN_Q_OVERFLOW = 0x00004000
+_IN_ISDIR = 0x40000000
+_IN_NONBLOCK = os.O_NONBLOCK
+_IN_CLOEXEC = getattr(os, 'O_CLOEXEC', 0)
+
+#: Header of an inotify event (wd, mask, cookie, len), followed by a name.
+_EVENT_HEADER = struct.Struct('iIII')
+
+
+class DirectoryWatcher:
+    """Watches a directory for new files.
+
+    :param str directory: Directory to be watched.
+    :param float settle_time: Number of seconds for which a file has to stay
+        unmodified to be considered fully written when it is not known
+        whether it is still being written.
+    :param float poll_interval: Number of seconds between two scans of the
+        directory when inotify is not used.
+    :param bool use_inotify: Use inotify when it is available (Linux)?
+
+    With inotify, a file is reported as soon as the process that wrote it
+    closes it (or when it is moved into the directory). Otherwise, the
+    directory is scanned periodically and a file is reported when it has not
+    been modified for `settle_time` seconds. Files that are in the directory
+    when the watching starts are always reported the latter way.
+
+    Only regular files directly in the directory are reported, and each of
+    them only once (unless it is removed from the directory and added again).
+    Hidden files (starting with a dot) are ignored, so writers may create a
+    hidden file and rename it when it is complete.
+    """
+
+    def __init__(self, directory, settle_time=1.0, poll_interval=1.0,
+                 use_inotify=True):
+        if not os.path.isdir(directory):
+            raise RetdecError(
+                'Not a directory: {}'.format(directory)
+            )
+        self._directory = directory
+        self._settle_time = settle_time
+        self._poll_interval = poll_interval
+        self._reported = set()
+        # Files that appeared without inotify telling us that they are
+        # complete (name -> size and modification time when last seen).
+        self._unsettled = {}
+        self._inotify = _Inotify.create(directory) if use_inotify else None
+        self._scan()
+
+    @property
+    def directory(self):
+        """The watched directory."""
+        return self._directory
+
+    @property
+    def uses_inotify(self):
+        """Is inotify used to watch the directory?"""
+        return self._inotify is not None
+
+    def wait(self, timeout=None):
+        """Waits until there are new fully written files in the directory.
+
+        :param float timeout: Maximal number of seconds to wait (``None``
+            means to wait indefinitely).
+
+        :returns: List of paths to the new files (empty when the timeout
+            expired).
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            ready = self._ready_files()
+            if ready:
+                return ready
+
+            remaining = None
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return []
+            if self._inotify is None or self._unsettled:
+                # Check the unsettled files again after a while.
+                interval = self._poll_interval
+                if self._unsettled:
+                    interval = min(interval, self._settle_time)
+                if remaining is None or remaining > interval:
+                    remaining = interval
+
+            if self._inotify is None:
+                time.sleep(remaining)
+                self._scan()
+            else:
+                self._process_events(self._inotify.read(remaining))
+
+    def close(self):
+        """Stops watching the directory."""
+        if self._inotify is not None:
+            self._inotify.close()
+            self._inotify = None
+
+    def _scan(self):
+        """Scans the directory for files that are not known yet and forgets
+        files that are no longer there.
+        """
+        names = set()
+        for name in os.listdir(self._directory):
+            if not _is_watched_name(name):
+                continue
+            try:
+                mode = os.lstat(os.path.join(self._directory, name)).st_mode
+            except OSError:
+                # The file has been removed in the meantime.
+                continue
+            if not stat.S_ISREG(mode):
+                continue
+            names.add(name)
+            if name not in self._reported:
+                self._unsettled.setdefault(name, None)
+        self._reported &= names
+        for name in set(self._unsettled) - names:
+            del self._unsettled[name]
+
+    def _process_events(self, events):
+        """Updates the state of the files based on the given inotify
+        events.
+        """
+        for mask, name in events:
+            if mask & _IN_Q_OVERFLOW:
+                # Events have been lost, so we have to look for ourselves.
+                self._scan()
+                continue
+            if mask & _IN_ISDIR or not _is_watched_name(name):
+                continue
+            if mask & (_IN_DELETE | _IN_MOVED_FROM):
+                self._reported.discard(name)
+                self._unsettled.pop(name, None)
+            elif mask & (_IN_CLOSE_WRITE | _IN_MOVED_TO):
+                # The file is complete, unless it has been opened for
+                # writing several times. In such a case, it has been
+                # reported already when it was first closed.
+                if name not in self._reported:
+                    self._unsettled[name] = _SETTLED
+
+    def _ready_files(self):
+        """Returns paths to files that are ready to be reported and marks
+        them as reported.
+        """
+        now = time.time()
+        ready = []
+        for name, last_seen in sorted(self._unsettled.items()):
+            path = os.path.join(self._directory, name)
+            if last_seen is not _SETTLED:
+                try:
+                    file_stat = os.stat(path)
+                except OSError:
+                    del self._unsettled[name]
+                    continue
+                # The file is considered fully written when its size and
+                # modification time stay the same between two checks and it
+                # has not been modified for a while.
+                seen = (file_stat.st_size, file_stat.st_mtime)
+                if (seen != last_seen or
+                        now - file_stat.st_mtime < self._settle_time):
+                    self._unsettled[name] = seen
+                    continue
+            del self._unsettled[name]
+            self._reported.add(name)
+            ready.append(path)
+        return ready
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __repr__(self):
+        return '<{} directory={!r} inotify={}>'.format(
+            __name__ + '.' + self.__class__.__name__,
+            self._directory,
+            self.uses_inotify
+        )
+
+
+#: Marks files that are known to be fully written.
+_SETTLED = object()
+
+
+def _is_watched_name(name):
+    """Should a file with the given name be watched?"""
+    return not name.startswith('.')
+
+
+class _Inotify:
+    """A thin wrapper around an inotify instance watching a directory."""
+
+    #: Events that are watched.
+    MASK = _IN_CLOSE_WRITE | _IN_MOVED_TO | _IN_MOVED_FROM | _IN_DELETE
+
+    def __init__(self, fd):
+        self._fd = fd
+
+    @classmethod
+    def create(cls, directory):
+        """Starts watching the given directory.
+
+        :returns: The created instance or ``None`` when inotify is not
+            available.
+        """
+        libc = _load_libc()
+        if libc is None:
+            return None
+        fd = libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        if fd < 0:
+            return None
+        if libc.inotify_add_watch(fd, os.fsencode(directory), cls.MASK) < 0:
+            os.close(fd)
+            return None
+        return cls(fd)
+
+    def read(self, timeout=None):
+        """Waits for events and returns them.
+
+        :returns: List of pairs ``(mask, name)`` (empty when the timeout
+            expired).
+        """
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        if not readable:
+            return []
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except OSError as ex:
+            if ex.errno == errno.EAGAIN:
+                return []
+            raise
+        events = []
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            _, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b'\0')
+            offset += length
+            events.append((mask, os.fsdecode(name)))
+        return events
+
+    def close(self):
+        os.close(self._fd)
+
+
+def _load_libc():
+    """Returns the C library with inotify functions (or ``None`` when it is
+    not available).
+    """
+    try:
+        # The C library is already loaded into the process, so there is no
+        # need to search for it (which would be slow).
+        libc = ctypes.CDLL(None, use_errno=True)
+        libc.inotify_init1.argtypes = [ctypes.c_int]
+        libc.inotify_add_watch.argtypes = [
+            ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32
+        ]
+    except (OSError, AttributeError):
+        return None
+    return libc
@@ -70,10 +70,17 @@ setup(
         'Topic :: Software Development :: Libraries :: Python Modules',
     ],
     keywords='retdec decompiler decompilation analysis fileinfo',
-    packages=['retdec', 'retdec.tools'],
+    packages=['retdec', 'retdec.testing', 'retdec.tools'],
     install_requires=['requests'],
+    extras_require={
+        'tracing': ['opentelemetry-api'],
+        'profiling': ['numpy'],
+    },
     scripts=[
         os.path.join('scripts', 'decompiler'),
-        os.path.join('scripts', 'fileinfo')
+        os.path.join('scripts', 'fileinfo'),
+        os.path.join('scripts', 'retdec-phase-report'),
+        os.path.join('scripts', 'retdec-worker'),
+        os.path.join('scripts', 'retdecd')
     ]
 )
@@ -6,6 +6,8 @@
 
 """Tests for the :mod:`retdec.analysis` module."""
 
+import io
+
 from retdec.analysis import Analysis
 from retdec.exceptions import AnalysisFailedError
 from tests import mock
@@ -111,3 +113,24 @@ class AnalysisGetOutputsTests(WithMockedIO, AnalysisTestsBase):
             '/ID/output',
             is_text_file=True
         )
+
+    def test_iter_output_lines_yields_lines_of_output(self):
+        self.conn.get_file.return_value = io.BytesIO(b'line1\nline2\n')
+        a = Analysis('ID', self.conn)
+
+        lines = list(a.iter_output_lines())
+
+        self.assertEqual(lines, ['line1\n', 'line2\n'])
+        self.conn.get_file.assert_called_once_with('/ID/output')
+
+    def test_write_output_copies_file_contents_into_given_file(self):
+        a = Analysis('ID', self.conn)
+        file = mock.Mock()
+
+        a.write_output(file)
+
+        self.conn.get_file.assert_called_once_with('/ID/output')
+        self.shutil.copyfileobj.assert_called_once_with(
+            self.conn.get_file.return_value,
+            file
+        )
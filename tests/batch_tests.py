@@ -0,0 +1,242 @@
+#
+# Project:   retdec-python
+# Copyright: (c) 2015 by Petr Zemek <s3rvac@gmail.com> and contributors
+# License:   MIT, see the LICENSE file for more details
+#
+
+"""Tests for the :mod:`retdec.batch` module."""
+
+import os
+import tempfile
+import threading
+import unittest
+
+import requests
+
+from retdec.batch import Submission
+from retdec.batch import shard
+from retdec.batch import submit_concurrently
+from retdec.exceptions import InvalidValueError
+from retdec.exceptions import MissingParameterError
+
+
+class SubmissionTests(unittest.TestCase):
+    """Tests for :class:`retdec.batch.Submission`."""
+
+    def test_arguments_passed_to_initializer_are_accessible(self):
+        error = MissingParameterError('input_file')
+        submission = Submission({'mode': 'bin'}, resource='R', error=error)
+
+        self.assertEqual(submission.params, {'mode': 'bin'})
+        self.assertEqual(submission.resource, 'R')
+        self.assertIs(submission.error, error)
+
+    def test_has_succeeded_returns_true_when_there_is_no_error(self):
+        submission = Submission({}, resource='R')
+
+        self.assertTrue(submission.has_succeeded())
+        self.assertFalse(submission.has_failed())
+
+    def test_has_failed_returns_true_when_there_is_error(self):
+        submission = Submission({}, error=OSError('No such file.'))
+
+        self.assertTrue(submission.has_failed())
+        self.assertFalse(submission.has_succeeded())
+
+    def test_repr_returns_correct_value(self):
+        submission = Submission({'mode': 'bin'}, resource='R')
+
+        self.assertEqual(
+            repr(submission),
+            "<retdec.batch.Submission params={'mode': 'bin'} resource='R'"
+            " error=None>"
+        )
+
+
+class SubmitConcurrentlyTests(unittest.TestCase):
+    """Tests for :func:`retdec.batch.submit_concurrently()`."""
+
+    def test_yields_submission_for_each_item(self):
+        submissions = list(submit_concurrently(
+            lambda params: params['id'],
+            [{'id': 'ID1'}, {'id': 'ID2'}, {'id': 'ID3'}],
+            max_workers=2
+        ))
+
+        self.assertEqual(
+            sorted(s.resource for s in submissions),
+            ['ID1', 'ID2', 'ID3']
+        )
+        for submission in submissions:
+            self.assertEqual(submission.resource, submission.params['id'])
+
+    def test_reports_error_for_failed_item_and_continues(self):
+        def start(params):
+            if params['id'] == 'ID1':
+                raise OSError('No such file.')
+            return params['id']
+
+        submissions = list(submit_concurrently(
+            start,
+            [{'id': 'ID1'}, {'id': 'ID2'}],
+            max_workers=1
+        ))
+
+        failed = [s for s in submissions if s.has_failed()]
+        self.assertEqual(len(failed), 1)
+        self.assertEqual(failed[0].params, {'id': 'ID1'})
+        self.assertIsInstance(failed[0].error, OSError)
+        succeeded = [s for s in submissions if s.has_succeeded()]
+        self.assertEqual([s.resource for s in succeeded], ['ID2'])
+
+    def test_reports_requests_errors_and_malformed_responses(self):
+        errors = {
+            'ID1': requests.exceptions.TooManyRedirects('Exceeded 30.'),
+            'ID2': ValueError('Expecting value.'),
+        }
+
+        def start(params):
+            raise errors[params['id']]
+
+        submissions = list(submit_concurrently(
+            start,
+            [{'id': 'ID1'}, {'id': 'ID2'}],
+            max_workers=2
+        ))
+
+        self.assertEqual(
+            {s.params['id']: s.error for s in submissions},
+            errors
+        )
+
+    def test_does_not_catch_programming_errors(self):
+        def start(params):
+            raise TypeError('bug')
+
+        with self.assertRaises(TypeError):
+            list(submit_concurrently(start, [{}], max_workers=1))
+
+    def test_submits_at_most_max_workers_items_at_the_same_time(self):
+        lock = threading.Lock()
+        running = [0]
+        max_running = [0]
+
+        def start(params):
+            with lock:
+                running[0] += 1
+                max_running[0] = max(max_running[0], running[0])
+            threading.Event().wait(0.01)
+            with lock:
+                running[0] -= 1
+            return params
+
+        list(submit_concurrently(start, range(10), max_workers=3))
+
+        self.assertLessEqual(max_running[0], 3)
+
+    def test_consumes_batch_lazily(self):
+        consumed = []
+
+        def batch():
+            for i in range(100):
+                consumed.append(i)
+                yield i
+
+        submissions = submit_concurrently(lambda i: i, batch(), max_workers=2)
+        next(submissions)
+
+        self.assertLess(len(consumed), 100)
+        submissions.close()
+
+    def test_raises_exception_when_max_workers_is_not_positive(self):
+        with self.assertRaises(InvalidValueError):
+            submit_concurrently(lambda i: i, [1], max_workers=0)
+
+
+class ShardTests(unittest.TestCase):
+    """Tests for :func:`retdec.batch.shard()`."""
+
+    PATHS = ['dir/file{}.exe'.format(i) for i in range(100)]
+
+    def assert_shards_partition_paths(self, count, **kwargs):
+        shards = [
+            list(shard(self.PATHS, index, count, **kwargs))
+            for index in range(count)
+        ]
+        self.assertEqual(
+            sorted(path for paths in shards for path in paths),
+            sorted(self.PATHS)
+        )
+        for paths in shards:
+            self.assertTrue(paths)
+        return shards
+
+    def test_shards_partition_paths(self):
+        self.assert_shards_partition_paths(4)
+
+    def test_shards_partition_paths_with_consistent_hashing(self):
+        self.assert_shards_partition_paths(4, consistent=True)
+
+    def test_keeps_order_of_paths(self):
+        paths = list(shard(self.PATHS, 0, 2))
+
+        self.assertEqual(paths, [p for p in self.PATHS if p in paths])
+
+    def test_assignment_is_deterministic(self):
+        self.assertEqual(
+            list(shard(self.PATHS, 1, 3)),
+            list(shard(self.PATHS, 1, 3))
+        )
+
+    def test_single_shard_contains_all_paths(self):
+        self.assertEqual(list(shard(self.PATHS, 0, 1)), self.PATHS)
+
+    def test_equivalent_paths_are_assigned_to_same_shard(self):
+        self.assertEqual(
+            [bool(list(shard([path], 0, 2)))
+             for path in ['dir/file.exe', 'dir//file.exe', './dir/file.exe']],
+            [bool(list(shard(['dir/file.exe'], 0, 2)))] * 3
+        )
+
+    def test_consistent_hashing_moves_only_files_to_new_shard(self):
+        old_shards = self.assert_shards_partition_paths(4, consistent=True)
+        new_shards = self.assert_shards_partition_paths(5, consistent=True)
+
+        for old_paths, new_paths in zip(old_shards, new_shards):
+            self.assertTrue(set(new_paths) <= set(old_paths))
+
+    def test_files_with_same_content_are_assigned_to_same_shard(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            paths = []
+            for i in range(10):
+                path = os.path.join(tmp_dir, 'file{}.exe'.format(i))
+                with open(path, 'wb') as f:
+                    f.write(b'same content')
+                paths.append(path)
+
+            shard_sizes = [
+                len(list(shard(paths, index, 3, by='content')))
+                for index in range(3)
+            ]
+
+        self.assertEqual(sorted(shard_sizes), [0, 0, 10])
+
+    def test_unreadable_file_is_assigned_to_shard_by_its_path(self):
+        paths = ['missing{}.exe'.format(i) for i in range(10)]
+
+        self.assertEqual(
+            [list(shard(paths, index, 3, by='content')) for index in range(3)],
+            [list(shard(paths, index, 3)) for index in range(3)]
+        )
+
+    def test_raises_exception_when_index_is_out_of_range(self):
+        with self.assertRaises(InvalidValueError):
+            list(shard(self.PATHS, 2, 2))
+
+    def test_raises_exception_when_count_is_not_positive(self):
+        with self.assertRaises(InvalidValueError):
+            list(shard(self.PATHS, 0, 0))
+
+    def test_raises_exception_when_by_is_invalid(self):
+        with self.assertRaises(InvalidValueError):
+            list(shard(self.PATHS, 0, 2, by='size'))
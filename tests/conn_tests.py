@@ -13,6 +13,7 @@ import unittest
 import requests
 import responses
 
+from retdec import hooks
 from retdec.conn import APIConnection
 from retdec.exceptions import AuthenticationError
 from retdec.exceptions import ConnectionError
@@ -174,10 +175,44 @@ class APIConnectionTests(unittest.TestCase):
         self.assertEqual(cm.exception.message, 'Request Timeout')
         self.assertEqual(cm.exception.description, 'The request timeouted.')
 
+    @responses.activate
+    def test_api_error_includes_retry_after_when_api_returns_it(self):
+        self.setup_responses(
+            url='https://retdec.com/service/api',
+            status=429,
+            body=(
+                '{"code": 429, "message": "Too Many Requests", '
+                '"description": "The request limit has been reached."}'
+            ),
+            headers={'Retry-After': '7'},
+        )
+        conn = APIConnection('https://retdec.com/service/api', 'KEY')
+
+        with self.assertRaises(UnknownAPIError) as cm:
+            conn.send_get_request()
+        self.assertEqual(cm.exception.retry_after, 7)
+
+    @responses.activate
+    def test_api_error_ignores_retry_after_that_is_not_number_of_seconds(self):
+        self.setup_responses(
+            url='https://retdec.com/service/api',
+            status=429,
+            body=(
+                '{"code": 429, "message": "Too Many Requests", '
+                '"description": "The request limit has been reached."}'
+            ),
+            headers={'Retry-After': 'Wed, 21 Oct 2015 07:28:00 GMT'},
+        )
+        conn = APIConnection('https://retdec.com/service/api', 'KEY')
+
+        with self.assertRaises(UnknownAPIError) as cm:
+            conn.send_get_request()
+        self.assertIsNone(cm.exception.retry_after)
+
     # For the following test, we need to mock requests.Session, not just
     # requests. The reason is that HTTP requests are sent through a Session
     # instance, not directly through requests.{get,post}().
-    @mock.patch('retdec.conn.requests.Session')
+    @mock.patch('requests.Session')
     def test_send_get_request_raises_exception_when_there_is_connection_error(
             self, requests_session):
         requests_session.side_effect = requests.exceptions.ConnectionError(
@@ -268,6 +303,36 @@ class APIConnectionTests(unittest.TestCase):
         self.assertEqual(file.name, 'test.c')
         self.assertEqual(file.read(), b'data')
 
+    @responses.activate
+    def test_get_file_returns_file_with_size_from_content_length(self):
+        self.setup_responses(
+            method=responses.GET,
+            url='https://retdec.com/service/api',
+            body='data',
+            headers={'Content-Length': '4'},
+            stream=True
+        )
+        conn = APIConnection('https://retdec.com/service/api', 'KEY')
+
+        file = conn.get_file()
+
+        self.assertEqual(file.size, 4)
+
+    @responses.activate
+    def test_get_file_returns_file_without_size_when_response_is_encoded(self):
+        self.setup_responses(
+            method=responses.GET,
+            url='https://retdec.com/service/api',
+            body='data',
+            headers={'Content-Encoding': 'identity'},
+            stream=True
+        )
+        conn = APIConnection('https://retdec.com/service/api', 'KEY')
+
+        file = conn.get_file()
+
+        self.assertIsNone(file.size)
+
     @responses.activate
     def test_get_file_returns_file_with_correct_name_when_header_has_quotes(self):
         self.setup_responses(
@@ -321,3 +386,207 @@ class APIConnectionTests(unittest.TestCase):
             repr(conn),
             "<retdec.conn.APIConnection base_url='https://retdec.com/service/api'>"
         )
+
+
+class RecordingHooks(hooks.RequestHooks):
+    """Hooks that record all calls."""
+
+    def __init__(self):
+        self.calls = []
+
+    def on_request_start(self, request):
+        self.calls.append(('on_request_start', request))
+
+    def on_response(self, request):
+        self.calls.append(('on_response', request))
+
+    def on_error(self, request, error):
+        self.calls.append(('on_error', request, error))
+
+    def on_bytes(self, request, direction, count):
+        self.calls.append(('on_bytes', request, direction, count))
+
+    def call_names(self):
+        return [call[0] for call in self.calls]
+
+
+class APIConnectionHooksTests(unittest.TestCase):
+    """Tests for reporting requests of :class:`retdec.conn.APIConnection` to
+    hooks.
+    """
+
+    def setUp(self):
+        super().setUp()
+
+        self.hooks = RecordingHooks()
+        hooks.register(self.hooks)
+        self.addCleanup(hooks.unregister, self.hooks)
+
+        self.conn = APIConnection(
+            'https://retdec.com/service/api/decompiler/decompilations', 'KEY'
+        )
+
+    def add_response(self, method=responses.GET, path='', body='{}',
+                     **kwargs):
+        responses.add(
+            method,
+            'https://retdec.com/service/api/decompiler/decompilations' + path,
+            body=body,
+            **kwargs
+        )
+
+    @responses.activate
+    def test_reports_successful_request(self):
+        self.add_response(path='/ID/status', body='{"finished": true}')
+
+        self.conn.send_get_request('/ID/status')
+
+        self.assertEqual(
+            self.hooks.call_names(),
+            ['on_request_start', 'on_response', 'on_bytes']
+        )
+        request = self.hooks.calls[0][1]
+        self.assertEqual(request.method, 'GET')
+        self.assertEqual(
+            request.path,
+            '/service/api/decompiler/decompilations/{id}/status'
+        )
+        self.assertEqual(request.resource_id, 'ID')
+        self.assertEqual(request.status_code, 200)
+        self.assertGreaterEqual(request.latency, 0)
+        self.assertEqual(request.bytes_received, len('{"finished": true}'))
+        self.assertEqual(request.retries, 0)
+        self.assertEqual(
+            self.hooks.calls[2][2:],
+            ('received', len('{"finished": true}'))
+        )
+
+    @responses.activate
+    def test_reports_sent_bytes_of_upload(self):
+        self.add_response(method=responses.POST)
+
+        self.conn.send_post_request(
+            params={'mode': 'c'},
+            files={'input': ('test.c', io.BytesIO(b'main()'))}
+        )
+
+        sent = [call for call in self.hooks.calls if call[0] == 'on_bytes'
+                and call[2] == 'sent']
+        self.assertEqual(len(sent), 1)
+        request = sent[0][1]
+        self.assertEqual(request.method, 'POST')
+        self.assertEqual(
+            request.path,
+            '/service/api/decompiler/decompilations'
+        )
+        self.assertIsNone(request.resource_id)
+        self.assertEqual(request.params, {'mode': 'c'})
+        self.assertEqual(request.bytes_sent, sent[0][3])
+        self.assertGreater(request.bytes_sent, len(b'main()'))
+
+    @responses.activate
+    def test_reports_received_bytes_of_file_while_it_is_read(self):
+        self.add_response(
+            path='/ID/outputs/cfgs/main',
+            body='data',
+            stream=True
+        )
+
+        file = self.conn.get_file('/ID/outputs/cfgs/main')
+
+        self.assertNotIn('on_bytes', self.hooks.call_names())
+        self.assertEqual(file.read(), b'data')
+        request = self.hooks.calls[0][1]
+        self.assertEqual(
+            request.path,
+            '/service/api/decompiler/decompilations/{id}/outputs/cfgs/{func}'
+        )
+        self.assertEqual(request.bytes_received, 4)
+        self.assertEqual(self.hooks.calls[-1][2:], ('received', 4))
+
+    @responses.activate
+    def test_reports_end_of_request_with_its_duration(self):
+        end_hooks = mock.Mock(spec_set=hooks.RequestHooks)
+        hooks.register(end_hooks)
+        self.addCleanup(hooks.unregister, end_hooks)
+        self.add_response(path='/ID/status')
+
+        self.conn.send_get_request('/ID/status')
+
+        end_hooks.on_request_end.assert_called_once_with(
+            self.hooks.calls[0][1], Anything()
+        )
+        self.assertGreaterEqual(end_hooks.on_request_end.call_args[0][1], 0)
+
+    @responses.activate
+    def test_reports_end_of_file_download_when_file_is_closed(self):
+        end_hooks = mock.Mock(spec_set=hooks.RequestHooks)
+        hooks.register(end_hooks)
+        self.addCleanup(hooks.unregister, end_hooks)
+        self.add_response(path='/ID/outputs/hll', body='data', stream=True)
+
+        file = self.conn.get_file('/ID/outputs/hll')
+        file.read()
+        self.assertFalse(end_hooks.on_request_end.called)
+        file.close()
+
+        self.assertEqual(len(end_hooks.on_request_end.mock_calls), 1)
+
+    @responses.activate
+    def test_reports_api_error(self):
+        self.add_response(
+            status=429,
+            body=(
+                '{"code": 429, "message": "Too Many Requests", '
+                '"description": "Limit reached."}'
+            )
+        )
+
+        with self.assertRaises(UnknownAPIError):
+            self.conn.send_get_request()
+
+        self.assertEqual(
+            self.hooks.call_names(),
+            ['on_request_start', 'on_response', 'on_bytes', 'on_error']
+        )
+        self.assertEqual(self.hooks.calls[0][1].status_code, 429)
+        self.assertIsInstance(self.hooks.calls[-1][2], UnknownAPIError)
+
+    def test_reports_connection_error(self):
+        session = mock.Mock()
+        session.get.side_effect = requests.exceptions.ConnectionError(
+            'Connection refused.'
+        )
+        self.conn.__dict__['_session'] = session
+
+        with self.assertRaises(ConnectionError):
+            self.conn.send_get_request()
+
+        self.assertEqual(
+            self.hooks.call_names(),
+            ['on_request_start', 'on_error']
+        )
+        self.assertIsNone(self.hooks.calls[0][1].status_code)
+
+    @responses.activate
+    def test_sends_headers_added_by_hooks(self):
+        class HeaderAddingHooks(hooks.RequestHooks):
+            def on_request_start(self, request):
+                request.headers['X-Test'] = 'value'
+        header_adding_hooks = HeaderAddingHooks()
+        hooks.register(header_adding_hooks)
+        self.addCleanup(hooks.unregister, header_adding_hooks)
+        self.add_response()
+
+        self.conn.send_get_request()
+
+        self.assertEqual(responses.calls[0].request.headers['X-Test'], 'value')
+
+    @responses.activate
+    def test_hooks_are_not_called_after_unregistration(self):
+        hooks.unregister(self.hooks)
+        self.add_response()
+
+        self.conn.send_get_request()
+
+        self.assertEqual(self.hooks.calls, [])
@@ -0,0 +1,473 @@
+#
+# Project:   retdec-python
+# Copyright: (c) 2015 by Petr Zemek <s3rvac@gmail.com> and contributors
+# License:   MIT, see the LICENSE file for more details
+#
+
+"""Tests for the :mod:`retdec.daemon` module."""
+
+import io
+import os
+import socket
+import stat
+import tempfile
+import threading
+import unittest
+
+from retdec import hooks
+from retdec.daemon import Daemon
+from retdec.daemon import DaemonConnection
+from retdec.daemon import _StatusPoller
+from retdec.daemon import default_socket_path
+from retdec.decompiler import Decompiler
+from retdec.exceptions import AuthenticationError
+from retdec.exceptions import ConnectionError
+from retdec.exceptions import RetdecError
+from retdec.exceptions import UnknownAPIError
+from retdec.file import File
+from retdec.fileinfo import Fileinfo
+from retdec.testing.server import MockAPI
+from retdec.testing.server import MockAPIServer
+from tests import mock
+
+
+class RequestRecorder(hooks.RequestHooks):
+    """Records paths of requests sent to the API by the daemon."""
+
+    def __init__(self):
+        self.paths = []
+
+    def on_request_start(self, request):
+        # The daemon serves requests in other threads than the main one, in
+        # which the tests send requests through the daemon.
+        if threading.current_thread() is not threading.main_thread():
+            self.paths.append(request.path)
+
+
+class ClientRequestRecorder(hooks.RequestHooks):
+    """Records events of requests sent through the daemon by the client."""
+
+    def __init__(self):
+        self.events = []
+
+    def record(self, *event):
+        if threading.current_thread() is threading.main_thread():
+            self.events.append(event)
+
+    def on_request_start(self, request):
+        self.record('start', request.method, request.path)
+
+    def on_response(self, request):
+        self.record('response', request.status_code)
+
+    def on_request_end(self, request, duration):
+        self.record('end', request.bytes_received)
+
+    def on_error(self, request, error):
+        self.record('error', type(error))
+
+
+class DefaultSocketPathTests(unittest.TestCase):
+    """Tests for :func:`retdec.daemon.default_socket_path()`."""
+
+    def test_returns_path_in_runtime_directory_when_it_is_set(self):
+        with mock.patch.dict(os.environ, {'XDG_RUNTIME_DIR': '/run/user/1'}):
+            self.assertEqual(
+                default_socket_path(),
+                '/run/user/1/retdecd.sock'
+            )
+
+    def test_returns_path_in_temporary_directory_when_runtime_dir_is_not_set(self):
+        with mock.patch.dict(os.environ, {'TMPDIR': '/tmp'}):
+            os.environ.pop('XDG_RUNTIME_DIR', None)
+
+            self.assertEqual(
+                default_socket_path(),
+                '/tmp/retdecd-{}.sock'.format(os.getuid())
+            )
+
+
+class StatusPollerTests(unittest.TestCase):
+    """Tests for :class:`retdec.daemon._StatusPoller`."""
+
+    def setUp(self):
+        super().setUp()
+
+        # Statuses are updated explicitly in the tests.
+        self.poller = _StatusPoller(interval=60)
+        self.addCleanup(self.poller.stop)
+        self.conn = mock.Mock()
+
+    def test_finished_status_is_updated_until_outputs_are_generated(self):
+        self.conn.send_get_request.side_effect = [
+            {'finished': True, 'failed': False,
+             'cg': {'generated': False, 'failed': False, 'error': None}},
+            {'finished': True, 'failed': False,
+             'cg': {'generated': True, 'failed': False, 'error': None}},
+        ]
+
+        status1 = self.poller.get(self.conn, '/ID/status')
+        self.poller.update()
+        status2 = self.poller.get(self.conn, '/ID/status')
+        self.poller.update()
+
+        self.assertFalse(status1['cg']['generated'])
+        self.assertTrue(status2['cg']['generated'])
+        self.assertEqual(self.conn.send_get_request.call_count, 2)
+
+    def test_finished_status_is_updated_until_all_cfgs_are_generated(self):
+        self.conn.send_get_request.side_effect = [
+            {'finished': True, 'failed': False, 'cfgs': {
+                'main': {'generated': True, 'failed': False, 'error': None},
+                'func': {'generated': False, 'failed': False, 'error': None},
+            }},
+            {'finished': True, 'failed': False, 'cfgs': {
+                'main': {'generated': True, 'failed': False, 'error': None},
+                'func': {'generated': False, 'failed': True, 'error': 'x'},
+            }},
+        ]
+
+        self.poller.get(self.conn, '/ID/status')
+        self.poller.update()
+        status = self.poller.get(self.conn, '/ID/status')
+        self.poller.update()
+
+        self.assertTrue(status['cfgs']['func']['failed'])
+        self.assertEqual(self.conn.send_get_request.call_count, 2)
+
+    def test_failed_status_is_not_updated(self):
+        self.conn.send_get_request.return_value = {
+            'finished': True, 'failed': True,
+            'archive': {'generated': False, 'failed': False, 'error': None},
+        }
+
+        self.poller.get(self.conn, '/ID/status')
+        self.poller.update()
+
+        self.assertEqual(self.conn.send_get_request.call_count, 1)
+
+
+class DaemonTestsBase(unittest.TestCase):
+    """A base class for tests that send requests through a daemon to a mock
+    of the API.
+    """
+
+    def setUp(self):
+        super().setUp()
+
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.socket_path = os.path.join(self.tmp_dir.name, 'retdecd.sock')
+
+        self.api = MockAPI(api_key='KEY')
+        self.server = MockAPIServer(self.api)
+        self.server.__enter__()
+        self.addCleanup(self.server.__exit__, None, None, None)
+
+    def start_daemon(self, **kwargs):
+        # Statuses are updated explicitly in the tests.
+        kwargs.setdefault('poll_interval', 60)
+        daemon = Daemon(self.socket_path, **kwargs)
+        daemon.__enter__()
+        self.addCleanup(daemon.__exit__, None, None, None)
+        return daemon
+
+    def create_input_file(self, content=b'MZ'):
+        path = os.path.join(self.tmp_dir.name, 'prog.exe')
+        with open(path, 'wb') as f:
+            f.write(content)
+        return path
+
+    def create_connection(self, path='/decompiler/decompilations'):
+        return DaemonConnection(
+            self.socket_path,
+            self.server.api_url + path,
+            'KEY'
+        )
+
+    def create_decompiler(self, api_key='KEY'):
+        return Decompiler(
+            api_url=self.server.api_url,
+            api_key=api_key,
+            daemon_socket=self.socket_path
+        )
+
+
+class DaemonTests(DaemonTestsBase):
+    """Tests for :class:`retdec.daemon.Daemon` and
+    :class:`retdec.daemon.DaemonConnection`.
+    """
+
+    def test_decompilation_can_be_performed(self):
+        self.start_daemon()
+        decompiler = self.create_decompiler()
+
+        decompilation = decompiler.start_decompilation(
+            input_file=self.create_input_file()
+        )
+        decompilation.wait_until_finished()
+
+        self.assertEqual(decompilation.get_hll_code()[:3], 'int')
+
+    def test_file_without_path_is_sent_to_daemon(self):
+        self.start_daemon()
+        decompiler = self.create_decompiler()
+
+        decompilation = decompiler.start_decompilation(
+            input_file=File(io.BytesIO(b'MZ'), 'other.exe')
+        )
+        decompilation.wait_until_finished()
+        path = decompilation.save_hll_code(self.tmp_dir.name)
+
+        self.assertEqual(os.path.basename(path), 'other.c')
+
+    def test_analysis_can_be_performed(self):
+        self.start_daemon()
+        fileinfo = Fileinfo(
+            api_url=self.server.api_url,
+            api_key='KEY',
+            daemon_socket=self.socket_path
+        )
+
+        analysis = fileinfo.start_analysis(input_file=self.create_input_file())
+        analysis.wait_until_finished()
+
+        self.assertIn('File format', analysis.get_output())
+
+    def test_authentication_error_is_raised_in_client(self):
+        self.start_daemon()
+        decompiler = self.create_decompiler(api_key='INVALID-KEY')
+
+        with self.assertRaises(AuthenticationError):
+            decompiler.start_decompilation(input_file=self.create_input_file())
+
+    def test_api_error_is_raised_in_client(self):
+        self.start_daemon()
+        conn = self.create_connection()
+
+        with self.assertRaises(UnknownAPIError) as cm:
+            conn.get_file('/unknown/outputs/hll')
+
+        self.assertEqual(cm.exception.code, 404)
+
+    def test_retry_after_of_api_error_is_passed_to_client(self):
+        self.api.throttle_rate = 1
+        self.api.retry_after = 3
+        self.start_daemon()
+        conn = self.create_connection()
+
+        with self.assertRaises(UnknownAPIError) as cm:
+            conn.send_get_request('/unknown/status')
+
+        self.assertEqual(cm.exception.code, 429)
+        self.assertEqual(cm.exception.retry_after, 3)
+
+    def test_error_when_reading_input_file_is_raised_in_client(self):
+        self.start_daemon()
+        conn = self.create_connection()
+        # The daemon opens the file by its path.
+        input_file = File(self.create_input_file())
+        os.remove(input_file.path)
+
+        with self.assertRaises(FileNotFoundError):
+            conn.send_post_request(files={'input': input_file})
+
+    def test_connection_can_be_used_after_error(self):
+        self.start_daemon()
+        conn = self.create_connection()
+        with self.assertRaises(UnknownAPIError):
+            conn.send_get_request('/unknown/status')
+
+        conn = self.create_connection('')
+        response = conn.send_get_request('/test/echo', params={'a': 'b'})
+
+        self.assertEqual(response['a'], 'b')
+
+    def test_identical_submissions_reuse_started_resource(self):
+        self.start_daemon()
+        decompiler = self.create_decompiler()
+        input_file = self.create_input_file()
+
+        decompilation1 = decompiler.start_decompilation(input_file=input_file)
+        decompilation2 = decompiler.start_decompilation(input_file=input_file)
+
+        self.assertEqual(decompilation1.id, decompilation2.id)
+
+    def test_submissions_with_different_parameters_start_new_resources(self):
+        self.start_daemon()
+        decompiler = self.create_decompiler()
+        input_file = self.create_input_file()
+
+        decompilation1 = decompiler.start_decompilation(input_file=input_file)
+        decompilation2 = decompiler.start_decompilation(
+            input_file=input_file,
+            generate_archive=True
+        )
+
+        self.assertNotEqual(decompilation1.id, decompilation2.id)
+
+    def test_submissions_start_new_resources_when_cache_is_disabled(self):
+        self.start_daemon(cache_ttl=0)
+        decompiler = self.create_decompiler()
+        input_file = self.create_input_file()
+
+        decompilation1 = decompiler.start_decompilation(input_file=input_file)
+        decompilation2 = decompiler.start_decompilation(input_file=input_file)
+
+        self.assertNotEqual(decompilation1.id, decompilation2.id)
+
+    def test_statuses_are_answered_from_poller(self):
+        self.api.job_duration = 60
+        daemon = self.start_daemon()
+        recorder = RequestRecorder()
+        hooks.register(recorder)
+        self.addCleanup(hooks.unregister, recorder)
+        conn = self.create_connection()
+        path = '/{}/status'.format(
+            conn.send_post_request(
+                files={'input': File(io.BytesIO(b'MZ'), 'prog.exe')}
+            )['id']
+        )
+
+        conn.send_get_request(path)
+        conn.send_get_request(path)
+        status_requests = len(recorder.paths) - 1
+        daemon._poller.update()
+        conn.send_get_request(path)
+
+        self.assertEqual(status_requests, 1)
+        self.assertEqual(len(recorder.paths), 3)
+
+    def test_finished_statuses_are_not_updated(self):
+        daemon = self.start_daemon()
+        recorder = RequestRecorder()
+        hooks.register(recorder)
+        self.addCleanup(hooks.unregister, recorder)
+        conn = self.create_connection()
+        path = '/{}/status'.format(
+            conn.send_post_request(
+                files={'input': File(io.BytesIO(b'MZ'), 'prog.exe')}
+            )['id']
+        )
+
+        status = conn.send_get_request(path)
+        daemon._poller.update()
+
+        self.assertTrue(status['finished'])
+        self.assertEqual(len(recorder.paths), 2)
+
+    def register_client_recorder(self):
+        recorder = ClientRequestRecorder()
+        hooks.register(recorder)
+        self.addCleanup(hooks.unregister, recorder)
+        return recorder
+
+    def test_request_hooks_are_called_in_client(self):
+        self.start_daemon()
+        recorder = self.register_client_recorder()
+        conn = self.create_connection()
+
+        conn.send_post_request(
+            files={'input': File(io.BytesIO(b'MZ'), 'prog.exe')}
+        )
+
+        self.assertEqual(recorder.events, [
+            ('start', 'POST', '/service/api/decompiler/decompilations'),
+            ('response', 200),
+            ('end', 0),
+        ])
+
+    def test_request_hooks_are_called_in_client_when_file_is_closed(self):
+        self.start_daemon()
+        conn = self.create_connection()
+        decompilation_id = conn.send_post_request(
+            files={'input': File(io.BytesIO(b'MZ'), 'prog.exe')}
+        )['id']
+        recorder = self.register_client_recorder()
+
+        file = conn.get_file('/{}/outputs/hll'.format(decompilation_id))
+        size = len(file.read())
+        events_before_close = list(recorder.events)
+        file.close()
+
+        self.assertEqual(events_before_close, [
+            (
+                'start', 'GET',
+                '/service/api/decompiler/decompilations/{id}/outputs/hll'
+            ),
+            ('response', 200),
+        ])
+        self.assertEqual(recorder.events[-1], ('end', size))
+
+    def test_request_hooks_are_notified_about_error_in_client(self):
+        self.start_daemon()
+        recorder = self.register_client_recorder()
+        conn = self.create_connection()
+
+        with self.assertRaises(UnknownAPIError):
+            conn.get_file('/unknown/outputs/hll')
+
+        self.assertEqual(recorder.events[1:], [
+            ('response', 404),
+            ('error', UnknownAPIError),
+        ])
+
+    def test_request_hooks_are_notified_when_daemon_is_not_running(self):
+        recorder = self.register_client_recorder()
+        conn = self.create_connection('')
+
+        with self.assertRaises(ConnectionError):
+            conn.send_get_request('/test/echo')
+
+        self.assertEqual(recorder.events[1:], [('error', ConnectionError)])
+
+    def test_raises_connection_error_when_daemon_is_not_running(self):
+        conn = self.create_connection('')
+
+        with self.assertRaises(ConnectionError):
+            conn.send_get_request('/test/echo')
+
+    def test_socket_is_accessible_only_by_owner(self):
+        self.start_daemon()
+
+        mode = stat.S_IMODE(os.stat(self.socket_path).st_mode)
+
+        self.assertEqual(mode & 0o077, 0)
+
+    def test_close_removes_socket(self):
+        daemon = Daemon(self.socket_path)
+
+        daemon.close()
+
+        self.assertFalse(os.path.exists(self.socket_path))
+
+    def test_refuses_to_start_when_another_daemon_is_listening(self):
+        self.start_daemon()
+
+        with self.assertRaises(RetdecError):
+            Daemon(self.socket_path)
+
+    def test_removes_socket_left_by_daemon_that_is_not_running(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.bind(self.socket_path)
+        sock.close()
+
+        self.start_daemon()
+        conn = self.create_connection('')
+
+        self.assertEqual(conn.send_get_request('/test/echo'), {})
+
+    def test_refuses_to_overwrite_file_that_is_not_socket(self):
+        with open(self.socket_path, 'w') as f:
+            f.write('data')
+
+        with self.assertRaises(RetdecError):
+            Daemon(self.socket_path)
+
+    def test_repr_returns_correct_value(self):
+        daemon = self.start_daemon()
+
+        self.assertEqual(
+            repr(daemon),
+            '<retdec.daemon.Daemon socket_path={!r}>'.format(self.socket_path)
+        )
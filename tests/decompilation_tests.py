@@ -7,7 +7,11 @@
 """Tests for the :mod:`retdec.decompilation` module."""
 
 import functools
+import io
+import os
+import tempfile
 import unittest
+import zipfile
 
 from retdec.decompilation import Decompilation
 from retdec.decompilation import DecompilationPhase
@@ -15,8 +19,12 @@ from retdec.exceptions import ArchiveGenerationFailedError
 from retdec.exceptions import CFGGenerationFailedError
 from retdec.exceptions import CGGenerationFailedError
 from retdec.exceptions import DecompilationFailedError
+from retdec.exceptions import InvalidValueError
 from retdec.exceptions import NoSuchCFGError
 from retdec.exceptions import OutputNotRequestedError
+from retdec.file import File
+from retdec.storage import DirectoryStore
+from retdec.storage import OutputStore
 from tests import mock
 from tests.resource_tests import ResourceTestsBase
 from tests.resource_tests import WithDisabledWaitingInterval
@@ -1387,6 +1395,39 @@ class DecompilationGetOutputsTests(WithMockedIO, DecompilationTestsBase):
             is_text_file=True
         )
 
+    def test_iter_hll_lines_yields_lines_of_hll_code(self):
+        self.conn.get_file.return_value = io.BytesIO(b'int x;\nint y;\n')
+        d = Decompilation('ID', self.conn)
+
+        lines = list(d.iter_hll_lines())
+
+        self.assertEqual(lines, ['int x;\n', 'int y;\n'])
+        self.conn.get_file.assert_called_once_with('/ID/outputs/hll')
+
+    def test_read_output_into_reads_output_into_buffer(self):
+        self.conn.get_file.return_value = File(io.BytesIO(b'int x;'))
+        d = Decompilation('ID', self.conn)
+        buffer = bytearray(10)
+
+        size = d.read_output_into('hll', buffer)
+
+        self.assertEqual(buffer[:size], b'int x;')
+        self.conn.get_file.assert_called_once_with('/ID/outputs/hll')
+
+    def test_read_output_into_reads_cfg_of_given_function(self):
+        self.conn.get_file.return_value = File(io.BytesIO(b'digraph {}'))
+        d = Decompilation('ID', self.conn)
+
+        d.read_output_into('cfgs/main', bytearray(10))
+
+        self.conn.get_file.assert_called_once_with('/ID/outputs/cfgs/main')
+
+    def test_read_output_into_raises_exception_when_output_is_invalid(self):
+        d = Decompilation('ID', self.conn)
+
+        with self.assertRaises(InvalidValueError):
+            d.read_output_into('xxx', bytearray(10))
+
     def test_save_hll_code_stores_file_to_cwd_when_directory_is_not_given(self):
         d = Decompilation('ID', self.conn)
         self.assert_obtains_and_saves_file(
@@ -1411,6 +1452,15 @@ class DecompilationGetOutputsTests(WithMockedIO, DecompilationTestsBase):
             is_text_file=True
         )
 
+    def test_iter_dsm_lines_yields_lines_of_dsm_code(self):
+        self.conn.get_file.return_value = io.BytesIO(b'nop\nret\n')
+        d = Decompilation('ID', self.conn)
+
+        lines = list(d.iter_dsm_lines())
+
+        self.assertEqual(lines, ['nop\n', 'ret\n'])
+        self.conn.get_file.assert_called_once_with('/ID/outputs/dsm')
+
     def test_save_dsm_code_stores_file_to_cwd_when_directory_is_not_given(self):
         d = Decompilation('ID', self.conn)
         self.assert_obtains_and_saves_file(
@@ -1459,6 +1509,18 @@ class DecompilationGetOutputsTests(WithMockedIO, DecompilationTestsBase):
             directory='dir'
         )
 
+    def test_save_cfg_saves_file_into_store_under_correct_key(self):
+        file = mock.Mock()
+        file.name = 'my_func.png'
+        self.conn.get_file.return_value = file
+        store = mock.Mock(spec_set=OutputStore)
+        d = Decompilation('ID', self.conn)
+
+        path = d.save_cfg('my_func', store)
+
+        store.save.assert_called_once_with(file, 'my_func.png', 'cfgs/my_func')
+        self.assertEqual(path, store.save.return_value)
+
     def test_save_archive_stores_file_to_cwd_when_directory_is_not_given(self):
         d = Decompilation('ID', self.conn)
         self.assert_obtains_and_saves_file(
@@ -1490,3 +1552,226 @@ class DecompilationGetOutputsTests(WithMockedIO, DecompilationTestsBase):
             '/ID/outputs/binary',
             directory='dir'
         )
+
+
+# WithMockedIO and WithDisabledWaitingInterval have to be put as the first base
+# classes, see their descriptions for the reason why.
+class DecompilationExtractArchiveTests(DecompilationTestsBase):
+    """Tests for
+    :func:`retdec.decompilation.Decompilation.extract_archive()`.
+    """
+
+    def setUp(self):
+        super().setUp()
+
+        archive = io.BytesIO()
+        with zipfile.ZipFile(archive, 'w') as zf:
+            zf.writestr('file.c', 'int main() {}')
+            zf.writestr('file.dsm', '; disassembly')
+        archive.seek(0)
+        self.conn.get_file.return_value = archive
+
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def read_extracted_file(self, name):
+        with open(os.path.join(self.directory.name, name)) as f:
+            return f.read()
+
+    def test_obtains_archive_from_correct_url(self):
+        d = Decompilation('ID', self.conn)
+
+        d.extract_archive(self.directory.name)
+
+        self.conn.get_file.assert_called_once_with('/ID/outputs/archive')
+
+    def test_extracts_all_files_when_members_are_not_given(self):
+        d = Decompilation('ID', self.conn)
+
+        paths = d.extract_archive(self.directory.name)
+
+        self.assertEqual(sorted(paths), [
+            os.path.join(self.directory.name, 'file.c'),
+            os.path.join(self.directory.name, 'file.dsm')
+        ])
+        self.assertEqual(self.read_extracted_file('file.c'), 'int main() {}')
+        self.assertEqual(
+            self.read_extracted_file('file.dsm'),
+            '; disassembly'
+        )
+
+    def test_extracts_only_files_with_given_names(self):
+        d = Decompilation('ID', self.conn)
+
+        paths = d.extract_archive(self.directory.name, members=['file.c'])
+
+        self.assertEqual(paths, [os.path.join(self.directory.name, 'file.c')])
+        self.assertEqual(os.listdir(self.directory.name), ['file.c'])
+
+    def test_extracts_only_files_for_which_given_function_returns_true(self):
+        d = Decompilation('ID', self.conn)
+
+        paths = d.extract_archive(
+            self.directory.name,
+            members=lambda name: name.endswith('.dsm')
+        )
+
+        self.assertEqual(
+            paths,
+            [os.path.join(self.directory.name, 'file.dsm')]
+        )
+
+    def test_raises_exception_when_member_is_not_in_archive(self):
+        d = Decompilation('ID', self.conn)
+
+        with self.assertRaises(KeyError):
+            d.extract_archive(self.directory.name, members=['xxx.c'])
+        self.assertEqual(os.listdir(self.directory.name), [])
+
+    def test_buffers_large_archive_in_temporary_file(self):
+        d = Decompilation('ID', self.conn)
+        d._ARCHIVE_BUFFER_SIZE = 1
+
+        paths = d.extract_archive(self.directory.name, members=['file.c'])
+
+        self.assertEqual(self.read_extracted_file('file.c'), 'int main() {}')
+        self.assertEqual(len(paths), 1)
+
+
+class DecompilationSaveAllTests(WithMockedIO, WithDisabledWaitingInterval,
+                                DecompilationTestsBase):
+    """Tests for :func:`retdec.decompilation.Decompilation.save_all()`."""
+
+    def setUp(self):
+        super().setUp()
+
+        self.conn.get_file.side_effect = self.get_file
+
+    def get_file(self, file_path):
+        """Returns a file named after the last part of `file_path`."""
+        file = mock.Mock()
+        file.name = file_path.split('/')[-1]
+        return file
+
+    def get_decompilation_with_status(self, status):
+        """Returns a decompilation with the given status."""
+        self.conn.send_get_request.return_value = self.status_with(status)
+        return Decompilation('ID', self.conn)
+
+    def test_saves_hll_and_dsm_code_by_default(self):
+        d = self.get_decompilation_with_status({'finished': True})
+
+        manifest = d.save_all('dir')
+
+        self.assertEqual(manifest, {
+            'hll': os.path.join('dir', 'hll'),
+            'dsm': os.path.join('dir', 'dsm')
+        })
+        self.conn.get_file.assert_any_call('/ID/outputs/hll')
+        self.conn.get_file.assert_any_call('/ID/outputs/dsm')
+
+    def test_saves_outputs_into_given_store_without_committing_them(self):
+        d = self.get_decompilation_with_status({'finished': True})
+        store = mock.Mock(spec_set=DirectoryStore)
+        store.save.side_effect = lambda src, name, key: os.path.join(
+            'store', key
+        )
+
+        manifest = d.save_all(store, outputs=['hll'])
+
+        self.assertEqual(manifest, {'hll': os.path.join('store', 'hll')})
+        self.assertFalse(store.commit.called)
+        self.assertFalse(store.close.called)
+
+    def test_commits_outputs_at_once_when_durability_is_batch(self):
+        d = self.get_decompilation_with_status({'finished': True})
+        sync_file = mock.Mock()
+        self.patch('retdec.storage._sync_file', sync_file)
+        self.patch('os.fsync', mock.Mock())
+
+        d.save_all('dir', durability='batch')
+
+        self.assertEqual(sync_file.call_count, 2)
+        self.assertEqual(self.replace.call_count, 2)
+
+    def test_saves_all_requested_outputs(self):
+        d = self.get_decompilation_with_status({
+            'finished': True,
+            'cg': {'generated': True, 'failed': False, 'error': None},
+            'cfgs': {
+                'f1': {'generated': True, 'failed': False, 'error': None},
+                'f2': {'generated': True, 'failed': False, 'error': None}
+            },
+            'archive': {'generated': True, 'failed': False, 'error': None}
+        })
+
+        manifest = d.save_all('dir', outputs=Decompilation.OUTPUTS)
+
+        self.assertEqual(
+            sorted(manifest.keys()),
+            ['archive', 'binary', 'cfgs/f1', 'cfgs/f2', 'cg', 'dsm', 'hll']
+        )
+        self.assertEqual(manifest['cfgs/f1'], os.path.join('dir', 'f1'))
+        self.conn.get_file.assert_any_call('/ID/outputs/cfgs/f1')
+
+    def test_waits_until_outputs_are_generated(self):
+        self.conn.send_get_request.side_effect = [
+            self.status_with({
+                'finished': True,
+                'cg': {'generated': False, 'failed': False, 'error': None}
+            }),
+            self.status_with({
+                'finished': True,
+                'cg': {'generated': True, 'failed': False, 'error': None}
+            })
+        ]
+        d = Decompilation('ID', self.conn)
+
+        manifest = d.save_all('dir', outputs=['cg'])
+
+        self.assertEqual(manifest, {'cg': os.path.join('dir', 'cg')})
+
+    def test_calls_on_download_for_each_saved_file(self):
+        d = self.get_decompilation_with_status({'finished': True})
+        on_download = mock.Mock()
+
+        d.save_all('dir', on_download=on_download)
+
+        on_download.assert_any_call(os.path.join('dir', 'hll'))
+        on_download.assert_any_call(os.path.join('dir', 'dsm'))
+
+    def test_calls_on_generation_failure_and_saves_other_outputs(self):
+        d = self.get_decompilation_with_status({
+            'finished': True,
+            'cfgs': {
+                'f1': {'generated': False, 'failed': True, 'error': 'Too big.'},
+                'f2': {'generated': True, 'failed': False, 'error': None}
+            }
+        })
+        on_generation_failure = mock.Mock()
+
+        manifest = d.save_all(
+            'dir',
+            outputs=['cfgs'],
+            on_generation_failure=on_generation_failure
+        )
+
+        on_generation_failure.assert_called_once_with(
+            'control-flow graph for f1', 'Too big.'
+        )
+        self.assertEqual(manifest, {'cfgs/f2': os.path.join('dir', 'f2')})
+
+    def test_raises_exception_when_generation_fails_and_no_callback_is_given(self):
+        d = self.get_decompilation_with_status({
+            'finished': True,
+            'archive': {'generated': False, 'failed': True, 'error': 'Big.'}
+        })
+
+        with self.assertRaises(ArchiveGenerationFailedError):
+            d.save_all('dir', outputs=['archive'])
+
+    def test_raises_exception_when_output_is_invalid(self):
+        d = Decompilation('ID', self.conn)
+
+        with self.assertRaises(InvalidValueError):
+            d.save_all('dir', outputs=['xxx'])
@@ -6,10 +6,13 @@
 
 """Tests for the :mod:`retdec.decompiler` module."""
 
+from retdec import hooks
+from retdec.decompilation import Decompilation
 from retdec.decompiler import Decompiler
 from retdec.exceptions import InvalidValueError
 from retdec.exceptions import MissingParameterError
 from retdec.file import File
+from retdec.hooks import ResourceHooks
 from tests import mock
 from tests.conn_tests import AnyFilesWith
 from tests.conn_tests import AnyParamsWith
@@ -61,6 +64,17 @@ class DecompilerStartDecompilationTests(BaseServiceTests):
             self.decompiler.api_key
         )
 
+    def test_notifies_hooks_about_started_decompilation(self):
+        resource_hooks = mock.Mock(spec_set=ResourceHooks)
+        hooks.register(resource_hooks)
+        self.addCleanup(hooks.unregister, resource_hooks)
+
+        decompilation = self.start_decompilation_with_any_input_file()
+
+        resource_hooks.on_resource_start.assert_called_once_with(
+            decompilation
+        )
+
     def test_sends_input_file(self):
         self.start_decompilation(input_file=self.input_file)
 
@@ -389,3 +403,69 @@ class DecompilerStartDecompilationTests(BaseServiceTests):
         decompilation = self.start_decompilation_with_any_input_file()
 
         self.assertTrue(decompilation.id, 'ID')
+
+
+class DecompilerStartDecompilationsTests(BaseServiceTests):
+    """Tests for :func:`retdec.decompiler.Decompiler.start_decompilations()`.
+    """
+
+    def setUp(self):
+        super().setUp()
+
+        self.decompiler = Decompiler(api_key='KEY')
+
+    def test_creates_single_api_connection_for_whole_batch(self):
+        list(self.decompiler.start_decompilations([
+            {'input_file': mock.Mock(spec_set=File)},
+            {'input_file': mock.Mock(spec_set=File)}
+        ]))
+
+        self.APIConnectionMock.assert_called_once_with(
+            'https://retdec.com/service/api/decompiler/decompilations',
+            self.decompiler.api_key
+        )
+        self.assertEqual(self.conn.send_post_request.call_count, 2)
+
+    def test_yields_started_decompilations(self):
+        self.conn.send_post_request.return_value = {'id': 'ID'}
+
+        submissions = list(self.decompiler.start_decompilations([
+            {'input_file': mock.Mock(spec_set=File)}
+        ]))
+
+        self.assertEqual(len(submissions), 1)
+        self.assertTrue(submissions[0].has_succeeded())
+        self.assertIsInstance(submissions[0].resource, Decompilation)
+        self.assertEqual(submissions[0].resource.id, 'ID')
+
+    def test_reports_submission_errors_per_item(self):
+        input_file = mock.Mock(spec_set=File)
+
+        submissions = list(self.decompiler.start_decompilations([
+            {},
+            {'input_file': input_file}
+        ], max_concurrent_uploads=1))
+
+        failed = [s for s in submissions if s.has_failed()]
+        self.assertEqual(len(failed), 1)
+        self.assertEqual(failed[0].params, {})
+        self.assertIsInstance(failed[0].error, MissingParameterError)
+        succeeded = [s for s in submissions if s.has_succeeded()]
+        self.assertEqual(succeeded[0].params, {'input_file': input_file})
+
+
+class DecompilerGetDecompilationTests(BaseServiceTests):
+    """Tests for :func:`retdec.decompiler.Decompiler.get_decompilation()`."""
+
+    def test_returns_decompilation_with_given_id_without_sending_request(self):
+        decompiler = Decompiler(api_key='KEY')
+
+        decompilation = decompiler.get_decompilation('ID')
+
+        self.assertIsInstance(decompilation, Decompilation)
+        self.assertEqual(decompilation.id, 'ID')
+        self.APIConnectionMock.assert_called_once_with(
+            'https://retdec.com/service/api/decompiler/decompilations',
+            'KEY'
+        )
+        self.assertFalse(self.conn.send_get_request.called)
@@ -10,7 +10,10 @@ import unittest
 
 from retdec.exceptions import AuthenticationError
 from retdec.exceptions import InvalidValueError
+from retdec.exceptions import BufferTooSmallError
+from retdec.exceptions import LeaseLostError
 from retdec.exceptions import MissingAPIKeyError
+from retdec.exceptions import MissingDependencyError
 from retdec.exceptions import MissingParameterError
 from retdec.exceptions import NoSuchCFGError
 from retdec.exceptions import OutputNotRequestedError
@@ -36,6 +39,16 @@ class MissingParameterErrorTests(unittest.TestCase):
         self.assertIn('PARAM_NAME', str(ex))
 
 
+class MissingDependencyErrorTests(unittest.TestCase):
+    """Tests for :class:`retdec.exceptions.MissingDependencyError`."""
+
+    def test_has_correct_description(self):
+        ex = MissingDependencyError('PACKAGE')
+
+        self.assertIn('PACKAGE', str(ex))
+        self.assertIn('not installed', str(ex))
+
+
 class InvalidValueErrorTests(unittest.TestCase):
     """Tests for :class:`retdec.exceptions.InvalidValueError`."""
 
@@ -74,6 +87,37 @@ class NoSuchCFGErrorTests(unittest.TestCase):
         self.assertIn('my_func', str(ex))
 
 
+class BufferTooSmallErrorTests(unittest.TestCase):
+    """Tests for :class:`retdec.exceptions.BufferTooSmallError`."""
+
+    def test_has_correct_attributes(self):
+        ex = BufferTooSmallError(2, 4)
+
+        self.assertEqual(ex.buffer_size, 2)
+        self.assertEqual(ex.file_size, 4)
+
+    def test_includes_both_sizes_when_file_size_is_known(self):
+        ex = BufferTooSmallError(2, 4)
+
+        self.assertIn('2 bytes', str(ex))
+        self.assertIn('4 bytes', str(ex))
+
+    def test_includes_buffer_size_when_file_size_is_not_known(self):
+        ex = BufferTooSmallError(2)
+
+        self.assertIn('2 bytes', str(ex))
+        self.assertIsNone(ex.file_size)
+
+
+class LeaseLostErrorTests(unittest.TestCase):
+    """Tests for :class:`retdec.exceptions.LeaseLostError`."""
+
+    def test_includes_item_id(self):
+        ex = LeaseLostError('42')
+
+        self.assertIn('42', str(ex))
+
+
 class UnknownAPIErrorTests(unittest.TestCase):
     """Tests for :class:`retdec.exceptions.UnknownAPIError`."""
 
@@ -83,6 +127,12 @@ class UnknownAPIErrorTests(unittest.TestCase):
         self.assertEqual(ex.code, 401)
         self.assertEqual(ex.message, 'message')
         self.assertEqual(ex.description, 'description')
+        self.assertIsNone(ex.retry_after)
+
+    def test_retry_after_returns_given_value(self):
+        ex = UnknownAPIError(429, 'message', 'description', retry_after=5)
+
+        self.assertEqual(ex.retry_after, 5)
 
     def test_str_gives_description(self):
         ex = UnknownAPIError(401, 'message', 'description')
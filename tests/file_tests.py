@@ -6,7 +6,10 @@
 
 """Tests for the :mod:`retdec.file` module."""
 
+import hashlib
 import io
+import os
+import tempfile
 import unittest
 
 from retdec.file import File
@@ -73,6 +76,17 @@ class FileTests(unittest.TestCase):
 
         self.assertIsNone(f.name)
 
+    @mock.patch('builtins.open')
+    def test_path_returns_absolute_path_when_path_is_given(self, open):
+        f = File('test.txt')
+
+        self.assertEqual(f.path, os.path.abspath('test.txt'))
+
+    def test_path_returns_none_when_opened_file_is_given(self):
+        f = File(io.BytesIO(b'...'), 'file.txt')
+
+        self.assertIsNone(f.path)
+
     def test_mode_returns_original_mode_when_underlying_file_has_mode(self):
         file = mock.Mock()
         file.mode = 'r+'
@@ -86,7 +100,106 @@ class FileTests(unittest.TestCase):
 
         self.assertIsNone(f.mode)
 
+    def test_size_returns_size_when_given(self):
+        f = File(io.BytesIO(b'data'), size=4)
+
+        self.assertEqual(f.size, 4)
+
+    def test_size_returns_none_when_not_given(self):
+        f = File(io.BytesIO(b'data'))
+
+        self.assertIsNone(f.size)
+
     def test_repr_returns_correct_value(self):
         f = File(io.StringIO('...'), name='file.txt')
 
         self.assertEqual(repr(f), "<retdec.file.File name='file.txt' mode=None>")
+
+
+class FileMmapTests(unittest.TestCase):
+    """Tests for memory-mapped :class:`retdec.file.File` instances."""
+
+    def create_file(self, content):
+        """Creates a temporary file with the given content and returns its
+        path.
+        """
+        fd, path = tempfile.mkstemp()
+        with os.fdopen(fd, 'wb') as f:
+            f.write(content)
+        self.addCleanup(os.remove, path)
+        return path
+
+    def open_file(self, path, **kwargs):
+        f = File(path, **kwargs)
+        self.addCleanup(f.close)
+        return f
+
+    def test_file_is_not_mapped_by_default(self):
+        f = self.open_file(self.create_file(b'data'))
+
+        self.assertFalse(f.is_mapped())
+
+    def test_file_is_mapped_when_requested(self):
+        f = self.open_file(self.create_file(b'data'), use_mmap=True)
+
+        self.assertTrue(f.is_mapped())
+
+    def test_empty_file_is_not_mapped(self):
+        f = self.open_file(self.create_file(b''), use_mmap=True)
+
+        self.assertFalse(f.is_mapped())
+        self.assertEqual(f.read(), b'')
+
+    def test_opened_file_is_not_mapped(self):
+        f = File(io.BytesIO(b'data'), use_mmap=True)
+
+        self.assertFalse(f.is_mapped())
+
+    def test_size_of_mapped_file_is_size_of_mapping(self):
+        f = self.open_file(self.create_file(b'data'), use_mmap=True)
+
+        self.assertEqual(f.size, 4)
+
+    def test_mapped_file_can_be_read(self):
+        f = self.open_file(self.create_file(b'data'), use_mmap=True)
+
+        self.assertEqual(f.read(2), b'da')
+        self.assertEqual(f.tell(), 2)
+        self.assertEqual(f.read(), b'ta')
+
+    def test_mapped_file_keeps_name(self):
+        path = self.create_file(b'data')
+
+        f = self.open_file(path, use_mmap=True)
+
+        self.assertEqual(f.name, path)
+
+    def test_getbuffer_returns_view_of_contents(self):
+        f = self.open_file(self.create_file(b'data'), use_mmap=True)
+
+        with f.getbuffer() as buffer:
+            self.assertEqual(buffer[1:3].tobytes(), b'at')
+
+    def test_getbuffer_raises_exception_when_file_is_not_mapped(self):
+        f = File(io.BytesIO(b'data'))
+
+        with self.assertRaises(ValueError):
+            f.getbuffer()
+
+    def test_digest_returns_digest_of_mapped_file(self):
+        f = self.open_file(self.create_file(b'data'), use_mmap=True)
+
+        self.assertEqual(f.digest(), hashlib.sha256(b'data').hexdigest())
+
+    def test_digest_returns_digest_of_not_mapped_file(self):
+        f = File(io.BytesIO(b'data'))
+
+        self.assertEqual(f.digest('md5'), hashlib.md5(b'data').hexdigest())
+
+    def test_digest_does_not_change_position_in_file(self):
+        f = File(io.BytesIO(b'data'))
+        f.read(1)
+
+        f.digest()
+
+        self.assertEqual(f.read(), b'ata')
@@ -6,6 +6,7 @@
 
 """Tests for the :mod:`retdec.fileinfo` module."""
 
+from retdec.analysis import Analysis
 from retdec.exceptions import MissingParameterError
 from retdec.file import File
 from retdec.fileinfo import Fileinfo
@@ -98,3 +99,41 @@ class FileinfoStartAnalysisTests(BaseServiceTests):
         )
 
         self.assertTrue(analysis.id, 'ID')
+
+
+class FileinfoStartAnalysesTests(BaseServiceTests):
+    """Tests for :func:`retdec.fileinfo.Fileinfo.start_analyses()`."""
+
+    def setUp(self):
+        super().setUp()
+
+        self.fileinfo = Fileinfo(api_key='KEY')
+
+    def test_creates_single_api_connection_for_whole_batch(self):
+        list(self.fileinfo.start_analyses([
+            {'input_file': mock.Mock(spec_set=File)},
+            {'input_file': mock.Mock(spec_set=File)}
+        ]))
+
+        self.APIConnectionMock.assert_called_once_with(
+            'https://retdec.com/service/api/fileinfo/analyses',
+            self.fileinfo.api_key
+        )
+        self.assertEqual(self.conn.send_post_request.call_count, 2)
+
+    def test_yields_started_analyses(self):
+        self.conn.send_post_request.return_value = {'id': 'ID'}
+
+        submissions = list(self.fileinfo.start_analyses([
+            {'input_file': mock.Mock(spec_set=File), 'verbose': True}
+        ]))
+
+        self.assertEqual(len(submissions), 1)
+        self.assertIsInstance(submissions[0].resource, Analysis)
+        self.assertEqual(submissions[0].resource.id, 'ID')
+
+    def test_reports_submission_errors_per_item(self):
+        submissions = list(self.fileinfo.start_analyses([{}]))
+
+        self.assertTrue(submissions[0].has_failed())
+        self.assertIsInstance(submissions[0].error, MissingParameterError)
@@ -0,0 +1,173 @@
+#
+# Project:   retdec-python
+# Copyright: (c) 2015 by Petr Zemek <s3rvac@gmail.com> and contributors
+# License:   MIT, see the LICENSE file for more details
+#
+
+"""Tests for the :mod:`retdec.hooks` module."""
+
+import io
+import unittest
+
+from retdec import hooks
+from retdec.hooks import CountingReader
+from retdec.hooks import RequestHooks
+from retdec.hooks import RequestInfo
+from retdec.hooks import ResourceHooks
+from tests import mock
+
+
+class RequestInfoTests(unittest.TestCase):
+    """Tests for :class:`retdec.hooks.RequestInfo`."""
+
+    def test_arguments_passed_to_initializer_are_accessible(self):
+        request = RequestInfo(
+            'GET', '/api/{id}/status', 'https://x/api/1/status'
+        )
+
+        self.assertEqual(request.method, 'GET')
+        self.assertEqual(request.path, '/api/{id}/status')
+        self.assertEqual(request.url, 'https://x/api/1/status')
+        self.assertIsNone(request.resource_id)
+        self.assertEqual(request.params, {})
+
+    def test_resource_id_and_params_are_accessible_when_given(self):
+        request = RequestInfo(
+            'GET', '/api/{id}', 'https://x/api/1', '1', {'key': 'value'}
+        )
+
+        self.assertEqual(request.resource_id, '1')
+        self.assertEqual(request.params, {'key': 'value'})
+
+    def test_other_attributes_have_correct_initial_values(self):
+        request = RequestInfo('GET', '/api', 'https://x/api')
+
+        self.assertIsNone(request.status_code)
+        self.assertIsNone(request.latency)
+        self.assertEqual(request.bytes_sent, 0)
+        self.assertEqual(request.bytes_received, 0)
+        self.assertEqual(request.retries, 0)
+        self.assertEqual(request.headers, {})
+        self.assertEqual(request.context, {})
+
+    def test_kind_returns_correct_value(self):
+        def kind(method, path):
+            return RequestInfo(method, path, 'https://x' + path).kind
+
+        self.assertEqual(kind('POST', '/api'), 'upload')
+        self.assertEqual(kind('GET', '/api/{id}/status'), 'status')
+        self.assertEqual(kind('GET', '/api/{id}/outputs/hll'), 'download')
+        self.assertEqual(kind('GET', '/api/{id}/output'), 'download')
+        self.assertEqual(kind('GET', '/api'), 'other')
+
+    def test_repr_returns_correct_value(self):
+        request = RequestInfo('GET', '/api', 'https://x/api')
+        request.status_code = 200
+
+        self.assertEqual(
+            repr(request),
+            "<retdec.hooks.RequestInfo method='GET' path='/api'"
+            " status_code=200>"
+        )
+
+
+class RegistrationTests(unittest.TestCase):
+    """Tests for registration of hooks."""
+
+    def test_registered_hooks_are_returned(self):
+        h1 = RequestHooks()
+        h2 = RequestHooks()
+        hooks.register(h1)
+        self.addCleanup(hooks.unregister, h1)
+        hooks.register(h2)
+        self.addCleanup(hooks.unregister, h2)
+
+        self.assertEqual(hooks.registered(), (h1, h2))
+
+    def test_unregistered_hooks_are_not_returned(self):
+        h = RequestHooks()
+        hooks.register(h)
+
+        hooks.unregister(h)
+
+        self.assertEqual(hooks.registered(), ())
+
+    def test_unregister_does_nothing_when_hooks_are_not_registered(self):
+        hooks.unregister(RequestHooks())
+
+        self.assertEqual(hooks.registered(), ())
+
+
+class NotifyTests(unittest.TestCase):
+    """Tests for :func:`retdec.hooks.notify()`."""
+
+    def test_calls_method_on_registered_hooks(self):
+        h = mock.Mock(spec_set=ResourceHooks)
+        hooks.register(h)
+        self.addCleanup(hooks.unregister, h)
+
+        hooks.notify('on_resource_start', 'resource')
+
+        h.on_resource_start.assert_called_once_with('resource')
+
+    def test_calls_method_on_given_hooks_instead_of_registered_ones(self):
+        registered = mock.Mock(spec_set=ResourceHooks)
+        hooks.register(registered)
+        self.addCleanup(hooks.unregister, registered)
+        given = mock.Mock(spec_set=ResourceHooks)
+
+        hooks.notify('on_resource_start', 'resource', hooks=(given,))
+
+        given.on_resource_start.assert_called_once_with('resource')
+        self.assertFalse(registered.on_resource_start.called)
+
+    def test_skips_hooks_that_do_not_define_method(self):
+        request_hooks = RequestHooks()
+        resource_hooks = mock.Mock(spec_set=ResourceHooks)
+
+        hooks.notify(
+            'on_resource_start', 'resource',
+            hooks=(request_hooks, resource_hooks)
+        )
+
+        resource_hooks.on_resource_start.assert_called_once_with('resource')
+
+
+class CountingReaderTests(unittest.TestCase):
+    """Tests for :class:`retdec.hooks.CountingReader`."""
+
+    def test_read_reports_number_of_read_bytes(self):
+        callback = mock.Mock()
+        reader = CountingReader(io.BytesIO(b'data'), callback)
+
+        self.assertEqual(reader.read(3), b'dat')
+        self.assertEqual(reader.read(), b'a')
+        self.assertEqual(reader.read(), b'')
+
+        self.assertEqual(callback.mock_calls, [mock.call(3), mock.call(1)])
+
+    def test_readinto_reports_number_of_read_bytes(self):
+        callback = mock.Mock()
+        reader = CountingReader(io.BytesIO(b'data'), callback)
+        buffer = bytearray(10)
+
+        self.assertEqual(reader.readinto(buffer), 4)
+
+        callback.assert_called_once_with(4)
+
+    def test_other_attributes_are_delegated_to_file(self):
+        file = io.BytesIO(b'data')
+        reader = CountingReader(file, mock.Mock())
+
+        reader.close()
+
+        self.assertTrue(file.closed)
+
+    def test_close_calls_on_close_only_once(self):
+        on_close = mock.Mock()
+        reader = CountingReader(io.BytesIO(b'data'), mock.Mock(), on_close)
+
+        reader.close()
+        reader.close()
+
+        on_close.assert_called_once_with()
@@ -0,0 +1,203 @@
+#
+# Project:   retdec-python
+# Copyright: (c) 2015 by Petr Zemek <s3rvac@gmail.com> and contributors
+# License:   MIT, see the LICENSE file for more details
+#
+
+"""Tests for the :mod:`retdec.limiter` module."""
+
+import threading
+import unittest
+
+from retdec.exceptions import InvalidValueError
+from retdec.exceptions import UnknownAPIError
+from retdec.limiter import InFlightLimiter
+from retdec.resource import Resource
+from tests import WithPatching
+from tests import mock
+
+
+class InFlightLimiterTests(unittest.TestCase, WithPatching):
+    """Tests for :class:`retdec.limiter.InFlightLimiter`."""
+
+    def setUp(self):
+        super().setUp()
+
+        self.sleep = mock.Mock()
+        self.patch('time.sleep', self.sleep)
+
+    def create_resource(self, finished=False):
+        resource = mock.Mock(spec_set=Resource)
+        resource.has_finished.return_value = finished
+        return resource
+
+    def test_limit_is_unknown_by_default(self):
+        limiter = InFlightLimiter()
+
+        self.assertIsNone(limiter.limit)
+
+    def test_raises_exception_when_limit_is_not_positive(self):
+        with self.assertRaises(InvalidValueError):
+            InFlightLimiter(limit=0)
+
+    def test_try_acquire_takes_slot_when_one_is_free(self):
+        limiter = InFlightLimiter(limit=1)
+
+        self.assertTrue(limiter.try_acquire())
+        self.assertEqual(limiter.in_flight, 1)
+
+    def test_try_acquire_returns_false_when_all_slots_are_taken(self):
+        limiter = InFlightLimiter(limit=1)
+        limiter.try_acquire()
+        limiter.track(self.create_resource(finished=False))
+
+        self.assertFalse(limiter.try_acquire())
+
+    def test_try_acquire_reuses_slot_of_finished_resource(self):
+        limiter = InFlightLimiter(limit=1)
+        resource = self.create_resource(finished=False)
+        limiter.start(lambda: resource)
+        resource.has_finished.return_value = True
+
+        self.assertTrue(limiter.try_acquire())
+        self.assertEqual(limiter.in_flight, 1)
+
+    def test_release_frees_slot(self):
+        limiter = InFlightLimiter(limit=1)
+        limiter.try_acquire()
+
+        limiter.release()
+
+        self.assertEqual(limiter.in_flight, 0)
+
+    def test_acquire_returns_false_when_timeout_expires(self):
+        limiter = InFlightLimiter(limit=1)
+        limiter.try_acquire()
+
+        self.assertFalse(limiter.acquire(timeout=0.01))
+
+    def test_acquire_waits_until_slot_is_released_by_other_thread(self):
+        limiter = InFlightLimiter(limit=1)
+        limiter.try_acquire()
+        thread = threading.Timer(0.01, limiter.release)
+        thread.start()
+        self.addCleanup(thread.join)
+
+        self.assertTrue(limiter.acquire(timeout=5))
+
+    def test_release_finished_releases_slots_of_finished_resources(self):
+        limiter = InFlightLimiter()
+        limiter.start(lambda: self.create_resource(finished=True))
+        limiter.start(lambda: self.create_resource(finished=False))
+
+        released = limiter.release_finished()
+
+        self.assertEqual(released, 1)
+        self.assertEqual(limiter.in_flight, 1)
+
+    def test_start_passes_arguments_and_returns_resource(self):
+        limiter = InFlightLimiter()
+        resource = self.create_resource()
+        start = mock.Mock(return_value=resource)
+
+        result = limiter.start(start, 'a', input_file='file.exe')
+
+        self.assertIs(result, resource)
+        start.assert_called_once_with('a', input_file='file.exe')
+        self.assertEqual(limiter.in_flight, 1)
+
+    def test_start_releases_slot_and_propagates_other_errors(self):
+        limiter = InFlightLimiter()
+        start = mock.Mock(side_effect=OSError('No such file.'))
+
+        with self.assertRaises(OSError):
+            limiter.start(start)
+        self.assertEqual(limiter.in_flight, 0)
+
+    def test_start_learns_limit_and_retries_when_api_rejects_start(self):
+        limiter = InFlightLimiter()
+        # The limit is unknown, so the first resource is not checked until the
+        # API rejects the second one.
+        limiter.start(lambda: self.create_resource(finished=True))
+        resource = self.create_resource()
+        start = mock.Mock(side_effect=[
+            UnknownAPIError(429, 'Too Many Requests', 'Limit reached.'),
+            resource
+        ])
+
+        result = limiter.start(start)
+
+        self.assertIs(result, resource)
+        self.assertEqual(limiter.limit, 1)
+        self.assertEqual(limiter.in_flight, 1)
+        self.sleep.assert_called_once_with(5)
+
+    def test_start_waits_as_long_as_api_asks_before_retrying(self):
+        limiter = InFlightLimiter()
+        start = mock.Mock(side_effect=[
+            UnknownAPIError(
+                429, 'Too Many Requests', 'Limit reached.', retry_after=2
+            ),
+            self.create_resource()
+        ])
+
+        limiter.start(start)
+
+        self.sleep.assert_called_once_with(2)
+
+    def test_start_raises_lowered_limit_after_run_of_successful_starts(self):
+        limiter = InFlightLimiter(increase_after=2)
+        limiter.start(lambda: self.create_resource(finished=True))
+        start = mock.Mock(side_effect=[
+            UnknownAPIError(429, 'Too Many Requests', 'Limit reached.'),
+            self.create_resource(finished=True)
+        ])
+        limiter.start(start)
+        limit_after_rejection = limiter.limit
+
+        limiter.start(lambda: self.create_resource(finished=True))
+
+        self.assertEqual(limit_after_rejection, 1)
+        self.assertEqual(limiter.limit, 2)
+
+    def test_start_does_not_raise_limit_above_given_limit(self):
+        limiter = InFlightLimiter(limit=1, increase_after=1)
+
+        limiter.start(lambda: self.create_resource(finished=True))
+        limiter.start(lambda: self.create_resource(finished=True))
+
+        self.assertEqual(limiter.limit, 1)
+
+    def test_raises_exception_when_increase_after_is_not_positive(self):
+        with self.assertRaises(InvalidValueError):
+            InFlightLimiter(increase_after=0)
+
+    def test_start_gives_up_after_max_retries(self):
+        limiter = InFlightLimiter(max_retries=1)
+        start = mock.Mock(side_effect=UnknownAPIError(
+            429, 'Too Many Requests', 'Limit reached.'
+        ))
+
+        with self.assertRaises(UnknownAPIError):
+            limiter.start(start)
+        self.assertEqual(start.call_count, 2)
+        self.assertEqual(limiter.in_flight, 0)
+
+    def test_start_does_not_retry_other_api_errors(self):
+        limiter = InFlightLimiter()
+        start = mock.Mock(side_effect=UnknownAPIError(
+            500, 'Internal Server Error', 'Something went wrong.'
+        ))
+
+        with self.assertRaises(UnknownAPIError):
+            limiter.start(start)
+        self.assertEqual(start.call_count, 1)
+        self.assertIsNone(limiter.limit)
+
+    def test_repr_returns_correct_value(self):
+        limiter = InFlightLimiter(limit=2)
+
+        self.assertEqual(
+            repr(limiter),
+            '<retdec.limiter.InFlightLimiter limit=2 in_flight=0>'
+        )
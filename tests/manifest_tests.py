@@ -0,0 +1,181 @@
+#
+# Project:   retdec-python
+# Copyright: (c) 2015 by Petr Zemek <s3rvac@gmail.com> and contributors
+# License:   MIT, see the LICENSE file for more details
+#
+
+"""Tests for the :mod:`retdec.manifest` module."""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from retdec.manifest import Manifest
+from retdec.manifest import ManifestEntry
+
+
+class ManifestEntryTests(unittest.TestCase):
+    """Tests for :class:`retdec.manifest.ManifestEntry`."""
+
+    def test_arguments_passed_to_initializer_are_accessible(self):
+        entry = ManifestEntry(
+            '/prog.exe', 'DIGEST', {'mode': 'bin'}, 'ID', 'done',
+            ['/prog.c'], 'ERROR'
+        )
+
+        self.assertEqual(entry.input_file, '/prog.exe')
+        self.assertEqual(entry.digest, 'DIGEST')
+        self.assertEqual(entry.params, {'mode': 'bin'})
+        self.assertEqual(entry.id, 'ID')
+        self.assertEqual(entry.state, 'done')
+        self.assertEqual(entry.outputs, ['/prog.c'])
+        self.assertEqual(entry.error, 'ERROR')
+
+    def test_repr_returns_correct_value(self):
+        entry = ManifestEntry('/prog.exe', None, {}, 'ID', 'submitted')
+
+        self.assertEqual(
+            repr(entry),
+            "<retdec.manifest.ManifestEntry input_file='/prog.exe' "
+            "state='submitted' id='ID'>"
+        )
+
+
+class ManifestTests(unittest.TestCase):
+    """Tests for :class:`retdec.manifest.Manifest`."""
+
+    def setUp(self):
+        super().setUp()
+
+        self.tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp_dir)
+        self.path = os.path.join(self.tmp_dir, 'manifest.sqlite')
+        self.manifest = self.open_manifest()
+        self.input_file = self.write_file('prog.exe', b'MZ')
+
+    def open_manifest(self):
+        manifest = Manifest(self.path)
+        self.addCleanup(manifest.close)
+        return manifest
+
+    def write_file(self, name, content):
+        path = os.path.join(self.tmp_dir, name)
+        with open(path, 'wb') as f:
+            f.write(content)
+        return path
+
+    def test_get_returns_none_for_unknown_file(self):
+        self.assertIsNone(self.manifest.get(self.input_file))
+
+    def test_submitted_file_has_correct_entry(self):
+        self.manifest.mark_submitted(
+            self.input_file, {'input_file': self.input_file, 'mode': 'bin'},
+            'ID'
+        )
+
+        entry = self.manifest.get(self.input_file)
+        self.assertEqual(entry.input_file, self.input_file)
+        self.assertEqual(entry.state, Manifest.SUBMITTED)
+        self.assertEqual(entry.id, 'ID')
+        self.assertEqual(entry.params, {'mode': 'bin'})
+        self.assertEqual(
+            entry.digest,
+            # SHA-256 of b'MZ'.
+            '9b8db510ef42b8ed54a3712636fda55a4f8cfcd5493e20b74ab00cd4f3979f2d'
+        )
+
+    def test_done_file_has_saved_outputs(self):
+        self.manifest.mark_submitted(self.input_file, {}, 'ID')
+
+        self.manifest.mark_done(self.input_file, ['/out/prog.c'])
+
+        entry = self.manifest.get(self.input_file)
+        self.assertEqual(entry.state, Manifest.DONE)
+        self.assertEqual(entry.id, 'ID')
+        self.assertEqual(entry.outputs, ['/out/prog.c'])
+
+    def test_failed_file_keeps_id_of_its_decompilation(self):
+        self.manifest.mark_submitted(self.input_file, {}, 'ID')
+
+        self.manifest.mark_failed(self.input_file, {}, 'failed')
+
+        entry = self.manifest.get(self.input_file)
+        self.assertEqual(entry.state, Manifest.FAILED)
+        self.assertEqual(entry.id, 'ID')
+        self.assertEqual(entry.error, 'failed')
+
+    def test_file_that_failed_to_be_submitted_has_entry(self):
+        self.manifest.mark_failed(self.input_file, {'mode': 'bin'}, 'failed')
+
+        entry = self.manifest.get(self.input_file)
+        self.assertEqual(entry.state, Manifest.FAILED)
+        self.assertIsNone(entry.id)
+        self.assertEqual(entry.params, {'mode': 'bin'})
+
+    def test_relative_paths_are_stored_as_absolute_paths(self):
+        relative_path = os.path.relpath(self.input_file)
+
+        self.manifest.mark_submitted(relative_path, {}, 'ID')
+
+        self.assertEqual(self.manifest.get(self.input_file).id, 'ID')
+
+    def test_entries_are_persistent(self):
+        self.manifest.mark_submitted(self.input_file, {}, 'ID')
+        self.manifest.close()
+
+        manifest = self.open_manifest()
+
+        self.assertEqual(manifest.get(self.input_file).id, 'ID')
+
+    def test_get_resumable_returns_entry_of_unchanged_file(self):
+        self.manifest.mark_submitted(self.input_file, {'mode': 'bin'}, 'ID')
+
+        entry = self.manifest.get_resumable(self.input_file, {'mode': 'bin'})
+
+        self.assertEqual(entry.id, 'ID')
+
+    def test_get_resumable_returns_entry_of_touched_file_with_same_contents(self):
+        self.manifest.mark_submitted(self.input_file, {}, 'ID')
+        os.utime(self.input_file, (0, 0))
+
+        entry = self.manifest.get_resumable(self.input_file, {})
+
+        self.assertEqual(entry.id, 'ID')
+
+    def test_get_resumable_returns_none_when_file_has_changed(self):
+        self.manifest.mark_submitted(self.input_file, {}, 'ID')
+        self.write_file('prog.exe', b'MZ-changed')
+
+        self.assertIsNone(self.manifest.get_resumable(self.input_file, {}))
+
+    def test_get_resumable_returns_none_when_file_no_longer_exists(self):
+        self.manifest.mark_submitted(self.input_file, {}, 'ID')
+        os.remove(self.input_file)
+
+        self.assertIsNone(self.manifest.get_resumable(self.input_file, {}))
+
+    def test_get_resumable_returns_none_when_parameters_differ(self):
+        self.manifest.mark_submitted(self.input_file, {'mode': 'bin'}, 'ID')
+
+        self.assertIsNone(
+            self.manifest.get_resumable(self.input_file, {'mode': 'raw'})
+        )
+
+    def test_counts_returns_number_of_files_by_state(self):
+        other_file = self.write_file('other.exe', b'MZ')
+        self.manifest.mark_submitted(self.input_file, {}, 'ID1')
+        self.manifest.mark_submitted(other_file, {}, 'ID2')
+        self.manifest.mark_done(other_file, [])
+
+        self.assertEqual(self.manifest.counts(), {
+            Manifest.SUBMITTED: 1,
+            Manifest.DONE: 1,
+            Manifest.FAILED: 0,
+        })
+
+    def test_repr_returns_correct_value(self):
+        self.assertEqual(
+            repr(self.manifest),
+            '<retdec.manifest.Manifest path={!r}>'.format(self.path)
+        )
@@ -0,0 +1,374 @@
+#
+# Project:   retdec-python
+# Copyright: (c) 2015 by Petr Zemek <s3rvac@gmail.com> and contributors
+# License:   MIT, see the LICENSE file for more details
+#
+
+"""Tests for the :mod:`retdec.metrics` module."""
+
+import os
+import tempfile
+import unittest
+import urllib.error
+import urllib.request
+
+from retdec import hooks
+from retdec import metrics
+from retdec.exceptions import DecompilationFailedError
+from retdec.exceptions import InvalidValueError
+from retdec.exceptions import UnknownAPIError
+from retdec.hooks import RequestInfo
+from retdec.metrics import Counter
+from retdec.metrics import Gauge
+from retdec.metrics import Histogram
+from retdec.metrics import MetricsHooks
+from retdec.metrics import Registry
+from tests import mock
+
+
+class CounterTests(unittest.TestCase):
+    """Tests for :class:`retdec.metrics.Counter`."""
+
+    def test_inc_increases_value_with_given_labels(self):
+        counter = Counter('c_total', 'Doc.', ('kind',))
+
+        counter.inc(kind='a')
+        counter.inc(2, kind='a')
+        counter.inc(kind='b')
+
+        self.assertEqual(counter.get(kind='a'), 3)
+        self.assertEqual(counter.get(kind='b'), 1)
+        self.assertEqual(counter.get(kind='c'), 0)
+
+    def test_inc_raises_exception_when_amount_is_negative(self):
+        counter = Counter('c_total', 'Doc.')
+
+        with self.assertRaises(InvalidValueError):
+            counter.inc(-1)
+
+    def test_inc_raises_exception_when_labels_do_not_match(self):
+        counter = Counter('c_total', 'Doc.', ('kind',))
+
+        with self.assertRaises(InvalidValueError):
+            counter.inc(other='a')
+
+    def test_render_returns_correct_value(self):
+        counter = Counter('c_total', 'Doc.', ('kind', 'code'))
+        counter.inc(kind='b', code=200)
+        counter.inc(2, kind='a', code=404)
+
+        self.assertEqual(
+            counter.render(),
+            '# HELP c_total Doc.\n'
+            '# TYPE c_total counter\n'
+            'c_total{kind="a",code="404"} 2\n'
+            'c_total{kind="b",code="200"} 1\n'
+        )
+
+    def test_render_escapes_label_values(self):
+        counter = Counter('c_total', 'Doc.', ('type',))
+        counter.inc(type='a"b\\c\nd')
+
+        self.assertIn(r'c_total{type="a\"b\\c\nd"} 1', counter.render())
+
+    def test_render_omits_braces_when_there_are_no_labels(self):
+        counter = Counter('c_total', 'Doc.')
+        counter.inc()
+
+        self.assertIn('\nc_total 1\n', counter.render())
+
+    def test_repr_returns_correct_value(self):
+        counter = Counter('c_total', 'Doc.')
+
+        self.assertEqual(
+            repr(counter),
+            "<retdec.metrics.Counter name='c_total'>"
+        )
+
+
+class GaugeTests(unittest.TestCase):
+    """Tests for :class:`retdec.metrics.Gauge`."""
+
+    def test_inc_dec_and_set_change_value(self):
+        gauge = Gauge('g', 'Doc.', ('kind',))
+
+        gauge.inc(3, kind='a')
+        gauge.dec(kind='a')
+        self.assertEqual(gauge.get(kind='a'), 2)
+
+        gauge.set(10, kind='a')
+        self.assertEqual(gauge.get(kind='a'), 10)
+
+    def test_render_returns_correct_value(self):
+        gauge = Gauge('g', 'Doc.')
+        gauge.set(1.5)
+
+        self.assertEqual(
+            gauge.render(),
+            '# HELP g Doc.\n'
+            '# TYPE g gauge\n'
+            'g 1.5\n'
+        )
+
+
+class HistogramTests(unittest.TestCase):
+    """Tests for :class:`retdec.metrics.Histogram`."""
+
+    def test_get_returns_count_and_sum_of_observed_values(self):
+        histogram = Histogram('h', 'Doc.', buckets=(1, 2))
+
+        histogram.observe(0.5)
+        histogram.observe(1.5)
+
+        self.assertEqual(histogram.get(), (2, 2.0))
+
+    def test_get_returns_zeros_when_nothing_was_observed(self):
+        histogram = Histogram('h', 'Doc.', ('kind',))
+
+        self.assertEqual(histogram.get(kind='a'), (0, 0))
+
+    def test_render_returns_cumulative_buckets_sum_and_count(self):
+        histogram = Histogram('h', 'Doc.', ('kind',), buckets=(2, 1))
+        histogram.observe(0.5, kind='a')
+        histogram.observe(1.5, kind='a')
+        histogram.observe(3, kind='a')
+
+        self.assertEqual(
+            histogram.render(),
+            '# HELP h Doc.\n'
+            '# TYPE h histogram\n'
+            'h_bucket{kind="a",le="1"} 1\n'
+            'h_bucket{kind="a",le="2"} 2\n'
+            'h_bucket{kind="a",le="+Inf"} 3\n'
+            'h_sum{kind="a"} 5.0\n'
+            'h_count{kind="a"} 3\n'
+        )
+
+
+class RegistryTests(unittest.TestCase):
+    """Tests for :class:`retdec.metrics.Registry`."""
+
+    def test_register_returns_metric(self):
+        registry = Registry()
+        counter = Counter('c_total', 'Doc.')
+
+        self.assertIs(registry.register(counter), counter)
+
+    def test_render_returns_all_metrics_in_order_of_registration(self):
+        registry = Registry()
+        registry.register(Gauge('b', 'Doc.'))
+        registry.register(Counter('a_total', 'Doc.'))
+
+        self.assertEqual(
+            registry.render(),
+            '# HELP b Doc.\n'
+            '# TYPE b gauge\n'
+            '# HELP a_total Doc.\n'
+            '# TYPE a_total counter\n'
+        )
+
+
+class MetricsHooksTests(unittest.TestCase):
+    """Tests for :class:`retdec.metrics.MetricsHooks`."""
+
+    def setUp(self):
+        super().setUp()
+
+        self.hooks = MetricsHooks()
+
+    def request(self, method, path, status_code=200):
+        """Creates information about a request."""
+        request = RequestInfo(method, path, 'https://retdec.com' + path)
+        request.status_code = status_code
+        return request
+
+    def decompilation(self, id='ID'):
+        """Creates a fake decompilation."""
+        decompilation = mock.Mock()
+        decompilation.__class__.__name__ = 'Decompilation'
+        decompilation.id = id
+        return decompilation
+
+    def test_registry_is_created_when_not_given(self):
+        self.assertIsInstance(self.hooks.registry, Registry)
+
+    def test_uses_given_registry(self):
+        registry = Registry()
+
+        hooks = MetricsHooks(registry)
+
+        self.assertIs(hooks.registry, registry)
+        self.assertIn('retdec_requests_total', registry.render())
+
+    def test_counts_responses_by_kind_method_and_code(self):
+        self.hooks.on_response(self.request('POST', '/decompilations'))
+        self.hooks.on_response(
+            self.request('GET', '/decompilations/{id}/status', 404)
+        )
+        self.hooks.on_response(
+            self.request('GET', '/decompilations/{id}/outputs/hll')
+        )
+
+        requests = self.hooks.requests
+        self.assertEqual(
+            requests.get(kind='upload', method='POST', code=200), 1
+        )
+        self.assertEqual(
+            requests.get(kind='status', method='GET', code=404), 1
+        )
+        self.assertEqual(
+            requests.get(kind='download', method='GET', code=200), 1
+        )
+
+    def test_observes_durations_of_requests(self):
+        self.hooks.on_request_end(self.request('GET', '/{id}/status'), 0.5)
+
+        self.assertEqual(
+            self.hooks.request_duration.get(kind='status'),
+            (1, 0.5)
+        )
+
+    def test_counts_sent_and_received_bytes(self):
+        self.hooks.on_bytes(self.request('POST', '/'), 'sent', 100)
+        self.hooks.on_bytes(self.request('GET', '/{id}/output'), 'received', 5)
+
+        self.assertEqual(self.hooks.sent_bytes.get(kind='upload'), 100)
+        self.assertEqual(self.hooks.received_bytes.get(kind='download'), 5)
+
+    def test_counts_request_failures_by_type_and_code(self):
+        self.hooks.on_error(
+            self.request('GET', '/'),
+            UnknownAPIError(500, 'Error', 'Description')
+        )
+
+        self.assertEqual(
+            self.hooks.failures.get(type='UnknownAPIError', code=500),
+            1
+        )
+
+    def test_counts_resource_failures_by_type(self):
+        self.hooks.on_resource_error(
+            self.decompilation(),
+            DecompilationFailedError('Error')
+        )
+
+        self.assertEqual(
+            self.hooks.failures.get(type='DecompilationFailedError', code=''),
+            1
+        )
+
+    def test_counts_started_resources_as_submitted_and_in_flight(self):
+        self.hooks.on_resource_start(self.decompilation())
+
+        self.assertEqual(
+            self.hooks.submissions.get(resource='decompilation'), 1
+        )
+        self.assertEqual(self.hooks.in_flight.get(resource='decompilation'), 1)
+
+    def test_counts_status_polls(self):
+        self.hooks.on_resource_status(self.decompilation(), {})
+
+        self.assertEqual(
+            self.hooks.status_polls.get(resource='decompilation'), 1
+        )
+
+    def test_counts_finished_resources_by_outcome(self):
+        decompilation = self.decompilation()
+        self.hooks.on_resource_start(decompilation)
+
+        self.hooks.on_resource_finish(decompilation, {'failed': True})
+
+        self.assertEqual(
+            self.hooks.finished.get(
+                resource='decompilation', outcome='failed'
+            ),
+            1
+        )
+        self.assertEqual(self.hooks.in_flight.get(resource='decompilation'), 0)
+
+    def test_finish_of_resource_not_started_by_us_does_not_change_in_flight(self):
+        self.hooks.on_resource_finish(self.decompilation(), {'failed': False})
+
+        self.assertEqual(self.hooks.in_flight.get(resource='decompilation'), 0)
+        self.assertEqual(
+            self.hooks.finished.get(
+                resource='decompilation', outcome='succeeded'
+            ),
+            1
+        )
+
+
+class EnableDisableTests(unittest.TestCase):
+    """Tests for :func:`retdec.metrics.enable()` and
+    :func:`retdec.metrics.disable()`.
+    """
+
+    def setUp(self):
+        super().setUp()
+
+        self.addCleanup(metrics.disable)
+
+    def test_enable_registers_metrics_hooks(self):
+        metrics_hooks = metrics.enable()
+
+        self.assertIsInstance(metrics_hooks, MetricsHooks)
+        self.assertIn(metrics_hooks, hooks.registered())
+
+    def test_enable_returns_same_hooks_when_called_twice(self):
+        self.assertIs(metrics.enable(), metrics.enable())
+
+    def test_disable_unregisters_metrics_hooks(self):
+        metrics_hooks = metrics.enable()
+
+        metrics.disable()
+
+        self.assertNotIn(metrics_hooks, hooks.registered())
+
+    def test_disable_does_nothing_when_not_enabled(self):
+        metrics.disable()
+
+        self.assertEqual(hooks.registered(), ())
+
+
+class ExportTests(unittest.TestCase):
+    """Tests for exporting of metrics."""
+
+    def setUp(self):
+        super().setUp()
+
+        self.registry = Registry()
+        self.registry.register(Counter('c_total', 'Doc.')).inc()
+
+    def test_write_textfile_writes_rendered_metrics_into_file(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'retdec.prom')
+
+            metrics.write_textfile(path, registry=self.registry)
+
+            with open(path, encoding='utf-8') as f:
+                self.assertEqual(f.read(), self.registry.render())
+            self.assertEqual(os.listdir(tmp_dir), ['retdec.prom'])
+
+    def test_http_server_serves_metrics(self):
+        server = metrics.start_http_server(0, registry=self.registry)
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        url = 'http://127.0.0.1:{}/metrics'.format(server.server_address[1])
+
+        with urllib.request.urlopen(url, timeout=10) as response:
+            body = response.read().decode('utf-8')
+            content_type = response.headers['Content-Type']
+
+        self.assertEqual(body, self.registry.render())
+        self.assertTrue(content_type.startswith('text/plain; version=0.0.4'))
+
+    def test_http_server_returns_not_found_for_other_paths(self):
+        server = metrics.start_http_server(0, registry=self.registry)
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        url = 'http://127.0.0.1:{}/other'.format(server.server_address[1])
+
+        with self.assertRaises(urllib.error.HTTPError) as cm:
+            urllib.request.urlopen(url, timeout=10)
+        self.assertEqual(cm.exception.code, 404)
+        cm.exception.close()
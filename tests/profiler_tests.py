@@ -0,0 +1,266 @@
+#
+# Project:   retdec-python
+# Copyright: (c) 2015 by Petr Zemek <s3rvac@gmail.com> and contributors
+# License:   MIT, see the LICENSE file for more details
+#
+
+"""Tests for the :mod:`retdec.profiler` module."""
+
+import io
+import json
+import os
+import tempfile
+import unittest
+
+from retdec import hooks
+from retdec import profiler
+from retdec.hooks import RequestInfo
+from retdec.profiler import PhaseProfiler
+from retdec.profiler import TOTAL
+from retdec.profiler import phase_durations
+from retdec.profiler import read_records
+from retdec.profiler import summarize
+from tests import WithPatching
+from tests import mock
+
+
+def phase(name, part=None):
+    """Returns a phase with the given name as returned by the API."""
+    return {
+        'name': name,
+        'part': part,
+        'description': name + '.',
+        'completion': 0,
+        'warnings': []
+    }
+
+
+def record(phases, total, params=None, failed=False):
+    """Returns a record with the given data."""
+    return {
+        'id': 'ID',
+        'params': params or {},
+        'phases': phases,
+        'total': total,
+        'failed': failed
+    }
+
+
+class PhaseProfilerTests(unittest.TestCase, WithPatching):
+    """Tests for :class:`retdec.profiler.PhaseProfiler`."""
+
+    def setUp(self):
+        super().setUp()
+
+        self.time = mock.Mock(return_value=100.0)
+        self.patch('retdec.profiler.time.monotonic', self.time)
+
+        self.log = io.StringIO()
+        self.profiler = PhaseProfiler(self.log)
+
+    def start_decompilation(self, params=None):
+        """Simulates starting of a decompilation and returns it."""
+        request = RequestInfo('POST', '/api', 'https://x/api', None, params)
+        self.profiler.on_request_start(request)
+        decompilation = mock.Mock()
+        decompilation.id = 'ID'
+        self.profiler.on_resource_start(decompilation)
+        return decompilation
+
+    def written_records(self):
+        return [json.loads(line) for line in self.log.getvalue().splitlines()]
+
+    def test_writes_record_with_first_observations_of_phases(self):
+        decompilation = self.start_decompilation({'decomp_optimizations': 'none'})
+        self.time.return_value = 101.0
+        self.profiler.on_resource_status(
+            decompilation, {'phases': [phase('A')]}
+        )
+        self.time.return_value = 103.5
+        self.profiler.on_resource_status(
+            decompilation, {'phases': [phase('A'), phase('B'), phase('C')]}
+        )
+        self.time.return_value = 110.0
+        status = {'phases': [phase('A'), phase('B'), phase('C')],
+                  'failed': False}
+        self.profiler.on_resource_status(decompilation, status)
+        self.profiler.on_resource_finish(decompilation, status)
+
+        self.assertEqual(self.written_records(), [{
+            'id': 'ID',
+            'params': {'decomp_optimizations': 'none'},
+            'phases': [[None, 'A', 1.0], [None, 'B', 3.5], [None, 'C', 3.5]],
+            'total': 10.0,
+            'failed': False
+        }])
+
+    def test_writes_parts_of_phases(self):
+        decompilation = self.start_decompilation()
+        status = {
+            'phases': [phase('Initializing', 'Front-End'),
+                       phase('Initializing', 'Back-End')],
+            'failed': False
+        }
+        self.profiler.on_resource_status(decompilation, status)
+        self.profiler.on_resource_finish(decompilation, status)
+
+        self.assertEqual(self.written_records()[0]['phases'], [
+            ['Front-End', 'Initializing', 0.0],
+            ['Back-End', 'Initializing', 0.0]
+        ])
+
+    def test_does_not_write_record_for_resource_without_phases(self):
+        analysis = self.start_decompilation()
+        status = {'failed': False}
+        self.profiler.on_resource_status(analysis, status)
+
+        self.profiler.on_resource_finish(analysis, status)
+
+        self.assertEqual(self.log.getvalue(), '')
+
+    def test_ignores_resources_not_started_while_registered(self):
+        decompilation = mock.Mock()
+        decompilation.id = 'OTHER'
+        status = {'phases': [phase('A')], 'failed': False}
+
+        self.profiler.on_resource_status(decompilation, status)
+        self.profiler.on_resource_finish(decompilation, status)
+
+        self.assertEqual(self.log.getvalue(), '')
+
+    def test_context_manager_registers_and_unregisters_profiler(self):
+        with self.profiler as p:
+            self.assertIs(p, self.profiler)
+            self.assertIn(self.profiler, hooks.registered())
+
+        self.assertNotIn(self.profiler, hooks.registered())
+        self.assertFalse(self.log.closed)
+
+    def test_closes_log_opened_by_itself(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'phases.jsonl')
+            with PhaseProfiler(path) as p:
+                log = p._log
+
+            self.assertTrue(log.closed)
+
+    def test_repr_returns_correct_value(self):
+        self.log.name = 'phases.jsonl'
+
+        self.assertEqual(
+            repr(self.profiler),
+            "<retdec.profiler.PhaseProfiler log='phases.jsonl'>"
+        )
+
+
+class ReadRecordsTests(unittest.TestCase):
+    """Tests for :func:`retdec.profiler.read_records()`."""
+
+    def test_returns_records_and_skips_invalid_lines(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'phases.jsonl')
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write('{"id": "1"}\n\n{"id": "2"}\n{"id": "3", "pha')
+
+            records = list(read_records(path))
+
+        self.assertEqual(records, [{'id': '1'}, {'id': '2'}])
+
+
+class PhaseDurationsTests(unittest.TestCase):
+    """Tests for :func:`retdec.profiler.phase_durations()`."""
+
+    def test_returns_durations_of_phases_and_total(self):
+        durations = phase_durations(
+            record([[None, 'A', 0.0], ['P', 'B', 2.0]], 5.0)
+        )
+
+        self.assertEqual(
+            durations,
+            [((None, 'A'), 2.0), (('P', 'B'), 3.0), ((None, TOTAL), 5.0)]
+        )
+
+
+class SummarizeTests(unittest.TestCase, WithPatching):
+    """Tests for :func:`retdec.profiler.summarize()`."""
+
+    def records(self):
+        return [
+            record([[None, 'A', 0], [None, 'B', 1]], 2,
+                   {'decomp_optimizations': 'none'}),
+            record([[None, 'A', 0], [None, 'B', 3]], 4,
+                   {'decomp_optimizations': 'none'}),
+            record([[None, 'A', 0], [None, 'B', 5]], 6, {}),
+            record([[None, 'A', 0]], 100, {}, failed=True),
+        ]
+
+    def test_computes_percentiles_of_phases_of_successful_records(self):
+        summaries = summarize(self.records(), percentiles=(0, 50, 100))
+
+        self.assertEqual(summaries, {
+            (): [
+                ((None, 'A'), 3, [1.0, 3.0, 5.0]),
+                ((None, 'B'), 3, [1.0, 1.0, 1.0]),
+                ((None, TOTAL), 3, [2.0, 4.0, 6.0]),
+            ]
+        })
+
+    def test_distinguishes_phases_with_same_name_in_different_parts(self):
+        records = [
+            record([['Front-End', 'Initializing', 0],
+                    ['Back-End', 'Initializing', 1]], 4)
+            for _ in range(2)
+        ]
+
+        summaries = summarize(records, percentiles=(50,))
+
+        self.assertEqual(summaries[()], [
+            (('Front-End', 'Initializing'), 2, [1.0]),
+            (('Back-End', 'Initializing'), 2, [3.0]),
+            ((None, TOTAL), 2, [4.0]),
+        ])
+
+    def test_includes_failed_records_when_requested(self):
+        summaries = summarize(
+            self.records(), percentiles=(100,), include_failed=True
+        )
+
+        self.assertEqual(summaries[()][0], ((None, 'A'), 4, [100.0]))
+
+    def test_groups_records_by_given_params(self):
+        summaries = summarize(
+            self.records(), by=('decomp_optimizations',), percentiles=(50,)
+        )
+
+        self.assertEqual(set(summaries), {('none',), (None,)})
+        self.assertEqual(
+            summaries[('none',)][-1], ((None, TOTAL), 2, [3.0])
+        )
+
+    def test_interpolates_percentiles_linearly_without_numpy(self):
+        self.patch('retdec.profiler._import_numpy', lambda: None)
+
+        summaries = summarize(
+            [record([], total) for total in (1, 2, 3, 4)],
+            percentiles=(50, 95)
+        )
+
+        (_, _, values), = summaries[()]
+        self.assertEqual(values[0], 2.5)
+        self.assertAlmostEqual(values[1], 3.85)
+
+    @unittest.skipIf(profiler._import_numpy() is None, 'requires NumPy')
+    def test_numpy_and_pure_python_give_same_results(self):
+        records = [
+            record([[None, 'A', 0]], i * 1.7 % 13) for i in range(101)
+        ]
+        with_numpy = summarize(records)
+        self.patch('retdec.profiler._import_numpy', lambda: None)
+
+        without_numpy = summarize(records)
+
+        for (phase1, _, v1), (phase2, _, v2) in zip(
+                with_numpy[()], without_numpy[()]):
+            self.assertEqual(phase1, phase2)
+            for a, b in zip(v1, v2):
+                self.assertAlmostEqual(a, b)
@@ -0,0 +1,306 @@
+#
+# Project:   retdec-python
+# Copyright: (c) 2015 by Petr Zemek <s3rvac@gmail.com> and contributors
+# License:   MIT, see the LICENSE file for more details
+#
+
+"""Tests for the :mod:`retdec.queue` module."""
+
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from retdec.exceptions import LeaseLostError
+from retdec.queue import DirectoryWorkQueue
+from retdec.queue import SQLiteWorkQueue
+from retdec.queue import WorkItem
+from retdec.queue import open_queue
+from tests import mock
+
+
+class WorkItemTests(unittest.TestCase):
+    """Tests for :class:`retdec.queue.WorkItem`."""
+
+    def test_arguments_passed_to_initializer_are_accessible(self):
+        item = WorkItem('ID', {'input_file': 'file.exe'}, 2, 'TOKEN')
+
+        self.assertEqual(item.id, 'ID')
+        self.assertEqual(item.payload, {'input_file': 'file.exe'})
+        self.assertEqual(item.attempts, 2)
+        self.assertEqual(item.token, 'TOKEN')
+
+    def test_repr_returns_correct_value(self):
+        item = WorkItem('ID', {}, 1, 'TOKEN')
+
+        self.assertEqual(
+            repr(item),
+            "<retdec.queue.WorkItem id='ID' attempts=1>"
+        )
+
+
+class WorkQueueTests:
+    """Tests shared by all work queues.
+
+    Subclasses have to define the ``create_queue(**kwargs)`` method.
+    """
+
+    def setUp(self):
+        super().setUp()
+
+        self.tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp_dir)
+
+    def create_queue(self, **kwargs):
+        raise NotImplementedError
+
+    def test_lease_returns_none_when_queue_is_empty(self):
+        queue = self.create_queue()
+
+        self.assertIsNone(queue.lease())
+
+    def test_lease_returns_put_item(self):
+        queue = self.create_queue()
+        id = queue.put({'input_file': 'file.exe'})
+
+        item = queue.lease()
+
+        self.assertEqual(item.id, id)
+        self.assertEqual(item.payload, {'input_file': 'file.exe'})
+        self.assertEqual(item.attempts, 1)
+
+    def test_items_are_leased_in_order_in_which_they_were_put(self):
+        queue = self.create_queue()
+        queue.put({'n': 1})
+        queue.put({'n': 2})
+
+        self.assertEqual(queue.lease().payload, {'n': 1})
+        self.assertEqual(queue.lease().payload, {'n': 2})
+
+    def test_leased_item_is_not_leased_again_before_lease_expires(self):
+        queue = self.create_queue()
+        queue.put({})
+        queue.lease()
+
+        self.assertIsNone(queue.lease())
+
+    def test_item_is_leased_by_only_one_of_two_workers(self):
+        queue1 = self.create_queue()
+        queue2 = self.create_queue()
+        queue1.put({})
+
+        items = [queue1.lease(), queue2.lease()]
+
+        self.assertEqual(len([item for item in items if item]), 1)
+
+    def test_item_is_leased_again_after_lease_expires(self):
+        queue = self.create_queue(visibility_timeout=10)
+        queue.put({})
+        queue.lease()
+
+        with mock.patch('time.time', return_value=time.time() + 20):
+            item = queue.lease()
+
+        self.assertEqual(item.attempts, 2)
+
+    def test_expired_item_is_failed_when_it_reaches_max_attempts(self):
+        queue = self.create_queue(visibility_timeout=10, max_attempts=1)
+        queue.put({})
+        queue.lease()
+
+        with mock.patch('time.time', return_value=time.time() + 20):
+            item = queue.lease()
+
+        self.assertIsNone(item)
+        self.assertEqual(queue.counts()['failed'], 1)
+
+    def test_acked_item_is_done(self):
+        queue = self.create_queue()
+        queue.put({})
+
+        queue.ack(queue.lease())
+
+        self.assertIsNone(queue.lease())
+        self.assertEqual(
+            queue.counts(),
+            {'pending': 0, 'leased': 0, 'done': 1, 'failed': 0}
+        )
+
+    def test_failed_item_is_returned_to_queue(self):
+        queue = self.create_queue(max_attempts=2)
+        queue.put({})
+
+        queue.fail(queue.lease(), 'error')
+
+        self.assertEqual(queue.lease().attempts, 2)
+
+    def test_failed_item_is_failed_when_it_reaches_max_attempts(self):
+        queue = self.create_queue(max_attempts=1)
+        queue.put({})
+
+        queue.fail(queue.lease(), 'error')
+
+        self.assertIsNone(queue.lease())
+        self.assertEqual(queue.counts()['failed'], 1)
+
+    def test_ack_raises_exception_when_lease_has_been_lost(self):
+        queue = self.create_queue(visibility_timeout=10)
+        queue.put({})
+        item = queue.lease()
+        with mock.patch('time.time', return_value=time.time() + 20):
+            queue.lease()
+
+        with self.assertRaises(LeaseLostError):
+            queue.ack(item)
+
+    def test_renewed_item_is_not_leased_again_before_new_lease_expires(self):
+        queue = self.create_queue(visibility_timeout=10)
+        queue.put({})
+        item = queue.lease()
+        with mock.patch('time.time', return_value=time.time() + 8):
+            queue.renew(item)
+
+        with mock.patch('time.time', return_value=time.time() + 15):
+            self.assertIsNone(queue.lease())
+        queue.ack(item)
+
+    def test_renew_raises_exception_when_lease_has_been_lost(self):
+        queue = self.create_queue(visibility_timeout=10)
+        queue.put({})
+        item = queue.lease()
+        with mock.patch('time.time', return_value=time.time() + 20):
+            queue.lease()
+
+        with self.assertRaises(LeaseLostError):
+            queue.renew(item)
+
+    def test_counts_returns_number_of_items_in_each_state(self):
+        queue = self.create_queue()
+        queue.put({})
+        queue.put({})
+        queue.lease()
+
+        self.assertEqual(
+            queue.counts(),
+            {'pending': 1, 'leased': 1, 'done': 0, 'failed': 0}
+        )
+
+    def test_queue_can_be_used_as_context_manager(self):
+        with self.create_queue() as queue:
+            queue.put({})
+
+
+class SQLiteWorkQueueTests(WorkQueueTests, unittest.TestCase):
+    """Tests for :class:`retdec.queue.SQLiteWorkQueue`."""
+
+    def create_queue(self, **kwargs):
+        queue = SQLiteWorkQueue(
+            os.path.join(self.tmp_dir, 'queue.sqlite'), **kwargs
+        )
+        self.addCleanup(queue.close)
+        return queue
+
+    def test_repr_returns_correct_value(self):
+        queue = self.create_queue()
+
+        self.assertEqual(
+            repr(queue),
+            '<retdec.queue.SQLiteWorkQueue path={!r}>'.format(
+                os.path.join(self.tmp_dir, 'queue.sqlite')
+            )
+        )
+
+
+class DirectoryWorkQueueTests(WorkQueueTests, unittest.TestCase):
+    """Tests for :class:`retdec.queue.DirectoryWorkQueue`."""
+
+    def create_queue(self, **kwargs):
+        return DirectoryWorkQueue(
+            os.path.join(self.tmp_dir, 'queue'), **kwargs
+        )
+
+    def leased_dir(self):
+        return os.path.join(self.tmp_dir, 'queue', 'leased')
+
+    def test_leased_file_appears_with_expiration_time_already_set(self):
+        queue = self.create_queue(visibility_timeout=10)
+        queue.put({})
+        mtimes = []
+        rename = os.rename
+
+        def rename_and_record_mtime(src, dst):
+            if os.path.dirname(dst) == self.leased_dir():
+                mtimes.append(os.path.getmtime(src))
+            rename(src, dst)
+
+        with mock.patch('os.rename', rename_and_record_mtime):
+            queue.lease()
+
+        self.assertEqual(len(mtimes), 1)
+        self.assertGreater(mtimes[0], time.time())
+
+    def test_item_claimed_by_crashed_worker_is_leased_again_later(self):
+        queue = self.create_queue(visibility_timeout=10)
+        queue.put({})
+        with mock.patch('os.utime', side_effect=RuntimeError('crash')):
+            with self.assertRaises(RuntimeError):
+                queue.lease()
+
+        self.assertIsNone(queue.lease())
+        with mock.patch('time.time', return_value=time.time() + 20):
+            item = queue.lease()
+
+        self.assertIsNotNone(item)
+
+    def test_expired_item_with_corrupted_file_is_failed(self):
+        queue = self.create_queue(visibility_timeout=10)
+        queue.put({})
+        item = queue.lease()
+        leased_path = os.path.join(
+            self.leased_dir(), '{}.{}.json'.format(item.id, item.token)
+        )
+        with open(leased_path, 'w') as f:
+            f.write('{"payl')
+        expires = time.time() + 10
+        os.utime(leased_path, (expires, expires))
+
+        with mock.patch('time.time', return_value=time.time() + 20):
+            self.assertIsNone(queue.lease())
+
+        self.assertEqual(queue.counts()['failed'], 1)
+
+    def test_repr_returns_correct_value(self):
+        queue = self.create_queue()
+
+        self.assertEqual(
+            repr(queue),
+            '<retdec.queue.DirectoryWorkQueue path={!r}>'.format(
+                os.path.join(self.tmp_dir, 'queue')
+            )
+        )
+
+
+class OpenQueueTests(unittest.TestCase):
+    """Tests for :func:`retdec.queue.open_queue()`."""
+
+    def setUp(self):
+        super().setUp()
+
+        self.tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp_dir)
+
+    def test_returns_directory_queue_for_existing_directory(self):
+        queue = open_queue(self.tmp_dir)
+
+        self.assertIsInstance(queue, DirectoryWorkQueue)
+
+    def test_returns_sqlite_queue_for_other_paths(self):
+        with open_queue(os.path.join(self.tmp_dir, 'queue.sqlite')) as queue:
+            self.assertIsInstance(queue, SQLiteWorkQueue)
+
+    def test_passes_arguments_to_queue(self):
+        queue = open_queue(self.tmp_dir, visibility_timeout=5, max_attempts=2)
+
+        self.assertEqual(queue.visibility_timeout, 5)
+        self.assertEqual(queue.max_attempts, 2)
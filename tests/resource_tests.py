@@ -11,10 +11,15 @@ import io
 import os
 import unittest
 
+from retdec import hooks
 from retdec.conn import APIConnection
+from retdec.exceptions import BufferTooSmallError
+from retdec.file import File
+from retdec.hooks import ResourceHooks
 from retdec.resource import Resource
 from tests import WithPatching
 from tests import mock
+from tests.matchers import Anything
 
 
 class ResourceTestsBase(unittest.TestCase, WithPatching):
@@ -107,6 +112,10 @@ class WithMockedIO(WithPatching):
 
         self.shutil = mock.Mock()
         self.patch('retdec.resource.shutil', self.shutil)
+        self.patch('retdec.storage.shutil', self.shutil)
+
+        self.replace = mock.Mock()
+        self.patch('os.replace', self.replace)
 
     def assert_obtains_file_contents(self, func, file_path, is_text_file):
         """Asserts that ``func()`` obtains the contents of the given file.
@@ -141,10 +150,14 @@ class WithMockedIO(WithPatching):
         self.conn.get_file.assert_called_once_with(file_path)
         directory = directory or os.getcwd()
         ref_saved_file_path = os.path.join(directory, 'file_name')
-        self.open.assert_called_once_with(
-            ref_saved_file_path,
-            'wb'
+        # The file is written into a temporary file, which is then renamed.
+        self.open.assert_called_once_with(Anything(), 'xb')
+        tmp_file_path = self.open.call_args[0][0]
+        self.replace.assert_called_once_with(
+            tmp_file_path,
+            ref_saved_file_path
         )
+        self.assertEqual(os.path.dirname(tmp_file_path), directory)
         self.assertEqual(ref_saved_file_path, saved_file_path)
 
 
@@ -244,3 +257,176 @@ class ResourceTests(ResourceTestsBase):
 
         self.assertEqual(len(self.conn.send_get_request.mock_calls), 1)
         self.assertTrue(pending)  # Still True because there was only one query.
+
+
+class ResourceHooksTests(ResourceTestsBase):
+    """Tests for notifications of hooks by
+    :class:`retdec.resource.Resource`.
+    """
+
+    def setUp(self):
+        super().setUp()
+
+        self.hooks = mock.Mock(spec_set=ResourceHooks)
+        hooks.register(self.hooks)
+        self.addCleanup(hooks.unregister, self.hooks)
+
+    def test_hooks_are_notified_about_obtained_status(self):
+        status = self.status_with({'running': True})
+        self.conn.send_get_request.return_value = status
+        r = Resource('ID', self.conn)
+
+        r.is_running()
+
+        self.hooks.on_resource_status.assert_called_once_with(r, status)
+        self.assertFalse(self.hooks.on_resource_finish.called)
+
+    def test_hooks_are_notified_only_once_about_finish(self):
+        status = self.status_with({'finished': True, 'succeeded': True})
+        self.conn.send_get_request.return_value = status
+        r = Resource('ID', self.conn)
+        r._last_updated = datetime.datetime.min
+
+        r.has_finished()
+        r._last_updated = datetime.datetime.min
+        r.has_finished()
+
+        self.assertEqual(len(self.hooks.on_resource_status.mock_calls), 2)
+        self.hooks.on_resource_finish.assert_called_once_with(r, status)
+
+    def test_hooks_are_notified_about_error_before_it_is_raised(self):
+        error = RuntimeError('error')
+        r = Resource('ID', self.conn)
+
+        with self.assertRaises(RuntimeError):
+            r._handle_failure(lambda: error)
+
+        self.hooks.on_resource_error.assert_called_once_with(r, error)
+
+    def test_hooks_are_not_notified_about_error_when_nothing_is_raised(self):
+        r = Resource('ID', self.conn)
+
+        r._handle_failure(lambda: None)
+
+        self.assertFalse(self.hooks.on_resource_error.called)
+
+
+class ResourceIterFileLinesTests(ResourceTestsBase):
+    """Tests for :func:`retdec.resource.Resource._iter_file_lines()`."""
+
+    def setUp(self):
+        super().setUp()
+
+        # Use tiny chunks to check that lines and characters spanning several
+        # chunks are handled correctly.
+        self.patch('retdec.resource.Resource._LINES_CHUNK_SIZE', 3)
+
+    def iter_file_lines(self, contents):
+        self.conn.get_file.return_value = io.BytesIO(contents)
+        r = Resource('ID', self.conn)
+        return list(r._iter_file_lines('/ID/output'))
+
+    def test_yields_lines_including_newlines(self):
+        lines = self.iter_file_lines(b'int main() {\n    return 0;\n}\n')
+
+        self.assertEqual(lines, ['int main() {\n', '    return 0;\n', '}\n'])
+        self.conn.get_file.assert_called_once_with('/ID/output')
+
+    def test_yields_last_line_without_newline(self):
+        lines = self.iter_file_lines(b'first\nlast')
+
+        self.assertEqual(lines, ['first\n', 'last'])
+
+    def test_yields_lines_spanning_many_chunks(self):
+        lines = self.iter_file_lines(b'x' * 100 + b'\n' + b'y' * 100)
+
+        self.assertEqual(lines, ['x' * 100 + '\n', 'y' * 100])
+
+    def test_yields_empty_lines(self):
+        lines = self.iter_file_lines(b'\n\nx\n')
+
+        self.assertEqual(lines, ['\n', '\n', 'x\n'])
+
+    def test_yields_nothing_for_empty_file(self):
+        self.assertEqual(self.iter_file_lines(b''), [])
+
+    def test_decodes_characters_spanning_several_chunks(self):
+        lines = self.iter_file_lines('// žluťoučký kůň\n'.encode('utf-8'))
+
+        self.assertEqual(lines, ['// žluťoučký kůň\n'])
+
+    def test_raises_exception_when_file_is_not_valid_utf8(self):
+        with self.assertRaises(UnicodeDecodeError):
+            self.iter_file_lines(b'\xff\n')
+
+    def test_closes_file_when_iteration_stops_early(self):
+        file = io.BytesIO(b'first\nsecond\n')
+        self.conn.get_file.return_value = file
+        r = Resource('ID', self.conn)
+
+        lines = r._iter_file_lines('/ID/output')
+        next(lines)
+        lines.close()
+
+        self.assertTrue(file.closed)
+
+
+class ResourceReadFileIntoTests(ResourceTestsBase):
+    """Tests for :func:`retdec.resource.Resource._read_file_into()`."""
+
+    def read_file_into(self, buffer, contents, size=None):
+        self.conn.get_file.return_value = File(io.BytesIO(contents), size=size)
+        r = Resource('ID', self.conn)
+        return r._read_file_into('/ID/output', buffer)
+
+    def test_reads_file_into_buffer_and_returns_number_of_read_bytes(self):
+        buffer = bytearray(10)
+
+        size = self.read_file_into(buffer, b'data')
+
+        self.assertEqual(size, 4)
+        self.assertEqual(buffer[:size], b'data')
+        self.conn.get_file.assert_called_once_with('/ID/output')
+
+    def test_reads_file_into_memoryview(self):
+        buffer = bytearray(10)
+
+        size = self.read_file_into(memoryview(buffer)[2:], b'data')
+
+        self.assertEqual(size, 4)
+        self.assertEqual(buffer[2:6], b'data')
+
+    def test_reads_file_that_has_exactly_size_of_buffer(self):
+        buffer = bytearray(4)
+
+        size = self.read_file_into(buffer, b'data', size=4)
+
+        self.assertEqual(size, 4)
+        self.assertEqual(buffer, b'data')
+
+    def test_raises_exception_without_reading_when_known_size_is_too_big(self):
+        buffer = bytearray(2)
+
+        with self.assertRaises(BufferTooSmallError) as cm:
+            self.read_file_into(buffer, b'data', size=4)
+
+        self.assertEqual(cm.exception.file_size, 4)
+        self.assertEqual(buffer, bytearray(2))
+
+    def test_raises_exception_when_file_of_unknown_size_does_not_fit(self):
+        with self.assertRaises(BufferTooSmallError) as cm:
+            self.read_file_into(bytearray(2), b'data')
+
+        self.assertEqual(cm.exception.buffer_size, 2)
+        self.assertIsNone(cm.exception.file_size)
+
+    def test_closes_file(self):
+        file = mock.Mock()
+        file.size = 0
+        file.readinto.return_value = 0
+        self.conn.get_file.return_value = file
+        r = Resource('ID', self.conn)
+
+        r._read_file_into('/ID/output', bytearray(1))
+
+        file.close.assert_called_once_with()
@@ -0,0 +1,57 @@
+#
+# Project:   retdec-python
+# Copyright: (c) 2015 by Petr Zemek <s3rvac@gmail.com> and contributors
+# License:   MIT, see the LICENSE file for more details
+#
+
+"""Tests for the :mod:`retdec` package."""
+
+import subprocess
+import sys
+import unittest
+
+import retdec
+from retdec.decompiler import Decompiler
+from retdec.exceptions import RetdecError
+
+
+def imported_modules(module):
+    """Returns names of modules imported by importing the given module in a
+    new interpreter.
+    """
+    output = subprocess.check_output([
+        sys.executable, '-c',
+        'import sys, {}; print("\\n".join(sys.modules))'.format(module)
+    ])
+    return set(output.decode().split())
+
+
+class PackageTests(unittest.TestCase):
+    """Tests for the :mod:`retdec` package."""
+
+    def test_classes_can_be_imported_from_package(self):
+        from retdec import Decompiler as PackageDecompiler
+        from retdec import RetdecError as PackageRetdecError
+
+        self.assertIs(PackageDecompiler, Decompiler)
+        self.assertIs(PackageRetdecError, RetdecError)
+
+    def test_accessing_nonexisting_attribute_raises_attribute_error(self):
+        with self.assertRaises(AttributeError):
+            retdec.NonExisting
+
+    def test_dir_includes_exported_classes(self):
+        self.assertIn('Fileinfo', dir(retdec))
+
+    def test_importing_package_does_not_import_its_modules(self):
+        modules = imported_modules('retdec')
+
+        self.assertNotIn('retdec.decompiler', modules)
+
+    def test_importing_scripts_does_not_import_heavy_modules(self):
+        for script in ('decompiler', 'fileinfo'):
+            modules = imported_modules('retdec.tools.' + script)
+
+            for heavy_module in ('requests', 'http.server',
+                                 'concurrent.futures', 'numpy'):
+                self.assertNotIn(heavy_module, modules, script)
@@ -0,0 +1,371 @@
+#
+# Project:   retdec-python
+# Copyright: (c) 2015 by Petr Zemek <s3rvac@gmail.com> and contributors
+# License:   MIT, see the LICENSE file for more details
+#
+
+"""Tests for the :mod:`retdec.scheduler` module."""
+
+import os
+import tempfile
+import threading
+import unittest
+
+import requests
+
+from retdec.exceptions import InvalidValueError
+from retdec.limiter import InFlightLimiter
+from retdec.resource import Resource
+from retdec.scheduler import FIFOPolicy
+from retdec.scheduler import FairSharePolicy
+from retdec.scheduler import Job
+from retdec.scheduler import PriorityPolicy
+from retdec.scheduler import Scheduler
+from retdec.scheduler import ShortestJobFirstPolicy
+from retdec.scheduler import input_file_size
+from tests import mock
+
+
+def pop_all(policy):
+    """Pops all jobs from the given policy and returns their parameters."""
+    params = []
+    while policy:
+        params.append(policy.pop().params)
+    return params
+
+
+class JobTests(unittest.TestCase):
+    """Tests for :class:`retdec.scheduler.Job`."""
+
+    def test_arguments_passed_to_initializer_are_accessible(self):
+        job = Job({'input_file': 'file.exe'}, priority=1, feed='feed')
+
+        self.assertEqual(job.params, {'input_file': 'file.exe'})
+        self.assertEqual(job.priority, 1)
+        self.assertEqual(job.feed, 'feed')
+
+    def test_repr_returns_correct_value(self):
+        job = Job({}, priority=1, feed='feed')
+
+        self.assertEqual(
+            repr(job),
+            "<retdec.scheduler.Job params={} priority=1 feed='feed'>"
+        )
+
+
+class FIFOPolicyTests(unittest.TestCase):
+    """Tests for :class:`retdec.scheduler.FIFOPolicy`."""
+
+    def test_pops_jobs_in_order_in_which_they_were_pushed(self):
+        policy = FIFOPolicy()
+        policy.push(Job(1))
+        policy.push(Job(2))
+
+        self.assertEqual(pop_all(policy), [1, 2])
+
+
+class InputFileSizeTests(unittest.TestCase):
+    """Tests for :func:`retdec.scheduler.input_file_size()`."""
+
+    def test_returns_size_of_input_file(self):
+        with tempfile.NamedTemporaryFile() as f:
+            f.write(b'data')
+            f.flush()
+
+            self.assertEqual(input_file_size({'input_file': f.name}), 4)
+
+    def test_returns_zero_when_file_does_not_exist(self):
+        self.assertEqual(
+            input_file_size({'input_file': os.path.join('no', 'such.exe')}),
+            0
+        )
+
+    def test_returns_zero_when_input_file_is_not_path(self):
+        self.assertEqual(input_file_size({'input_file': object()}), 0)
+
+
+class ShortestJobFirstPolicyTests(unittest.TestCase):
+    """Tests for :class:`retdec.scheduler.ShortestJobFirstPolicy`."""
+
+    def test_pops_jobs_in_ascending_order_of_estimates(self):
+        policy = ShortestJobFirstPolicy(estimate=lambda params: params['size'])
+        policy.push(Job({'size': 500}))
+        policy.push(Job({'size': 20}))
+        policy.push(Job({'size': 100}))
+
+        self.assertEqual(
+            [params['size'] for params in pop_all(policy)],
+            [20, 100, 500]
+        )
+
+    def test_pops_jobs_with_equal_estimates_in_order_of_pushing(self):
+        policy = ShortestJobFirstPolicy(estimate=lambda params: 0)
+        policy.push(Job({'n': 1}))
+        policy.push(Job({'n': 2}))
+
+        self.assertEqual(pop_all(policy), [{'n': 1}, {'n': 2}])
+
+
+class PriorityPolicyTests(unittest.TestCase):
+    """Tests for :class:`retdec.scheduler.PriorityPolicy`."""
+
+    def test_pops_jobs_with_higher_priority_first(self):
+        policy = PriorityPolicy()
+        policy.push(Job('low', priority=-1))
+        policy.push(Job('normal'))
+        policy.push(Job('high', priority=10))
+
+        self.assertEqual(pop_all(policy), ['high', 'normal', 'low'])
+
+
+class FairSharePolicyTests(unittest.TestCase):
+    """Tests for :class:`retdec.scheduler.FairSharePolicy`."""
+
+    def test_takes_turns_in_popping_jobs_from_feeds(self):
+        policy = FairSharePolicy()
+        policy.push(Job('a1', feed='a'))
+        policy.push(Job('a2', feed='a'))
+        policy.push(Job('a3', feed='a'))
+        policy.push(Job('b1', feed='b'))
+
+        self.assertEqual(pop_all(policy), ['a1', 'b1', 'a2', 'a3'])
+
+    def test_uses_given_policy_within_feed(self):
+        policy = FairSharePolicy(policy_factory=PriorityPolicy)
+        policy.push(Job('a1', feed='a'))
+        policy.push(Job('a2', priority=1, feed='a'))
+
+        self.assertEqual(pop_all(policy), ['a2', 'a1'])
+
+    def test_len_returns_number_of_jobs_in_all_feeds(self):
+        policy = FairSharePolicy()
+        policy.push(Job('a1', feed='a'))
+        policy.push(Job('b1', feed='b'))
+
+        self.assertEqual(len(policy), 2)
+
+
+class SchedulerTests(unittest.TestCase):
+    """Tests for :class:`retdec.scheduler.Scheduler`."""
+
+    def test_uses_fifo_policy_by_default(self):
+        scheduler = Scheduler(lambda params: params)
+
+        self.assertIsInstance(scheduler.policy, FIFOPolicy)
+
+    def test_raises_exception_when_max_in_flight_is_not_positive(self):
+        with self.assertRaises(InvalidValueError):
+            Scheduler(lambda params: params, max_in_flight=0)
+
+    def test_raises_exception_when_max_pending_is_not_positive(self):
+        with self.assertRaises(InvalidValueError):
+            Scheduler(lambda params: params, max_pending=0)
+
+    def test_pending_returns_number_of_added_jobs(self):
+        scheduler = Scheduler(lambda params: params)
+        scheduler.add({})
+        scheduler.add({})
+
+        self.assertEqual(scheduler.pending(), 2)
+
+    def test_run_starts_jobs_in_order_given_by_policy(self):
+        started = []
+
+        def start(params):
+            started.append(params)
+            return params
+
+        scheduler = Scheduler(start, PriorityPolicy(), max_in_flight=1)
+        scheduler.add('low')
+        scheduler.add('high', priority=1)
+
+        scheduler.run(lambda submission: None)
+
+        self.assertEqual(started, ['high', 'low'])
+        self.assertEqual(scheduler.pending(), 0)
+
+    def test_run_calls_finish_with_submission_for_each_job(self):
+        submissions = []
+        scheduler = Scheduler(lambda params: params.upper())
+        scheduler.add('a')
+        scheduler.add('b')
+
+        scheduler.run(submissions.append)
+
+        self.assertEqual(
+            sorted((s.params, s.resource) for s in submissions),
+            [('a', 'A'), ('b', 'B')]
+        )
+
+    def test_run_reports_error_from_start_in_submission(self):
+        def start(params):
+            raise OSError('No such file.')
+
+        submissions = []
+        scheduler = Scheduler(start)
+        scheduler.add('a')
+
+        scheduler.run(submissions.append)
+
+        self.assertTrue(submissions[0].has_failed())
+        self.assertIsInstance(submissions[0].error, OSError)
+
+    def test_run_reports_malformed_response_from_start_in_submission(self):
+        def start(params):
+            raise ValueError('No JSON object could be decoded.')
+
+        submissions = []
+        scheduler = Scheduler(start)
+        scheduler.add('a')
+
+        scheduler.run(submissions.append)
+
+        self.assertIsInstance(submissions[0].error, ValueError)
+
+    def test_run_reports_requests_error_from_start_in_submission(self):
+        def start(params):
+            raise requests.exceptions.TooManyRedirects('Too many redirects.')
+
+        submissions = []
+        scheduler = Scheduler(start)
+        scheduler.add('a')
+
+        scheduler.run(submissions.append)
+
+        self.assertIsInstance(
+            submissions[0].error, requests.exceptions.TooManyRedirects
+        )
+
+    def test_run_propagates_programming_errors_from_start(self):
+        def start(params):
+            raise TypeError('bug')
+
+        scheduler = Scheduler(start)
+        scheduler.add('a')
+
+        with self.assertRaises(TypeError):
+            scheduler.run(lambda submission: None)
+
+    def test_run_propagates_errors_from_finish(self):
+        def finish(submission):
+            raise TypeError('bug')
+
+        scheduler = Scheduler(lambda params: params)
+        scheduler.add('a')
+
+        with self.assertRaises(TypeError):
+            scheduler.run(finish)
+
+    def test_run_keeps_at_most_max_in_flight_jobs_in_flight(self):
+        lock = threading.Lock()
+        in_flight = [0]
+        max_in_flight = [0]
+
+        def start(params):
+            with lock:
+                in_flight[0] += 1
+                max_in_flight[0] = max(max_in_flight[0], in_flight[0])
+            return params
+
+        def finish(submission):
+            threading.Event().wait(0.01)
+            with lock:
+                in_flight[0] -= 1
+
+        scheduler = Scheduler(start, max_in_flight=3)
+        for i in range(10):
+            scheduler.add(i)
+
+        scheduler.run(finish)
+
+        self.assertLessEqual(max_in_flight[0], 3)
+
+    def test_run_starts_jobs_through_limiter_when_given(self):
+        resource = mock.Mock(spec_set=Resource)
+        limiter = mock.Mock(spec_set=InFlightLimiter)
+        limiter.start.return_value = resource
+        start = mock.Mock()
+        scheduler = Scheduler(start, limiter=limiter)
+        scheduler.add({'input_file': 'file.exe'})
+        submissions = []
+
+        scheduler.run(submissions.append)
+
+        limiter.start.assert_called_once_with(
+            start, {'input_file': 'file.exe'}
+        )
+        self.assertIs(submissions[0].resource, resource)
+
+    def test_run_until_closed_processes_jobs_added_while_running(self):
+        submissions = []
+        scheduler = Scheduler(lambda params: params)
+        runner = threading.Thread(
+            target=scheduler.run,
+            args=(submissions.append,),
+            kwargs={'until_closed': True}
+        )
+        runner.start()
+
+        scheduler.add('a')
+        scheduler.add('b')
+        scheduler.close()
+        runner.join(5)
+
+        self.assertFalse(runner.is_alive())
+        self.assertEqual(
+            sorted(s.resource for s in submissions), ['a', 'b']
+        )
+
+    def test_add_blocks_until_job_is_started_when_max_pending_is_reached(self):
+        scheduler = Scheduler(lambda params: params, max_pending=1)
+        scheduler.add('a')
+        adder = threading.Thread(target=scheduler.add, args=('b',))
+        adder.start()
+
+        adder.join(0.05)
+        blocked = adder.is_alive()
+        submissions = []
+        runner = threading.Thread(
+            target=scheduler.run,
+            args=(submissions.append,),
+            kwargs={'until_closed': True}
+        )
+        runner.start()
+        adder.join(5)
+        scheduler.close()
+        runner.join(5)
+
+        self.assertTrue(blocked)
+        self.assertFalse(adder.is_alive())
+        self.assertEqual(
+            sorted(s.resource for s in submissions), ['a', 'b']
+        )
+
+    def test_add_does_not_block_when_scheduler_is_closed(self):
+        scheduler = Scheduler(lambda params: params, max_pending=1)
+        scheduler.add('a')
+        scheduler.close()
+
+        scheduler.add('b')
+
+        self.assertEqual(scheduler.pending(), 2)
+
+    def test_close_discards_pending_jobs_when_requested(self):
+        scheduler = Scheduler(lambda params: params)
+        scheduler.add('a')
+        submissions = []
+
+        scheduler.close(discard_pending=True)
+        scheduler.run(submissions.append, until_closed=True)
+
+        self.assertEqual(submissions, [])
+        self.assertEqual(scheduler.pending(), 0)
+
+    def test_repr_returns_correct_value(self):
+        scheduler = Scheduler(lambda params: params, max_in_flight=2)
+
+        self.assertEqual(
+            repr(scheduler),
+            '<retdec.scheduler.Scheduler'
+            ' policy=<retdec.scheduler.FIFOPolicy> max_in_flight=2>'
+        )
@@ -10,6 +10,7 @@ import os
 import unittest
 
 from retdec.conn import APIConnection
+from retdec.daemon import DaemonConnection
 from retdec.exceptions import MissingAPIKeyError
 from retdec.service import Service
 from tests import WithPatching
@@ -97,6 +98,38 @@ class ServiceTests(unittest.TestCase):
             # Restore the original state.
             del os.environ['RETDEC_API_URL']
 
+    def test_daemon_socket_returns_none_when_no_socket_was_given(self):
+        service = Service(api_key='API-KEY')
+
+        self.assertIsNone(service.daemon_socket)
+
+    def test_daemon_socket_returns_given_socket_if_explicitly_given(self):
+        service = Service(api_key='API-KEY', daemon_socket='retdecd.sock')
+
+        self.assertEqual(service.daemon_socket, 'retdecd.sock')
+
+    def test_daemon_socket_ignores_socket_from_environment(self):
+        try:
+            os.environ['RETDEC_DAEMON_SOCKET'] = 'retdecd.sock'
+
+            service = Service(api_key='API-KEY')
+
+            self.assertIsNone(service.daemon_socket)
+        finally:
+            # Restore the original state.
+            del os.environ['RETDEC_DAEMON_SOCKET']
+
+    def test_creates_daemon_connection_when_daemon_socket_is_given(self):
+        service = Service(
+            api_key='API-KEY',
+            api_url='API-URL',
+            daemon_socket='retdecd.sock'
+        )
+
+        conn = service._create_new_api_connection('/decompiler/decompilations')
+
+        self.assertIsInstance(conn, DaemonConnection)
+
     def test_api_url_returns_url_without_trailing_slash_if_present(self):
         service = Service(
             api_key='API-KEY',
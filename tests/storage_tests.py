@@ -0,0 +1,335 @@
+#
+# Project:   retdec-python
+# Copyright: (c) 2015 by Petr Zemek <s3rvac@gmail.com> and contributors
+# License:   MIT, see the LICENSE file for more details
+#
+
+"""Tests for the :mod:`retdec.storage` module."""
+
+import io
+import os
+import tempfile
+import unittest
+
+from retdec.exceptions import InvalidValueError
+from retdec.storage import DirectoryStore
+from retdec.storage import SQLiteStore
+from retdec.storage import SQLiteStoreReader
+from retdec.storage import ZipStore
+from retdec.storage import ZipStoreReader
+from retdec.storage import open_store_reader
+from tests import WithPatching
+from tests import mock
+
+
+class DirectoryStoreTests(unittest.TestCase, WithPatching):
+    """Tests for :class:`retdec.storage.DirectoryStore`."""
+
+    def setUp(self):
+        super().setUp()
+
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.directory = self.tmp_dir.name
+
+        self.fsync = mock.Mock()
+        self.patch('os.fsync', self.fsync)
+        self.sync = mock.Mock()
+        self.patch('os.sync', self.sync)
+
+    def read_file(self, name):
+        with open(os.path.join(self.directory, name), 'rb') as f:
+            return f.read()
+
+    def test_uses_cwd_when_directory_is_not_given(self):
+        store = DirectoryStore()
+
+        self.assertEqual(store.directory, os.getcwd())
+
+    def test_raises_exception_when_durability_is_invalid(self):
+        with self.assertRaises(InvalidValueError):
+            DirectoryStore(self.directory, durability='xxx')
+
+    def test_save_saves_file_and_returns_path_to_it(self):
+        store = DirectoryStore(self.directory)
+
+        path = store.save(io.BytesIO(b'data'), 'prog.c')
+
+        self.assertEqual(path, os.path.join(self.directory, 'prog.c'))
+        self.assertEqual(self.read_file('prog.c'), b'data')
+        self.assertEqual(os.listdir(self.directory), ['prog.c'])
+        self.assertFalse(self.fsync.called)
+
+    def test_save_replaces_existing_file(self):
+        store = DirectoryStore(self.directory)
+        store.save(io.BytesIO(b'old'), 'prog.c')
+
+        store.save(io.BytesIO(b'new'), 'prog.c')
+
+        self.assertEqual(self.read_file('prog.c'), b'new')
+
+    def test_save_leaves_no_file_when_copying_fails(self):
+        src = mock.Mock()
+        src.read.side_effect = OSError('Connection reset.')
+        store = DirectoryStore(self.directory)
+
+        with self.assertRaises(OSError):
+            store.save(src, 'prog.c')
+
+        self.assertEqual(os.listdir(self.directory), [])
+
+    def test_save_keeps_existing_file_when_copying_fails(self):
+        store = DirectoryStore(self.directory)
+        store.save(io.BytesIO(b'old'), 'prog.c')
+        src = mock.Mock()
+        src.read.side_effect = OSError('Connection reset.')
+
+        with self.assertRaises(OSError):
+            store.save(src, 'prog.c')
+
+        self.assertEqual(self.read_file('prog.c'), b'old')
+
+    def test_save_flushes_file_and_directory_when_durability_is_file(self):
+        store = DirectoryStore(self.directory, durability='file')
+
+        store.save(io.BytesIO(b'data'), 'prog.c')
+
+        # Once for the file and once for the directory.
+        self.assertEqual(self.fsync.call_count, 2)
+        self.assertEqual(self.read_file('prog.c'), b'data')
+
+    def test_files_appear_after_commit_when_durability_is_batch(self):
+        store = DirectoryStore(self.directory, durability='batch')
+        store.save(io.BytesIO(b'1'), 'f1.png')
+        store.save(io.BytesIO(b'2'), 'f2.png')
+
+        self.assertFalse(
+            os.path.exists(os.path.join(self.directory, 'f1.png'))
+        )
+
+        store.commit()
+
+        self.assertEqual(self.read_file('f1.png'), b'1')
+        self.assertEqual(self.read_file('f2.png'), b'2')
+        self.assertEqual(
+            sorted(os.listdir(self.directory)),
+            ['f1.png', 'f2.png']
+        )
+
+    def test_commit_flushes_files_and_directory_once_for_batch(self):
+        store = DirectoryStore(self.directory, durability='batch')
+        for i in range(5):
+            store.save(io.BytesIO(b'data'), 'f{}.png'.format(i))
+
+        store.commit()
+
+        # Once for every file and once for the directory.
+        self.assertEqual(self.fsync.call_count, 6)
+        # Flushing all file systems on the host would be too costly.
+        self.assertFalse(self.sync.called)
+
+    def test_commit_does_nothing_when_nothing_is_pending(self):
+        store = DirectoryStore(self.directory, durability='batch')
+
+        store.commit()
+
+        self.assertFalse(self.sync.called)
+        self.assertFalse(self.fsync.called)
+
+    def test_context_manager_commits_files_upon_exit(self):
+        with DirectoryStore(self.directory, durability='batch') as store:
+            store.save(io.BytesIO(b'data'), 'prog.c')
+
+        self.assertEqual(self.read_file('prog.c'), b'data')
+
+    def test_context_manager_discards_pending_files_upon_exception(self):
+        with self.assertRaises(OSError):
+            with DirectoryStore(self.directory, durability='batch') as store:
+                store.save(io.BytesIO(b'data'), 'prog.c')
+                raise OSError('failed')
+
+        self.assertEqual(os.listdir(self.directory), [])
+
+    def test_repr_returns_correct_value(self):
+        store = DirectoryStore('dir', durability='file')
+
+        self.assertEqual(
+            repr(store),
+            "<retdec.storage.DirectoryStore directory='dir'"
+            " durability='file'>"
+        )
+
+
+class PackedStoreTestsBase(WithPatching):
+    """Base class of tests of stores that pack files into a single
+    container.
+    """
+
+    #: Class of the tested store.
+    store_class = None
+
+    #: Class of the reader of the container.
+    reader_class = None
+
+    def setUp(self):
+        super().setUp()
+
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.path = os.path.join(self.tmp_dir.name, 'prog.exe.pack')
+
+        self.fsync = mock.Mock()
+        self.patch('os.fsync', self.fsync)
+
+    def create_packed_outputs(self):
+        """Packs outputs of a decompilation and returns a reader of them."""
+        with self.store_class(self.path) as store:
+            store.save(io.BytesIO(b'int main() {}'), 'prog.c', 'hll')
+            store.save(io.BytesIO(b'; main'), 'prog.dsm', 'dsm')
+            store.save(io.BytesIO(b'PNG1'), 'main.png', 'cfgs/main')
+            store.save(io.BytesIO(b'PNG2'), 'f.png', 'cfgs/f')
+        reader = open_store_reader(self.path)
+        self.addCleanup(reader.close)
+        return reader
+
+    def test_raises_exception_when_durability_is_invalid(self):
+        with self.assertRaises(InvalidValueError):
+            self.store_class(self.path, durability='xxx')
+
+    def test_save_returns_path_consisting_of_container_path_and_key(self):
+        with self.store_class(self.path) as store:
+            path = store.save(io.BytesIO(b'data'), 'main.png', 'cfgs/main')
+
+        self.assertEqual(path, os.path.join(self.path, 'cfgs/main'))
+
+    def test_container_appears_only_after_store_is_closed(self):
+        store = self.store_class(self.path)
+        store.save(io.BytesIO(b'data'), 'prog.c', 'hll')
+
+        self.assertFalse(os.path.exists(self.path))
+
+        store.close()
+
+        self.assertTrue(os.path.exists(self.path))
+        self.assertEqual(os.listdir(self.tmp_dir.name), ['prog.exe.pack'])
+
+    def test_context_manager_leaves_no_container_upon_exception(self):
+        with self.assertRaises(OSError):
+            with self.store_class(self.path) as store:
+                store.save(io.BytesIO(b'int main() {}'), 'prog.c', 'hll')
+                raise OSError('failed')
+
+        self.assertEqual(os.listdir(self.tmp_dir.name), [])
+
+    def test_save_does_not_lock_container_while_reading_file(self):
+        store = self.store_class(self.path)
+        self.addCleanup(store.close)
+        locked_while_reading = []
+
+        def read(*args):
+            locked_while_reading.append(store._lock.locked())
+            return b''
+        src = mock.Mock()
+        src.read.side_effect = read
+
+        store.save(src, 'prog.c', 'hll')
+
+        self.assertEqual(locked_while_reading, [False])
+
+    def test_close_flushes_container_when_durability_is_not_none(self):
+        with self.store_class(self.path, durability='batch'):
+            pass
+
+        # Once for the container and once for the directory.
+        self.assertEqual(self.fsync.call_count, 2)
+
+    def test_close_does_not_flush_container_when_durability_is_none(self):
+        with self.store_class(self.path):
+            pass
+
+        self.assertFalse(self.fsync.called)
+
+    def test_name_is_used_as_key_when_key_is_not_given(self):
+        with self.store_class(self.path) as store:
+            store.save(io.BytesIO(b'data'), 'prog.c')
+
+        with open_store_reader(self.path) as reader:
+            self.assertEqual(reader.keys(), ['prog.c'])
+
+    def test_open_store_reader_returns_correct_reader(self):
+        reader = self.create_packed_outputs()
+
+        self.assertIsInstance(reader, self.reader_class)
+
+    def test_reader_returns_sorted_keys(self):
+        reader = self.create_packed_outputs()
+
+        self.assertEqual(
+            reader.keys(),
+            ['cfgs/f', 'cfgs/main', 'dsm', 'hll']
+        )
+
+    def test_reader_reads_file_by_key(self):
+        reader = self.create_packed_outputs()
+
+        self.assertEqual(reader.read('hll'), b'int main() {}')
+        self.assertEqual(reader.name('hll'), 'prog.c')
+
+    def test_reader_opens_file_by_key(self):
+        reader = self.create_packed_outputs()
+
+        with reader.open('dsm') as f:
+            self.assertEqual(f.read(), b'; main')
+
+    def test_reader_reads_cfg_by_function_name(self):
+        reader = self.create_packed_outputs()
+
+        self.assertEqual(reader.read_cfg('main'), b'PNG1')
+        self.assertEqual(reader.funcs_with_cfg, ['f', 'main'])
+
+    def test_reader_checks_whether_key_is_present(self):
+        reader = self.create_packed_outputs()
+
+        self.assertIn('hll', reader)
+        self.assertNotIn('cg', reader)
+
+    def test_reader_raises_exception_when_there_is_no_such_file(self):
+        reader = self.create_packed_outputs()
+
+        with self.assertRaises(KeyError):
+            reader.read('cg')
+        with self.assertRaises(KeyError):
+            reader.name('cg')
+
+    def test_repr_returns_correct_value(self):
+        store = self.store_class(self.path)
+        self.addCleanup(store.close)
+
+        self.assertEqual(
+            repr(store),
+            "<retdec.storage.{} path={!r} durability='none'>".format(
+                self.store_class.__name__, self.path
+            )
+        )
+
+
+class ZipStoreTests(PackedStoreTestsBase, unittest.TestCase):
+    """Tests for :class:`retdec.storage.ZipStore`."""
+
+    store_class = ZipStore
+    reader_class = ZipStoreReader
+
+
+class SQLiteStoreTests(PackedStoreTestsBase, unittest.TestCase):
+    """Tests for :class:`retdec.storage.SQLiteStore`."""
+
+    store_class = SQLiteStore
+    reader_class = SQLiteStoreReader
+
+    def test_saving_file_under_existing_key_replaces_it(self):
+        with self.store_class(self.path) as store:
+            store.save(io.BytesIO(b'old'), 'prog.c', 'hll')
+            store.save(io.BytesIO(b'new'), 'prog.c', 'hll')
+
+        with open_store_reader(self.path) as reader:
+            self.assertEqual(reader.read('hll'), b'new')
@@ -0,0 +1,314 @@
+#
+# Project:   retdec-python
+# Copyright: (c) 2015 by Petr Zemek <s3rvac@gmail.com> and contributors
+# License:   MIT, see the LICENSE file for more details
+#
+
+"""Tests for the :mod:`retdec.testing.server` module."""
+
+import io
+import json
+import unittest
+import zipfile
+
+from retdec.decompiler import Decompiler
+from retdec.exceptions import AuthenticationError
+from retdec.exceptions import ConnectionError
+from retdec.exceptions import DecompilationFailedError
+from retdec.exceptions import UnknownAPIError
+from retdec.file import File
+from retdec.fileinfo import Fileinfo
+from retdec.test import Test
+from retdec.testing.server import MockAPI
+from retdec.testing.server import MockAPIServer
+from tests import WithPatching
+from tests import mock
+
+#: Multipart body of a request uploading a file named ``prog.exe``.
+UPLOAD_BODY = (
+    b'--boundary\r\n'
+    b'Content-Disposition: form-data; name="input"; filename="prog.exe"\r\n'
+    b'\r\n'
+    b'MZ\r\n'
+    b'--boundary--\r\n'
+)
+
+DECOMPILATIONS = '/service/api/decompiler/decompilations'
+ANALYSES = '/service/api/fileinfo/analyses'
+
+
+class MockAPITests(unittest.TestCase, WithPatching):
+    """Tests for :class:`retdec.testing.server.MockAPI`."""
+
+    def setUp(self):
+        super().setUp()
+
+        self.time = mock.Mock(return_value=100.0)
+        self.patch('retdec.testing.server.time.monotonic', self.time)
+
+    def get_json(self, api, path, params=None):
+        code, _, body = api.handle('GET', path, params)
+        return code, json.loads(body.decode())
+
+    def start(self, api, path=DECOMPILATIONS, params=None):
+        """Starts a job and returns its ID."""
+        code, _, body = api.handle('POST', path, params, body=UPLOAD_BODY)
+        self.assertEqual(code, 200)
+        return json.loads(body.decode())['id']
+
+    def test_start_returns_unique_ids(self):
+        api = MockAPI()
+
+        self.assertNotEqual(self.start(api), self.start(api))
+
+    def test_start_returns_400_when_no_file_is_uploaded(self):
+        api = MockAPI()
+
+        code, _, body = api.handle('POST', DECOMPILATIONS)
+
+        self.assertEqual(code, 400)
+        self.assertEqual(json.loads(body.decode())['code'], 400)
+
+    def test_decompilation_progresses_through_phases(self):
+        api = MockAPI(job_duration=10, queue_duration=1, phases=('A', 'B', 'C'))
+        id = self.start(api)
+        status_path = '{}/{}/status'.format(DECOMPILATIONS, id)
+
+        _, pending = self.get_json(api, status_path)
+        self.time.return_value = 107.0
+        _, running = self.get_json(api, status_path)
+        self.time.return_value = 111.0
+        _, finished = self.get_json(api, status_path)
+
+        self.assertTrue(pending['pending'])
+        self.assertEqual(pending['phases'], [])
+        self.assertTrue(running['running'])
+        self.assertEqual(running['completion'], 60)
+        self.assertEqual(
+            [(p['name'], p['completion']) for p in running['phases']],
+            [('A', 0), ('B', 50)]
+        )
+        self.assertTrue(finished['finished'])
+        self.assertTrue(finished['succeeded'])
+        self.assertEqual(finished['completion'], 100)
+        self.assertEqual(len(finished['phases']), 3)
+
+    def test_status_contains_only_requested_outputs(self):
+        api = MockAPI(cfg_count=3)
+        id = self.start(api, params={'generate_cfgs': 'True'})
+
+        _, status = self.get_json(
+            api, '{}/{}/status'.format(DECOMPILATIONS, id)
+        )
+
+        self.assertNotIn('cg', status)
+        self.assertNotIn('archive', status)
+        self.assertEqual(sorted(status['cfgs']), ['func0', 'func1', 'func2'])
+        self.assertTrue(status['cfgs']['func0']['generated'])
+
+    def test_failed_decompilation_has_failed_outputs_and_no_outputs(self):
+        api = MockAPI(failure_rate=1)
+        id = self.start(api, params={'generate_cg': '1'})
+
+        _, status = self.get_json(
+            api, '{}/{}/status'.format(DECOMPILATIONS, id)
+        )
+        code, _, _ = api.handle(
+            'GET', '{}/{}/outputs/hll'.format(DECOMPILATIONS, id)
+        )
+
+        self.assertTrue(status['failed'])
+        self.assertEqual(status['error'], 'The decompilation has failed.')
+        self.assertTrue(status['cg']['failed'])
+        self.assertEqual(code, 404)
+
+    def test_output_is_named_after_input_file_and_has_configured_size(self):
+        api = MockAPI(output_size=100)
+        id = self.start(api)
+
+        code, headers, body = api.handle(
+            'GET', '{}/{}/outputs/hll'.format(DECOMPILATIONS, id)
+        )
+
+        self.assertEqual(code, 200)
+        self.assertEqual(
+            headers['Content-Disposition'], 'attachment; filename=prog.c'
+        )
+        self.assertEqual(len(body), 100)
+
+    def test_archive_is_zip_file(self):
+        api = MockAPI()
+        id = self.start(api, params={'generate_archive': 'true'})
+
+        _, _, body = api.handle(
+            'GET', '{}/{}/outputs/archive'.format(DECOMPILATIONS, id)
+        )
+
+        with zipfile.ZipFile(io.BytesIO(body)) as archive:
+            self.assertEqual(archive.namelist(), ['decompiled.c'])
+
+    def test_output_of_running_decompilation_is_not_available(self):
+        api = MockAPI(job_duration=10)
+        id = self.start(api)
+
+        code, _, _ = api.handle(
+            'GET', '{}/{}/outputs/hll'.format(DECOMPILATIONS, id)
+        )
+
+        self.assertEqual(code, 404)
+
+    def test_cfg_of_nonexisting_function_is_not_available(self):
+        api = MockAPI(cfg_count=1)
+        id = self.start(api, params={'generate_cfgs': 'true'})
+
+        code, _, _ = api.handle(
+            'GET', '{}/{}/outputs/cfgs/func1'.format(DECOMPILATIONS, id)
+        )
+
+        self.assertEqual(code, 404)
+
+    def test_analysis_has_status_and_output(self):
+        api = MockAPI()
+        id = self.start(api, ANALYSES)
+
+        _, status = self.get_json(api, '{}/{}/status'.format(ANALYSES, id))
+        code, headers, _ = api.handle(
+            'GET', '{}/{}/output'.format(ANALYSES, id)
+        )
+
+        self.assertTrue(status['succeeded'])
+        self.assertNotIn('phases', status)
+        self.assertEqual(code, 200)
+
+    def test_unknown_path_returns_404(self):
+        code, body = self.get_json(MockAPI(), '/service/api/unknown')
+
+        self.assertEqual(code, 404)
+        self.assertEqual(body['message'], 'Not Found')
+
+    def test_echo_returns_params(self):
+        code, body = self.get_json(
+            MockAPI(), '/service/api/test/echo', {'a': 'b'}
+        )
+
+        self.assertEqual(code, 200)
+        self.assertEqual(body, {'a': 'b'})
+
+    def test_returns_429_with_retry_after_when_throttling(self):
+        api = MockAPI(throttle_rate=1, retry_after=5)
+
+        code, headers, _ = api.handle('GET', '/service/api/test/echo')
+
+        self.assertEqual(code, 429)
+        self.assertEqual(headers['Retry-After'], '5')
+
+    def test_returns_500_when_injecting_errors(self):
+        code, _ = self.get_json(MockAPI(error_rate=1), '/service/api/test/echo')
+
+        self.assertEqual(code, 500)
+
+    def test_returns_none_when_dropping_connections(self):
+        api = MockAPI(drop_rate=1)
+
+        self.assertIsNone(api.handle('GET', '/service/api/test/echo'))
+
+    def test_delays_responses_by_latency(self):
+        sleep = mock.Mock()
+        self.patch('retdec.testing.server.time.sleep', sleep)
+
+        MockAPI(latency=0.5).handle('GET', '/service/api/test/echo')
+
+        sleep.assert_called_once_with(0.5)
+
+    def test_returns_401_when_api_key_is_invalid(self):
+        api = MockAPI(api_key='KEY')
+
+        code, _ = self.get_json(api, '/service/api/test/echo')
+
+        self.assertEqual(code, 401)
+
+    def test_repr_returns_correct_value(self):
+        self.assertEqual(
+            repr(MockAPI(job_duration=2)),
+            '<retdec.testing.server.MockAPI job_duration=2 jobs=0>'
+        )
+
+
+class MockAPIServerTests(unittest.TestCase):
+    """Tests for :class:`retdec.testing.server.MockAPIServer`, which use the
+    library to send requests to the server.
+    """
+
+    def setUp(self):
+        super().setUp()
+
+        self.api = MockAPI(api_key='KEY', cfg_count=2)
+        self.server = MockAPIServer(self.api)
+        self.server.__enter__()
+        self.addCleanup(self.server.__exit__, None, None, None)
+
+    def test_decompilation_can_be_performed(self):
+        decompiler = Decompiler(api_url=self.server.api_url, api_key='KEY')
+
+        decompilation = decompiler.start_decompilation(
+            input_file=File(io.BytesIO(b'MZ'), 'prog.exe'),
+            generate_cfgs=True
+        )
+        decompilation.wait_until_finished()
+
+        self.assertEqual(decompilation.funcs_with_cfg, ['func0', 'func1'])
+        self.assertEqual(decompilation.get_hll_code()[:3], 'int')
+
+    def test_failed_decompilation_raises_exception(self):
+        self.api.failure_rate = 1
+        decompiler = Decompiler(api_url=self.server.api_url, api_key='KEY')
+
+        decompilation = decompiler.start_decompilation(
+            input_file=File(io.BytesIO(b'MZ'), 'prog.exe')
+        )
+
+        with self.assertRaises(DecompilationFailedError):
+            decompilation.wait_until_finished()
+
+    def test_analysis_can_be_performed(self):
+        fileinfo = Fileinfo(api_url=self.server.api_url, api_key='KEY')
+
+        analysis = fileinfo.start_analysis(input_file=File(io.BytesIO(b'MZ'), 'prog.exe'))
+        analysis.wait_until_finished()
+
+        self.assertTrue(analysis.get_output().startswith('File format'))
+
+    def test_echo_returns_params(self):
+        test = Test(api_url=self.server.api_url, api_key='KEY')
+
+        self.assertEqual(test.echo(param='value'), {'param': 'value'})
+
+    def test_invalid_api_key_raises_authentication_error(self):
+        test = Test(api_url=self.server.api_url, api_key='INVALID')
+
+        with self.assertRaises(AuthenticationError):
+            test.auth()
+
+    def test_throttled_request_raises_api_error_with_code_429(self):
+        self.api.throttle_rate = 1
+        test = Test(api_url=self.server.api_url, api_key='KEY')
+
+        with self.assertRaises(UnknownAPIError) as cm:
+            test.echo()
+
+        self.assertEqual(cm.exception.code, 429)
+
+    def test_dropped_connection_raises_connection_error(self):
+        self.api.drop_rate = 1
+        test = Test(api_url=self.server.api_url, api_key='KEY')
+
+        with self.assertRaises(ConnectionError):
+            test.echo()
+
+    def test_repr_returns_correct_value(self):
+        self.assertEqual(
+            repr(self.server),
+            '<retdec.testing.server.MockAPIServer api_url={!r}>'.format(
+                self.server.api_url
+            )
+        )
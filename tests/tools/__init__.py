@@ -7,6 +7,8 @@
 """Tests for the :mod:`retdec.tools` package."""
 
 import io
+import os
+import time
 import unittest
 
 from tests import WithPatching
@@ -23,3 +25,40 @@ class ToolTestsBase(unittest.TestCase, WithPatching):
 
         self.stderr = io.StringIO()
         self.patch('sys.stderr', self.stderr)
+
+
+class FakeDirectoryWatcher:
+    """A fake :class:`retdec.watcher.DirectoryWatcher`.
+
+    It reports all files in the directory at once. Then, it waits until they
+    are moved away and simulates an interruption by the user.
+    """
+
+    def __init__(self, directory, **kwargs):
+        self.directory = directory
+        self.reported = False
+
+    def wait(self, timeout=None):
+        if not self.reported:
+            self.reported = True
+            return self._files()
+        if self._files() and timeout is not None:
+            time.sleep(0.01)
+            return []
+        raise KeyboardInterrupt
+
+    def close(self):
+        pass
+
+    def _files(self):
+        return sorted(
+            os.path.join(self.directory, name)
+            for name in os.listdir(self.directory)
+            if os.path.isfile(os.path.join(self.directory, name))
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -0,0 +1,60 @@
+#
+# Project:   retdec-python
+# Copyright: (c) 2015 by Petr Zemek <s3rvac@gmail.com> and contributors
+# License:   MIT, see the LICENSE file for more details
+#
+
+"""Tests for the :mod:`retdec.tools.daemon` module."""
+
+from retdec.daemon import Daemon
+from retdec.tools.daemon import main
+from retdec.tools.daemon import parse_args
+from tests import mock
+from tests.tools import ToolTestsBase
+
+
+class ParseArgsTests(ToolTestsBase):
+    """Tests for :func:`retdec.tools.daemon.parse_args()`."""
+
+    def test_arguments_are_parsed_correctly(self):
+        args = parse_args([
+            'retdecd',
+            '--socket', 'retdecd.sock',
+            '--poll-interval', '0.1',
+            '--cache-ttl', '0'
+        ])
+
+        self.assertEqual(args.socket_path, 'retdecd.sock')
+        self.assertEqual(args.poll_interval, 0.1)
+        self.assertEqual(args.cache_ttl, 0.0)
+
+    def test_socket_is_parsed_correctly_short_form(self):
+        args = parse_args(['retdecd', '-s', 'retdecd.sock'])
+
+        self.assertEqual(args.socket_path, 'retdecd.sock')
+
+
+class MainTests(ToolTestsBase):
+    """Tests for :func:`retdec.tools.daemon.main()`."""
+
+    def setUp(self):
+        super().setUp()
+
+        self.daemon = mock.Mock(spec_set=Daemon)
+        self.daemon.socket_path = 'retdecd.sock'
+        self.DaemonMock = mock.Mock(return_value=self.daemon)
+        self.patch('retdec.tools.daemon.Daemon', self.DaemonMock)
+
+    def test_serves_until_interrupted_and_closes_daemon(self):
+        self.daemon.serve_forever.side_effect = KeyboardInterrupt
+
+        exit_code = main(['retdecd', '--socket', 'retdecd.sock'])
+
+        self.assertEqual(exit_code, 0)
+        self.DaemonMock.assert_called_once_with(
+            'retdecd.sock',
+            poll_interval=0.5,
+            cache_ttl=600.0
+        )
+        self.daemon.close.assert_called_once_with()
+        self.assertEqual(self.stdout.getvalue(), 'Listening on retdecd.sock\n')
@@ -6,26 +6,43 @@
 
 """Tests for the :mod:`retdec.tools.decompiler` module."""
 
+import io
 import os
+import tempfile
+import time
 import unittest
 
 from retdec import __version__
+from retdec import hooks
 from retdec.decompilation import Decompilation
 from retdec.decompilation import DecompilationPhase
 from retdec.decompiler import Decompiler
-from retdec.exceptions import ArchiveGenerationFailedError
-from retdec.exceptions import CFGGenerationFailedError
-from retdec.exceptions import CGGenerationFailedError
+from retdec.exceptions import DecompilationFailedError
+from retdec.exceptions import UnknownAPIError
+from retdec.manifest import Manifest
+from retdec.scheduler import FIFOPolicy
+from retdec.scheduler import FairSharePolicy
+from retdec.scheduler import Scheduler
+from retdec.scheduler import ShortestJobFirstPolicy
+from retdec.storage import open_store_reader
+from retdec.tools.decompiler import MultiJobProgressDisplayer
 from retdec.tools.decompiler import NoProgressDisplayer
 from retdec.tools.decompiler import ProgressBarDisplayer
 from retdec.tools.decompiler import ProgressLogDisplayer
+from retdec.tools.decompiler import ProgressSummaryDisplayer
 from retdec.tools.decompiler import display_download_progress
+from retdec.tools.decompiler import find_output_name_conflict
+from retdec.tools.decompiler import get_input_files
 from retdec.tools.decompiler import get_output_dir
+from retdec.tools.decompiler import get_output_names
 from retdec.tools.decompiler import get_progress_displayer
+from retdec.tools.decompiler import get_scheduling_policy
 from retdec.tools.decompiler import main
 from retdec.tools.decompiler import parse_args
+from retdec.tools.decompiler import uses_flat_layout
 from tests import mock
 from tests.matchers import Anything
+from tests.tools import FakeDirectoryWatcher
 from tests.tools import ToolTestsBase
 
 
@@ -257,6 +274,52 @@ Warning: warning2
         )
 
 
+class ProgressSummaryDisplayerTests(ToolTestsBase):
+    """Tests for :class:`retdec.tools.decompiler.ProgressSummaryDisplayer`."""
+
+    def test_display_decompilation_progress_does_nothing_when_not_finished(self):
+        displayer = ProgressSummaryDisplayer('prog.exe')
+        decompilation = mock.Mock(spec_set=Decompilation)
+        decompilation.has_finished.return_value = False
+
+        displayer.display_decompilation_progress(decompilation)
+
+        self.assertEqual(self.stdout.getvalue(), '')
+
+    def test_display_decompilation_progress_successful_decompilation(self):
+        displayer = ProgressSummaryDisplayer('prog.exe')
+        decompilation = mock.Mock(spec_set=Decompilation)
+        decompilation.id = '8DRerEdKop'
+        decompilation.has_finished.return_value = True
+        decompilation.has_succeeded.return_value = True
+
+        displayer.display_decompilation_progress(decompilation)
+
+        self.assertEqual(self.stdout.getvalue(), 'prog.exe (8DRerEdKop): OK\n')
+
+    def test_display_decompilation_progress_failed_decompilation(self):
+        displayer = ProgressSummaryDisplayer('prog.exe')
+        decompilation = mock.Mock(spec_set=Decompilation)
+        decompilation.id = '8DRerEdKop'
+        decompilation.has_finished.return_value = True
+        decompilation.has_succeeded.return_value = False
+
+        displayer.display_decompilation_progress(decompilation)
+
+        self.assertEqual(self.stdout.getvalue(), 'prog.exe (8DRerEdKop): FAIL\n')
+
+    def test_display_generation_failure_displays_correct_value(self):
+        displayer = ProgressSummaryDisplayer('prog.exe')
+
+        displayer.display_generation_failure('archive', 'Archive is too big.')
+
+        self.assertEqual(
+            self.stdout.getvalue(),
+            'Warning: prog.exe: Generation of the archive failed: '
+            'Archive is too big.\n'
+        )
+
+
 class NoProgressDisplayerTests(ToolTestsBase):
     """Tests for :class:`retdec.tools.decompiler.NoProgressDisplayer`."""
 
@@ -290,6 +353,169 @@ class NoProgressDisplayerTests(ToolTestsBase):
         )
 
 
+class MultiJobProgressDisplayerTests(ToolTestsBase):
+    """Tests for :class:`retdec.tools.decompiler.MultiJobProgressDisplayer`."""
+
+    def setUp(self):
+        super().setUp()
+
+        self.now = 1000.0
+        self.stream = io.StringIO()
+
+    def create_displayer(self, total=10, is_tty=False, **kwargs):
+        return MultiJobProgressDisplayer(
+            total,
+            stream=self.stream,
+            is_tty=is_tty,
+            clock=lambda: self.now,
+            **kwargs
+        )
+
+    def create_decompilation(self, completion, phase_description):
+        decompilation = mock.Mock(spec_set=Decompilation)
+        decompilation.get_completion.return_value = completion
+        decompilation.get_phases.return_value = [
+            DecompilationPhase('name', 'part', phase_description, completion, [])
+        ]
+        return decompilation
+
+    def test_events_do_not_write_anything(self):
+        displayer = self.create_displayer(total=1000)
+
+        for i in range(1000):
+            displayer.job_started('prog{}.exe'.format(i))
+            displayer.job_finished('prog{}.exe'.format(i))
+
+        self.assertEqual(self.stream.getvalue(), '')
+
+    def test_refresh_writes_summary_line_when_stream_is_not_tty(self):
+        displayer = self.create_displayer()
+        displayer.job_started('prog1.exe')
+        displayer.job_started('prog2.exe')
+        displayer.job_started('prog3.exe')
+        self.now += 60
+        displayer.job_finished('prog1.exe')
+        displayer.job_finished('prog2.exe', OSError('failed'))
+
+        displayer.refresh()
+
+        self.assertEqual(
+            self.stream.getvalue(),
+            'Progress: 2/10 files decompiled (1 failed), 1 in flight, '
+            '7 queued, 2.0 files/min, ETA 4m 00s, slowest: prog3.exe '
+            '(1m 00s)\n'
+        )
+
+    def test_refresh_writes_unknown_eta_when_no_file_has_been_decompiled(self):
+        displayer = self.create_displayer()
+
+        displayer.refresh()
+
+        self.assertEqual(
+            self.stream.getvalue(),
+            'Progress: 0/10 files decompiled (0 failed), 0 in flight, '
+            '10 queued, 0.0 files/min, ETA unknown\n'
+        )
+
+    def test_refresh_draws_block_with_slowest_jobs_when_stream_is_tty(self):
+        displayer = self.create_displayer(is_tty=True, slowest_count=2)
+        displayer.job_started('prog1.exe')
+        self.now += 30
+        displayer.job_started('prog2.exe')
+        displayer.job_started('prog3.exe')
+        displayer.job_displayer('prog1.exe').display_decompilation_progress(
+            self.create_decompilation(34, 'Data-flow analysis')
+        )
+        self.now += 3600
+
+        displayer.refresh()
+
+        self.assertEqual(
+            self.stream.getvalue(),
+            'Progress: 0/10 files decompiled (0 failed), 3 in flight, '
+            '7 queued\n'
+            'Throughput: 0.0 files/min, elapsed: 1h 00m, ETA: unknown\n'
+            'Slowest:\n'
+            '   1h 00m   34%  prog1.exe (Data-flow analysis)\n'
+            '   1h 00m    0%  prog2.exe\n'
+        )
+
+    def test_refresh_redraws_block_in_place_when_stream_is_tty(self):
+        displayer = self.create_displayer(is_tty=True)
+        displayer.refresh()
+        self.stream.seek(0)
+        self.stream.truncate()
+
+        displayer.refresh()
+
+        self.assertTrue(self.stream.getvalue().startswith('\x1b[2F\x1b[J'))
+
+    def test_display_message_erases_block_when_stream_is_tty(self):
+        displayer = self.create_displayer(is_tty=True)
+        displayer.refresh()
+        self.stream.seek(0)
+        self.stream.truncate()
+
+        displayer.display_message('Message')
+
+        self.assertEqual(self.stream.getvalue(), '\x1b[2F\x1b[JMessage\n')
+
+    def test_job_finished_displays_error_on_stderr(self):
+        displayer = self.create_displayer()
+        displayer.job_started('prog.exe')
+
+        displayer.job_finished('prog.exe', OSError('failed'))
+
+        self.assertEqual(self.stderr.getvalue(), 'Error: prog.exe: failed\n')
+
+    def test_job_displayer_displays_generation_failure(self):
+        displayer = self.create_displayer()
+
+        displayer.job_displayer('prog.exe').display_generation_failure(
+            'archive', 'Archive is too big.'
+        )
+
+        self.assertEqual(
+            self.stream.getvalue(),
+            'Warning: prog.exe: Generation of the archive failed: '
+            'Archive is too big.\n'
+        )
+
+    def test_close_displays_final_progress(self):
+        displayer = self.create_displayer(total=1)
+        with displayer:
+            displayer.job_started('prog.exe')
+            displayer.job_finished('prog.exe')
+
+        self.assertEqual(
+            self.stream.getvalue(),
+            'Progress: 1/1 files decompiled (0 failed), 0 in flight, '
+            '0 queued, 0.0 files/min, ETA unknown\n'
+        )
+
+    def test_progress_is_displayed_periodically(self):
+        displayer = self.create_displayer(summary_interval=0.01)
+        with displayer:
+            while not self.stream.getvalue():
+                time.sleep(0.01)
+
+        self.assertIn('Progress: ', self.stream.getvalue())
+
+    def test_is_tty_is_detected_from_stream(self):
+        displayer = MultiJobProgressDisplayer(10, stream=self.stream)
+
+        self.assertFalse(displayer.is_tty)
+
+    def test_repr_returns_correct_value(self):
+        displayer = self.create_displayer()
+
+        self.assertEqual(
+            repr(displayer),
+            '<retdec.tools.decompiler.MultiJobProgressDisplayer total=10 '
+            'tty=False>'
+        )
+
+
 class ParseArgsTests(ToolTestsBase):
     """Tests for :func:`retdec.tools.decompiler.parse_args()`."""
 
@@ -301,7 +527,168 @@ class ParseArgsTests(ToolTestsBase):
     def test_file_is_parsed_correctly(self):
         args = parse_args(['decompiler.py', 'prog.exe'])
 
-        self.assertEqual(args.input_file, 'prog.exe')
+        self.assertEqual(args.input_files, ['prog.exe'])
+
+    def test_multiple_files_are_parsed_correctly(self):
+        args = parse_args(['decompiler.py', 'prog1.exe', 'prog2.exe'])
+
+        self.assertEqual(args.input_files, ['prog1.exe', 'prog2.exe'])
+
+    def test_jobs_is_set_to_one_when_not_given(self):
+        args = parse_args(['decompiler.py', 'prog.exe'])
+
+        self.assertEqual(args.jobs, 1)
+
+    def test_jobs_is_parsed_correctly_short_form(self):
+        args = parse_args(['decompiler.py', '-j', '4', 'prog.exe'])
+
+        self.assertEqual(args.jobs, 4)
+
+    def test_jobs_is_parsed_correctly_long_form(self):
+        args = parse_args(['decompiler.py', '--jobs', '4', 'prog.exe'])
+
+        self.assertEqual(args.jobs, 4)
+
+    def test_schedule_is_set_to_fifo_when_not_given(self):
+        args = parse_args(['decompiler.py', 'prog.exe'])
+
+        self.assertEqual(args.schedule, 'fifo')
+
+    def test_schedule_is_parsed_correctly(self):
+        args = parse_args(['decompiler.py', '--schedule', 'size', 'prog.exe'])
+
+        self.assertEqual(args.schedule, 'size')
+
+    def test_shard_is_none_when_not_given(self):
+        args = parse_args(['decompiler.py', 'prog.exe'])
+
+        self.assertIsNone(args.shard)
+        self.assertEqual(args.shard_by, 'path')
+        self.assertFalse(args.consistent_sharding)
+
+    def test_shard_is_parsed_correctly(self):
+        args = parse_args([
+            'decompiler.py', '--shard', '1/4', '--shard-by', 'content',
+            '--consistent-sharding', 'prog.exe'
+        ])
+
+        self.assertEqual(args.shard, (1, 4))
+        self.assertEqual(args.shard_by, 'content')
+        self.assertTrue(args.consistent_sharding)
+
+    def test_shard_index_has_to_be_lower_than_count(self):
+        with self.assertRaises(SystemExit):
+            parse_args(['decompiler.py', '--shard', '4/4', 'prog.exe'])
+
+    def test_shard_has_to_be_in_correct_format(self):
+        with self.assertRaises(SystemExit):
+            parse_args(['decompiler.py', '--shard', '1', 'prog.exe'])
+
+    def test_pack_is_none_when_not_given(self):
+        args = parse_args(['decompiler.py', 'prog.exe'])
+
+        self.assertIsNone(args.pack)
+
+    def test_pack_is_parsed_correctly(self):
+        args = parse_args(['decompiler.py', '--pack', 'sqlite', 'prog.exe'])
+
+        self.assertEqual(args.pack, 'sqlite')
+
+    def test_durability_is_none_when_not_given(self):
+        args = parse_args(['decompiler.py', 'prog.exe'])
+
+        self.assertEqual(args.durability, 'none')
+
+    def test_durability_is_parsed_correctly(self):
+        args = parse_args(
+            ['decompiler.py', '--durability', 'batch', 'prog.exe']
+        )
+
+        self.assertEqual(args.durability, 'batch')
+
+    def test_metrics_are_not_exported_by_default(self):
+        args = parse_args(['decompiler.py', 'prog.exe'])
+
+        self.assertIsNone(args.metrics_port)
+        self.assertIsNone(args.metrics_file)
+
+    def test_metrics_arguments_are_parsed_correctly(self):
+        args = parse_args([
+            'decompiler.py',
+            '--metrics-port', '9100',
+            '--metrics-file', 'retdec.prom',
+            'prog.exe'
+        ])
+
+        self.assertEqual(args.metrics_port, 9100)
+        self.assertEqual(args.metrics_file, 'retdec.prom')
+
+    def test_phase_log_is_parsed_correctly(self):
+        args = parse_args(
+            ['decompiler.py', '--phase-log', 'phases.jsonl', 'prog.exe']
+        )
+
+        self.assertEqual(args.phase_log, 'phases.jsonl')
+
+    def test_watch_is_parsed_correctly(self):
+        args = parse_args(
+            ['decompiler.py', '--watch', 'drop', '--settle-time', '0.5']
+        )
+
+        self.assertEqual(args.watch, 'drop')
+        self.assertEqual(args.settle_time, 0.5)
+        self.assertEqual(args.input_files, [])
+
+    def test_watch_cannot_be_given_together_with_file(self):
+        with self.assertRaises(SystemExit) as cm:
+            parse_args(['decompiler.py', '--watch', 'drop', 'prog.exe'])
+        self.assertNotEqual(cm.exception.code, 0)
+
+    def test_daemon_socket_is_parsed_correctly(self):
+        args = parse_args(
+            ['decompiler.py', '--daemon-socket', 'retdecd.sock', 'prog.exe']
+        )
+
+        self.assertEqual(args.daemon_socket, 'retdecd.sock')
+
+    def test_daemon_does_not_take_value(self):
+        args = parse_args(['decompiler.py', '--daemon', 'prog.exe'])
+
+        self.assertTrue(args.daemon)
+        self.assertEqual(args.input_files, ['prog.exe'])
+
+    def test_manifest_and_resume_are_parsed_correctly(self):
+        args = parse_args(
+            ['decompiler.py', '--manifest', 'm.sqlite', '--resume', 'prog.exe']
+        )
+
+        self.assertEqual(args.manifest, 'm.sqlite')
+        self.assertTrue(args.resume)
+
+    def test_resume_requires_manifest(self):
+        with self.assertRaises(SystemExit) as cm:
+            parse_args(['decompiler.py', '--resume', 'prog.exe'])
+        self.assertNotEqual(cm.exception.code, 0)
+
+    def test_dashboard_is_parsed_correctly(self):
+        args = parse_args(['decompiler.py', '--dashboard', 'prog.exe'])
+
+        self.assertTrue(args.dashboard)
+
+    def test_dashboard_cannot_be_given_together_with_watch(self):
+        with self.assertRaises(SystemExit) as cm:
+            parse_args(['decompiler.py', '--dashboard', '--watch', 'drop'])
+        self.assertNotEqual(cm.exception.code, 0)
+
+    def test_manifest_cannot_be_given_together_with_watch(self):
+        with self.assertRaises(SystemExit) as cm:
+            parse_args(['decompiler.py', '--manifest', 'm.sqlite', '--watch', 'drop'])
+        self.assertNotEqual(cm.exception.code, 0)
+
+    def test_jobs_has_to_be_positive(self):
+        with self.assertRaises(SystemExit) as cm:
+            parse_args(['decompiler.py', '--jobs', '0', 'prog.exe'])
+        self.assertNotEqual(cm.exception.code, 0)
 
     def test_api_key_is_parsed_correctly_short_form(self):
         args = parse_args(['decompiler.py', '-k', 'KEY', 'prog.exe'])
@@ -583,14 +970,78 @@ class FakeArguments:
         self.__dict__.update(kwargs)
 
 
+class GetInputFilesTests(unittest.TestCase):
+    """Tests for :func:`retdec.tools.decompiler.get_input_files()`."""
+
+    def setUp(self):
+        super().setUp()
+
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+
+    def create_file(self, *path):
+        """Creates an empty file in the temporary directory and returns its
+        path.
+        """
+        file_path = os.path.join(self.tmp_dir.name, *path)
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        open(file_path, 'wb').close()
+        return file_path
+
+    def test_returns_given_file_when_it_is_not_directory_or_pattern(self):
+        args = FakeArguments(input_files=['prog.exe'])
+
+        self.assertEqual(list(get_input_files(args)), ['prog.exe'])
+
+    def test_returns_files_in_directory_recursively(self):
+        file1 = self.create_file('a.exe')
+        file2 = self.create_file('sub', 'b.exe')
+        args = FakeArguments(input_files=[self.tmp_dir.name])
+
+        self.assertEqual(list(get_input_files(args)), [file1, file2])
+
+    def test_expands_glob_patterns(self):
+        file1 = self.create_file('a.exe')
+        self.create_file('b.dll')
+        file3 = self.create_file('c.exe')
+        args = FakeArguments(
+            input_files=[os.path.join(self.tmp_dir.name, '*.exe')]
+        )
+
+        self.assertEqual(list(get_input_files(args)), [file1, file3])
+
+    def test_maps_files_to_arguments_from_which_they_come(self):
+        file1 = self.create_file('a.exe')
+        args = FakeArguments(input_files=[self.tmp_dir.name, 'prog.exe'])
+
+        self.assertEqual(
+            list(get_input_files(args).items()),
+            [(file1, self.tmp_dir.name), ('prog.exe', 'prog.exe')]
+        )
+
+    def test_returns_file_given_several_times_only_once(self):
+        args = FakeArguments(input_files=['prog.exe', 'prog.exe'])
+
+        self.assertEqual(list(get_input_files(args)), ['prog.exe'])
+
+    def test_walks_directory_only_once(self):
+        self.create_file('a.exe')
+        args = FakeArguments(input_files=[self.tmp_dir.name])
+
+        with mock.patch('os.walk', wraps=os.walk) as walk:
+            get_input_files(args)
+
+        self.assertEqual(walk.call_count, 1)
+
+
 class GetOutputDirTests(unittest.TestCase):
     """Tests for :func:`retdec.tools.decompiler.get_output_dir()`."""
 
     def test_returns_correct_dir_when_output_dir_is_not_given(self):
         input_file = os.path.join('dir', 'prog.exe')
-        args = FakeArguments(input_file=input_file, output_dir=None)
+        args = FakeArguments(output_dir=None)
 
-        output_dir = get_output_dir(args)
+        output_dir = get_output_dir(args, input_file)
 
         self.assertEqual(
             output_dir,
@@ -600,9 +1051,9 @@ class GetOutputDirTests(unittest.TestCase):
 
     def test_returns_correct_dir_when_output_dir_is_given(self):
         input_file = os.path.join('dir', 'prog.exe')
-        args = FakeArguments(input_file=input_file, output_dir='other_dir')
+        args = FakeArguments(output_dir='other_dir')
 
-        output_dir = get_output_dir(args)
+        output_dir = get_output_dir(args, input_file)
 
         self.assertEqual(
             output_dir,
@@ -610,6 +1061,89 @@ class GetOutputDirTests(unittest.TestCase):
         )
         self.assertTrue(os.path.isabs(output_dir))
 
+    def test_returns_subdir_with_given_name_when_output_dir_is_given(self):
+        input_file = os.path.join('dir', 'sub', 'prog.exe')
+        args = FakeArguments(output_dir='other_dir')
+
+        output_dir = get_output_dir(
+            args, input_file, os.path.join('sub', 'prog.exe')
+        )
+
+        self.assertEqual(
+            output_dir,
+            os.path.join(os.getcwd(), 'other_dir', 'sub', 'prog.exe')
+        )
+
+    def test_ignores_name_when_output_dir_is_not_given(self):
+        input_file = os.path.join('dir', 'prog.exe')
+        args = FakeArguments(output_dir=None)
+
+        output_dir = get_output_dir(args, input_file, 'prog.exe')
+
+        self.assertEqual(output_dir, os.path.join(os.getcwd(), 'dir'))
+
+
+class OutputLayoutTests(unittest.TestCase):
+    """Tests for :func:`retdec.tools.decompiler.uses_flat_layout()`,
+    :func:`retdec.tools.decompiler.get_output_names()`, and
+    :func:`retdec.tools.decompiler.find_output_name_conflict()`.
+    """
+
+    def setUp(self):
+        super().setUp()
+
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+
+    def test_single_file_uses_flat_layout(self):
+        args = FakeArguments(input_files=['prog.exe'])
+
+        self.assertTrue(uses_flat_layout(args))
+
+    def test_several_files_do_not_use_flat_layout(self):
+        args = FakeArguments(input_files=['prog1.exe', 'prog2.exe'])
+
+        self.assertFalse(uses_flat_layout(args))
+
+    def test_directory_does_not_use_flat_layout(self):
+        args = FakeArguments(input_files=[self.tmp_dir.name])
+
+        self.assertFalse(uses_flat_layout(args))
+
+    def test_glob_pattern_does_not_use_flat_layout(self):
+        args = FakeArguments(input_files=['*.exe'])
+
+        self.assertFalse(uses_flat_layout(args))
+
+    def test_files_from_directory_are_named_by_relative_paths(self):
+        input_file = os.path.join(self.tmp_dir.name, 'a', 'prog.exe')
+
+        names = get_output_names({input_file: self.tmp_dir.name})
+
+        self.assertEqual(names, {input_file: os.path.join('a', 'prog.exe')})
+
+    def test_other_files_are_named_by_base_names(self):
+        input_file = os.path.join('dir', 'prog.exe')
+
+        names = get_output_names({input_file: input_file})
+
+        self.assertEqual(names, {input_file: 'prog.exe'})
+
+    def test_find_output_name_conflict_returns_files_with_same_name(self):
+        conflict = find_output_name_conflict({
+            'a/prog.exe': 'prog.exe',
+            'b/prog.exe': 'prog.exe',
+            'c/other.exe': 'other.exe',
+        })
+
+        self.assertEqual(conflict, ('a/prog.exe', 'b/prog.exe'))
+
+    def test_find_output_name_conflict_returns_none_when_names_differ(self):
+        self.assertIsNone(find_output_name_conflict({
+            'a/prog.exe': 'a/prog.exe',
+            'b/prog.exe': 'b/prog.exe',
+        }))
+
 
 class GetProgressCallbackTests(unittest.TestCase):
     """Tests for :func:`retdec.tools.decompiler.get_progress_displayer()`."""
@@ -636,6 +1170,25 @@ class GetProgressCallbackTests(unittest.TestCase):
         self.assertIsInstance(displayer, NoProgressDisplayer)
 
 
+class GetSchedulingPolicyTests(unittest.TestCase):
+    """Tests for :func:`retdec.tools.decompiler.get_scheduling_policy()`."""
+
+    def test_returns_fifo_policy_for_fifo(self):
+        policy = get_scheduling_policy(FakeArguments(schedule='fifo'))
+
+        self.assertIsInstance(policy, FIFOPolicy)
+
+    def test_returns_shortest_job_first_policy_for_size(self):
+        policy = get_scheduling_policy(FakeArguments(schedule='size'))
+
+        self.assertIsInstance(policy, ShortestJobFirstPolicy)
+
+    def test_returns_fair_share_policy_for_fair(self):
+        policy = get_scheduling_policy(FakeArguments(schedule='fair'))
+
+        self.assertIsInstance(policy, FairSharePolicy)
+
+
 class DisplayDownloadProgressTests(unittest.TestCase):
     """Tests for :func:`retdec.tools.decompiler.display_download_progress()`.
     """
@@ -686,7 +1239,8 @@ class MainTests(ToolTestsBase):
         # Decompiler is instantiated with correct arguments.
         self.DecompilerMock.assert_called_once_with(
             api_url=None,
-            api_key='API-KEY'
+            api_key='API-KEY',
+            daemon_socket=None
         )
 
         # Decompilation is started with correct arguments.
@@ -700,11 +1254,75 @@ class MainTests(ToolTestsBase):
             len(decompilation.wait_until_finished.mock_calls), 1
         )
 
-        # The generated HLL code is saved.
-        decompilation.save_hll_code.assert_called_once_with(os.getcwd())
+        # The generated HLL and DSM code is saved.
+        decompilation.save_all.assert_called_once_with(
+            os.getcwd(),
+            outputs=['hll', 'dsm'],
+            on_download=Anything(),
+            on_generation_failure=Anything(),
+            durability='none'
+        )
 
-        # The generated DSM code is saved.
-        decompilation.save_dsm_code.assert_called_once_with(os.getcwd())
+    def test_passes_daemon_socket_to_decompiler_when_given(self):
+        main([
+            'decompiler.py', '--api-key', 'API-KEY',
+            '--daemon-socket', 'retdecd.sock', 'prog.exe'
+        ])
+
+        self.DecompilerMock.assert_called_once_with(
+            api_url=None,
+            api_key='API-KEY',
+            daemon_socket='retdecd.sock'
+        )
+
+    def test_passes_daemon_socket_from_environment_to_decompiler(self):
+        with mock.patch.dict(os.environ, {'RETDEC_DAEMON_SOCKET': 'env.sock'}):
+            main(['decompiler.py', '--api-key', 'API-KEY', 'prog.exe'])
+
+        self.DecompilerMock.assert_called_once_with(
+            api_url=None,
+            api_key='API-KEY',
+            daemon_socket='env.sock'
+        )
+
+    def test_passes_default_daemon_socket_to_decompiler_when_daemon_is_given(self):
+        self.patch(
+            'retdec.daemon.default_socket_path',
+            mock.Mock(return_value='default.sock')
+        )
+
+        main(['decompiler.py', '--api-key', 'API-KEY', '--daemon', 'prog.exe'])
+
+        self.DecompilerMock.assert_called_once_with(
+            api_url=None,
+            api_key='API-KEY',
+            daemon_socket='default.sock'
+        )
+
+    def test_writes_metrics_into_file_and_stops_collecting_them(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            metrics_file = os.path.join(tmp_dir, 'retdec.prom')
+
+            main([
+                'decompiler.py', '--api-key', 'API-KEY',
+                '--metrics-file', metrics_file, 'prog.exe'
+            ])
+
+            with open(metrics_file, encoding='utf-8') as f:
+                self.assertIn('# TYPE retdec_requests_total counter', f.read())
+        self.assertEqual(hooks.registered(), ())
+
+    def test_records_phases_into_phase_log_and_unregisters_profiler(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            phase_log = os.path.join(tmp_dir, 'phases.jsonl')
+
+            main([
+                'decompiler.py', '--api-key', 'API-KEY',
+                '--phase-log', phase_log, 'prog.exe'
+            ])
+
+            self.assertTrue(os.path.exists(phase_log))
+        self.assertEqual(hooks.registered(), ())
 
     def call_main_with_standard_arguments_and(self, *additional_args):
         """Calls ``main()`` with standard arguments (such as ``--api-key``),
@@ -909,6 +1527,14 @@ class MainTests(ToolTestsBase):
             ar_name='1'
         )
 
+    def assert_outputs_were_saved(self, outputs):
+        """Asserts that the given outputs of the decompilation were saved."""
+        decompilation = self.get_started_decompilation()
+        self.assertEqual(
+            decompilation.save_all.call_args[1]['outputs'],
+            outputs
+        )
+
     def test_generates_and_saves_cg_when_requested(self):
         self.call_main_with_standard_arguments_and(
             '--with-cg'
@@ -917,28 +1543,9 @@ class MainTests(ToolTestsBase):
         self.assert_decompilation_was_started_also_with(
             generate_cg=True
         )
-        decompilation = self.get_started_decompilation()
-        decompilation.wait_until_cg_is_generated.assert_called_once_with()
-        decompilation.save_cg.assert_called_once_with(os.getcwd())
-
-    def test_prints_generation_failure_warning_when_cg_fails_to_generate(self):
-        def raise_error():
-            raise CGGenerationFailedError('Graph is too big.')
-        decompilation = self.decompiler.start_decompilation()
-        decompilation.wait_until_cg_is_generated = raise_error
-
-        self.call_main_with_standard_arguments_and(
-            '--with-cg'
-        )
-
-        self.assertRegex(
-            self.stdout.getvalue(),
-            '.*Warning: .*call graph.*: Graph is too big\.'
-        )
-        self.assertFalse(decompilation.save_cg.called)
+        self.assert_outputs_were_saved(['hll', 'dsm', 'cg'])
 
     def test_generates_and_saves_cfgs_when_requested(self):
-        self.decompiler.start_decompilation().funcs_with_cfg = ['f1', 'f2']
         self.call_main_with_standard_arguments_and(
             '--with-cfgs'
         )
@@ -946,42 +1553,7 @@ class MainTests(ToolTestsBase):
         self.assert_decompilation_was_started_also_with(
             generate_cfgs=True
         )
-        decompilation = self.get_started_decompilation()
-        decompilation.wait_until_cfg_is_generated.assert_any_call('f1')
-        decompilation.save_cfg.assert_any_call('f1', os.getcwd())
-        decompilation.wait_until_cfg_is_generated.assert_any_call('f2')
-        decompilation.save_cfg.assert_any_call('f2', os.getcwd())
-
-    def test_prints_generation_failure_warning_when_cfg_fails_to_generate(self):
-        def raise_error(func):
-            raise CFGGenerationFailedError('Graph is too big.')
-        decompilation = self.decompiler.start_decompilation()
-        decompilation.wait_until_cfg_is_generated = raise_error
-        decompilation.funcs_with_cfg = ['my_func']
-
-        self.call_main_with_standard_arguments_and(
-            '--with-cfgs'
-        )
-
-        self.assertRegex(
-            self.stdout.getvalue(),
-            '.*Warning: .*control-flow graph.*my_func.*: Graph is too big\.'
-        )
-        self.assertFalse(decompilation.save_cfg.called)
-
-    def test_saves_second_cfg_even_when_first_cfg_failed_to_generate(self):
-        def raise_error_on_f1(func):
-            if func == 'f1':
-                raise CFGGenerationFailedError('Graph is too big.')
-        decompilation = self.decompiler.start_decompilation()
-        decompilation.wait_until_cfg_is_generated = raise_error_on_f1
-        decompilation.funcs_with_cfg = ['f1', 'f2']
-
-        self.call_main_with_standard_arguments_and(
-            '--with-cfgs'
-        )
-
-        decompilation.save_cfg.assert_called_once_with('f2', Anything())
+        self.assert_outputs_were_saved(['hll', 'dsm', 'cfgs'])
 
     def test_generates_and_saves_archive_when_requested(self):
         self.call_main_with_standard_arguments_and(
@@ -991,25 +1563,37 @@ class MainTests(ToolTestsBase):
         self.assert_decompilation_was_started_also_with(
             generate_archive=True
         )
+        self.assert_outputs_were_saved(['hll', 'dsm', 'archive'])
+
+    def test_displays_progress_of_downloading_saved_files(self):
+        def save_all(directory, outputs, on_download, on_generation_failure,
+                     durability):
+            on_download(os.path.join('dir', 'prog.c'))
+            return {'hll': os.path.join('dir', 'prog.c')}
         decompilation = self.get_started_decompilation()
-        decompilation.wait_until_archive_is_generated.assert_called_once_with()
-        decompilation.save_archive.assert_called_once_with(os.getcwd())
+        decompilation.save_all = save_all
+        self.os_path_basename_mock.return_value = 'prog.c'
+
+        self.call_main_with_standard_arguments_and()
 
-    def test_prints_generation_failure_warning_when_archive_fails_to_generate(self):
-        def raise_error():
-            raise ArchiveGenerationFailedError('Archive is too big.')
-        decompilation = self.decompiler.start_decompilation()
-        decompilation.wait_until_archive_is_generated = raise_error
+        self.assertIn(' - prog.c', self.stdout.getvalue())
+
+    def test_prints_generation_failure_warning_when_output_fails_to_generate(self):
+        def save_all(directory, outputs, on_download, on_generation_failure,
+                     durability):
+            on_generation_failure('call graph', 'Graph is too big.')
+            return {}
+        decompilation = self.get_started_decompilation()
+        decompilation.save_all = save_all
 
         self.call_main_with_standard_arguments_and(
-            '--with-archive'
+            '--with-cg'
         )
 
         self.assertRegex(
             self.stdout.getvalue(),
-            '.*Warning: .*archive.*: Archive is too big\.'
+            r'.*Warning: .*call graph.*: Graph is too big\.'
         )
-        self.assertFalse(decompilation.save_archive.called)
 
     def test_saves_output_compiled_binary_when_mode_is_c(self):
         main([
@@ -1019,8 +1603,7 @@ class MainTests(ToolTestsBase):
             'file'
         ])
 
-        decompilation = self.get_started_decompilation()
-        decompilation.save_binary.assert_called_once_with(os.getcwd())
+        self.assert_outputs_were_saved(['hll', 'dsm', 'binary'])
 
     def test_saves_output_compiled_binary_when_input_is_c_file(self):
         main([
@@ -1029,8 +1612,7 @@ class MainTests(ToolTestsBase):
             'file.c'
         ])
 
-        decompilation = self.get_started_decompilation()
-        decompilation.save_binary.assert_called_once_with(os.getcwd())
+        self.assert_outputs_were_saved(['hll', 'dsm', 'binary'])
 
     def test_saves_output_compiled_binary_when_input_is_c_file_uppercase_c(self):
         main([
@@ -1039,8 +1621,7 @@ class MainTests(ToolTestsBase):
             'file.C'
         ])
 
-        decompilation = self.get_started_decompilation()
-        decompilation.save_binary.assert_called_once_with(os.getcwd())
+        self.assert_outputs_were_saved(['hll', 'dsm', 'binary'])
 
     def test_does_not_save_output_compiled_binary_when_mode_is_bin(self):
         main([
@@ -1050,8 +1631,7 @@ class MainTests(ToolTestsBase):
             'file'
         ])
 
-        decompilation = self.get_started_decompilation()
-        self.assertFalse(decompilation.save_binary.called)
+        self.assert_outputs_were_saved(['hll', 'dsm'])
 
     def test_does_not_save_output_compiled_binary_when_input_is_binary_file(self):
         main([
@@ -1060,8 +1640,7 @@ class MainTests(ToolTestsBase):
             'file.exe'
         ])
 
-        decompilation = self.get_started_decompilation()
-        self.assertFalse(decompilation.save_binary.called)
+        self.assert_outputs_were_saved(['hll', 'dsm'])
 
     def test_sends_pdb_file_when_given(self):
         self.call_main_with_standard_arguments_and(
@@ -1071,3 +1650,589 @@ class MainTests(ToolTestsBase):
         self.assert_decompilation_was_started_also_with(
             pdb_file='prog.pdb'
         )
+
+
+class MainMultipleFilesTests(ToolTestsBase):
+    """Tests for :func:`retdec.tools.decompiler.main()` when several files are
+    given.
+    """
+
+    def setUp(self):
+        super().setUp()
+
+        self.decompiler = mock.MagicMock(spec_set=Decompiler)
+        self.decompiler.start_decompilation.side_effect = \
+            self.start_decompilation
+        self.DecompilerMock = mock.Mock()
+        self.DecompilerMock.return_value = self.decompiler
+        self.patch(
+            'retdec.tools.decompiler.Decompiler',
+            self.DecompilerMock
+        )
+
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+
+        self.decompilations = {}
+        self.batch = []
+
+    def start_decompilation(self, **params):
+        """Fake implementation of ``Decompiler.start_decompilation()``."""
+        self.batch.append(params)
+        if params['input_file'] not in self.decompilations:
+            raise OSError('No such file.')
+        return self.decompilations[params['input_file']]
+
+    def add_decompilation(self, input_file):
+        """Adds a decompilation that is started for the given file."""
+        decompilation = mock.MagicMock(spec_set=Decompilation)
+        self.decompilations[input_file] = decompilation
+        return decompilation
+
+    def call_main(self, *args):
+        """Calls ``main()`` with the given arguments."""
+        return main(('decompiler.py', '--api-key', 'KEY') + args)
+
+    def test_starts_decompilation_of_each_file_with_same_parameters(self):
+        self.add_decompilation('prog1.exe')
+        self.add_decompilation('prog2.exe')
+
+        self.call_main('--mode', 'bin', 'prog1.exe', 'prog2.exe')
+
+        self.assertEqual(self.batch, [
+            {'input_file': 'prog1.exe', 'mode': 'bin'},
+            {'input_file': 'prog2.exe', 'mode': 'bin'}
+        ])
+
+    def test_uses_jobs_as_maximal_number_of_jobs_in_flight(self):
+        SchedulerMock = mock.Mock(wraps=Scheduler)
+        self.patch('retdec.scheduler.Scheduler', SchedulerMock)
+
+        self.call_main('--jobs', '3', 'prog1.exe', 'prog2.exe')
+
+        SchedulerMock.assert_called_once_with(
+            Anything(), policy=Anything(), max_in_flight=3
+        )
+
+    def test_decompiles_smallest_files_first_when_requested(self):
+        big_file = os.path.join(self.tmp_dir.name, 'big.exe')
+        with open(big_file, 'wb') as f:
+            f.write(b'x' * 100)
+        small_file = os.path.join(self.tmp_dir.name, 'small.exe')
+        with open(small_file, 'wb') as f:
+            f.write(b'x')
+
+        self.call_main('--schedule', 'size', big_file, small_file)
+
+        self.assertEqual(
+            [params['input_file'] for params in self.batch],
+            [small_file, big_file]
+        )
+
+    def test_saves_outputs_to_per_file_directories(self):
+        d1 = self.add_decompilation('prog1.exe')
+        d2 = self.add_decompilation('prog2.exe')
+
+        self.call_main('-o', self.tmp_dir.name, 'prog1.exe', 'prog2.exe')
+
+        output_dir1 = os.path.join(self.tmp_dir.name, 'prog1.exe')
+        output_dir2 = os.path.join(self.tmp_dir.name, 'prog2.exe')
+        self.assertEqual(d1.save_all.call_args[0], (output_dir1,))
+        self.assertEqual(d2.save_all.call_args[0], (output_dir2,))
+        self.assertTrue(os.path.isdir(output_dir1))
+        self.assertTrue(os.path.isdir(output_dir2))
+
+    def test_packs_outputs_of_each_file_into_single_file_when_requested(self):
+        def save_all(store, **kwargs):
+            store.save(io.BytesIO(b'int main() {}'), 'prog1.c', 'hll')
+        d1 = self.add_decompilation('prog1.exe')
+        d1.save_all.side_effect = save_all
+        self.add_decompilation('prog2.exe')
+
+        self.call_main(
+            '-o', self.tmp_dir.name, '--pack', 'zip', 'prog1.exe', 'prog2.exe'
+        )
+
+        self.assertEqual(
+            sorted(os.listdir(self.tmp_dir.name)),
+            ['prog1.exe.zip', 'prog2.exe.zip']
+        )
+        path = os.path.join(self.tmp_dir.name, 'prog1.exe.zip')
+        with open_store_reader(path) as reader:
+            self.assertEqual(reader.read('hll'), b'int main() {}')
+
+    def test_returns_zero_when_all_files_are_decompiled(self):
+        self.add_decompilation('prog1.exe')
+        self.add_decompilation('prog2.exe')
+
+        rc = self.call_main('-o', self.tmp_dir.name, 'prog1.exe', 'prog2.exe')
+
+        self.assertEqual(rc, 0)
+        self.assertEqual(self.stderr.getvalue(), '')
+
+    def test_returns_one_and_continues_when_submission_fails(self):
+        d2 = self.add_decompilation('prog2.exe')
+
+        rc = self.call_main('-o', self.tmp_dir.name, 'prog1.exe', 'prog2.exe')
+
+        self.assertEqual(rc, 1)
+        self.assertIn('prog1.exe: No such file.', self.stderr.getvalue())
+        self.assertTrue(d2.save_all.called)
+
+    def test_returns_one_when_decompilation_fails(self):
+        d1 = self.add_decompilation('prog1.exe')
+        d1.wait_until_finished.side_effect = DecompilationFailedError('failed')
+        self.add_decompilation('prog2.exe')
+
+        rc = self.call_main('-o', self.tmp_dir.name, 'prog1.exe', 'prog2.exe')
+
+        self.assertEqual(rc, 1)
+        self.assertIn('prog1.exe: failed', self.stderr.getvalue())
+
+    def test_displays_aggregate_progress_when_dashboard_is_requested(self):
+        self.add_decompilation('prog1.exe')
+        d2 = self.add_decompilation('prog2.exe')
+        d2.wait_until_finished.side_effect = DecompilationFailedError('failed')
+
+        rc = self.call_main(
+            '--dashboard', '-o', self.tmp_dir.name, 'prog1.exe', 'prog2.exe'
+        )
+
+        self.assertEqual(rc, 1)
+        self.assertIn(
+            'Progress: 2/2 files decompiled (1 failed)',
+            self.stdout.getvalue()
+        )
+        self.assertNotIn('OK', self.stdout.getvalue())
+        self.assertEqual(
+            self.stderr.getvalue(),
+            'Error: prog2.exe: failed\n'
+        )
+
+    def test_displays_aggregate_progress_of_single_file(self):
+        self.add_decompilation('prog.exe')
+
+        self.call_main('--dashboard', '-o', self.tmp_dir.name, 'prog.exe')
+
+        self.assertIn(
+            'Progress: 1/1 files decompiled (0 failed)',
+            self.stdout.getvalue()
+        )
+
+    def test_displays_no_progress_when_dashboard_is_requested_in_quiet_mode(self):
+        self.add_decompilation('prog1.exe')
+        self.add_decompilation('prog2.exe')
+
+        self.call_main(
+            '--dashboard', '-q', '-o', self.tmp_dir.name,
+            'prog1.exe', 'prog2.exe'
+        )
+
+        self.assertEqual(self.stdout.getvalue(), '')
+
+    def test_saves_outputs_of_files_from_directory_by_relative_paths(self):
+        input_dir = os.path.join(self.tmp_dir.name, 'in')
+        input_files = []
+        for sub_dir in ('a', 'b'):
+            os.makedirs(os.path.join(input_dir, sub_dir))
+            input_files.append(os.path.join(input_dir, sub_dir, 'prog.exe'))
+            open(input_files[-1], 'wb').close()
+        d1 = self.add_decompilation(input_files[0])
+        d2 = self.add_decompilation(input_files[1])
+        output_dir = os.path.join(self.tmp_dir.name, 'out')
+
+        self.call_main('-o', output_dir, input_dir)
+
+        self.assertEqual(
+            d1.save_all.call_args[0],
+            (os.path.join(output_dir, 'a', 'prog.exe'),)
+        )
+        self.assertEqual(
+            d2.save_all.call_args[0],
+            (os.path.join(output_dir, 'b', 'prog.exe'),)
+        )
+
+    def test_fails_when_outputs_of_two_files_would_be_saved_into_same_dir(self):
+        rc = self.call_main(
+            '-o', self.tmp_dir.name,
+            os.path.join('a', 'prog.exe'), os.path.join('b', 'prog.exe')
+        )
+
+        self.assertEqual(rc, 1)
+        self.assertIn('same directory', self.stderr.getvalue())
+        self.assertEqual(self.batch, [])
+
+    def test_saves_outputs_of_single_file_in_directory_to_per_file_dir(self):
+        input_dir = os.path.join(self.tmp_dir.name, 'in')
+        os.makedirs(input_dir)
+        input_file = os.path.join(input_dir, 'prog.exe')
+        open(input_file, 'wb').close()
+        d = self.add_decompilation(input_file)
+        output_dir = os.path.join(self.tmp_dir.name, 'out')
+
+        self.call_main('-o', output_dir, input_dir)
+
+        self.assertEqual(
+            d.save_all.call_args[0],
+            (os.path.join(output_dir, 'prog.exe'),)
+        )
+
+    def test_saves_outputs_of_single_file_from_shard_to_per_file_dir(self):
+        d1 = self.add_decompilation('prog1.exe')
+        d2 = self.add_decompilation('prog2.exe')
+
+        for index in range(2):
+            self.call_main(
+                '-o', self.tmp_dir.name, '--shard', '{}/2'.format(index),
+                'prog1.exe', 'prog2.exe'
+            )
+
+        self.assertEqual(
+            d1.save_all.call_args[0],
+            (os.path.join(self.tmp_dir.name, 'prog1.exe'),)
+        )
+        self.assertEqual(
+            d2.save_all.call_args[0],
+            (os.path.join(self.tmp_dir.name, 'prog2.exe'),)
+        )
+
+    def test_saves_outputs_of_single_file_to_output_dir_with_dashboard(self):
+        d = self.add_decompilation('prog.exe')
+
+        self.call_main('--dashboard', '-o', self.tmp_dir.name, 'prog.exe')
+
+        self.assertEqual(d.save_all.call_args[0], (self.tmp_dir.name,))
+
+    def test_decompiles_only_files_from_given_shard(self):
+        input_files = ['prog{}.exe'.format(i) for i in range(10)]
+        for input_file in input_files:
+            self.add_decompilation(input_file)
+
+        for index in range(2):
+            self.call_main('--shard', '{}/2'.format(index), *input_files)
+
+        self.assertEqual(
+            sorted(params['input_file'] for params in self.batch),
+            input_files
+        )
+
+    def test_returns_zero_when_shard_is_empty(self):
+        rc = self.call_main('--shard', '0/1000', 'prog1.exe', 'prog2.exe')
+
+        self.assertEqual(rc, 0)
+
+    def test_returns_one_when_no_files_are_found(self):
+        rc = self.call_main(os.path.join(self.tmp_dir.name, '*.exe'))
+
+        self.assertEqual(rc, 1)
+        self.assertIn('No files to decompile', self.stderr.getvalue())
+
+
+class MainManifestTests(ToolTestsBase):
+    """Tests for :func:`retdec.tools.decompiler.main()` when a manifest is
+    used.
+    """
+
+    def setUp(self):
+        super().setUp()
+
+        self.decompiler = mock.MagicMock(spec_set=Decompiler)
+        self.decompiler.start_decompilation.side_effect = \
+            self.start_decompilation
+        self.patch(
+            'retdec.tools.decompiler.Decompiler',
+            mock.Mock(return_value=self.decompiler)
+        )
+
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.output_dir = os.path.join(self.tmp_dir.name, 'out')
+        self.manifest_path = os.path.join(self.tmp_dir.name, 'm.sqlite')
+
+        self.file1 = self.create_input_file('prog1.exe')
+        self.file2 = self.create_input_file('prog2.exe')
+        self.started = []
+
+    def create_input_file(self, name):
+        path = os.path.join(self.tmp_dir.name, name)
+        with open(path, 'wb') as f:
+            f.write(name.encode())
+        return path
+
+    def create_decompilation(self, id):
+        decompilation = mock.MagicMock(spec_set=Decompilation)
+        decompilation.id = id
+        decompilation.save_all.return_value = {'hll': id + '.c'}
+        return decompilation
+
+    def start_decompilation(self, **params):
+        """Fake implementation of ``Decompiler.start_decompilation()``."""
+        self.started.append(params['input_file'])
+        return self.create_decompilation(
+            'ID-' + os.path.basename(params['input_file'])
+        )
+
+    def open_manifest(self):
+        manifest = Manifest(self.manifest_path)
+        self.addCleanup(manifest.close)
+        return manifest
+
+    def call_main(self, *args):
+        """Calls ``main()`` with the given arguments."""
+        return main((
+            'decompiler.py', '--api-key', 'KEY', '-o', self.output_dir,
+            '--manifest', self.manifest_path
+        ) + args)
+
+    def test_records_decompiled_files_into_manifest(self):
+        rc = self.call_main(self.file1, self.file2)
+
+        self.assertEqual(rc, 0)
+        manifest = self.open_manifest()
+        entry = manifest.get(self.file1)
+        self.assertEqual(entry.state, Manifest.DONE)
+        self.assertEqual(entry.id, 'ID-prog1.exe')
+        self.assertEqual(entry.outputs, ['ID-prog1.exe.c'])
+        self.assertEqual(manifest.get(self.file2).state, Manifest.DONE)
+
+    def test_records_single_file_into_manifest(self):
+        self.call_main(self.file1)
+
+        self.assertEqual(
+            self.open_manifest().get(self.file1).state,
+            Manifest.DONE
+        )
+
+    def test_saves_outputs_of_single_file_right_into_output_dir(self):
+        self.call_main(self.file1)
+
+        self.assertEqual(
+            self.open_manifest().get(self.file1).outputs,
+            ['ID-prog1.exe.c']
+        )
+        self.assertTrue(os.path.isdir(self.output_dir))
+        self.assertFalse(
+            os.path.exists(os.path.join(self.output_dir, 'prog1.exe'))
+        )
+
+    def test_records_failed_files_into_manifest(self):
+        self.decompiler.start_decompilation.side_effect = OSError('failed')
+
+        rc = self.call_main(self.file1)
+
+        self.assertEqual(rc, 1)
+        entry = self.open_manifest().get(self.file1)
+        self.assertEqual(entry.state, Manifest.FAILED)
+        self.assertEqual(entry.error, 'failed')
+
+    def test_resume_skips_decompiled_files(self):
+        manifest = self.open_manifest()
+        manifest.mark_submitted(self.file1, {}, 'ID1')
+        manifest.mark_done(self.file1, [])
+
+        rc = self.call_main('--resume', self.file1, self.file2)
+
+        self.assertEqual(rc, 0)
+        self.assertEqual(self.started, [self.file2])
+        self.assertIn(
+            'Resuming: 1 files already decompiled, 0 decompilations in '
+            'progress, 1 files to decompile.',
+            self.stdout.getvalue()
+        )
+
+    def test_resume_waits_for_decompilations_in_progress(self):
+        self.open_manifest().mark_submitted(self.file1, {}, 'ID1')
+        decompilation = self.create_decompilation('ID1')
+        self.decompiler.get_decompilation.return_value = decompilation
+
+        self.call_main('--resume', self.file1)
+
+        self.assertEqual(self.started, [])
+        self.decompiler.get_decompilation.assert_called_once_with('ID1')
+        self.assertTrue(decompilation.save_all.called)
+        self.assertEqual(
+            self.open_manifest().get(self.file1).state,
+            Manifest.DONE
+        )
+
+    def test_resume_resubmits_file_when_decompilation_no_longer_exists(self):
+        self.open_manifest().mark_submitted(self.file1, {}, 'ID1')
+        decompilation = self.create_decompilation('ID1')
+        decompilation.has_finished.side_effect = UnknownAPIError(
+            404, 'Not Found', 'There is no decompilation with ID ID1.'
+        )
+        self.decompiler.get_decompilation.return_value = decompilation
+
+        self.call_main('--resume', self.file1)
+
+        self.assertEqual(self.started, [self.file1])
+
+    def test_resume_retries_failed_files(self):
+        self.open_manifest().mark_failed(self.file1, {}, 'failed')
+
+        self.call_main('--resume', self.file1)
+
+        self.assertEqual(self.started, [self.file1])
+
+    def test_resume_resubmits_files_decompiled_with_other_parameters(self):
+        manifest = self.open_manifest()
+        manifest.mark_submitted(self.file1, {'mode': 'raw'}, 'ID1')
+        manifest.mark_done(self.file1, [])
+
+        self.call_main('--resume', self.file1)
+
+        self.assertEqual(self.started, [self.file1])
+
+    def test_without_resume_decompiles_all_files(self):
+        manifest = self.open_manifest()
+        manifest.mark_submitted(self.file1, {}, 'ID1')
+        manifest.mark_done(self.file1, [])
+
+        self.call_main(self.file1)
+
+        self.assertEqual(self.started, [self.file1])
+
+
+class MainWatchTests(ToolTestsBase):
+    """Tests for :func:`retdec.tools.decompiler.main()` when a directory is
+    watched.
+    """
+
+    def setUp(self):
+        super().setUp()
+
+        self.decompiler = mock.MagicMock(spec_set=Decompiler)
+        self.decompiler.start_decompilation.side_effect = \
+            self.start_decompilation
+        self.DecompilerMock = mock.Mock()
+        self.DecompilerMock.return_value = self.decompiler
+        self.patch(
+            'retdec.tools.decompiler.Decompiler',
+            self.DecompilerMock
+        )
+        self.patch('retdec.watcher.DirectoryWatcher', FakeDirectoryWatcher)
+
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.watched_dir = self.tmp_dir.name
+
+        self.decompilations = {}
+        self.batch = []
+
+    def start_decompilation(self, **params):
+        """Fake implementation of ``Decompiler.start_decompilation()``."""
+        self.batch.append(params)
+        name = os.path.basename(params['input_file'])
+        if name not in self.decompilations:
+            raise OSError('No such file.')
+        return self.decompilations[name]
+
+    def add_file(self, name, decompiled=True):
+        """Creates a file in the watched directory and returns a
+        decompilation that is started for it (when `decompiled` is
+        ``True``).
+        """
+        with open(os.path.join(self.watched_dir, name), 'wb') as f:
+            f.write(b'MZ')
+        if decompiled:
+            decompilation = mock.MagicMock(spec_set=Decompilation)
+            self.decompilations[name] = decompilation
+            return decompilation
+
+    def call_main(self, *args):
+        """Calls ``main()`` with the given arguments."""
+        return main(
+            ('decompiler.py', '--api-key', 'KEY', '--watch', self.watched_dir) +
+            args
+        )
+
+    def test_starts_decompilation_of_each_new_file_with_same_parameters(self):
+        self.add_file('prog1.exe')
+        self.add_file('prog2.exe')
+
+        self.call_main('--mode', 'bin')
+
+        self.assertEqual(
+            sorted(
+                (os.path.basename(params.pop('input_file')), params)
+                for params in self.batch
+            ),
+            [('prog1.exe', {'mode': 'bin'}), ('prog2.exe', {'mode': 'bin'})]
+        )
+
+    def test_moves_decompiled_files_to_done_and_saves_outputs_there(self):
+        decompilation = self.add_file('prog.exe')
+
+        rc = self.call_main()
+
+        entry_dir = os.path.join(self.watched_dir, 'done', 'prog.exe')
+        self.assertEqual(rc, 0)
+        self.assertEqual(os.listdir(entry_dir), ['prog.exe'])
+        self.assertEqual(decompilation.save_all.call_args[0], (entry_dir,))
+        self.assertEqual(self.stderr.getvalue(), '')
+
+    def test_saves_outputs_to_per_file_directories_when_output_dir_is_given(
+            self):
+        decompilation = self.add_file('prog.exe')
+        output_dir = os.path.join(self.watched_dir, 'done', 'outputs')
+
+        self.call_main('-o', output_dir)
+
+        self.assertEqual(
+            decompilation.save_all.call_args[0],
+            (os.path.join(output_dir, 'prog.exe'),)
+        )
+
+    def test_does_not_overwrite_previously_processed_file_with_same_name(
+            self):
+        previous_dir = os.path.join(self.watched_dir, 'done', 'prog.exe')
+        os.makedirs(previous_dir)
+        with open(os.path.join(previous_dir, 'prog.exe'), 'wb') as f:
+            f.write(b'previous')
+        os.makedirs(os.path.join(self.watched_dir, 'failed', 'prog-2.exe'))
+        decompilation = self.add_file('prog.exe')
+
+        rc = self.call_main()
+
+        entry_dir = os.path.join(self.watched_dir, 'done', 'prog-3.exe')
+        self.assertEqual(rc, 0)
+        self.assertEqual(os.listdir(entry_dir), ['prog.exe'])
+        self.assertEqual(decompilation.save_all.call_args[0], (entry_dir,))
+        with open(os.path.join(previous_dir, 'prog.exe'), 'rb') as f:
+            self.assertEqual(f.read(), b'previous')
+
+    def test_moves_files_to_failed_and_returns_one_when_decompilation_fails(
+            self):
+        decompilation = self.add_file('prog1.exe')
+        decompilation.wait_until_finished.side_effect = \
+            DecompilationFailedError('failed')
+        self.add_file('prog2.exe', decompiled=False)
+
+        rc = self.call_main()
+
+        failed_dir = os.path.join(self.watched_dir, 'failed')
+        self.assertEqual(rc, 1)
+        self.assertEqual(
+            sorted(os.listdir(failed_dir)),
+            ['prog1.exe', 'prog2.exe']
+        )
+        self.assertEqual(
+            os.listdir(os.path.join(failed_dir, 'prog1.exe')),
+            ['prog1.exe']
+        )
+        self.assertEqual(
+            os.listdir(os.path.join(self.watched_dir, 'done')),
+            []
+        )
+        self.assertIn('prog1.exe: failed', self.stderr.getvalue())
+        self.assertIn('prog2.exe: No such file.', self.stderr.getvalue())
+
+    def test_uses_jobs_as_maximal_number_of_jobs_in_flight(self):
+        SchedulerMock = mock.Mock(wraps=Scheduler)
+        self.patch('retdec.scheduler.Scheduler', SchedulerMock)
+
+        self.call_main('--jobs', '3')
+
+        SchedulerMock.assert_called_once_with(
+            Anything(), policy=Anything(), max_in_flight=3
+        )
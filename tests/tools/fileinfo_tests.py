@@ -6,11 +6,20 @@
 
 """Tests for the :mod:`retdec.tools.fileinfo` module."""
 
+import io
+import json
+import os
+import tempfile
+import threading
+
 from retdec import __version__
+from retdec.analysis import Analysis
+from retdec.exceptions import AnalysisFailedError
 from retdec.fileinfo import Fileinfo
 from retdec.tools.fileinfo import main
 from retdec.tools.fileinfo import parse_args
 from tests import mock
+from tests.tools import FakeDirectoryWatcher
 from tests.tools import ToolTestsBase
 
 
@@ -25,7 +34,49 @@ class ParseArgsTests(ToolTestsBase):
     def test_file_is_parsed_correctly(self):
         args = parse_args(['fileinfo.py', 'prog.exe'])
 
-        self.assertEqual(args.input_file, 'prog.exe')
+        self.assertEqual(args.input_files, ['prog.exe'])
+
+    def test_multiple_files_are_parsed_correctly(self):
+        args = parse_args(['fileinfo.py', 'prog1.exe', 'prog2.exe'])
+
+        self.assertEqual(args.input_files, ['prog1.exe', 'prog2.exe'])
+
+    def test_watch_is_parsed_correctly(self):
+        args = parse_args(['fileinfo.py', '--watch', 'drop'])
+
+        self.assertEqual(args.watch, 'drop')
+
+    def test_watch_cannot_be_given_together_with_file(self):
+        with self.assertRaises(SystemExit) as cm:
+            parse_args(['fileinfo.py', '--watch', 'drop', 'prog.exe'])
+        self.assertNotEqual(cm.exception.code, 0)
+
+    def test_daemon_socket_is_parsed_correctly(self):
+        args = parse_args(
+            ['fileinfo.py', '--daemon-socket', 'retdecd.sock', 'prog.exe']
+        )
+
+        self.assertEqual(args.daemon_socket, 'retdecd.sock')
+
+    def test_jobs_is_parsed_correctly_short_form(self):
+        args = parse_args(['fileinfo.py', '-j', '4', 'prog.exe'])
+
+        self.assertEqual(args.jobs, 4)
+
+    def test_jobs_is_parsed_correctly_long_form(self):
+        args = parse_args(['fileinfo.py', '--jobs', '4', 'prog.exe'])
+
+        self.assertEqual(args.jobs, 4)
+
+    def test_jobs_has_to_be_positive(self):
+        with self.assertRaises(SystemExit) as cm:
+            parse_args(['fileinfo.py', '--jobs', '0', 'prog.exe'])
+        self.assertNotEqual(cm.exception.code, 0)
+
+    def test_shard_is_parsed_correctly(self):
+        args = parse_args(['fileinfo.py', '--shard', '0/2', 'prog.exe'])
+
+        self.assertEqual(args.shard, (0, 2))
 
     def test_api_key_is_parsed_correctly_short_form(self):
         args = parse_args(['fileinfo.py', '-k', 'KEY', 'prog.exe'])
@@ -96,6 +147,10 @@ class MainTests(ToolTestsBase):
     def setUp(self):
         super().setUp()
 
+        # The output is written into the binary buffer of the standard output.
+        self.stdout = io.TextIOWrapper(io.BytesIO(), encoding='utf-8')
+        self.patch('sys.stdout', self.stdout)
+
         # Mock Fileinfo so that when it is instantiated, it returns our
         # fileinfo that can be used in the tests.
         self.fileinfo = mock.Mock(spec_set=Fileinfo)
@@ -106,15 +161,23 @@ class MainTests(ToolTestsBase):
             self.FileinfoMock
         )
 
+    def get_stdout(self):
+        """Returns everything that was written to the standard output."""
+        self.stdout.flush()
+        return self.stdout.buffer.getvalue().decode()
+
     def test_performs_correct_actions(self):
-        self.fileinfo.start_analysis.return_value.get_output.return_value = 'OUTPUT'
+        def write_output(file):
+            file.write(b'OUTPUT')
+        self.fileinfo.start_analysis.return_value.write_output = write_output
 
         main(['fileinfo.py', '--api-key', 'API-KEY', 'prog.exe'])
 
         # Fileinfo is instantiated with correct arguments.
         self.FileinfoMock.assert_called_once_with(
             api_url=None,
-            api_key='API-KEY'
+            api_key='API-KEY',
+            daemon_socket=None
         )
 
         # Analysis is started with correct arguments.
@@ -129,4 +192,259 @@ class MainTests(ToolTestsBase):
         analysis.wait_until_finished.assert_called_once_with()
 
         # The output from the analysis is written to the standard output.
-        self.assertEqual(self.stdout.getvalue(), 'OUTPUT')
+        self.assertEqual(self.get_stdout(), 'OUTPUT')
+
+    def test_passes_daemon_socket_to_fileinfo_when_given(self):
+        main([
+            'fileinfo.py', '--api-key', 'API-KEY',
+            '--daemon-socket', 'retdecd.sock', 'prog.exe'
+        ])
+
+        self.FileinfoMock.assert_called_once_with(
+            api_url=None,
+            api_key='API-KEY',
+            daemon_socket='retdecd.sock'
+        )
+
+
+class MainBatchTests(ToolTestsBase):
+    """Tests for :func:`retdec.tools.fileinfo.main()` in the batch mode."""
+
+    def setUp(self):
+        super().setUp()
+
+        self.fileinfo = mock.Mock(spec_set=Fileinfo)
+        self.fileinfo.start_analysis.side_effect = self.start_analysis
+        self.FileinfoMock = mock.Mock()
+        self.FileinfoMock.return_value = self.fileinfo
+        self.patch(
+            'retdec.tools.fileinfo.Fileinfo',
+            self.FileinfoMock
+        )
+
+        self.analyses = {}
+        self.batch = []
+
+    def start_analysis(self, **params):
+        """Fake implementation of ``Fileinfo.start_analysis()``."""
+        self.batch.append(params)
+        if params['input_file'] not in self.analyses:
+            raise OSError('No such file.')
+        return self.analyses[params['input_file']]
+
+    def add_analysis(self, input_file, id, output):
+        """Adds an analysis that is started for the given file."""
+        analysis = mock.Mock(spec_set=Analysis)
+        analysis.id = id
+        analysis.get_output.return_value = output
+        self.analyses[input_file] = analysis
+        return analysis
+
+    def get_results(self):
+        """Returns parsed lines from the standard output."""
+        return sorted(
+            (json.loads(line) for line in self.stdout.getvalue().splitlines()),
+            key=lambda result: result['input_file']
+        )
+
+    def test_prints_json_object_per_line_for_each_file(self):
+        self.add_analysis('prog1.exe', 'ID1', 'OUTPUT1')
+        self.add_analysis('prog2.exe', 'ID2', 'OUTPUT2')
+
+        rc = main(['fileinfo.py', 'prog1.exe', 'prog2.exe'])
+
+        self.assertEqual(rc, 0)
+        self.assertEqual(self.get_results(), [
+            {'input_file': 'prog1.exe', 'id': 'ID1', 'output': 'OUTPUT1'},
+            {'input_file': 'prog2.exe', 'id': 'ID2', 'output': 'OUTPUT2'}
+        ])
+
+    def test_embeds_output_as_object_when_output_format_is_json(self):
+        self.add_analysis('prog1.exe', 'ID1', '{"format": "PE"}')
+        self.add_analysis('prog2.exe', 'ID2', '{"format": "ELF"}')
+
+        main(['fileinfo.py', '-f', 'json', 'prog1.exe', 'prog2.exe'])
+
+        results = self.get_results()
+        self.assertEqual(results[0]['output'], {'format': 'PE'})
+        self.assertEqual(results[1]['output'], {'format': 'ELF'})
+
+    def test_reports_file_as_failed_when_json_output_is_invalid(self):
+        self.add_analysis('prog1.exe', 'ID1', 'not JSON')
+        self.add_analysis('prog2.exe', 'ID2', '{"format": "ELF"}')
+
+        rc = main(['fileinfo.py', '-f', 'json', 'prog1.exe', 'prog2.exe'])
+
+        results = self.get_results()
+        self.assertEqual(rc, 1)
+        self.assertEqual(results[0]['id'], 'ID1')
+        self.assertIn('Invalid JSON output', results[0]['error'])
+        self.assertEqual(results[1]['output'], {'format': 'ELF'})
+
+    def test_reads_files_from_stdin_when_file_is_dash(self):
+        self.add_analysis('prog1.exe', 'ID1', 'OUTPUT1')
+        self.add_analysis('prog2.exe', 'ID2', 'OUTPUT2')
+        self.patch('sys.stdin', io.StringIO('prog1.exe\n\nprog2.exe\n'))
+
+        main(['fileinfo.py', '--verbose', '-'])
+
+        self.assertEqual(self.batch, [
+            {'input_file': 'prog1.exe', 'output_format': 'plain', 'verbose': True},
+            {'input_file': 'prog2.exe', 'output_format': 'plain', 'verbose': True}
+        ])
+
+    def test_analyzes_only_files_from_given_shard(self):
+        input_files = ['prog{}.exe'.format(i) for i in range(10)]
+
+        for index in range(2):
+            main(['fileinfo.py', '--shard', '{}/2'.format(index)] +
+                 input_files)
+
+        self.assertEqual(
+            sorted(params['input_file'] for params in self.batch),
+            input_files
+        )
+
+    def test_uses_batch_mode_for_single_file_when_shard_is_given(self):
+        self.add_analysis('prog.exe', 'ID', 'OUTPUT')
+
+        main(['fileinfo.py', '--shard', '0/1', 'prog.exe'])
+
+        self.assertEqual(self.get_results(), [
+            {'input_file': 'prog.exe', 'id': 'ID', 'output': 'OUTPUT'}
+        ])
+
+    def test_keeps_at_most_jobs_analyses_in_flight(self):
+        lock = threading.Lock()
+        in_flight = [0]
+        max_in_flight = [0]
+        input_files = ['prog{}.exe'.format(i) for i in range(10)]
+        for input_file in input_files:
+            analysis = self.add_analysis(input_file, input_file, 'OUTPUT')
+            analysis.wait_until_finished.side_effect = \
+                lambda: threading.Event().wait(0.01)
+
+        def start_analysis(**params):
+            with lock:
+                in_flight[0] += 1
+                max_in_flight[0] = max(max_in_flight[0], in_flight[0])
+            return self.start_analysis(**params)
+
+        def get_output():
+            with lock:
+                in_flight[0] -= 1
+            return 'OUTPUT'
+
+        self.fileinfo.start_analysis.side_effect = start_analysis
+        for analysis in self.analyses.values():
+            analysis.get_output.side_effect = get_output
+
+        rc = main(['fileinfo.py', '-j', '3'] + input_files)
+
+        self.assertEqual(rc, 0)
+        self.assertEqual(len(self.get_results()), 10)
+        self.assertLessEqual(max_in_flight[0], 3)
+
+    def test_prints_error_and_returns_one_when_submission_fails(self):
+        self.add_analysis('prog2.exe', 'ID2', 'OUTPUT2')
+
+        rc = main(['fileinfo.py', 'prog1.exe', 'prog2.exe'])
+
+        self.assertEqual(rc, 1)
+        self.assertEqual(
+            self.get_results()[0],
+            {'input_file': 'prog1.exe', 'error': 'No such file.'}
+        )
+
+    def test_prints_error_and_returns_one_when_analysis_fails(self):
+        analysis = self.add_analysis('prog1.exe', 'ID1', 'OUTPUT1')
+        analysis.wait_until_finished.side_effect = AnalysisFailedError('failed')
+        self.add_analysis('prog2.exe', 'ID2', 'OUTPUT2')
+
+        rc = main(['fileinfo.py', 'prog1.exe', 'prog2.exe'])
+
+        self.assertEqual(rc, 1)
+        self.assertEqual(
+            self.get_results()[0],
+            {'input_file': 'prog1.exe', 'id': 'ID1', 'error': 'failed'}
+        )
+
+
+class MainWatchTests(ToolTestsBase):
+    """Tests for :func:`retdec.tools.fileinfo.main()` when a directory is
+    watched.
+    """
+
+    def setUp(self):
+        super().setUp()
+
+        self.fileinfo = mock.Mock(spec_set=Fileinfo)
+        self.fileinfo.start_analysis.side_effect = self.start_analysis
+        self.FileinfoMock = mock.Mock()
+        self.FileinfoMock.return_value = self.fileinfo
+        self.patch(
+            'retdec.tools.fileinfo.Fileinfo',
+            self.FileinfoMock
+        )
+        self.patch('retdec.watcher.DirectoryWatcher', FakeDirectoryWatcher)
+
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.watched_dir = self.tmp_dir.name
+
+        self.analyses = {}
+        self.started = []
+
+    def start_analysis(self, **params):
+        """Fake implementation of ``Fileinfo.start_analysis()``."""
+        self.started.append(params)
+        return self.analyses[os.path.basename(params['input_file'])]
+
+    def add_file(self, name, id, output):
+        """Creates a file in the watched directory and returns an analysis
+        that is started for it.
+        """
+        with open(os.path.join(self.watched_dir, name), 'wb') as f:
+            f.write(b'MZ')
+        analysis = mock.Mock(spec_set=Analysis)
+        analysis.id = id
+        analysis.get_output.return_value = output
+        self.analyses[name] = analysis
+        return analysis
+
+    def call_main(self, *args):
+        """Calls ``main()`` with the given arguments."""
+        return main(
+            ('fileinfo.py', '--api-key', 'KEY', '--watch', self.watched_dir) +
+            args
+        )
+
+    def test_prints_json_object_per_line_and_moves_file_to_done(self):
+        self.add_file('prog.exe', 'ID', 'PE')
+
+        rc = self.call_main('--verbose')
+
+        self.assertEqual(rc, 0)
+        self.assertEqual(json.loads(self.stdout.getvalue()), {
+            'input_file': os.path.join(self.watched_dir, 'prog.exe'),
+            'id': 'ID',
+            'output': 'PE'
+        })
+        self.assertEqual(self.started[0]['verbose'], True)
+        self.assertEqual(
+            os.listdir(os.path.join(self.watched_dir, 'done', 'prog.exe')),
+            ['prog.exe']
+        )
+
+    def test_moves_file_to_failed_and_returns_one_when_analysis_fails(self):
+        analysis = self.add_file('prog.exe', 'ID', 'PE')
+        analysis.wait_until_finished.side_effect = AnalysisFailedError('bad')
+
+        rc = self.call_main()
+
+        self.assertEqual(rc, 1)
+        self.assertEqual(json.loads(self.stdout.getvalue())['error'], 'bad')
+        self.assertEqual(
+            os.listdir(os.path.join(self.watched_dir, 'failed', 'prog.exe')),
+            ['prog.exe']
+        )
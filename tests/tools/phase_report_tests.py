@@ -0,0 +1,130 @@
+#
+# Project:   retdec-python
+# Copyright: (c) 2015 by Petr Zemek <s3rvac@gmail.com> and contributors
+# License:   MIT, see the LICENSE file for more details
+#
+
+"""Tests for the :mod:`retdec.tools.phase_report` module."""
+
+import json
+import os
+import tempfile
+
+from retdec.tools.phase_report import format_group
+from retdec.tools.phase_report import format_phase
+from retdec.tools.phase_report import format_summary
+from retdec.tools.phase_report import main
+from retdec.tools.phase_report import parse_args
+from tests.tools import ToolTestsBase
+
+
+class ParseArgsTests(ToolTestsBase):
+    """Tests for :func:`retdec.tools.phase_report.parse_args()`."""
+
+    def test_logs_are_parsed_correctly(self):
+        args = parse_args(['retdec-phase-report', 'a.jsonl', 'b.jsonl'])
+
+        self.assertEqual(args.logs, ['a.jsonl', 'b.jsonl'])
+        self.assertEqual(args.by, [])
+        self.assertFalse(args.include_failed)
+
+    def test_by_can_be_given_several_times(self):
+        args = parse_args([
+            'retdec-phase-report',
+            '--by', 'decomp_optimizations',
+            '--by', 'sel_decomp_decoding',
+            'a.jsonl'
+        ])
+
+        self.assertEqual(
+            args.by,
+            ['decomp_optimizations', 'sel_decomp_decoding']
+        )
+
+
+class FormatTests(ToolTestsBase):
+    """Tests for formatting functions of
+    :mod:`retdec.tools.phase_report`.
+    """
+
+    def test_format_group_returns_all_when_not_grouped(self):
+        self.assertEqual(format_group([], ()), 'All decompilations')
+
+    def test_format_group_returns_values_of_params(self):
+        self.assertEqual(
+            format_group(['a', 'b'], ('x', None)),
+            'a=x, b=(default)'
+        )
+
+    def test_format_phase_returns_name_when_phase_has_no_part(self):
+        self.assertEqual(format_phase((None, 'Total')), 'Total')
+
+    def test_format_phase_returns_part_and_name_when_phase_has_part(self):
+        self.assertEqual(
+            format_phase(('Front-End', 'Decoding')),
+            'Front-End: Decoding'
+        )
+
+    def test_format_summary_returns_aligned_table(self):
+        table = format_summary(
+            [(('Front-End', 'Decoding'), 10, [1.0, 2.5]),
+             ((None, 'Total'), 10, [3.25, 10.0])],
+            (50, 95)
+        )
+
+        self.assertEqual(
+            table,
+            'Phase                  Jobs        p50        p95\n'
+            'Front-End: Decoding      10      1.00s      2.50s\n'
+            'Total                    10      3.25s     10.00s'
+        )
+
+
+class MainTests(ToolTestsBase):
+    """Tests for :func:`retdec.tools.phase_report.main()`."""
+
+    def setUp(self):
+        super().setUp()
+
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+
+    def write_log(self, *records):
+        """Writes the given records into a log and returns its path."""
+        path = os.path.join(self.tmp_dir.name, 'phases.jsonl')
+        with open(path, 'w', encoding='utf-8') as f:
+            for record in records:
+                f.write(json.dumps(record) + '\n')
+        return path
+
+    def test_prints_summary_of_each_group(self):
+        log = self.write_log(
+            {'id': '1', 'params': {'decomp_optimizations': 'none'},
+             'phases': [['Front-End', 'Decoding', 0.0]], 'total': 2.0,
+             'failed': False},
+            {'id': '2', 'params': {'decomp_optimizations': 'normal'},
+             'phases': [['Front-End', 'Decoding', 0.0]], 'total': 4.0,
+             'failed': False}
+        )
+
+        exit_code = main([
+            'retdec-phase-report', '--by', 'decomp_optimizations', log
+        ])
+
+        self.assertEqual(exit_code, 0)
+        output = self.stdout.getvalue()
+        self.assertIn('decomp_optimizations=none\n', output)
+        self.assertIn('decomp_optimizations=normal\n', output)
+        self.assertLess(
+            output.index('=none'), output.index('=normal')
+        )
+        self.assertIn('Front-End: Decoding', output)
+        self.assertIn('p99', output)
+
+    def test_returns_error_when_there_are_no_decompilations(self):
+        log = self.write_log()
+
+        exit_code = main(['retdec-phase-report', log])
+
+        self.assertEqual(exit_code, 1)
+        self.assertIn('No decompilations', self.stderr.getvalue())
@@ -0,0 +1,270 @@
+#
+# Project:   retdec-python
+# Copyright: (c) 2015 by Petr Zemek <s3rvac@gmail.com> and contributors
+# License:   MIT, see the LICENSE file for more details
+#
+
+"""Tests for the :mod:`retdec.tools.worker` module."""
+
+import os
+import shutil
+import tempfile
+
+from retdec.decompilation import Decompilation
+from retdec.decompiler import Decompiler
+from retdec.exceptions import DecompilationFailedError
+from retdec.exceptions import LeaseLostError
+from retdec.queue import SQLiteWorkQueue
+from retdec.queue import WorkItem
+from retdec.tools.worker import get_output_dir
+from retdec.tools.worker import get_outputs_to_save
+from retdec.tools.worker import main
+from retdec.tools.worker import parse_args
+from tests import mock
+from tests.matchers import Anything
+from tests.tools import ToolTestsBase
+
+
+class ParseArgsTests(ToolTestsBase):
+    """Tests for :func:`retdec.tools.worker.parse_args()`."""
+
+    def test_queue_is_parsed_correctly(self):
+        args = parse_args(['worker', 'queue.sqlite'])
+
+        self.assertEqual(args.queue, 'queue.sqlite')
+
+    def test_files_to_add_are_parsed_correctly(self):
+        args = parse_args(
+            ['worker', 'queue.sqlite', '--add', 'a.exe', 'b.exe']
+        )
+
+        self.assertEqual(args.files_to_add, ['a.exe', 'b.exe'])
+
+    def test_worker_options_have_correct_defaults(self):
+        args = parse_args(['worker', 'queue.sqlite'])
+
+        self.assertIsNone(args.files_to_add)
+        self.assertFalse(args.status)
+        self.assertIsNone(args.output_dir)
+        self.assertEqual(args.visibility_timeout, 3600)
+        self.assertEqual(args.max_attempts, 3)
+        self.assertFalse(args.exit_when_empty)
+        self.assertEqual(args.durability, 'none')
+
+    def test_worker_options_are_parsed_correctly(self):
+        args = parse_args([
+            'worker', 'queue.sqlite', '-o', 'out',
+            '--visibility-timeout', '60', '--max-attempts', '5',
+            '--poll-interval', '0.5', '--exit-when-empty'
+        ])
+
+        self.assertEqual(args.output_dir, 'out')
+        self.assertEqual(args.visibility_timeout, 60)
+        self.assertEqual(args.max_attempts, 5)
+        self.assertEqual(args.poll_interval, 0.5)
+        self.assertTrue(args.exit_when_empty)
+
+
+class GetOutputDirTests(ToolTestsBase):
+    """Tests for :func:`retdec.tools.worker.get_output_dir()`."""
+
+    def test_returns_subdirectory_named_after_item_id_when_output_dir_given(self):
+        args = parse_args(['worker', 'queue.sqlite', '-o', '/out'])
+        item = WorkItem('42', {'input_file': '/corpus/file.exe'}, 1, 'T')
+
+        self.assertEqual(
+            get_output_dir(args, item),
+            os.path.join(os.path.abspath('/out'), '42')
+        )
+
+    def test_returns_directory_of_input_file_when_output_dir_not_given(self):
+        args = parse_args(['worker', 'queue.sqlite'])
+        item = WorkItem('42', {'input_file': '/corpus/file.exe'}, 1, 'T')
+
+        self.assertEqual(
+            get_output_dir(args, item),
+            os.path.abspath('/corpus')
+        )
+
+
+class GetOutputsToSaveTests(ToolTestsBase):
+    """Tests for :func:`retdec.tools.worker.get_outputs_to_save()`."""
+
+    def test_returns_only_hll_and_dsm_by_default(self):
+        self.assertEqual(get_outputs_to_save({}), ['hll', 'dsm'])
+
+    def test_returns_also_generated_outputs(self):
+        self.assertEqual(
+            get_outputs_to_save({
+                'generate_cg': True,
+                'generate_cfgs': True,
+                'generate_archive': True
+            }),
+            ['hll', 'dsm', 'cg', 'cfgs', 'archive']
+        )
+
+
+class MainTests(ToolTestsBase):
+    """Tests for :func:`retdec.tools.worker.main()`."""
+
+    def setUp(self):
+        super().setUp()
+
+        self.tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp_dir)
+        self.queue_path = os.path.join(self.tmp_dir, 'queue.sqlite')
+        self.output_dir = os.path.join(self.tmp_dir, 'out')
+
+        self.decompiler = mock.Mock(spec_set=Decompiler)
+        self.decompilation = mock.Mock(spec_set=Decompilation)
+        self.decompilation.id = 'ID'
+        self.decompiler.start_decompilation.return_value = self.decompilation
+        self.patch(
+            'retdec.tools.worker.Decompiler',
+            mock.Mock(return_value=self.decompiler)
+        )
+
+    def get_counts(self):
+        with SQLiteWorkQueue(self.queue_path) as queue:
+            return queue.counts()
+
+    def test_add_puts_files_into_queue(self):
+        main([
+            'worker', self.queue_path, '--add', 'a.exe', 'b.exe', '--with-cg'
+        ])
+
+        with SQLiteWorkQueue(self.queue_path) as queue:
+            item = queue.lease()
+        self.assertEqual(item.payload, {
+            'input_file': os.path.abspath('a.exe'),
+            'params': {'generate_cg': True}
+        })
+        self.assertEqual(self.get_counts()['pending'], 1)
+
+    def test_status_prints_number_of_items_in_each_state(self):
+        main(['worker', self.queue_path, '--add', 'a.exe'])
+
+        main(['worker', self.queue_path, '--status'])
+
+        self.assertEqual(
+            self.stdout.getvalue(),
+            'done: 0\nfailed: 0\nleased: 0\npending: 1\n'
+        )
+
+    def test_worker_decompiles_files_from_queue_and_acks_them(self):
+        main(['worker', self.queue_path, '--add', 'a.exe', '--with-cfgs'])
+
+        rc = main([
+            'worker', self.queue_path, '-o', self.output_dir,
+            '--exit-when-empty'
+        ])
+
+        self.assertEqual(rc, 0)
+        self.decompiler.start_decompilation.assert_called_once_with(
+            input_file=os.path.abspath('a.exe'),
+            generate_cfgs=True
+        )
+        self.decompilation.save_all.assert_called_once_with(
+            os.path.join(self.output_dir, '1'),
+            outputs=['hll', 'dsm', 'cfgs'],
+            on_generation_failure=Anything(),
+            durability='none'
+        )
+        self.assertTrue(
+            os.path.isdir(os.path.join(self.output_dir, '1'))
+        )
+        self.assertEqual(self.get_counts()['done'], 1)
+
+    def test_worker_returns_failed_file_to_queue_and_continues(self):
+        main(['worker', self.queue_path, '--add', 'a.exe', 'b.exe'])
+        self.decompilation.wait_until_finished.side_effect = [
+            DecompilationFailedError('failed'), None
+        ]
+
+        main([
+            'worker', self.queue_path, '-o', self.output_dir,
+            '--max-attempts', '1', '--exit-when-empty'
+        ])
+
+        self.assertIn(
+            'Error: {}: failed'.format(os.path.abspath('a.exe')),
+            self.stderr.getvalue()
+        )
+        counts = self.get_counts()
+        self.assertEqual(counts['failed'], 1)
+        self.assertEqual(counts['done'], 1)
+
+    def test_worker_saves_outputs_of_files_with_same_name_separately(self):
+        main(['worker', self.queue_path, '--add', 'a/prog.exe', 'b/prog.exe'])
+
+        main([
+            'worker', self.queue_path, '-o', self.output_dir,
+            '--exit-when-empty'
+        ])
+
+        self.assertEqual(
+            [c[0][0] for c in self.decompilation.save_all.call_args_list],
+            [os.path.join(self.output_dir, '1'),
+             os.path.join(self.output_dir, '2')]
+        )
+
+    def test_worker_renews_lease_when_half_of_visibility_timeout_elapses(self):
+        main(['worker', self.queue_path, '--add', 'a.exe'])
+        renew = mock.Mock()
+        self.patch('retdec.queue.SQLiteWorkQueue.renew', renew)
+        # Only the time seen by the worker is faked (other threads may use
+        # the time module as well).
+        self.patch(
+            'retdec.tools.worker.time',
+            mock.Mock(monotonic=mock.Mock(side_effect=[0, 10, 40]))
+        )
+        renewals = []
+
+        def wait_until_finished(callback):
+            for _ in range(2):
+                callback(self.decompilation)
+                renewals.append(renew.call_count)
+
+        self.decompilation.wait_until_finished.side_effect = \
+            wait_until_finished
+
+        main([
+            'worker', self.queue_path, '--visibility-timeout', '60',
+            '--exit-when-empty'
+        ])
+
+        self.assertEqual(renewals, [0, 1])
+        self.assertEqual(self.get_counts()['done'], 1)
+
+    def test_worker_skips_item_whose_lease_has_been_lost(self):
+        main(['worker', self.queue_path, '--add', 'a.exe'])
+        self.patch(
+            'retdec.queue.SQLiteWorkQueue.renew',
+            mock.Mock(side_effect=LeaseLostError('1'))
+        )
+        self.patch(
+            'retdec.tools.worker.time',
+            mock.Mock(monotonic=mock.Mock(side_effect=[0, 100]))
+        )
+        self.decompilation.wait_until_finished.side_effect = \
+            lambda callback: callback(self.decompilation)
+
+        rc = main([
+            'worker', self.queue_path, '--visibility-timeout', '60',
+            '--exit-when-empty'
+        ])
+
+        self.assertEqual(rc, 0)
+        self.assertIn("lease of item '1' has been lost", self.stderr.getvalue())
+        self.assertEqual(self.get_counts()['leased'], 1)
+
+    def test_worker_waits_for_new_files_when_queue_is_empty(self):
+        sleep = mock.Mock(side_effect=KeyboardInterrupt)
+        self.patch('time.sleep', sleep)
+
+        with self.assertRaises(KeyboardInterrupt):
+            main([
+                'worker', self.queue_path, '--poll-interval', '2'
+            ])
+
+        sleep.assert_called_once_with(2)
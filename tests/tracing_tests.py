@@ -0,0 +1,271 @@
+#
+# Project:   retdec-python
+# Copyright: (c) 2015 by Petr Zemek <s3rvac@gmail.com> and contributors
+# License:   MIT, see the LICENSE file for more details
+#
+
+"""Tests for the :mod:`retdec.tracing` module."""
+
+import gc
+import unittest
+
+from retdec import hooks
+from retdec import tracing
+from retdec.conn import APIConnection
+from retdec.decompilation import Decompilation
+from retdec.exceptions import ConnectionError
+from retdec.exceptions import DecompilationFailedError
+from retdec.exceptions import MissingDependencyError
+from retdec.hooks import RequestInfo
+from retdec.tracing import TracingHooks
+from tests import WithPatching
+from tests import mock
+
+try:
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+    from opentelemetry.sdk.trace.export.in_memory_span_exporter import \
+        InMemorySpanExporter
+except ImportError:
+    TracerProvider = None
+
+BASE_PATH = '/service/api/decompiler/decompilations'
+
+
+class MissingOpenTelemetryTests(unittest.TestCase, WithPatching):
+    """Tests for :mod:`retdec.tracing` when OpenTelemetry is not installed."""
+
+    def setUp(self):
+        super().setUp()
+
+        self.patch('retdec.tracing.trace', None)
+        self.patch('retdec.tracing.propagate', None)
+
+    def test_tracing_hooks_cannot_be_created(self):
+        with self.assertRaises(MissingDependencyError):
+            TracingHooks()
+
+    def test_enable_raises_exception_and_registers_nothing(self):
+        with self.assertRaises(MissingDependencyError):
+            tracing.enable()
+
+        self.assertEqual(hooks.registered(), ())
+
+
+@unittest.skipIf(TracerProvider is None, 'requires opentelemetry-sdk')
+class TracingHooksTests(unittest.TestCase):
+    """Tests for :class:`retdec.tracing.TracingHooks`."""
+
+    def setUp(self):
+        super().setUp()
+
+        self.exporter = InMemorySpanExporter()
+        provider = TracerProvider()
+        provider.add_span_processor(SimpleSpanProcessor(self.exporter))
+        self.hooks = TracingHooks(provider.get_tracer('test'))
+
+    def finished_spans(self, name=None):
+        """Returns the finished spans (with the given name)."""
+        return [
+            span for span in self.exporter.get_finished_spans()
+            if name is None or span.name == name
+        ]
+
+    def send_request(self, method, path, resource_id=None, kind_path=None):
+        """Simulates a successful request and returns its information."""
+        request = RequestInfo(
+            method, BASE_PATH + (kind_path or path),
+            'https://retdec.com' + BASE_PATH + path, resource_id
+        )
+        self.hooks.on_request_start(request)
+        request.status_code = 200
+        self.hooks.on_response(request)
+        self.hooks.on_request_end(request, 0.1)
+        return request
+
+    def start_decompilation(self, id='ID'):
+        """Simulates starting of a decompilation and returns it."""
+        request = self.send_request('POST', '')
+        decompilation = Decompilation(id, mock.Mock(spec_set=APIConnection))
+        self.hooks.on_resource_start(decompilation)
+        return decompilation, request
+
+    def poll_status(self, decompilation, status):
+        """Simulates checking the status of the given decompilation."""
+        status.setdefault('finished', False)
+        status.setdefault('failed', False)
+        self.send_request(
+            'GET', '/{}/status'.format(decompilation.id), decompilation.id,
+            '/{id}/status'
+        )
+        self.hooks.on_resource_status(decompilation, status)
+        if status['finished']:
+            self.hooks.on_resource_finish(decompilation, status)
+
+    def phase(self, name, completion):
+        return {
+            'name': name,
+            'part': None,
+            'description': name + '.',
+            'completion': completion,
+            'warnings': []
+        }
+
+    def test_upload_is_child_of_root_span_named_after_resource(self):
+        decompilation, _ = self.start_decompilation()
+        del decompilation
+        gc.collect()
+
+        upload, = self.finished_spans('retdec.upload')
+        root, = self.finished_spans('retdec.decompilation')
+        self.assertEqual(upload.parent.span_id, root.context.span_id)
+        self.assertEqual(root.attributes['retdec.id'], 'ID')
+        self.assertEqual(upload.attributes['http.method'], 'POST')
+        self.assertEqual(upload.attributes['http.status_code'], 200)
+
+    def test_root_span_ends_when_resource_finishes(self):
+        decompilation, _ = self.start_decompilation()
+
+        self.poll_status(decompilation, {'completion': 100, 'finished': True})
+
+        root, = self.finished_spans('retdec.decompilation')
+        self.assertFalse(root.attributes['retdec.failed'])
+
+    def test_download_after_resource_finished_is_child_of_root_span(self):
+        decompilation, _ = self.start_decompilation()
+        self.poll_status(decompilation, {'completion': 100, 'finished': True})
+
+        self.send_request(
+            'GET', '/ID/outputs/hll', 'ID', '/{id}/outputs/hll'
+        )
+
+        download, = self.finished_spans('retdec.download')
+        self.assertEqual(download.parent.span_id, self.root_span_id())
+
+    def test_root_span_ends_when_unfinished_resource_is_garbage_collected(self):
+        decompilation, _ = self.start_decompilation()
+
+        self.assertEqual(self.finished_spans('retdec.decompilation'), [])
+        del decompilation
+        gc.collect()
+
+        self.assertEqual(len(self.finished_spans('retdec.decompilation')), 1)
+
+    def test_trace_context_is_propagated_in_request_headers(self):
+        _, request = self.start_decompilation()
+
+        upload, = self.finished_spans('retdec.upload')
+        self.assertIn(
+            '{:032x}'.format(upload.context.trace_id),
+            request.headers['traceparent']
+        )
+
+    def test_status_span_has_completion_attribute(self):
+        decompilation, _ = self.start_decompilation()
+
+        self.poll_status(decompilation, {'completion': 40, 'phases': []})
+
+        status, = self.finished_spans('retdec.status')
+        self.assertEqual(status.attributes['retdec.completion'], 40)
+        self.assertFalse(status.attributes['retdec.finished'])
+        self.assertEqual(status.parent.span_id, self.root_span_id())
+
+    def test_phase_spans_end_when_next_phase_starts_or_resource_finishes(self):
+        decompilation, _ = self.start_decompilation()
+
+        self.poll_status(decompilation, {
+            'completion': 10,
+            'phases': [self.phase('Init', 10)]
+        })
+        self.assertEqual(self.finished_spans('retdec.phase'), [])
+        self.poll_status(decompilation, {
+            'completion': 50,
+            'phases': [self.phase('Init', 10), self.phase('Decoding', 50)]
+        })
+        self.poll_status(decompilation, {
+            'completion': 100,
+            'finished': True,
+            'phases': [self.phase('Init', 10), self.phase('Decoding', 50)]
+        })
+
+        phases = self.finished_spans('retdec.phase')
+        self.assertEqual(
+            [span.attributes['retdec.phase.name'] for span in phases],
+            ['Init', 'Decoding']
+        )
+        self.assertEqual(phases[1].attributes['retdec.phase.completion'], 50)
+
+    def test_download_is_child_of_root_span(self):
+        decompilation, _ = self.start_decompilation()
+
+        self.send_request(
+            'GET', '/ID/outputs/hll', 'ID', '/{id}/outputs/hll'
+        )
+
+        download, = self.finished_spans('retdec.download')
+        self.assertEqual(download.parent.span_id, self.root_span_id())
+
+    def test_failed_resource_has_error_status(self):
+        decompilation, _ = self.start_decompilation()
+
+        self.poll_status(decompilation, {
+            'finished': True,
+            'failed': True,
+            'error': 'Error.'
+        })
+        self.hooks.on_resource_error(
+            decompilation, DecompilationFailedError('Error.')
+        )
+
+        root, = self.finished_spans('retdec.decompilation')
+        self.assertTrue(root.attributes['retdec.failed'])
+        self.assertFalse(root.status.is_ok)
+
+    def test_failed_upload_ends_its_span_and_root_span_with_error(self):
+        request = RequestInfo('POST', BASE_PATH, 'https://retdec.com')
+        self.hooks.on_request_start(request)
+
+        self.hooks.on_error(request, ConnectionError('Connection refused.'))
+
+        upload, = self.finished_spans('retdec.upload')
+        root, = self.finished_spans('retdec.resource')
+        self.assertFalse(upload.status.is_ok)
+        self.assertFalse(root.status.is_ok)
+
+    def test_requests_of_resources_not_started_while_tracing_have_no_parent(self):
+        self.send_request('GET', '/OTHER/status', 'OTHER', '/{id}/status')
+
+        status, = self.finished_spans('retdec.status')
+        self.assertIsNone(status.parent)
+
+    def root_span_id(self):
+        """Returns the span ID of the root span of the
+        decompilation with ID ``'ID'``.
+        """
+        return self.hooks._get_trace('ID').root_span.get_span_context() \
+            .span_id
+
+
+@unittest.skipIf(TracerProvider is None, 'requires opentelemetry-sdk')
+class EnableDisableTests(unittest.TestCase):
+    """Tests for :func:`retdec.tracing.enable()` and
+    :func:`retdec.tracing.disable()`.
+    """
+
+    def setUp(self):
+        super().setUp()
+
+        self.addCleanup(tracing.disable)
+
+    def test_enable_registers_tracing_hooks_only_once(self):
+        tracing_hooks = tracing.enable()
+
+        self.assertIs(tracing.enable(), tracing_hooks)
+        self.assertEqual(hooks.registered(), (tracing_hooks,))
+
+    def test_disable_unregisters_tracing_hooks(self):
+        tracing.enable()
+
+        tracing.disable()
+
+        self.assertEqual(hooks.registered(), ())
@@ -0,0 +1,158 @@
+#
+# Project:   retdec-python
+# Copyright: (c) 2015 by Petr Zemek <s3rvac@gmail.com> and contributors
+# License:   MIT, see the LICENSE file for more details
+#
+
+"""Tests for the :mod:`retdec.watcher` module."""
+
+import os
+import tempfile
+import unittest
+
+from retdec.exceptions import RetdecError
+from retdec.watcher import DirectoryWatcher
+
+
+def inotify_is_available():
+    """Is inotify available on this system?"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        with DirectoryWatcher(tmp_dir) as watcher:
+            return watcher.uses_inotify
+
+
+class DirectoryWatcherTestsBase(unittest.TestCase):
+    """A base class for tests of :class:`retdec.watcher.DirectoryWatcher`."""
+
+    #: Use inotify in the tests?
+    use_inotify = False
+
+    def setUp(self):
+        super().setUp()
+
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+
+    def create_watcher(self, settle_time=0.0):
+        watcher = DirectoryWatcher(
+            self.tmp_dir.name,
+            settle_time=settle_time,
+            poll_interval=0.01,
+            use_inotify=self.use_inotify
+        )
+        self.addCleanup(watcher.close)
+        return watcher
+
+    def write_file(self, name, content=b'MZ', mtime=None):
+        path = os.path.join(self.tmp_dir.name, name)
+        with open(path, 'wb') as f:
+            f.write(content)
+        if mtime is not None:
+            os.utime(path, (mtime, mtime))
+        return path
+
+
+class DirectoryWatcherPollingTests(DirectoryWatcherTestsBase):
+    """Tests for :class:`retdec.watcher.DirectoryWatcher` without inotify."""
+
+    def test_raises_exception_when_directory_does_not_exist(self):
+        with self.assertRaises(RetdecError):
+            DirectoryWatcher(os.path.join(self.tmp_dir.name, 'missing'))
+
+    def test_does_not_use_inotify_when_not_requested(self):
+        self.assertFalse(self.create_watcher().uses_inotify)
+
+    def test_reports_files_present_at_start(self):
+        path = self.write_file('prog.exe', mtime=0)
+        watcher = self.create_watcher()
+
+        self.assertEqual(watcher.wait(timeout=1), [path])
+
+    def test_reports_new_file(self):
+        watcher = self.create_watcher()
+        path = self.write_file('prog.exe')
+
+        self.assertEqual(watcher.wait(timeout=1), [path])
+
+    def test_reports_each_file_only_once(self):
+        self.write_file('prog.exe', mtime=0)
+        watcher = self.create_watcher()
+        watcher.wait(timeout=1)
+
+        self.assertEqual(watcher.wait(timeout=0.05), [])
+
+    def test_reports_file_again_when_it_is_added_again(self):
+        path = self.write_file('prog.exe', mtime=0)
+        watcher = self.create_watcher()
+        watcher.wait(timeout=1)
+        os.remove(path)
+        watcher.wait(timeout=0.05)
+        self.write_file('prog.exe', mtime=0)
+
+        self.assertEqual(watcher.wait(timeout=1), [path])
+
+    def test_does_not_report_recently_modified_file(self):
+        self.write_file('prog.exe')
+        watcher = self.create_watcher(settle_time=60)
+
+        self.assertEqual(watcher.wait(timeout=0.05), [])
+
+    def test_ignores_hidden_files_and_directories(self):
+        self.write_file('.prog.exe.part', mtime=0)
+        os.mkdir(os.path.join(self.tmp_dir.name, 'done'))
+        watcher = self.create_watcher()
+
+        self.assertEqual(watcher.wait(timeout=0.05), [])
+
+    def test_repr_returns_correct_value(self):
+        watcher = self.create_watcher()
+
+        self.assertEqual(
+            repr(watcher),
+            '<retdec.watcher.DirectoryWatcher directory={!r} '
+            'inotify=False>'.format(self.tmp_dir.name)
+        )
+
+
+@unittest.skipUnless(inotify_is_available(), 'requires inotify')
+class DirectoryWatcherInotifyTests(DirectoryWatcherTestsBase):
+    """Tests for :class:`retdec.watcher.DirectoryWatcher` with inotify."""
+
+    use_inotify = True
+
+    def test_reports_new_file_as_soon_as_it_is_closed(self):
+        # The settle time is not waited for because inotify tells us that
+        # the file is complete.
+        watcher = self.create_watcher(settle_time=60)
+        path = self.write_file('prog.exe')
+
+        self.assertEqual(watcher.wait(timeout=1), [path])
+
+    def test_reports_file_moved_into_directory(self):
+        watcher = self.create_watcher(settle_time=60)
+        part_path = self.write_file('.prog.exe.part')
+        path = os.path.join(self.tmp_dir.name, 'prog.exe')
+        os.rename(part_path, path)
+
+        self.assertEqual(watcher.wait(timeout=1), [path])
+
+    def test_reports_files_present_at_start_after_settle_time(self):
+        path = self.write_file('prog.exe', mtime=0)
+        watcher = self.create_watcher()
+
+        self.assertEqual(watcher.wait(timeout=1), [path])
+
+    def test_does_not_report_file_that_is_still_open(self):
+        watcher = self.create_watcher(settle_time=60)
+        with open(os.path.join(self.tmp_dir.name, 'prog.exe'), 'wb') as f:
+            f.write(b'MZ')
+            f.flush()
+
+            self.assertEqual(watcher.wait(timeout=0.05), [])
+
+    def test_does_not_use_inotify_after_close(self):
+        watcher = self.create_watcher()
+
+        watcher.close()
+
+        self.assertFalse(watcher.uses_inotify)